@@ -4,7 +4,10 @@ A Star Wars themed voting app for conference feedback
 """
 
 import streamlit as st
+from services.streamlit_adapters import bootstrap_services
 from utils.theme import apply_star_wars_theme
+from utils.metrics import track_streamlit_session
+from utils.session_identity import ensure_session_id
 from utils.qr_generator import generate_themed_qr_code
 import base64
 
@@ -19,6 +22,12 @@ st.set_page_config(
 # Apply Star Wars theme
 apply_star_wars_theme()
 
+# Track active session for metrics
+track_streamlit_session()
+
+# Servizi in background (una volta per processo)
+bootstrap_services()
+
 # Hide sidebar on home page with custom CSS
 st.markdown("""
 <style>
@@ -258,9 +267,7 @@ with col2:
         """, unsafe_allow_html=True)
 
 # Initialize session state
-if 'session_id' not in st.session_state:
-    import time
-    st.session_state.session_id = f"session_{int(time.time() * 1000)}"
+ensure_session_id(st.session_state)
 
 if 'has_voted' not in st.session_state:
     st.session_state.has_voted = False
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark: servizio risultati sync (thread pool) contro async (asyncio)
+con 1k client concorrenti
+
+Ogni client esegue --requests letture di get_results. Il servizio sync
+usa un ThreadPoolExecutor come un server WSGI a thread; quello async usa
+AsyncVoteService con un event loop e un pool di lettori.
+
+Uso:
+    python benchmarks/bench_async_results.py [--clients 1000] [--requests 20] [--no-cache]
+
+Risultati di riferimento (1 vCPU, 10k voti, 1000 client):
+
+    cache 1s (x20):   sync 32 thread  ~148k req/s  p99 0.01 ms
+                      async           ~165k req/s  p99 0.01 ms
+    no cache (x5):    sync 32 thread    ~520 req/s  p99 ~340 ms
+                      async 8 lettori   ~490 req/s  p99 ~2.2 s
+
+Con la cache attiva l'async serve dall'event loop senza passaggi di
+thread. Senza cache il limite è SQLite: il throughput è simile, ma
+l'async accetta tutti i 1000 client insieme e li accoda sugli 8 lettori,
+quindi la latenza di coda cresce; il vantaggio è nel numero di
+connessioni aperte gestibili, non nelle query al secondo.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.async_vote_service import AsyncVoteService  # noqa: E402
+from services.vote_service import VoteService, invalidate_results_cache  # noqa: E402
+from utils.settings import update_settings  # noqa: E402
+
+
+def percentile(values, p):
+    """Percentile p di una lista di valori"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def run_sync(service, clients, requests, threads):
+    """Client serviti da un thread pool"""
+    latencies = []
+
+    def client():
+        for _ in range(requests):
+            start = time.perf_counter()
+            service.get_results()
+            latencies.append(time.perf_counter() - start)
+
+    invalidate_results_cache()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        for _ in range(clients):
+            pool.submit(client)
+    return time.perf_counter() - start, latencies
+
+
+async def run_async(service, clients, requests):
+    """Client come coroutine concorrenti su un event loop"""
+    latencies = []
+
+    async def client():
+        for _ in range(requests):
+            start = time.perf_counter()
+            await service.get_results()
+            latencies.append(time.perf_counter() - start)
+
+    invalidate_results_cache()
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return time.perf_counter() - start, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--threads", type=int, default=32, help="Thread del servizio sync")
+    parser.add_argument("--votes", type=int, default=10_000)
+    parser.add_argument("--no-cache", action="store_true", help="Disabilita la cache risultati")
+    args = parser.parse_args()
+
+    if args.no_cache:
+        update_settings(results_cache_ttl=0.0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        service = VoteService(os.path.join(tmp, "bench.db"))
+        with service.db_manager.get_transaction() as conn:
+            conn.executemany(
+                "INSERT INTO votes (rating, session_id) VALUES (?, ?)",
+                ((i % 5 + 1, i.to_bytes(16, 'big')) for i in range(args.votes))
+            )
+
+        total = args.clients * args.requests
+        elapsed, latencies = run_sync(service, args.clients, args.requests, args.threads)
+        print(f"sync  {args.threads:3d} thread  {total / elapsed:8.0f} req/s   "
+              f"p50 {percentile(latencies, 50) * 1000:7.2f} ms   "
+              f"p99 {percentile(latencies, 99) * 1000:7.2f} ms")
+
+        async_service = AsyncVoteService(service)
+        elapsed, latencies = asyncio.run(run_async(async_service, args.clients, args.requests))
+        async_service.close()
+        print(f"async              {total / elapsed:8.0f} req/s   "
+              f"p50 {percentile(latencies, 50) * 1000:7.2f} ms   "
+              f"p99 {percentile(latencies, 99) * 1000:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark: analisi locale dei commenti (sentiment e parole chiave)
+
+Su un database temporaneo con --comments commenti approvati, arrivati a
+lotti di --batch, confronta due modi di aggiornare sentiment e parole
+chiave del Risultati a ogni lotto:
+
+- ricostruzione: un CommentAnalyzer nuovo che rilegge tutti i commenti
+  del round (costo proporzionale a tutti i commenti);
+- incrementale: l'indice condiviso di get_comment_analyzer, che applica
+  solo i commenti approvati dopo la lettura precedente.
+
+Misura anche il costo di un aggiornamento senza commenti nuovi (il caso
+di ogni rerun della pagina a votazione ferma) e il throughput del
+sentiment a lessico. Nessuna chiamata di rete: è l'analisi usata quando
+GEMINI_API_KEY non è configurata.
+
+Uso:
+    python benchmarks/bench_comment_analytics.py [--comments 10000] [--batch 20]
+
+Risultati di riferimento (1 vCPU, 10000 commenti a lotti di 20):
+
+    ricostruzione   ~620 ms per aggiornamento con 10000 commenti
+    incrementale    ~10 ms per aggiornamento (20 commenti nuovi)
+    nessun commento nuovo: ~4 µs (contatore di modifiche invariato)
+    sentiment: ~26000 commenti/s
+
+L'aggiornamento incrementale è per metà la lettura e l'analisi dei
+commenti nuovi e per metà la classifica TF-IDF, lineare nel vocabolario
+(~2600 termini qui: parole e coppie di parole) ma indipendente dal
+numero di commenti.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database.db_manager import DatabaseManager  # noqa: E402
+from services.comment_analytics import CommentAnalyzer, get_comment_analyzer, sentiment_score  # noqa: E402
+from utils.session_identity import new_session_id, to_session_key  # noqa: E402
+
+WORDS = (
+    "talk demo slide esempi codice streamlit python sqlite forza jedi chiaro veloce lento "
+    "interessante utile divertente pratico teorico domanda risposta tempo microfono audio "
+    "schermo sala live coding grazie bravo ottimo noioso confuso pessimo non molto poco ma "
+    "vibe coding modello prompt agente test deploy cloud voto risultati grafici dashboard "
+    "commenti relatore spiegazione ritmo pausa esempio finale introduzione bellissimo"
+).split()
+
+
+def add_comments(db, rng, count):
+    """Scrive `count` voti con commento già approvato"""
+    with db.get_transaction() as conn:
+        for _ in range(count):
+            vote_id = conn.execute(
+                "INSERT INTO votes (rating, session_id, round_id) VALUES (?, ?, (SELECT MAX(id) FROM rounds))"
+                " RETURNING id", (rng.randint(1, 5), to_session_key(new_session_id()))
+            ).fetchone()[0]
+            text = " ".join(rng.sample(WORDS, rng.randint(4, 14))).capitalize()
+            conn.execute(
+                "INSERT INTO comments (vote_id, comment, comment_status) VALUES (?, ?, 'approved')",
+                (vote_id, text)
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--comments", type=int, default=10000)
+    parser.add_argument("--batch", type=int, default=20, help="Commenti nuovi tra due aggiornamenti")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "votes.db"))
+        db.initialize_database()
+        analyzer = get_comment_analyzer(db)
+
+        incremental, rebuild = [], []
+        for _ in range(args.comments // args.batch):
+            add_comments(db, rng, args.batch)
+            start = time.perf_counter()
+            analyzer.insights()
+            incremental.append(time.perf_counter() - start)
+        # La ricostruzione solo alla fine, con tutti i commenti (il caso peggiore)
+        for _ in range(3):
+            start = time.perf_counter()
+            CommentAnalyzer(db).insights()
+            rebuild.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for _ in range(1000):
+            analyzer.insights()
+        idle = (time.perf_counter() - start) / 1000
+
+        texts = [text for _, text in db.get_approved_comments()]
+        start = time.perf_counter()
+        for text in texts:
+            sentiment_score(text)
+        throughput = len(texts) / (time.perf_counter() - start)
+
+        tail = incremental[-len(incremental) // 10:]
+        print(f"ricostruzione   {min(rebuild) * 1000:7.1f} ms per aggiornamento con {args.comments} commenti")
+        print(f"incrementale    {sum(tail) / len(tail) * 1000:7.2f} ms per aggiornamento "
+              f"({args.batch} commenti nuovi, ultimo 10% dei lotti)")
+        print(f"nessun commento nuovo: {idle * 1e6:.1f} µs")
+        print(f"sentiment: {throughput:.0f} commenti/s")
+        print("parole chiave:", ", ".join(term for term, _ in analyzer.top_keywords(8)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark: tempo e memoria di picco dell'export streaming a 1M voti
+
+Uso:
+    python benchmarks/bench_export.py [--votes 1000000]
+
+Risultati di riferimento (Python 3.11, SQLite 3.40, 1M voti, batch 10k):
+
+    csv      ~6 s    picco Python ~6.6 MB   file ~68 MB
+    jsonl    ~13 s   picco Python ~8.0 MB   file ~133 MB
+    parquet  richiede pyarrow (non misurato nell'ambiente di riferimento)
+
+Il picco di memoria non cresce con il numero di voti: dipende solo dal
+batch size (fetchmany).
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database.db_manager import DatabaseManager  # noqa: E402
+from database.export import EXPORT_FORMATS, export_table  # noqa: E402
+
+
+def populate(db_manager, n):
+    """Inserisce n voti sintetici"""
+    with db_manager.get_transaction() as conn:
+        conn.executemany(
+            "INSERT INTO votes (rating, session_id, timestamp) VALUES (?, ?, ?)",
+            (
+                (i % 5 + 1, i.to_bytes(16, 'big'), f"2025-01-01 10:{(i // 60000) % 60:02d}:00")
+                for i in range(n)
+            )
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--votes", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_manager = DatabaseManager(os.path.join(tmp, "bench.db"))
+        db_manager.initialize_database()
+        populate(db_manager, args.votes)
+        print(f"Voti: {args.votes:,}")
+
+        for fmt in EXPORT_FORMATS:
+            path = os.path.join(tmp, f"votes.{fmt}")
+            try:
+                # Prima passata: tempo (senza l'overhead di tracemalloc)
+                start = time.perf_counter()
+                with open(path, "wb") as out:
+                    rows = export_table(db_manager, "votes", fmt, out)
+                elapsed = time.perf_counter() - start
+            except RuntimeError as e:
+                print(f"{fmt:8s} saltato: {e}")
+                continue
+
+            # Seconda passata: memoria di picco
+            tracemalloc.start()
+            with open(path, "wb") as out:
+                export_table(db_manager, "votes", fmt, out)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            print(
+                f"{fmt:8s} {elapsed:5.1f} s   picco {peak / 1e6:6.1f} MB   "
+                f"file {os.path.getsize(path) / 1e6:6.1f} MB   righe {rows:,}"
+            )
+
+
+if __name__ == "__main__":
+    main()
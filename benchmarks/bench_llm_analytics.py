@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Benchmark: commento automatico sotto carico con un LLM a latenza simulata
+
+Su un database temporaneo --sessions sessioni del Risultati chiedono il
+commento automatico ogni --poll secondi mentre arrivano --vote-rate voti
+al secondo. Il modello è FakeProvider (services.llm_providers) con
+latenza --latency: nessuna rete e nessuna chiave API. Confronta:
+
+- storico: la cache di AnalyticsService prima dei provider (controllo
+  e chiamata senza coordinamento: ogni sessione che trova la cache
+  scaduta o un voto nuovo chiama l'LLM e attende la risposta);
+- attuale: AnalyticsService con una sola chiamata alla volta, commento
+  scaduto servito durante l'aggiornamento in background e sessioni in
+  attesa della stessa chiamata al primo commento.
+
+Misura chiamate LLM al minuto, concorrenza massima delle chiamate,
+latenza delle richieste delle sessioni (p50/p99) e ritardo del commento
+(voti arrivati dopo quelli su cui è stato generato).
+
+Uso:
+    python benchmarks/bench_llm_analytics.py [--sessions 50] [--duration 30] \\
+        [--latency lognormal:1.5,0.5] [--vote-rate 5]
+
+Risultati di riferimento (1 vCPU, valori di default):
+
+    modo      chiamate/min  max concorrenti  p50 ms  p99 ms  ritardo voti p50/p99
+    storico          ~1300              ~47   ~1500   ~5000           ~5 / ~25
+    attuale            ~34                1     <1   ~1100          ~15 / ~30
+
+Il p99 attuale è la sola attesa del primo commento (le sessioni
+aspettano la stessa chiamata); poi ogni richiesta legge la cache. Il
+commento attuale è più indietro di circa una latenza dell'LLM (5 voti/s
+per ~3 s tra due aggiornamenti consecutivi): è il prezzo di una chiamata
+alla volta al posto di una per sessione a ogni voto nuovo.
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database.db_manager import DatabaseManager  # noqa: E402
+from services.analytics_service import AnalyticsService  # noqa: E402
+from services.llm_providers import FakeProvider  # noqa: E402
+from services.vote_service import VoteService  # noqa: E402
+from utils.session_identity import new_session_id, to_session_key  # noqa: E402
+
+# Il testo del provider locale riporta i voti su cui è stato generato
+_VOTES_RE = re.compile(r"(\d+) voti con")
+
+
+class LegacyAnalyticsService(AnalyticsService):
+    """Cache storica: controllo e chiamata senza coordinamento tra sessioni"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache = {'comment': None, 'last_update': None, 'last_vote_count': 0}
+        self.lock = threading.Lock()
+
+    def generate_automatic_comment(self):
+        results = self.vote_service.get_results()
+        if results['total_votes'] < 10:
+            return ""
+        with self.lock:
+            cache = dict(self.cache)
+        current_time = datetime.now()
+        needs_update = (
+            cache['comment'] is None or
+            (current_time - cache['last_update']) > timedelta(seconds=30) or
+            results['total_votes'] != cache['last_vote_count']
+        )
+        if not needs_update:
+            return cache['comment']
+        comment = self._generate_comment_from_results(results) or "⚠️"
+        with self.lock:
+            self.cache.update({
+                'comment': comment, 'last_update': current_time, 'last_vote_count': results['total_votes']
+            })
+        return comment
+
+
+def add_votes(db, rng, count):
+    """Scrive `count` voti nel round corrente"""
+    with db.get_transaction() as conn:
+        for _ in range(count):
+            conn.execute(
+                "INSERT INTO votes (rating, session_id, round_id) VALUES (?, ?, (SELECT MAX(id) FROM rounds))",
+                (rng.choices((1, 2, 3, 4, 5), weights=(2, 3, 10, 30, 55))[0], to_session_key(new_session_id()))
+            )
+
+
+def percentile(values, q):
+    """Percentile q (0-100) di una lista non vuota"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))]
+
+
+def run(service_class, args):
+    """Una simulazione; ritorna le misure"""
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "votes.db"))
+        db.initialize_database()
+        add_votes(db, rng, 20)
+        vote_service = VoteService(db_manager=db)
+        provider = FakeProvider(latency=args.latency, timeout=10, seed=0)
+        service = service_class(llm=provider, vote_service=vote_service)
+        service.clear_cache()
+
+        stop = threading.Event()
+        latencies, delays = [], []
+        samples_lock = threading.Lock()
+
+        def voter():
+            while not stop.wait(1.0):
+                add_votes(db, rng, args.vote_rate)
+
+        def session(offset):
+            stop.wait(offset)
+            while not stop.is_set():
+                start = time.perf_counter()
+                comment = service.generate_automatic_comment()
+                elapsed = time.perf_counter() - start
+                total = vote_service.get_results()['total_votes']
+                match = _VOTES_RE.search(comment or "")
+                with samples_lock:
+                    latencies.append(elapsed)
+                    if match:
+                        delays.append(total - int(match.group(1)))
+                stop.wait(max(0.0, args.poll - elapsed))
+
+        threads = [threading.Thread(target=voter, daemon=True)] + [
+            threading.Thread(target=session, args=(args.poll * i / args.sessions,), daemon=True)
+            for i in range(args.sessions)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(args.duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        return {
+            'calls_per_min': provider.calls * 60 / args.duration,
+            'max_in_flight': provider.max_in_flight,
+            'p50': percentile(latencies, 50) * 1000,
+            'p99': percentile(latencies, 99) * 1000,
+            'delay': (percentile(delays, 50), percentile(delays, 99)) if delays else (0, 0)
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30, help="Durata di ogni simulazione in secondi")
+    parser.add_argument("--poll", type=float, default=2.0, help="Intervallo di aggiornamento delle sessioni")
+    parser.add_argument("--latency", default="lognormal:1.5,0.5", help="Latenza dell'LLM simulato")
+    parser.add_argument("--vote-rate", type=int, default=5, help="Voti al secondo")
+    args = parser.parse_args()
+
+    print("modo      chiamate/min  max concorrenti  p50 ms  p99 ms  ritardo voti p50/p99")
+    for label, service_class in (("storico", LegacyAnalyticsService), ("attuale", AnalyticsService)):
+        m = run(service_class, args)
+        print(f"{label:8s} {m['calls_per_min']:13.0f} {m['max_in_flight']:16d} {m['p50']:7.1f} "
+              f"{m['p99']:7.1f}  {m['delay'][0]:>10} / {m['delay'][1]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Verifica e benchmark: coerenza delle cache tra più processi
+
+Avvia un processo writer e più processi lettori sullo stesso database.
+Il writer registra un voto ogni --interval secondi; ogni lettore
+interroga get_results a ogni tick e annota quando vede il nuovo totale.
+Il ritardo tra commit e lettura misura quanto restano stantie le cache
+di processo. Alla fine verifica che un reset eseguito da un processo
+sblocchi il voto della stessa sessione in un altro processo (indice
+delle sessioni ricaricato).
+
+Uso:
+    python benchmarks/bench_multiprocess.py [--readers 4] [--votes 50] [--no-notify]
+
+Risultati di riferimento (1 vCPU, 4 lettori, tick 5 ms, 50 voti):
+
+    notifier attivo    ritardo p50 ~4 ms   p99 ~8 ms   (entro ~1 tick)
+    --no-notify        ritardo p50 ~0.5 s  p99 ~1 s    (TTL della cache)
+
+Termina con codice 1 se un controllo fallisce.
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database.change_notifier import ChangeNotifier  # noqa: E402
+from services.vote_service import VoteService  # noqa: E402
+from utils.session_identity import new_session_id  # noqa: E402
+
+
+def make_service(db_path, notify):
+    """VoteService del processo corrente, con o senza notifier condiviso"""
+    service = VoteService(db_path)
+    if not notify:
+        service.db_manager.change_notifier = ChangeNotifier(":memory:")
+    return service
+
+
+def reader(db_path, notify, tick, expected, ready, results):
+    """Interroga i risultati a ogni tick e annota quando cambia il totale"""
+    service = make_service(db_path, notify)
+    seen = {}
+    last = service.get_results()['total_votes']
+    ready.wait()
+    deadline = time.monotonic() + 60
+    while last < expected and time.monotonic() < deadline:
+        total = service.get_results()['total_votes']
+        if total != last:
+            now = time.monotonic()
+            for value in range(last + 1, total + 1):
+                seen[value] = now
+            last = total
+        time.sleep(tick)
+    results.put(('reader', seen))
+
+
+def writer(db_path, notify, votes, interval, ready, results):
+    """Registra un voto ogni interval secondi annotando l'istante del commit"""
+    service = make_service(db_path, notify)
+    committed = {}
+    ready.wait()
+    for i in range(votes):
+        time.sleep(interval)
+        service.record_vote(new_session_id(), i % 5 + 1)
+        committed[i + 1] = time.monotonic()
+    results.put(('writer', committed))
+
+
+def voter(db_path, session_id, go, done, results):
+    """Vota due volte con la stessa sessione, prima e dopo un reset esterno"""
+    service = VoteService(db_path)
+    first = service.submit_vote(5, session_id=session_id).success
+    go.set()
+    done.wait()
+    second = service.submit_vote(5, session_id=session_id).success
+    results.put((first, second))
+
+
+def check_cross_process_reset(ctx, db_path):
+    """Un reset in un processo deve sbloccare la sessione negli altri"""
+    go, done, results = ctx.Event(), ctx.Event(), ctx.Queue()
+    proc = ctx.Process(target=voter, args=(db_path, new_session_id(), go, done, results))
+    proc.start()
+    go.wait()
+    VoteService(db_path).reset_votes()
+    done.set()
+    first, second = results.get()
+    proc.join()
+    return first and second
+
+
+def percentile(values, p):
+    """Percentile p di una lista di valori"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--votes", type=int, default=50)
+    parser.add_argument("--interval", type=float, default=0.05, help="Secondi tra due voti")
+    parser.add_argument("--tick", type=float, default=0.005, help="Intervallo di polling dei lettori")
+    parser.add_argument("--no-notify", action="store_true", help="Disabilita il notifier condiviso")
+    args = parser.parse_args()
+    notify = not args.no_notify
+
+    ctx = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        VoteService(db_path)
+
+        ready, results = ctx.Event(), ctx.Queue()
+        procs = [
+            ctx.Process(target=reader, args=(db_path, notify, args.tick, args.votes, ready, results))
+            for _ in range(args.readers)
+        ]
+        procs.append(ctx.Process(target=writer, args=(db_path, notify, args.votes, args.interval, ready, results)))
+        for proc in procs:
+            proc.start()
+        # Lascia ai processi il tempo di importare i moduli e aprire il database
+        time.sleep(2)
+        ready.set()
+        collected = [results.get() for _ in procs]
+        for proc in procs:
+            proc.join()
+
+        committed = next(data for role, data in collected if role == 'writer')
+        lags = []
+        missing = 0
+        for role, seen in collected:
+            if role != 'reader':
+                continue
+            for total, at in committed.items():
+                if total in seen:
+                    lags.append(max(0.0, seen[total] - at))
+                else:
+                    missing += 1
+
+        ok = missing == 0
+        mode = "notifier attivo" if notify else "--no-notify"
+        if lags:
+            print(f"{mode}: {len(lags)} letture, ritardo p50 {percentile(lags, 50) * 1000:.1f} ms, "
+                  f"p99 {percentile(lags, 99) * 1000:.1f} ms, max {max(lags) * 1000:.1f} ms")
+        if missing:
+            print(f"FAIL: {missing} totali mai visti dai lettori")
+
+        if notify:
+            reset_ok = check_cross_process_reset(ctx, db_path)
+            print(f"reset tra processi: {'OK' if reset_ok else 'FAIL'}")
+            ok = ok and reset_ok
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
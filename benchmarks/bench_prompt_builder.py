@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark: dimensione e costo di composizione del prompt del commento automatico
+
+Per --comments commenti sintetici (lunghezze e rating realistici: molti
+5 stelle, pochi 1-2) confronta:
+
+- f-string: il prompt storico di AnalyticsService con tutti i commenti
+  accodati, ricomposto a ogni chiamata;
+- builder: services.prompt_builder con il budget di default (template
+  compilato una volta, commenti campionati per rating entro il budget).
+
+Misura byte, token stimati, commenti inclusi (per rating) e tempo di
+composizione. Nessuna chiamata a Gemini: il costo e la latenza di una
+chiamata crescono con i token in ingresso e con max_output_tokens.
+
+Uso:
+    python benchmarks/bench_prompt_builder.py [--comments 0 100 1000 10000]
+
+Risultati di riferimento (1 vCPU):
+
+    commenti  f-string byte   token | builder byte  token  inclusi  µs/prompt
+           0           1136     403 |          716    272        0        ~90
+         100          17066    4909 |         4950   1494       31      ~1000
+        1000         170772   48236 |         4891   1474       27      ~1300
+       10000        1672521  472041 |         4813   1466       31      ~5700
+
+    con 1000 e 10000 commenti il campione include tutti i rating (anche
+    1-2 stelle, ~5% dei commenti); max_output_tokens 1024 -> 256
+"""
+
+import argparse
+import random
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.prompt_builder import PromptBuilder, estimate_tokens  # noqa: E402
+from services.statistics import compute_statistics  # noqa: E402
+
+WORDS = (
+    "talk demo slide esempi codice streamlit python sqlite forza jedi chiaro veloce lento "
+    "interessante utile divertente pratico teorico domanda risposta tempo microfono audio "
+    "schermo sala live coding grazie bravo ottimo migliorare approfondire modello prompt"
+).split()
+# Distribuzione dei rating tipica di un talk ben accolto
+RATING_WEIGHTS = {1: 2, 2: 3, 3: 10, 4: 30, 5: 55}
+
+
+def legacy_prompt(results, comments):
+    """Prompt f-string storico, con tutti i commenti accodati"""
+    v, stats = results['votes'], results['stats']
+    p = {rating: stats.percentage(rating) for rating in v}
+    listing = "\n".join(f"- {rating} stelle: {comment}" for comment, rating, _ in comments)
+    return f"""Analizza questi dati di votazione per una conference sul VibeCoding e genera un commento descrittivo in italiano.
+
+Distribuzione voti (scala 1-5 stelle con tematiche Star Wars):
+- 1 stella (Youngling): {v[1]} voti ({p[1]:.1f}%)
+- 2 stelle (Padawan): {v[2]} voti ({p[2]:.1f}%)
+- 3 stelle (Cavaliere Jedi): {v[3]} voti ({p[3]:.1f}%)
+- 4 stelle (Maestro Jedi): {v[4]} voti ({p[4]:.1f}%)
+- 5 stelle (Gran Maestro): {v[5]} voti ({p[5]:.1f}%)
+
+Totale voti: {results['total_votes']}
+Media: {results['average_rating']:.2f} stelle (IC 95%: {stats.mean_ci[0]:.2f}-{stats.mean_ci[1]:.2f})
+Mediana: {stats.median:g} stelle
+Deviazione standard: {stats.std_dev:.2f}
+Rating più votato: {stats.mode} stelle con {stats.mode_count} voti
+Top-2-box (4-5 stelle): {stats.top2_box:.1f}% (IC 95%: {stats.top2_box_ci[0]:.1f}-{stats.top2_box_ci[1]:.1f}%)
+Net score (4-5 stelle meno 1-2 stelle): {stats.net_score:+.1f}
+{listing}
+Genera un commento di esattamente 3-4 frasi in italiano che:
+1. Descriva il sentiment generale (positivo/negativo/misto) basato sulla distribuzione
+2. Identifichi il pattern più interessante nella distribuzione dei voti
+3. Fornisca un'osservazione comparativa o statistica significativa
+
+Usa un tono coinvolgente e a tema Star Wars quando appropriato (es. "La Forza è forte in questo talk", "Il lato luminoso prevale").
+Rispondi SOLO con il testo del commento, senza titoli, formattazione markdown o introduzioni.
+"""
+
+
+def make_data(count, rng):
+    """Risultati e commenti sintetici (dal più recente)"""
+    ratings = rng.choices(list(RATING_WEIGHTS), weights=list(RATING_WEIGHTS.values()), k=max(count, 50))
+    votes = {rating: ratings.count(rating) for rating in range(1, 6)}
+    total = sum(votes.values())
+    results = {
+        'votes': votes,
+        'total_votes': total,
+        'average_rating': round(sum(r * c for r, c in votes.items()) / total, 2),
+        'stats': compute_statistics(votes)
+    }
+    comments = [
+        (" ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 40))), rating, "")
+        for rating in ratings[:count]
+    ]
+    return results, comments
+
+
+def timed(function, repeat):
+    """Tempo medio di una chiamata in microsecondi"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--comments", type=int, nargs="+", default=[0, 100, 1000, 10000])
+    args = parser.parse_args()
+
+    builder = PromptBuilder()
+    rng = random.Random(0)
+    print("commenti  f-string byte   token | builder byte  token  inclusi  µs/prompt  rating inclusi")
+    for count in args.comments:
+        results, comments = make_data(count, rng)
+        legacy = legacy_prompt(results, comments)
+        prompt = builder.build_results_prompt(results, comments)
+        repeat = 20 if count >= 1000 else 200
+        elapsed = timed(lambda: builder.build_results_prompt(results, comments), repeat)
+        included = Counter(int(line[3]) for line in prompt.text.splitlines() if line.startswith("- ["))
+        print(f"{count:8d}  {len(legacy.encode()):13d} {estimate_tokens(legacy):7d} | "
+              f"{prompt.size_bytes:12d} {prompt.estimated_tokens:6d} {prompt.comments_included:8d} "
+              f"{elapsed:10.0f}  {dict(sorted(included.items()))}")
+    print(f"max_output_tokens: 1024 -> {builder.budget.output_tokens}")
+
+
+if __name__ == "__main__":
+    main()
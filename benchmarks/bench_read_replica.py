@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Benchmark: scritture dei voti con letture aggregate sul file o sulla replica in memoria
+
+Su un database temporaneo con --votes voti, --readers thread ripetono le
+letture di una pagina Risultati senza cache (get_votes_by_rating,
+get_comment_count, get_vote_timeline) mentre un writer registra
+--vote-rate voti al secondo, un commit per voto. Confronta:
+
+- file: le letture aprono connessioni sul database e ne prendono il
+  lock SHARED; col journal di rollback un commit aspetta che nessun
+  lettore lo tenga;
+- replica: le stesse letture con replica_interval=--interval, servite
+  dalla copia in memoria (database.read_replica); sul file resta solo
+  la copia periodica.
+
+Misura latenza dei commit (p50/p99/max), letture al secondo, durata
+media di una copia (a carico fermo) ed età massima dei dati letti
+(dall'"as of" di read_as_of alla fine della lettura).
+
+Uso:
+    python benchmarks/bench_read_replica.py [--votes 200000] [--readers 8] \\
+        [--duration 20] [--vote-rate 20] [--interval 1]
+
+Risultati di riferimento (1 vCPU, valori di default; replica_max_staleness 2 s):
+
+    modo      commit p50 ms  p99 ms  max ms  letture/s  copia ms  età max s
+    file               ~108    ~390    ~400        ~11         -       ~0.9
+    replica              ~6    ~120    ~140        ~15       ~40       ~2.0
+
+    con --votes 50000:
+    file                ~40    ~140    ~165        ~40         -       ~0.4
+    replica              ~6     ~20     ~40        ~60       ~14       ~1.2
+
+Con la replica un commit non aspetta più i lettori: resta solo l'attesa
+della copia (lock SHARED sul file per una copia, una volta per
+intervallo), che fa il p99. Le letture restano limitate dalla CPU
+(aggregati su tutti i voti del round) e guadagnano solo l'apertura della
+connessione. Con la CPU satura il thread della replica resta indietro e
+l'età dei dati arriva a replica_max_staleness, dove la lettura stessa
+rinnova la copia.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database.db_manager import DatabaseManager  # noqa: E402
+from utils.session_identity import new_session_id, to_session_key  # noqa: E402
+from utils.settings import update_settings  # noqa: E402
+
+RATING_WEIGHTS = (2, 3, 10, 30, 55)
+
+
+def vote_row(rng):
+    """Parametri di un voto casuale nel round corrente"""
+    return rng.choices((1, 2, 3, 4, 5), weights=RATING_WEIGHTS)[0], to_session_key(new_session_id())
+
+
+def populate(db, rng, count):
+    """Scrive `count` voti in transazioni da 10k"""
+    for start in range(0, count, 10_000):
+        with db.get_transaction() as conn:
+            conn.executemany(
+                "INSERT INTO votes (rating, session_id, round_id) VALUES (?, ?, (SELECT MAX(id) FROM rounds))",
+                [vote_row(rng) for _ in range(min(10_000, count - start))]
+            )
+
+
+def percentile(values, q):
+    """Percentile q (0-100) di una lista non vuota"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))]
+
+
+def run(db_path, args, interval):
+    """Una simulazione; ritorna le misure"""
+    update_settings(replica_interval=interval, replica_max_staleness=max(interval * 2, 0.1))
+    db = DatabaseManager(db_path)
+    db.initialize_database()
+    rng = random.Random(0)
+    stop = threading.Event()
+    commits, reads, ages = [], [0] * args.readers, []
+
+    def writer():
+        while not stop.is_set():
+            start = time.perf_counter()
+            with db.get_transaction() as conn:
+                conn.execute(
+                    "INSERT INTO votes (rating, session_id, round_id) VALUES (?, ?, (SELECT MAX(id) FROM rounds))",
+                    vote_row(rng)
+                )
+            commits.append(time.perf_counter() - start)
+            stop.wait(max(0.0, 1 / args.vote_rate - (time.perf_counter() - start)))
+
+    def reader(index):
+        while not stop.is_set():
+            as_of = db.read_as_of()
+            db.get_votes_by_rating()
+            db.get_comment_count()
+            db.get_vote_timeline()
+            reads[index] += 1
+            if index == 0:
+                ages.append((datetime.now() - as_of).total_seconds())
+
+    threads = [threading.Thread(target=writer, daemon=True)] + [
+        threading.Thread(target=reader, args=(i,), daemon=True) for i in range(args.readers)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    # Durata di una copia, misurata a carico fermo
+    copy_ms = None
+    if db.replica is not None:
+        start = time.perf_counter()
+        for _ in range(5):
+            db.replica.refresh(force=True)
+        copy_ms = (time.perf_counter() - start) / 5 * 1000
+        update_settings(replica_interval=0.0)
+        db.read_version  # ferma il thread della replica
+    db.change_notifier.close()
+    return {
+        'p50': percentile(commits, 50) * 1000,
+        'p99': percentile(commits, 99) * 1000,
+        'max': max(commits) * 1000,
+        'reads': sum(reads) / args.duration,
+        'copy_ms': copy_ms,
+        'age': max(ages)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--votes", type=int, default=200_000)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=20, help="Durata di ogni simulazione in secondi")
+    parser.add_argument("--vote-rate", type=int, default=20, help="Voti al secondo")
+    parser.add_argument("--interval", type=float, default=1.0, help="replica_interval in secondi")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "votes.db")
+        db = DatabaseManager(db_path)
+        db.initialize_database()
+        populate(db, random.Random(1), args.votes)
+        db.change_notifier.close()
+
+        print("modo      commit p50 ms  p99 ms  max ms  letture/s  copia ms  età max s")
+        for label, interval in (("file", 0.0), ("replica", args.interval)):
+            m = run(db_path, args, interval)
+            copy = f"{m['copy_ms']:9.0f}" if m['copy_ms'] is not None else f"{'-':>9}"
+            print(f"{label:8s} {m['p50']:14.1f} {m['p99']:7.1f} {m['max']:7.1f} "
+                  f"{m['reads']:10.0f} {copy} {m['age']:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
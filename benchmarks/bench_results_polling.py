@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Benchmark: polling dei risultati dal frontend statico durante un Q&A
+
+1) Simulazione (orologio virtuale): --clients dashboard aperte per
+   --minutes minuti. I voti arrivano a raffica alla fine del talk
+   (--burst voti nei primi 3 minuti) e poi radi (--idle-rate voti al
+   minuto). Ogni client alterna periodi con la scheda visibile e nascosta
+   (telefono in tasca, altra app) per una frazione --hidden del tempo.
+   Confronta il vecchio ResultsDashboard (setInterval da 2 s, anche a
+   scheda nascosta) con il polling adattivo di public/script.js:
+   intervallo suggerito dal server con suggest_poll_interval sul ritmo
+   del rollup, jitter del 10%, pausa a scheda nascosta e aggiornamento
+   immediato al ritorno. Misura le richieste al secondo aggregate, nella
+   raffica e a votazione ferma, e il ritardo con cui un voto compare sulle
+   schede visibili.
+
+2) Endpoint reale: GET /api/results su un database temporaneo, a
+   votazione ferma e dopo una raffica di voti (Retry-After suggerito), e
+   la rivalidazione con If-None-Match (304 senza corpo).
+
+Uso:
+    python benchmarks/bench_results_polling.py [--clients 200] [--minutes 45]
+
+Risultati di riferimento (200 client, 45 minuti, 300 voti in raffica, 0.5 voti/min poi):
+
+    fisso 2 s    100.0 req/s in media, raffica 100.0 req/s, votazione ferma 100.0 req/s
+    adattivo       7.9 req/s in media, raffica  38.9 req/s, votazione ferma   3.6 req/s
+    ritardo di un voto sulle schede visibili: fisso ~1.0 s, adattivo ~3.8 s (p95 ~23 s)
+
+    endpoint: Retry-After 30 s senza voti, 2 s dopo 100 voti; 304 di 0 byte
+
+Il p95 del ritardo è il primo voto dopo una pausa, visto al poll successivo
+(al più poll_max_seconds delle impostazioni); durante la raffica
+l'intervallo scende a 2 s.
+"""
+
+import argparse
+import bisect
+import json
+import os
+import random
+import sys
+import tempfile
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.vote_service import POLL_RATE_WINDOW_MINUTES, suggest_poll_interval  # noqa: E402
+
+# Stessi parametri di public/script.js
+FIXED_INTERVAL = 2.0
+POLL_JITTER = 0.1
+# Durata media di un periodo visibile o nascosto di una scheda
+MEAN_PERIOD = 180.0
+BURST_SECONDS = 180.0
+
+
+def vote_times(minutes, burst, idle_rate, rng):
+    """Istanti dei voti: raffica iniziale, poi un processo di Poisson lento"""
+    times = [rng.uniform(0, BURST_SECONDS) for _ in range(burst)]
+    t = BURST_SECONDS
+    while idle_rate > 0:
+        t += rng.expovariate(idle_rate / 60)
+        if t >= minutes * 60:
+            break
+        times.append(t)
+    return sorted(times)
+
+
+def visibility(duration, hidden, rng):
+    """Periodi visibili [(inizio, fine)] di una scheda, nascosta per la frazione `hidden`"""
+    periods, t = [], 0.0
+    visible = rng.random() >= hidden
+    while t < duration:
+        mean = MEAN_PERIOD * ((1 - hidden) if visible else hidden) * 2
+        end = min(duration, t + rng.expovariate(1 / max(mean, 1.0)))
+        if visible:
+            periods.append((t, end))
+        t, visible = end, not visible
+    return periods
+
+
+def advised_interval(votes, t):
+    """Retry-After del server all'istante t (minuti del rollup, minuto in corso incluso)"""
+    since = (t // 60 - POLL_RATE_WINDOW_MINUTES) * 60
+    recent = bisect.bisect_right(votes, t) - bisect.bisect_left(votes, since)
+    return suggest_poll_interval(recent / POLL_RATE_WINDOW_MINUTES)
+
+
+def simulate(policy, clients, minutes, votes, hidden, seed=1):
+    """
+    Simula le richieste di tutti i client
+
+    Returns:
+        (richieste per istante, ritardi dei voti visti da schede visibili)
+    """
+    rng = random.Random(seed)
+    duration = minutes * 60
+    requests, delays = [], []
+    for _ in range(clients):
+        periods = visibility(duration, hidden, rng)
+        polls = []
+        if policy == "fixed":
+            # setInterval ignora la visibilità
+            t = rng.uniform(0, FIXED_INTERVAL)
+            while t < duration:
+                polls.append(t)
+                t += FIXED_INTERVAL
+        else:
+            for start, end in periods:
+                t = start
+                while t < end:
+                    polls.append(t)
+                    t += advised_interval(votes, t) * (1 + rng.uniform(-POLL_JITTER, POLL_JITTER))
+        requests.extend(polls)
+
+        # Ritardo tra un voto e il primo poll successivo nello stesso periodo visibile
+        for start, end in periods:
+            for v in votes[bisect.bisect_left(votes, start):bisect.bisect_right(votes, end)]:
+                i = bisect.bisect_left(polls, v)
+                if i < len(polls) and polls[i] <= end:
+                    delays.append(polls[i] - v)
+    return sorted(requests), sorted(delays)
+
+
+def rate(requests, start, end):
+    """Richieste al secondo nell'intervallo [start, end)"""
+    return (bisect.bisect_left(requests, end) - bisect.bisect_left(requests, start)) / (end - start)
+
+
+def get(url, etag=None):
+    """GET con If-None-Match opzionale: (status, Retry-After, ETag, byte del corpo)"""
+    request = urllib.request.Request(url, headers={"If-None-Match": etag} if etag else {})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.headers["Retry-After"], response.headers["ETag"], len(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers["Retry-After"], e.headers["ETag"], len(e.read())
+
+
+def bench_endpoint(burst):
+    """Retry-After dell'endpoint a votazione ferma e dopo `burst` voti"""
+    with tempfile.TemporaryDirectory() as tmp:
+        map_path = os.path.join(tmp, "shards.json")
+        with open(map_path, "w") as f:
+            json.dump({"default": os.path.join(tmp, "votes.db")}, f)
+
+        from services.api_server import start_api_server
+        from services.sharded_vote_service import ShardedVoteService
+        from utils.session_identity import new_session_id
+        from utils.settings import update_settings
+
+        update_settings(shard_map=map_path)
+
+        server = start_api_server(port=0)
+        url = f"http://127.0.0.1:{server.server_address[1]}/api/results"
+
+        _, idle, _, _ = get(url)
+        service = ShardedVoteService()
+        for i in range(burst):
+            service.submit_vote(i % 5 + 1, session_id=new_session_id())
+        _, busy, etag, size = get(url)
+        revalidated = get(url, etag)
+        print(f"endpoint: Retry-After {idle} s senza voti, {busy} s dopo {burst} voti "
+              f"(200 di {size} byte); rivalidazione {revalidated[0]} di {revalidated[3]} byte")
+        server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--minutes", type=float, default=45.0, help="Durata del Q&A")
+    parser.add_argument("--burst", type=int, default=300, help="Voti nei primi 3 minuti")
+    parser.add_argument("--idle-rate", type=float, default=0.5, help="Voti al minuto dopo la raffica")
+    parser.add_argument("--hidden", type=float, default=0.5, help="Frazione del tempo a scheda nascosta")
+    args = parser.parse_args()
+
+    votes = vote_times(args.minutes, args.burst, args.idle_rate, random.Random(0))
+    duration = args.minutes * 60
+    mean_delays = {}
+    for policy, label in (("fixed", "fisso 2 s"), ("adaptive", "adattivo")):
+        requests, delays = simulate(policy, args.clients, args.minutes, votes, args.hidden)
+        print(f"{label:10s} {len(requests) / duration:6.1f} req/s in media, "
+              f"raffica {rate(requests, 0, BURST_SECONDS):6.1f} req/s, "
+              f"votazione ferma {rate(requests, BURST_SECONDS + 120, duration):6.1f} req/s")
+        mean_delays[label] = (sum(delays) / len(delays), delays[int(len(delays) * 0.95)])
+    print("ritardo di un voto sulle schede visibili: " + ", ".join(
+        f"{label} ~{mean:.1f} s (p95 ~{p95:.0f} s)" for label, (mean, p95) in mean_delays.items()
+    ))
+
+    bench_endpoint(100)
+
+
+if __name__ == "__main__":
+    main()
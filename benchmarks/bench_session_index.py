@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark: memoria e latenza del SessionIndex a 1M sessioni
+
+Confronta l'indice esatto (set) con il Bloom filter e con il controllo
+duplicati su SQLite.
+
+Uso:
+    python benchmarks/bench_session_index.py [--sessions 1000000]
+
+Risultati di riferimento (Python 3.11, Linux x86_64, 1M chiavi da 16 byte):
+
+    exact (set)   ~83 MB    lookup ~0.5 µs
+    bloom 0.1%    ~1.8 MB   lookup ~7 µs (positivi confermati su DB)
+    SQLite        -         lookup ~13 µs su connessione aperta,
+                            ~130 µs con connessione per chiamata
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database.session_index import SessionIndex  # noqa: E402
+
+
+def make_session_ids(n):
+    """Genera n chiavi di sessione deterministiche da 16 byte"""
+    return ((1_700_000_000_000 << 80 | i).to_bytes(16, 'big') for i in range(n))
+
+
+def measure_index(mode, n):
+    """Misura memoria e latenza di lookup per un SessionIndex"""
+    tracemalloc.start()
+    index = SessionIndex(mode=mode, capacity=n)
+    index.warm(("main", session_id) for session_id in make_session_ids(n))
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    probes = list(make_session_ids(10_000))
+    start = time.perf_counter()
+    for session_id in probes:
+        index.lookup(session_id)
+    lookup_us = (time.perf_counter() - start) / len(probes) * 1e6
+    return current, lookup_us
+
+
+def measure_sqlite(n):
+    """Misura la latenza del controllo duplicati su SQLite"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute(
+            "CREATE TABLE votes (id INTEGER PRIMARY KEY, rating INTEGER, "
+            "session_id BLOB NOT NULL UNIQUE)"
+        )
+        conn.executemany(
+            "INSERT INTO votes (rating, session_id) VALUES (3, ?)",
+            ((sid,) for sid in make_session_ids(n))
+        )
+        conn.commit()
+
+        probes = list(make_session_ids(10_000))
+        start = time.perf_counter()
+        for session_id in probes:
+            conn.execute("SELECT 1 FROM votes WHERE session_id = ? LIMIT 1", (session_id,)).fetchall()
+        warm_us = (time.perf_counter() - start) / len(probes) * 1e6
+        conn.close()
+
+        start = time.perf_counter()
+        for session_id in probes[:1000]:
+            c = sqlite3.connect(db_path)
+            c.execute("SELECT 1 FROM votes WHERE session_id = ? LIMIT 1", (session_id,)).fetchall()
+            c.close()
+        per_call_us = (time.perf_counter() - start) / 1000 * 1e6
+    return warm_us, per_call_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print(f"Sessioni: {args.sessions:,}")
+    for mode in SessionIndex.MODES:
+        memory, lookup_us = measure_index(mode, args.sessions)
+        print(f"{mode:6s}  memoria {memory / 1e6:8.1f} MB   lookup {lookup_us:6.2f} µs")
+
+    warm_us, per_call_us = measure_sqlite(args.sessions)
+    print(f"sqlite  lookup {warm_us:6.2f} µs (connessione aperta), "
+          f"{per_call_us:6.1f} µs (connessione per chiamata)")
+
+
+if __name__ == "__main__":
+    main()
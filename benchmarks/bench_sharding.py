@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Load test: throughput di scrittura con 1..N shard per talk
+
+Avvia --writers processi; ognuno registra --votes voti distribuiti a
+rotazione su --talks talk tramite ShardedVoteService. Con 1 shard tutti i
+talk condividono un file (un solo lock di scrittura); con N shard ogni
+talk ha il proprio file.
+
+Uso:
+    python benchmarks/bench_sharding.py [--shards 1 2 4] [--writers 4] [--votes 2000]
+
+Risultati di riferimento (1 vCPU, 4 writer, 4 talk, 2000 voti ciascuno):
+
+    1 shard    ~610 voti/s
+    2 shard    ~630 voti/s
+    4 shard    ~780 voti/s
+
+Con un solo core il costo CPU di ogni voto (connessione, controllo
+sessione, trigger di rollup) domina e la crescita è modesta: gli shard
+eliminano l'attesa sul lock di scrittura condiviso, quindi il guadagno
+si avvicina a lineare solo quando writer e shard hanno un core ciascuno.
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database.sharding import ShardedDatabaseManager, ShardMap  # noqa: E402
+from services.sharded_vote_service import ShardedVoteService  # noqa: E402
+from utils.session_identity import new_session_id  # noqa: E402
+
+
+def build_map(directory, shards, talks):
+    """Shard map che distribuisce i talk su `shards` file"""
+    routes = {
+        f"talk{t}": os.path.join(directory, f"shard{t % shards}.db")
+        for t in range(talks)
+    }
+    return ShardMap(routes=routes, default=os.path.join(directory, "shard0.db"))
+
+
+def writer(directory, shards, talks, votes, offset, ready, results):
+    """Registra `votes` voti a rotazione sui talk"""
+    service = ShardedVoteService(ShardedDatabaseManager(build_map(directory, shards, talks)))
+    for t in range(talks):
+        service.for_talk(f"talk{t}")
+    ready.wait()
+    start = time.perf_counter()
+    failed = 0
+    for i in range(votes):
+        result = service.submit_vote(i % 5 + 1, session_id=new_session_id(), talk_id=f"talk{(i + offset) % talks}")
+        failed += not result.success
+    results.put((time.perf_counter() - start, failed))
+
+
+def run(shards, writers, talks, votes):
+    """Throughput aggregato (voti/s) per un numero di shard"""
+    ctx = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        # Crea gli shard prima di avviare i writer
+        sharded_db = ShardedDatabaseManager(build_map(tmp, shards, talks))
+        for t in range(talks):
+            sharded_db.shard_for(f"talk{t}")
+
+        ready, results = ctx.Event(), ctx.Queue()
+        procs = [
+            ctx.Process(target=writer, args=(tmp, shards, talks, votes, w, ready, results))
+            for w in range(writers)
+        ]
+        for proc in procs:
+            proc.start()
+        time.sleep(2)
+        start = time.perf_counter()
+        ready.set()
+        outcomes = [results.get() for _ in procs]
+        elapsed = time.perf_counter() - start
+        for proc in procs:
+            proc.join()
+
+    failed = sum(f for _, f in outcomes)
+    return (writers * votes - failed) / elapsed, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--talks", type=int, default=4)
+    parser.add_argument("--votes", type=int, default=2000, help="Voti per writer")
+    args = parser.parse_args()
+
+    for shards in args.shards:
+        throughput, failed = run(shards, args.writers, args.talks, args.votes)
+        note = f"  ({failed} falliti)" if failed else ""
+        print(f"{shards:3d} shard   {throughput:8.0f} voti/s{note}")
+
+
+if __name__ == "__main__":
+    main()
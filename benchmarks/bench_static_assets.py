@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Benchmark: primo caricamento e visite successive del frontend statico,
+sorgenti in public/ contro la build di utils/asset_pipeline.py
+
+Entrambe le versioni sono servite in locale dal server API (--static).
+Per ogni versione misura i byte trasferiti al primo caricamento (HTML,
+CSS e JS della pagina, con Accept-Encoding: gzip) e le richieste della
+visita successiva, poi stima il time-to-interactive su un profilo di rete
+da Wi-Fi congestionato (--rtt, --kbps): connessione, HTML, poi CSS e
+script in parallelo sulla banda condivisa, più la connessione al dominio
+di Google Fonts quando il suo CSS blocca il render (DNS + TCP + TLS +
+richiesta = 4 RTT). Alla visita successiva la build risponde dal Service
+Worker senza rete; i sorgenti rivalidano ogni file (304).
+
+Con Playwright installato (pip install playwright && playwright install
+chromium) misura anche in Chromium headless con la rete rallentata via
+CDP: domInteractive e byte trasferiti, al primo caricamento e al reload
+servito dal Service Worker.
+
+Uso:
+    python benchmarks/bench_static_assets.py [--rtt 150] [--kbps 1500]
+
+Risultati di riferimento (modello, RTT 150 ms, 1.5 Mbit/s):
+
+    sorgenti   primo caricamento ~63 KB, TTI ~0.96 s; visita successiva 4 richieste 304, ~0.45 s
+    build      primo caricamento ~10 KB, TTI ~0.51 s; visita successiva 0 richieste
+
+Chromium headless non è disponibile nell'ambiente di riferimento: i tempi
+sono del modello, i byte sono misurati sul server locale.
+"""
+
+import argparse
+import gzip
+import importlib.util
+import re
+import sys
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.api_server import make_api_server  # noqa: E402
+from utils.asset_pipeline import build_assets  # noqa: E402
+
+PUBLIC_DIR = Path(__file__).resolve().parent.parent / "public"
+
+_ASSET_RE = re.compile(r'<(?:link[^>]+rel="stylesheet"[^>]*href|script[^>]+src)="([^"]+)"')
+_BLOCKING_FONTS_RE = re.compile(r'<link\s+href="https://fonts\.googleapis\.com[^"]*"\s+rel="stylesheet">')
+
+
+def fetch(url, etag=None):
+    """GET come un browser: ritorna (status, byte sul filo, corpo decompresso, etag)"""
+    headers = {"Accept-Encoding": "gzip"}
+    if etag:
+        headers["If-None-Match"] = etag
+    request = urllib.request.Request(url, headers=headers)
+    try:
+        with urllib.request.urlopen(request) as response:
+            body = response.read()
+            wire = len(body)
+            if response.headers.get("Content-Encoding") == "gzip":
+                body = gzip.decompress(body)
+            return response.status, wire, body.decode("utf-8"), response.headers.get("ETag")
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return 304, 0, "", etag
+        raise
+
+
+def measure(base_url):
+    """Primo caricamento (byte per file) e richieste della visita successiva"""
+    _, html_bytes, html, html_etag = fetch(base_url + "/")
+    assets = [name for name in _ASSET_RE.findall(html) if not name.startswith("http")]
+    files = {"index.html": (html_bytes, html_etag)}
+    for name in assets:
+        _, wire, _, etag = fetch(f"{base_url}/{name}")
+        files[name] = (wire, etag)
+
+    # Visita successiva senza Service Worker: rivalidazione di ogni file
+    revalidated = sum(
+        1 for name, (_, etag) in files.items()
+        if fetch(f"{base_url}/{'' if name == 'index.html' else name}", etag)[0] == 304
+    )
+    blocking_fonts = bool(_BLOCKING_FONTS_RE.search(html))
+    return {name: wire for name, (wire, _) in files.items()}, revalidated, blocking_fonts
+
+
+def model_tti(files, blocking_fonts, rtt, kbps):
+    """Stima del time-to-interactive (secondi) sul profilo di rete"""
+    bandwidth = kbps * 1000 / 8
+    html = files["index.html"]
+    subresources = sum(size for name, size in files.items() if name != "index.html")
+    # TCP + richiesta HTML, poi CSS e script in parallelo sulla stessa connessione
+    tti = rtt + (rtt + html / bandwidth) + (rtt + subresources / bandwidth)
+    if blocking_fonts:
+        # CSS di Google Fonts su un altro dominio, in parallelo dopo l'HTML
+        tti = max(tti, 2 * rtt + html / bandwidth + 4 * rtt)
+    return tti
+
+
+def serve(directory):
+    """Avvia un server API che serve `directory` su una porta libera"""
+    server = make_api_server(port=0, static_dir=str(directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def browser_measure(base_url, rtt, kbps):
+    """Misura in Chromium headless (richiede playwright)"""
+    from playwright.sync_api import sync_playwright
+
+    script = """() => {
+        const nav = performance.getEntriesByType('navigation')[0];
+        const resources = performance.getEntriesByType('resource');
+        return {
+            interactive: nav.domInteractive,
+            bytes: nav.transferSize + resources.reduce((sum, r) => sum + r.transferSize, 0)
+        };
+    }"""
+    with sync_playwright() as p:
+        browser = p.chromium.launch()
+        page = browser.new_page()
+        cdp = page.context.new_cdp_session(page)
+        cdp.send("Network.enable")
+        cdp.send("Network.emulateNetworkConditions", {
+            "offline": False,
+            "latency": rtt * 1000,
+            "downloadThroughput": kbps * 1000 / 8,
+            "uploadThroughput": kbps * 1000 / 8,
+        })
+        page.goto(base_url + "/", wait_until="load")
+        first = page.evaluate(script)
+        page.evaluate("() => navigator.serviceWorker ? navigator.serviceWorker.ready : null")
+        page.reload(wait_until="load")
+        repeat = page.evaluate(script)
+        browser.close()
+    return first, repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rtt", type=float, default=150.0, help="Round trip in ms")
+    parser.add_argument("--kbps", type=float, default=1500.0, help="Banda in kbit/s")
+    args = parser.parse_args()
+    rtt = args.rtt / 1000
+
+    has_playwright = importlib.util.find_spec("playwright") is not None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        build_assets(str(PUBLIC_DIR), tmp)
+        for label, directory, has_sw in (("sorgenti", PUBLIC_DIR, False), ("build", tmp, True)):
+            server, base_url = serve(directory)
+            files, revalidated, blocking_fonts = measure(base_url)
+            first_kb = sum(files.values()) / 1024
+            tti = model_tti(files, blocking_fonts, rtt, args.kbps)
+            # Senza Service Worker: connessione, HTML 304, poi gli altri 304 in parallelo
+            repeat = "0 richieste (Service Worker)" if has_sw else (
+                f"{revalidated} richieste 304, ~{3 * rtt:.2f} s"
+            )
+            print(f"{label:9s} primo caricamento {first_kb:5.1f} KB, TTI stimato {tti:4.2f} s"
+                  f"{' (font bloccanti)' if blocking_fonts else ''}; visita successiva {repeat}")
+
+            if has_playwright:
+                first, again = browser_measure(base_url, args.rtt, args.kbps)
+                print(f"{'':9s} Chromium: domInteractive {first['interactive']:.0f} ms "
+                      f"({first['bytes'] / 1024:.1f} KB), reload {again['interactive']:.0f} ms "
+                      f"({again['bytes'] / 1024:.1f} KB)")
+            server.shutdown()
+
+    if not has_playwright:
+        print("(misura in Chromium saltata: playwright non installato)")
+
+
+if __name__ == "__main__":
+    main()
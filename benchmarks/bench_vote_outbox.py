@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Benchmark: outbox dei voti del frontend statico durante un'interruzione di rete
+
+1) Tempesta di riconnessione (simulata, orologio virtuale): --clients
+   client con un voto in coda restano senza rete per --outage secondi.
+   Confronta il vecchio comportamento (una fetch per voto, l'utente preme
+   "Riprova" ogni ~2 s) con la politica di public/outbox.js: backoff
+   esponenziale con full jitter (1 s, tetto 60 s) e ripartenza distribuita
+   su 5 s all'evento 'online'. Conta le richieste durante l'interruzione e
+   il picco di richieste al secondo dopo il ritorno della rete. Caso
+   peggiore: rete "connessa" ma inutilizzabile (navigator.onLine resta
+   true); se il browser sa di essere offline l'outbox non invia nulla.
+
+2) Endpoint reale: POST /api/votes/batch su un database temporaneo, con
+   lotti da 1 voto e da --batch voti, più il reinvio dello stesso lotto
+   (idempotenza: tutti "duplicate", nessun voto doppio).
+
+Uso:
+    python benchmarks/bench_vote_outbox.py [--clients 500] [--outage 30] [--votes 2000]
+
+Risultati di riferimento (1 vCPU):
+
+    tempesta 500 client, 30 s:  retry fisso   ~6.5k richieste, picco ~250 req/s
+                                outbox        ~3.1k richieste, picco ~110 req/s
+    endpoint 2000 voti:         lotti da 1    ~190 voti/s
+                                lotti da 50   ~7.2k voti/s
+"""
+
+import argparse
+import heapq
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import urllib.request
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Stessi parametri di public/outbox.js e public/script.js
+BASE_DELAY = 1.0
+MAX_DELAY = 60.0
+ONLINE_JITTER = 5.0
+FIXED_RETRY = 2.0
+
+
+def simulate(clients, outage, policy, seed=1):
+    """
+    Simula l'invio di un voto per client con la rete assente fino a `outage`
+
+    Returns:
+        (richieste durante l'interruzione, picco req/s dopo, secondi per svuotare le code)
+    """
+    rng = random.Random(seed)
+    # Ogni client vota in un istante casuale dei primi 10 s di interruzione
+    events = [(rng.uniform(0, 10), c, 0) for c in range(clients)]
+    if policy == "outbox":
+        # L'evento 'online' riprogramma tutti i client con jitter
+        events += [(outage + rng.uniform(0, ONLINE_JITTER), c, -1) for c in range(clients)]
+    heapq.heapify(events)
+
+    delivered, during, per_second = set(), 0, Counter()
+    pending_timer = {}
+    last = 0.0
+    while events:
+        t, client, attempt = heapq.heappop(events)
+        if client in delivered:
+            continue
+        if attempt == -1:
+            # Riavvio da 'online': annulla il timer di backoff pendente
+            pending_timer[client] = t
+            attempt = 0
+        elif policy == "outbox" and pending_timer.get(client, t) > t:
+            continue
+        if t < outage:
+            during += 1
+            if policy == "fixed":
+                heapq.heappush(events, (t + FIXED_RETRY, client, attempt + 1))
+            else:
+                delay = rng.uniform(0, min(MAX_DELAY, BASE_DELAY * 2 ** attempt))
+                pending_timer[client] = t + delay
+                heapq.heappush(events, (t + delay, client, attempt + 1))
+        else:
+            per_second[int(t)] += 1
+            delivered.add(client)
+            last = t
+    return during, max(per_second.values()), last - outage
+
+
+def post(url, votes):
+    """Invia un lotto e ritorna gli esiti"""
+    request = urllib.request.Request(
+        url, data=json.dumps({"votes": votes}).encode(), headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(request) as response:
+        return json.load(response)["results"]
+
+
+def bench_endpoint(total, batch):
+    """Throughput dell'endpoint con lotti da 1 e da `batch` voti"""
+    with tempfile.TemporaryDirectory() as tmp:
+        map_path = os.path.join(tmp, "shards.json")
+        with open(map_path, "w") as f:
+            json.dump({"default": os.path.join(tmp, "votes.db")}, f)
+
+        from services.api_server import start_api_server
+        from utils.session_identity import new_session_id
+        from utils.settings import update_settings
+
+        update_settings(shard_map=map_path)
+
+        server = start_api_server(port=0)
+        url = f"http://127.0.0.1:{server.server_address[1]}/api/votes/batch"
+
+        for size in (1, batch):
+            votes = [
+                {"id": f"v{size}-{i}", "sessionId": new_session_id(), "rating": i % 5 + 1}
+                for i in range(total)
+            ]
+            start = time.perf_counter()
+            statuses = Counter()
+            for i in range(0, total, size):
+                statuses.update(r["status"] for r in post(url, votes[i:i + size]))
+            elapsed = time.perf_counter() - start
+            print(f"lotti da {size:3d}: {total / elapsed:8.0f} voti/s  {dict(statuses)}")
+
+        # Reinvio dell'ultimo lotto (risposta persa): nessun voto doppio
+        replay = Counter(r["status"] for r in post(url, votes[-batch:]))
+        print(f"reinvio lotto:  {dict(replay)}")
+        server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--outage", type=float, default=30.0, help="Secondi senza rete")
+    parser.add_argument("--votes", type=int, default=2000, help="Voti per la prova dell'endpoint")
+    parser.add_argument("--batch", type=int, default=50)
+    args = parser.parse_args()
+
+    for policy in ("fixed", "outbox"):
+        during, peak, drain = simulate(args.clients, args.outage, policy)
+        print(f"{policy:>6}: {during:6d} richieste durante l'interruzione, "
+              f"picco {peak:4d} req/s, code vuote in {drain:4.1f} s")
+
+    bench_endpoint(args.votes, args.batch)
+
+
+if __name__ == "__main__":
+    main()
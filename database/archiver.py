@@ -0,0 +1,340 @@
+"""
+Round archiver for VibeTheForce
+Moves the votes of finished rounds out of the live database and compacts it
+
+A reset only starts a new round (DatabaseManager.start_new_round); the
+rows of earlier rounds stay in the votes table, invisible to every read,
+until the archiver copies them to "<db>-archive.db" and deletes them from
+the live file. Rows are moved in small batches, each in its own short
+write transaction with a pause in between, so voters of the new round are
+never blocked for long. Copies use INSERT OR IGNORE, so an interrupted run
+is simply repeated.
+
+Freed pages are returned to the filesystem with PRAGMA incremental_vacuum,
+also in steps. This needs auto_vacuum = INCREMENTAL, which new databases
+get at creation; a database created before rounds existed has to be
+converted once with a full VACUUM (--convert), otherwise its free pages
+are only reused by new votes.
+
+Usage:
+    python -m database.archiver
+    python -m database.archiver --convert
+"""
+
+import argparse
+import logging
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from database.backup import BackupManager
+from database.db_manager import DatabaseManager
+from utils.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Votes moved and pages released per write transaction
+DEFAULT_BATCH_SIZE = 2000
+DEFAULT_VACUUM_PAGES = 256
+# Pause between steps: longer than the busy handler's early retry delays,
+# otherwise a waiting voter keeps losing the lock to the next batch
+DEFAULT_STEP_SLEEP = 0.05
+
+# PRAGMA auto_vacuum value for INCREMENTAL
+_AUTO_VACUUM_INCREMENTAL = 2
+
+_ARCHIVE_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS archive.rounds (
+        id INTEGER PRIMARY KEY,
+        started_at DATETIME,
+        archived_at DATETIME,
+        archived_votes INTEGER
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS archive.votes (
+        id INTEGER PRIMARY KEY,
+        rating INTEGER NOT NULL,
+        session_id BLOB NOT NULL,
+        timestamp DATETIME,
+        talk_id TEXT NOT NULL,
+        round_id INTEGER NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS archive.comments (
+        id INTEGER PRIMARY KEY,
+        vote_id INTEGER NOT NULL,
+        comment TEXT NOT NULL,
+        timestamp DATETIME,
+        comment_status TEXT,
+        sentiment REAL,
+        moderated_at DATETIME
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS archive.idx_archive_votes_round ON votes(round_id)",
+)
+
+# Moderation columns added to archive.comments after the first archive
+# files were written (added to older files on the next run)
+_ARCHIVE_COMMENT_COLUMNS = (
+    ("comment_status", "TEXT"),
+    ("sentiment", "REAL"),
+    ("moderated_at", "DATETIME"),
+)
+
+
+def archive_path_for(db_path: str) -> str:
+    """Archive file of a live database ("votes.db" -> "votes-archive.db")"""
+    path = Path(db_path)
+    return str(path.with_name(f"{path.stem}-archive{path.suffix or '.db'}"))
+
+
+class RoundArchiver:
+    """Archives finished rounds of one database and compacts it"""
+
+    def __init__(
+        self,
+        db_manager: DatabaseManager,
+        archive_path: Optional[str] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        vacuum_pages: int = DEFAULT_VACUUM_PAGES,
+        step_sleep: float = DEFAULT_STEP_SLEEP,
+        snapshot: bool = False
+    ):
+        """
+        Initialize RoundArchiver
+
+        Args:
+            db_manager: Live database
+            archive_path: Archive file (default: "<db>-archive.db" next to the database)
+            batch_size: Votes moved per write transaction
+            vacuum_pages: Pages released per incremental_vacuum step
+            step_sleep: Pause between batches and vacuum steps, during which voters can commit
+            snapshot: Take a "pre-reset" snapshot before moving any row
+        """
+        self.db_manager = db_manager
+        self.archive_path = archive_path or archive_path_for(db_manager.db_path)
+        self.batch_size = batch_size
+        self.vacuum_pages = vacuum_pages
+        self.step_sleep = step_sleep
+        self.snapshot = snapshot
+
+    def pending_rounds(self) -> List[int]:
+        """
+        Rounds before the current one that still have to be archived
+
+        Returns:
+            Round IDs, oldest first
+        """
+        rows = self.db_manager.execute_query("""
+            SELECT id FROM rounds
+            WHERE archived_at IS NULL AND id < (SELECT MAX(id) FROM rounds)
+            ORDER BY id
+        """)
+        return [row[0] for row in rows]
+
+    def archive_round(self, round_id: int) -> int:
+        """
+        Move one finished round to the archive file
+
+        Args:
+            round_id: Round to archive (must not be the current round)
+
+        Returns:
+            Number of votes of the round in the archive
+        """
+        with self.db_manager.get_connection() as conn:
+            # ATTACH is not allowed inside a transaction: attach first, then begin
+            conn.execute("ATTACH DATABASE ? AS archive", (self.archive_path,))
+            for statement in _ARCHIVE_SCHEMA:
+                conn.execute(statement)
+            columns = {row[1] for row in conn.execute("PRAGMA archive.table_info(comments)")}
+            for name, column_type in _ARCHIVE_COMMENT_COLUMNS:
+                if name not in columns:
+                    conn.execute(f"ALTER TABLE archive.comments ADD COLUMN {name} {column_type}")
+            conn.commit()
+
+            # Batches walk the primary key; "+round_id" keeps the planner on
+            # rowid ranges instead of rescanning the round through its index
+            first = conn.execute(
+                "SELECT MIN(id) FROM votes WHERE round_id = ?", (round_id,)
+            ).fetchone()[0]
+            while first is not None:
+                conn.execute("BEGIN IMMEDIATE")
+                last = conn.execute("""
+                    SELECT MAX(id) FROM (
+                        SELECT id FROM votes
+                        WHERE id >= ? AND +round_id = ?
+                        ORDER BY id LIMIT ?
+                    )
+                """, (first, round_id, self.batch_size)).fetchone()[0]
+                if last is None:
+                    conn.rollback()
+                    break
+                batch = (first, last, round_id)
+                conn.execute("""
+                    INSERT OR IGNORE INTO archive.votes (id, rating, session_id, timestamp, talk_id, round_id)
+                    SELECT id, rating, session_id, timestamp, talk_id, round_id
+                    FROM main.votes WHERE id BETWEEN ? AND ? AND +round_id = ?
+                """, batch)
+                conn.execute("""
+                    INSERT OR IGNORE INTO archive.comments
+                        (id, vote_id, comment, timestamp, comment_status, sentiment, moderated_at)
+                    SELECT c.id, c.vote_id, c.comment, c.timestamp,
+                           c.comment_status, c.sentiment, c.moderated_at
+                    FROM main.votes v
+                    CROSS JOIN main.comments c ON c.vote_id = v.id
+                    WHERE v.id BETWEEN ? AND ? AND +v.round_id = ?
+                """, batch)
+                # Comments follow through ON DELETE CASCADE; the rollup
+                # triggers only react to deletes in the current round
+                conn.execute(
+                    "DELETE FROM main.votes WHERE id BETWEEN ? AND ? AND +round_id = ?", batch
+                )
+                conn.commit()
+                first = last + 1
+                time.sleep(self.step_sleep)
+
+            conn.execute("BEGIN IMMEDIATE")
+            archived = conn.execute(
+                "SELECT COUNT(*) FROM archive.votes WHERE round_id = ?", (round_id,)
+            ).fetchone()[0]
+            conn.execute("""
+                UPDATE main.rounds
+                SET archived_at = CURRENT_TIMESTAMP, archived_votes = ?
+                WHERE id = ?
+            """, (archived, round_id))
+            conn.execute("""
+                INSERT OR REPLACE INTO archive.rounds (id, started_at, archived_at, archived_votes)
+                SELECT id, started_at, archived_at, archived_votes FROM main.rounds WHERE id = ?
+            """, (round_id,))
+            conn.commit()
+            conn.execute("DETACH DATABASE archive")
+        return archived
+
+    def compact(self, convert: bool = False) -> int:
+        """
+        Return free pages to the filesystem
+
+        Args:
+            convert: Switch a database without incremental auto_vacuum over
+                with a one-time full VACUUM (blocks writers for its duration)
+
+        Returns:
+            Number of pages released
+        """
+        with self.db_manager.get_connection() as conn:
+            mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+            free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if mode != _AUTO_VACUUM_INCREMENTAL:
+                if not convert:
+                    return 0
+                conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                conn.execute("VACUUM")
+                return free
+
+            released = 0
+            while free > 0:
+                # executescript steps the pragma to completion; a plain
+                # execute releases a single page per call
+                conn.executescript(f"PRAGMA incremental_vacuum({self.vacuum_pages});")
+                remaining = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                if remaining >= free:
+                    break
+                released += free - remaining
+                free = remaining
+                time.sleep(self.step_sleep)
+            return released
+
+    def run(self, convert: bool = False) -> Dict[int, int]:
+        """
+        Archive every finished round, then compact the live database
+
+        Args:
+            convert: See compact()
+
+        Returns:
+            Dictionary mapping archived round_id to its number of votes
+        """
+        pending = self.pending_rounds()
+        if pending and self.snapshot:
+            # Without a snapshot nothing is moved: the rows stay in the live file
+            BackupManager(self.db_manager).create_snapshot("pre-reset")
+
+        archived = {round_id: self.archive_round(round_id) for round_id in pending}
+        self.compact(convert=convert)
+        return archived
+
+
+_archive_queue: "queue.Queue[RoundArchiver]" = queue.Queue()
+_archive_thread: Optional[threading.Thread] = None
+_archive_lock = threading.Lock()
+
+
+def archive_in_background(archiver: RoundArchiver) -> threading.Thread:
+    """
+    Run an archiver on the background worker (one per process)
+
+    Args:
+        archiver: RoundArchiver to run
+
+    Returns:
+        Daemon thread running queued archivers
+    """
+    global _archive_thread
+
+    def run():
+        while True:
+            job = _archive_queue.get()
+            try:
+                job.run()
+            except Exception:
+                # One failed job must not stop the worker: later resets queue
+                # new jobs, and a retry archives whatever this one left behind
+                logger.exception("Round archiving failed for %s", job.db_manager.db_path)
+            finally:
+                _archive_queue.task_done()
+
+    with _archive_lock:
+        _archive_queue.put(archiver)
+        if _archive_thread is None:
+            _archive_thread = threading.Thread(target=run, name="round-archiver", daemon=True)
+            _archive_thread.start()
+        return _archive_thread
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Archive finished rounds and compact the database")
+    parser.add_argument("--db", default=get_settings().db_path, help="SQLite database path")
+    parser.add_argument("--archive", help="Archive file (default: <db>-archive.db)")
+    parser.add_argument("--convert", action="store_true",
+                        help="Enable incremental auto_vacuum with a one-time full VACUUM")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        print(f"Database not found: {args.db}", file=sys.stderr)
+        sys.exit(1)
+
+    db_manager = DatabaseManager(args.db)
+    db_manager.initialize_database()
+    archiver = RoundArchiver(db_manager, archive_path=args.archive)
+    try:
+        archived = archiver.run(convert=args.convert)
+    except (sqlite3.Error, OSError) as e:
+        print(f"Archiving failed: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    for round_id, votes in archived.items():
+        print(f"Round {round_id}: {votes} votes -> {archiver.archive_path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
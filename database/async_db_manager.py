@@ -0,0 +1,83 @@
+"""
+Async Database Manager for VibeTheForce
+asyncio counterpart of DatabaseManager for async HTTP front ends
+
+Every call is delegated to the wrapped DatabaseManager on dedicated
+executor threads, so connection settings, pragmas, instrumentation,
+metrics and the session index are exactly those of the sync path.
+Writes go through a single writer thread (SQLite allows one writer at a
+time, so queueing them in-process avoids busy-waiting on the file lock);
+reads use a pool of reader threads.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Tuple
+
+from database.db_manager import DatabaseManager, get_db_manager
+
+
+class AsyncDatabaseManager:
+    """Non-blocking facade over a DatabaseManager"""
+
+    def __init__(self, db_manager: Optional[DatabaseManager] = None, readers: int = 8):
+        """
+        Initialize AsyncDatabaseManager
+
+        Args:
+            db_manager: Sync DatabaseManager to delegate to (default: singleton)
+            readers: Number of reader threads
+        """
+        self.db_manager = db_manager or get_db_manager()
+        self._read_executor = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="db-read")
+        self._write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-write")
+
+    async def run_read(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Run a blocking read function on the reader pool
+
+        Args:
+            fn: Callable performing the read
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._read_executor, functools.partial(fn, *args, **kwargs)
+        )
+
+    async def run_write(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Run a blocking write function on the single writer thread
+
+        Args:
+            fn: Callable performing the write
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._write_executor, functools.partial(fn, *args, **kwargs)
+        )
+
+    async def execute_query(self, query: str, params: tuple = ()) -> List[Tuple]:
+        """Async version of DatabaseManager.execute_query"""
+        return await self.run_read(self.db_manager.execute_query, query, params)
+
+    async def execute_insert(self, query: str, params: tuple = ()) -> int:
+        """Async version of DatabaseManager.execute_insert"""
+        return await self.run_write(self.db_manager.execute_insert, query, params)
+
+    async def execute_update(self, query: str, params: tuple = ()) -> int:
+        """Async version of DatabaseManager.execute_update"""
+        return await self.run_write(self.db_manager.execute_update, query, params)
+
+    async def get_votes_by_rating(self, talk_id: Optional[str] = None) -> dict:
+        """Async version of DatabaseManager.get_votes_by_rating"""
+        return await self.run_read(self.db_manager.get_votes_by_rating, talk_id)
+
+    async def get_all_comments_with_ratings(self, talk_id: Optional[str] = None) -> List[Tuple[str, int, str]]:
+        """Async version of DatabaseManager.get_all_comments_with_ratings"""
+        return await self.run_read(self.db_manager.get_all_comments_with_ratings, talk_id)
+
+    def close(self):
+        """Shut down the executor threads"""
+        self._read_executor.shutdown(wait=True)
+        self._write_executor.shutdown(wait=True)
@@ -0,0 +1,340 @@
+"""
+Online backup for VibeTheForce
+Consistent snapshots of a live database through the SQLite backup API
+
+Snapshots are copied in paged steps (sqlite3.Connection.backup with
+pages > 0), releasing the source lock between steps so writers are only
+ever blocked for one step. SQLite restarts a backup whenever another
+connection writes to the source; after a few restarts the step size is
+multiplied, so under a steady stream of votes the copy still converges
+(at worst to a single step holding the read lock for one full copy).
+Each snapshot is written to a temporary file
+and renamed when complete, so a snapshot file is never torn; a JSON
+sidecar records when, why and how long it took. Each label keeps its
+own retention count, so frequent scheduled snapshots never push out the
+"pre-reset" snapshot of a reset.
+
+Usage:
+    python -m database.backup list
+    python -m database.backup create --label manual
+    python -m database.backup restore database/backups/votes-20250101-120000-000000-pre-reset.db
+"""
+
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from database.db_manager import DatabaseManager
+from utils.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Pages copied per backup step and pause between steps (seconds)
+DEFAULT_PAGES_PER_STEP = 256
+DEFAULT_STEP_SLEEP = 0.005
+
+# Restarts tolerated per attempt, and step size growth between attempts
+MAX_RESTARTS_PER_ATTEMPT = 3
+STEP_GROWTH = 8
+
+
+class _BackupRestarted(Exception):
+    """Raised from the progress callback to abandon an attempt that keeps restarting"""
+
+
+@dataclass
+class BackupInfo:
+    """Metadata of one snapshot"""
+    path: str
+    label: str
+    created_at: str
+    size_bytes: int
+    duration_s: float
+    pages: int
+
+    @property
+    def metadata_path(self) -> str:
+        """Path of the JSON sidecar"""
+        return f"{self.path}.json"
+
+
+class BackupManager:
+    """Creates, lists, prunes and restores snapshots of one database"""
+
+    def __init__(
+        self,
+        db_manager: DatabaseManager,
+        backup_dir: Optional[str] = None,
+        retention: Optional[int] = None,
+        pages_per_step: int = DEFAULT_PAGES_PER_STEP,
+        step_sleep: float = DEFAULT_STEP_SLEEP
+    ):
+        """
+        Initialize BackupManager
+
+        Args:
+            db_manager: Database to back up
+            backup_dir: Snapshot directory (default: backup_dir setting, or
+                a "backups" directory next to the database)
+            retention: Snapshots kept per label (default: backup_retention setting)
+            pages_per_step: Pages copied per backup step
+            step_sleep: Pause between steps, during which writers can commit
+        """
+        self.db_manager = db_manager
+        db_dir = os.path.dirname(db_manager.db_path) or "."
+        settings = get_settings()
+        self.backup_dir = backup_dir or settings.backup_dir or os.path.join(db_dir, "backups")
+        self.retention = retention if retention is not None else settings.backup_retention
+        self.pages_per_step = pages_per_step
+        self.step_sleep = step_sleep
+        self._stem = Path(db_manager.db_path).stem
+
+    def create_snapshot(self, label: str = "manual") -> BackupInfo:
+        """
+        Copy the live database into a new snapshot file
+
+        Args:
+            label: Reason for the snapshot (e.g. "manual", "pre-reset", "scheduled")
+
+        Returns:
+            BackupInfo of the new snapshot
+        """
+        os.makedirs(self.backup_dir, exist_ok=True)
+        now = datetime.now()
+        safe_label = "".join(c if c.isalnum() or c == "-" else "-" for c in label)
+        path = os.path.join(
+            self.backup_dir, f"{self._stem}-{now.strftime('%Y%m%d-%H%M%S-%f')}-{safe_label}.db"
+        )
+        partial = f"{path}.partial"
+
+        start = time.perf_counter()
+        try:
+            target = sqlite3.connect(partial)
+            try:
+                with self.db_manager.get_connection() as source:
+                    self._copy(source, target)
+                pages = target.execute("PRAGMA page_count").fetchone()[0]
+            finally:
+                target.close()
+            os.replace(partial, path)
+        except BaseException:
+            if os.path.exists(partial):
+                os.remove(partial)
+            raise
+
+        info = BackupInfo(
+            path=path,
+            label=label,
+            created_at=now.isoformat(timespec="seconds"),
+            size_bytes=os.path.getsize(path),
+            duration_s=round(time.perf_counter() - start, 3),
+            pages=pages
+        )
+        with open(info.metadata_path, "w", encoding="utf-8") as f:
+            json.dump(asdict(info), f)
+
+        self.apply_retention()
+        return info
+
+    def _copy(self, source: sqlite3.Connection, target: sqlite3.Connection):
+        """Paged backup, growing the step size while concurrent writes force restarts"""
+        pages = self.pages_per_step
+        while True:
+            state = {'remaining': None, 'restarts': 0}
+
+            def progress(status, remaining, total):
+                # Remaining pages going up again means SQLite restarted the copy
+                if state['remaining'] is not None and remaining > state['remaining']:
+                    state['restarts'] += 1
+                    if state['restarts'] > MAX_RESTARTS_PER_ATTEMPT:
+                        raise _BackupRestarted()
+                state['remaining'] = remaining
+
+            try:
+                source.backup(target, pages=pages, progress=progress, sleep=self.step_sleep)
+                return
+            except _BackupRestarted:
+                # Once a step covers the whole database the copy cannot restart
+                pages *= STEP_GROWTH
+
+    def list_snapshots(self) -> List[BackupInfo]:
+        """
+        List snapshots of this database, newest first
+
+        Returns:
+            List of BackupInfo
+        """
+        if not os.path.isdir(self.backup_dir):
+            return []
+
+        snapshots = []
+        for path in Path(self.backup_dir).glob(f"{self._stem}-*.db"):
+            metadata = Path(f"{path}.json")
+            if metadata.exists():
+                with open(metadata, encoding="utf-8") as f:
+                    data = json.load(f)
+                data["path"] = str(path)
+                snapshots.append(BackupInfo(**data))
+            else:
+                # Snapshot copied in by hand: derive what we can from the file
+                stat = path.stat()
+                snapshots.append(BackupInfo(
+                    path=str(path),
+                    label="external",
+                    created_at=datetime.fromtimestamp(stat.st_mtime).isoformat(timespec="seconds"),
+                    size_bytes=stat.st_size,
+                    duration_s=0.0,
+                    pages=0
+                ))
+        snapshots.sort(key=lambda info: (info.created_at, info.path), reverse=True)
+        return snapshots
+
+    def apply_retention(self) -> List[str]:
+        """
+        Delete snapshots beyond the retention count of their label
+
+        Returns:
+            Paths of deleted snapshots
+        """
+        if self.retention <= 0:
+            return []
+        removed = []
+        kept: Dict[str, int] = {}
+        for info in self.list_snapshots():
+            kept[info.label] = kept.get(info.label, 0) + 1
+            if kept[info.label] <= self.retention:
+                continue
+            for path in (info.path, info.metadata_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            removed.append(info.path)
+        return removed
+
+    def restore_snapshot(self, path: str, safety_snapshot: bool = True) -> Optional[BackupInfo]:
+        """
+        Replace the live database content with a snapshot
+
+        The destination stays locked for the whole copy, so other
+        connections see either the old or the restored data. A snapshot
+        taken by an older version is then migrated to the current schema.
+
+        Args:
+            path: Snapshot file
+            safety_snapshot: Take a "pre-restore" snapshot of the live data first
+
+        Returns:
+            BackupInfo of the safety snapshot, if one was taken
+        """
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+
+        safety = self.create_snapshot("pre-restore") if safety_snapshot else None
+
+        source = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            with self.db_manager.get_connection() as target:
+                source.backup(target)
+        finally:
+            source.close()
+
+        self.db_manager.upgrade_schema()
+        # Session index and every process cache refer to the replaced data
+        self.db_manager.notify_data_replaced()
+        return safety
+
+
+_scheduler_thread: Optional[threading.Thread] = None
+_scheduler_lock = threading.Lock()
+
+
+def start_backup_scheduler(backup_manager: BackupManager, interval_s: float) -> threading.Thread:
+    """
+    Take a "scheduled" snapshot every interval_s seconds (once per process)
+
+    Args:
+        backup_manager: BackupManager to use
+        interval_s: Seconds between snapshots
+
+    Returns:
+        Daemon thread running the schedule
+    """
+    global _scheduler_thread
+
+    def run():
+        while True:
+            time.sleep(interval_s)
+            try:
+                backup_manager.create_snapshot("scheduled")
+            except Exception:
+                logger.exception("Scheduled backup failed")
+
+    with _scheduler_lock:
+        if _scheduler_thread is None:
+            _scheduler_thread = threading.Thread(target=run, name="backup-scheduler", daemon=True)
+            _scheduler_thread.start()
+        return _scheduler_thread
+
+
+def start_backup_scheduler_from_settings(db_manager: DatabaseManager) -> Optional[threading.Thread]:
+    """
+    Start the backup schedule if the backup_interval setting (seconds) is set
+
+    Returns:
+        Scheduler thread or None if scheduling is disabled
+    """
+    interval = get_settings().backup_interval
+    if not interval:
+        return None
+    return start_backup_scheduler(BackupManager(db_manager), interval)
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Online backup and restore of the vote database")
+    parser.add_argument("--db", default=get_settings().db_path, help="SQLite database path")
+    parser.add_argument("--dir", help="Snapshot directory")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="List snapshots")
+    create = sub.add_parser("create", help="Take a snapshot")
+    create.add_argument("--label", default="manual")
+    restore = sub.add_parser("restore", help="Restore a snapshot into the database")
+    restore.add_argument("snapshot", help="Snapshot file")
+    restore.add_argument("--no-safety-snapshot", action="store_true",
+                         help="Do not snapshot the live data before restoring")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    db_manager = DatabaseManager(args.db)
+    backups = BackupManager(db_manager, backup_dir=args.dir)
+
+    try:
+        if args.command == "list":
+            for info in backups.list_snapshots():
+                print(f"{info.created_at}  {info.label:<12} {info.size_bytes / 1024:9.1f} KiB  "
+                      f"{info.duration_s:6.2f}s  {info.path}")
+        elif args.command == "create":
+            db_manager.initialize_database()
+            info = backups.create_snapshot(args.label)
+            logger.info("Snapshot %s (%.1f KiB in %.2fs)",
+                        info.path, info.size_bytes / 1024, info.duration_s)
+        else:
+            safety = backups.restore_snapshot(args.snapshot, not args.no_safety_snapshot)
+            if safety is not None:
+                logger.info("Live data saved to %s", safety.path)
+            logger.info("Restored %s into %s", args.snapshot, args.db)
+    except (sqlite3.Error, OSError) as e:
+        logger.error("Backup command failed: %s", e)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
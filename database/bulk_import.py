@@ -0,0 +1,212 @@
+"""
+Bulk import for VibeTheForce
+Loads historical vote dumps (CSV or JSON Lines) with executemany in large
+transactions, deferring triggers and secondary indexes until the end
+
+Accepted fields per record: rating (required), session_id, timestamp,
+talk_id, comment. The output of database.export is a valid input.
+
+Usage:
+    python -m database.bulk_import votes.jsonl [--db database/votes.db]
+"""
+
+import argparse
+import csv
+import json
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from database.db_manager import DatabaseManager
+from utils.session_identity import new_session_id, to_session_key
+from utils.settings import get_settings
+
+
+DEFAULT_BATCH_SIZE = 50_000
+
+
+@dataclass
+class ImportReport:
+    """Outcome of a bulk import"""
+    imported: int = 0
+    comments: int = 0
+    skipped: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        """Imported votes per second"""
+        return self.imported / self.seconds if self.seconds else 0.0
+
+
+def read_records(path: str) -> Iterator[Dict]:
+    """
+    Stream records from a CSV or JSON Lines file
+
+    Args:
+        path: File path; the format is chosen by extension (.csv, .jsonl, .json)
+
+    Yields:
+        One dictionary per vote
+    """
+    suffix = Path(path).suffix.lower()
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if suffix == ".csv":
+            yield from csv.DictReader(f)
+        elif suffix in (".jsonl", ".json", ".ndjson"):
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        else:
+            raise ValueError(f"Unsupported import format: {suffix}")
+
+
+def _normalize(record: Dict) -> Optional[tuple]:
+    """
+    Convert a raw record to (rating, session_key, timestamp, talk_id, comment)
+
+    Returns:
+        Tuple of column values, or None if the record is invalid
+    """
+    try:
+        rating = int(record["rating"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if rating < 1 or rating > 5:
+        return None
+
+    comment = (record.get("comment") or "").strip()[:500] or None
+    return (
+        rating,
+        to_session_key(record.get("session_id") or new_session_id()),
+        record.get("timestamp") or None,
+        record.get("talk_id") or "main",
+        comment,
+    )
+
+
+def _deferred_objects(conn) -> List[tuple]:
+    """Triggers and secondary indexes on votes/comments (name, type, sql)"""
+    return conn.execute("""
+        SELECT name, type, sql FROM sqlite_master
+        WHERE tbl_name IN ('votes', 'comments')
+            AND type IN ('index', 'trigger')
+            AND sql IS NOT NULL
+    """).fetchall()
+
+
+def bulk_import(
+    db_manager: DatabaseManager,
+    records: Iterable[Dict],
+    batch_size: int = DEFAULT_BATCH_SIZE
+) -> ImportReport:
+    """
+    Load votes (and their comments) in large executemany transactions
+
+    Secondary indexes and the rollup triggers are dropped for the duration
+    of the load and recreated afterwards; the rollup table is then rebuilt
+    in one GROUP BY pass and the session index re-warmed. The UNIQUE
+    constraint on (round_id, talk_id, session_id) stays active: duplicates (within
+    the file or against existing votes) are skipped. Votes are imported
+    into the current round.
+
+    Args:
+        db_manager: Target DatabaseManager (schema must be initialized)
+        records: Iterable of raw records (see read_records)
+        batch_size: Votes per transaction
+
+    Returns:
+        ImportReport with counts and duration
+    """
+    report = ImportReport()
+    start = time.perf_counter()
+
+    with db_manager.get_connection() as conn:
+        deferred = _deferred_objects(conn)
+        for name, obj_type, _ in deferred:
+            conn.execute(f'DROP {obj_type.upper()} IF EXISTS "{name}"')
+        conn.commit()
+
+        try:
+            next_id = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM votes").fetchone()[0]
+            round_id = conn.execute("SELECT MAX(id) FROM rounds").fetchone()[0]
+            batch = []
+
+            def flush():
+                nonlocal next_id
+                votes = [(next_id + i,) + row[:4] + (round_id,) for i, row in enumerate(batch)]
+                cursor = conn.executemany(
+                    "INSERT OR IGNORE INTO votes (id, rating, session_id, timestamp, talk_id, round_id) "
+                    "VALUES (?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP), ?, ?)",
+                    votes
+                )
+                inserted = cursor.rowcount
+                comments = [
+                    (vote[0], row[4], vote[3], vote[0])
+                    for vote, row in zip(votes, batch) if row[4]
+                ]
+                if comments:
+                    # Only attach comments to votes that were not ignored
+                    cursor = conn.executemany(
+                        "INSERT INTO comments (vote_id, comment, timestamp) "
+                        "SELECT ?, ?, COALESCE(?, CURRENT_TIMESTAMP) "
+                        "WHERE EXISTS (SELECT 1 FROM votes WHERE id = ?)",
+                        comments
+                    )
+                    report.comments += cursor.rowcount
+                conn.commit()
+                report.imported += inserted
+                report.skipped += len(batch) - inserted
+                next_id += len(batch)
+                batch.clear()
+
+            for record in records:
+                row = _normalize(record)
+                if row is None:
+                    report.skipped += 1
+                    continue
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    flush()
+            if batch:
+                flush()
+        finally:
+            # Recreate deferred indexes and triggers even if the load failed
+            for _, _, sql in deferred:
+                conn.execute(sql)
+            conn.commit()
+
+    db_manager.rebuild_vote_rollup()
+    db_manager.rebuild_talk_stats()
+    db_manager.session_index.clear()
+    db_manager.warm_session_index()
+    db_manager.change_notifier.notify()
+
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Bulk import of historical votes")
+    parser.add_argument("path", help="CSV or JSON Lines file")
+    parser.add_argument("--db", default=get_settings().db_path, help="SQLite database path")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    db_manager = DatabaseManager(args.db)
+    db_manager.initialize_database()
+    report = bulk_import(db_manager, read_records(args.path), args.batch_size)
+    print(
+        f"Imported {report.imported} votes ({report.comments} comments), "
+        f"skipped {report.skipped}, in {report.seconds:.1f}s "
+        f"({report.rate:.0f} votes/s)",
+        file=sys.stderr
+    )
+
+
+if __name__ == "__main__":
+    main()
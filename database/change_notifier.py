@@ -0,0 +1,104 @@
+"""
+Change Notifier for VibeTheForce
+Cross-process change counters for several app processes on one machine
+
+A small sidecar file next to the database ("<db>-version") is memory
+mapped by every process. Writers bump a change counter after each
+committed transaction (and a reset counter after a reset) under an
+exclusive file lock; readers compare the mapped counters with the values
+their caches were built from. Reading is a plain memory access, so a
+results cache can check it on every request and see a vote committed by
+any process on its very next read.
+
+The counters only signal that something changed; they are never used as
+data. A torn read while another process is writing can only cause a
+spurious cache miss.
+"""
+
+import mmap
+import os
+import struct
+import threading
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: notifications disabled, caches rely on their TTL
+    fcntl = None
+
+# Layout of the shared segment: change counter, reset counter
+_SEGMENT = struct.Struct("<QQ")
+
+
+class ChangeNotifier:
+    """Shared change and reset counters mapped from a sidecar file"""
+
+    def __init__(self, db_path: str):
+        """
+        Initialize ChangeNotifier
+
+        Args:
+            db_path: Path of the SQLite database the counters refer to
+        """
+        self.path: Optional[str] = None
+        self._map: Optional[mmap.mmap] = None
+        self._fd: Optional[int] = None
+        self._lock = threading.Lock()
+
+        if fcntl is None or db_path == ":memory:":
+            return
+
+        self.path = f"{db_path}-version"
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size < _SEGMENT.size:
+                os.ftruncate(self._fd, _SEGMENT.size)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._map = mmap.mmap(self._fd, _SEGMENT.size)
+
+    @property
+    def enabled(self) -> bool:
+        """True if the shared segment is available on this platform"""
+        return self._map is not None
+
+    @property
+    def version(self) -> Optional[int]:
+        """Current change counter (None if notifications are disabled)"""
+        if self._map is None:
+            return None
+        return _SEGMENT.unpack_from(self._map)[0]
+
+    @property
+    def resets(self) -> Optional[int]:
+        """Current reset counter (None if notifications are disabled)"""
+        if self._map is None:
+            return None
+        return _SEGMENT.unpack_from(self._map)[1]
+
+    def notify(self, reset: bool = False):
+        """
+        Signal a committed change to every process
+
+        Args:
+            reset: True if all data was deleted
+        """
+        if self._map is None:
+            return
+        # The thread lock serializes this process; flock serializes processes
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                version, resets = _SEGMENT.unpack_from(self._map)
+                _SEGMENT.pack_into(self._map, 0, version + 1, resets + int(reset))
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def close(self):
+        """Unmap the segment and close the sidecar file"""
+        if self._map is not None:
+            self._map.close()
+            os.close(self._fd)
+            self._map = None
+            self._fd = None
@@ -5,25 +5,145 @@ Handles SQLite database initialization, connection pooling, and common queries
 
 import sqlite3
 import os
+import threading
+import time
 from contextlib import contextmanager
-from typing import Optional, List, Tuple
+from datetime import datetime
+from typing import Dict, Optional, List, Sequence, Tuple
 from pathlib import Path
 
+from database.change_notifier import ChangeNotifier
+from database.instrumentation import InstrumentedConnection, QueryEvent, QueryInstrumentation
+from database.migrations import run_migrations
+from database.read_replica import ReadReplica
+from database.session_index import SessionIndex
+from utils.session_identity import to_session_key
+from utils.metrics import DB_QUERIES_TOTAL, DB_TRANSACTION_SECONDS, QUEUE_DEPTH
+from utils.settings import get_settings
+
+# Write transactions waiting for or holding the single SQLite writer
+_write_queue = QUEUE_DEPTH.labels(queue="db_write")
+
+# Subquery for the current round: reads and writes only see the latest round
+CURRENT_ROUND = "(SELECT MAX(id) FROM rounds)"
+
+
+def _talk_filter(talk_id: Optional[str], column: str = "talk_id") -> Tuple[str, tuple]:
+    """SQL condition and parameters restricting a read to one talk (none for all talks)"""
+    if talk_id is None:
+        return "", ()
+    return f" AND {column} = ?", (talk_id,)
+
 
 class DatabaseManager:
     """Manages SQLite database operations with connection pooling and transaction support"""
     
-    def __init__(self, db_path: str = "database/votes.db"):
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        instrumentation: Optional[QueryInstrumentation] = None,
+        session_index: Optional[SessionIndex] = None
+    ):
         """
         Initialize DatabaseManager
         
         Args:
-            db_path: Path to SQLite database file
+            db_path: Path to SQLite database file (default: settings db_path)
+            instrumentation: Optional QueryInstrumentation collecting query timings
+            session_index: In-memory index of voted sessions (default: exact set)
         """
+        db_path = db_path or get_settings().db_path
         self.db_path = db_path
+        self.instrumentation = instrumentation
+        self.session_index = session_index if session_index is not None else SessionIndex()
         self._ensure_database_directory()
+        # Shared with other processes using the same database file
+        self.change_notifier = ChangeNotifier(db_path)
+        self._seen_resets = self.change_notifier.resets
+        # In-memory copy for aggregate reads, driven by the replica_* settings
+        self.replica: Optional[ReadReplica] = None
+        self._replica_lock = threading.Lock()
         self._initialized = False
     
+    def enable_instrumentation(self, slow_query_ms: float = 50.0) -> QueryInstrumentation:
+        """
+        Enable query instrumentation if not already active
+        
+        Args:
+            slow_query_ms: Threshold above which EXPLAIN QUERY PLAN is captured
+        
+        Returns:
+            Active QueryInstrumentation instance
+        """
+        if self.instrumentation is None:
+            self.instrumentation = QueryInstrumentation(slow_query_ms=slow_query_ms)
+        return self.instrumentation
+    
+    def disable_instrumentation(self):
+        """Disable query instrumentation"""
+        self.instrumentation = None
+    
+    def _active_replica(self) -> Optional[ReadReplica]:
+        """
+        Start, reconfigure or stop the read replica to match the settings
+        
+        Returns:
+            The running ReadReplica, or None if aggregate reads go to the file
+        """
+        settings = get_settings()
+        replica = self.replica
+        if settings.replica_interval <= 0 or self.db_path == ":memory:":
+            if replica is not None:
+                with self._replica_lock:
+                    self.replica = None
+                replica.close()
+            return None
+        if replica is None:
+            with self._replica_lock:
+                if self.replica is None:
+                    self.replica = ReadReplica(
+                        self.db_path, self.change_notifier,
+                        interval=settings.replica_interval,
+                        max_staleness=settings.replica_max_staleness,
+                        timeout=settings.db_timeout
+                    )
+                    self.replica.start()
+                replica = self.replica
+        elif (replica.interval, replica.max_staleness) != (
+                settings.replica_interval, settings.replica_max_staleness):
+            replica.configure(settings.replica_interval, settings.replica_max_staleness)
+        return replica
+    
+    @property
+    def read_version(self) -> Optional[int]:
+        """
+        Change counter of the data served by execute_read
+        The replica's version while it is active (refreshed first if too
+        old or invalidated), so caches built from replica reads change
+        with the copy, not with the file
+        """
+        replica = self._active_replica()
+        if replica is None:
+            return self.change_notifier.version
+        try:
+            replica.ensure_fresh()
+        except sqlite3.Error:
+            # The read that follows reports the error
+            pass
+        return replica.version
+    
+    def read_as_of(self) -> datetime:
+        """
+        Time the data served by execute_read was current
+        
+        Returns:
+            When the replica was last brought up to date, or now without replica
+        """
+        replica = self._active_replica()
+        if replica is None or replica.as_of is None:
+            return datetime.now()
+        return replica.as_of
+    
     def _ensure_database_directory(self):
         """Ensure the database directory exists"""
         db_dir = os.path.dirname(self.db_path)
@@ -33,11 +153,19 @@ class DatabaseManager:
     def initialize_database(self):
         """
         Initialize database with schema from schema.sql
-        Creates tables and indexes if they don't exist
+        Applies pending migrations, then creates tables and indexes if they don't exist
         """
         if self._initialized:
             return
-        
+        self.upgrade_schema()
+        self.warm_session_index()
+        self._initialized = True
+    
+    def upgrade_schema(self):
+        """
+        Bring the file's schema up to date: migrations, schema.sql, rollups
+        Also run on data that replaced the file (e.g. a restored snapshot)
+        """
         schema_path = Path(__file__).parent / "schema.sql"
         
         if not schema_path.exists():
@@ -47,11 +175,85 @@ class DatabaseManager:
             schema_sql = f.read()
         
         with self.get_connection() as conn:
+            # Only takes effect on a new database; archived rounds free pages
+            # that the archiver returns with incremental_vacuum
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            run_migrations(conn)
             cursor = conn.cursor()
             cursor.executescript(schema_sql)
             conn.commit()
         
-        self._initialized = True
+        self.ensure_vote_rollup()
+        self.ensure_talk_stats()
+    
+    def ensure_vote_rollup(self):
+        """
+        Rebuild the per-minute rollup if it is out of sync with votes
+        (e.g. a database created before the rollup table existed)
+        """
+        votes, rolled_up = self.execute_query(f"""
+            SELECT
+                (SELECT COUNT(*) FROM votes WHERE round_id = {CURRENT_ROUND}),
+                (SELECT COALESCE(SUM(rating_1 + rating_2 + rating_3 + rating_4 + rating_5), 0)
+                 FROM vote_rollup_minute)
+        """)[0]
+        if votes != rolled_up:
+            self.rebuild_vote_rollup()
+    
+    def rebuild_vote_rollup(self):
+        """Recompute vote_rollup_minute from the current round's votes"""
+        with self.get_transaction() as conn:
+            conn.execute("DELETE FROM vote_rollup_minute")
+            conn.execute(f"""
+                INSERT INTO vote_rollup_minute (
+                    talk_id, minute, rating_1, rating_2, rating_3, rating_4, rating_5
+                )
+                SELECT
+                    talk_id,
+                    strftime('%Y-%m-%d %H:%M', timestamp) AS minute,
+                    SUM(rating = 1), SUM(rating = 2), SUM(rating = 3),
+                    SUM(rating = 4), SUM(rating = 5)
+                FROM votes
+                WHERE round_id = {CURRENT_ROUND}
+                GROUP BY talk_id, minute
+            """)
+    
+    def ensure_talk_stats(self):
+        """
+        Rebuild talk_stats if it is out of sync with votes
+        (e.g. a database created before the table existed)
+        """
+        votes, counted = self.execute_query(f"""
+            SELECT
+                (SELECT COUNT(*) FROM votes WHERE round_id = {CURRENT_ROUND}),
+                (SELECT COALESCE(SUM(votes), 0) FROM talk_stats)
+        """)[0]
+        if votes != counted:
+            self.rebuild_talk_stats()
+    
+    def rebuild_talk_stats(self):
+        """Recompute talk_stats from the current round's votes"""
+        with self.get_transaction() as conn:
+            conn.execute("DELETE FROM talk_stats")
+            conn.execute(f"""
+                INSERT INTO talk_stats (talk_id, votes, rating_sum, rating_sumsq)
+                SELECT talk_id, COUNT(*), SUM(rating), SUM(rating * rating)
+                FROM votes
+                WHERE round_id = {CURRENT_ROUND}
+                GROUP BY talk_id
+            """)
+    
+    def warm_session_index(self):
+        """
+        Load the (talk, session) pairs that voted in the current round into
+        the in-memory session index
+        Rows are streamed from the cursor, never materialized as a list
+        """
+        with self.get_connection() as conn:
+            cursor = conn.execute(
+                f"SELECT talk_id, session_id FROM votes WHERE round_id = {CURRENT_ROUND}"
+            )
+            self.session_index.warm(cursor)
     
     @contextmanager
     def get_connection(self):
@@ -69,7 +271,7 @@ class DatabaseManager:
         """
         conn = sqlite3.connect(
             self.db_path,
-            timeout=10.0,
+            timeout=get_settings().db_timeout,
             check_same_thread=False
         )
         # Enable foreign key constraints
@@ -98,6 +300,31 @@ class DatabaseManager:
         Yields:
             sqlite3.Connection: Database connection with transaction
         """
+        instrumentation = self.instrumentation
+        DB_QUERIES_TOTAL.labels(kind="transaction").inc()
+        _write_queue.inc()
+        
+        try:
+            with DB_TRANSACTION_SECONDS.time():
+                transaction = (
+                    self._plain_transaction() if instrumentation is None
+                    else self._instrumented_transaction(instrumentation)
+                )
+                with transaction as conn:
+                    changes = conn.total_changes
+                    yield conn
+                    changed = conn.total_changes != changes
+            # Committed rows: let caches in every process know (a transaction
+            # that changed nothing, like an empty moderation claim, does not
+            # invalidate them)
+            if changed:
+                self.change_notifier.notify()
+        finally:
+            _write_queue.dec()
+    
+    @contextmanager
+    def _plain_transaction(self):
+        """Transaction without instrumentation (implicit BEGIN)"""
         with self.get_connection() as conn:
             try:
                 yield conn
@@ -106,6 +333,40 @@ class DatabaseManager:
                 conn.rollback()
                 raise e
     
+    @contextmanager
+    def _instrumented_transaction(self, instrumentation: QueryInstrumentation):
+        """
+        Transaction that records duration and lock-wait time, and hands out
+        an InstrumentedConnection so each statement is timed as well.
+        Same implicit BEGIN as _plain_transaction: instrumentation must not
+        make read-only transactions take the write lock. The lock wait is
+        the time spent in COMMIT, which in rollback-journal mode waits for
+        readers to release their SHARED locks; waits for the RESERVED lock
+        on the first write fall in that statement's own timing.
+        """
+        with self.get_connection() as conn:
+            start = time.perf_counter()
+            commit_start = None
+            error = None
+            try:
+                yield InstrumentedConnection(conn, instrumentation)
+                commit_start = time.perf_counter()
+                conn.commit()
+            except Exception as e:
+                error = str(e)
+                conn.rollback()
+                raise e
+            finally:
+                end = time.perf_counter()
+                # A COMMIT that timed out on the lock still counts as waiting
+                lock_wait_ms = (end - commit_start) * 1000.0 if commit_start is not None else 0.0
+                instrumentation.record(QueryEvent(
+                    sql=QueryInstrumentation.TRANSACTION_KEY,
+                    duration_ms=(end - start) * 1000.0,
+                    lock_wait_ms=lock_wait_ms,
+                    error=error
+                ))
+    
     # Helper functions for common queries
     
     def execute_query(self, query: str, params: tuple = ()) -> List[Tuple]:
@@ -119,11 +380,33 @@ class DatabaseManager:
         Returns:
             List of tuples containing query results
         """
+        DB_QUERIES_TOTAL.labels(kind="select").inc()
         with self.get_connection() as conn:
+            if self.instrumentation is not None:
+                return self.instrumentation.run(conn, query, params, fetch=True)
             cursor = conn.cursor()
             cursor.execute(query, params)
             return cursor.fetchall()
     
+    def execute_read(self, query: str, params: tuple = ()) -> List[Tuple]:
+        """
+        Execute an aggregate SELECT query, on the read replica when active
+        Results may lag the file by up to replica_max_staleness seconds;
+        use execute_query for reads that must see the latest commit
+        
+        Args:
+            query: SQL query string
+            params: Query parameters (for parameterized queries)
+        
+        Returns:
+            List of tuples containing query results
+        """
+        replica = self._active_replica()
+        if replica is None:
+            return self.execute_query(query, params)
+        DB_QUERIES_TOTAL.labels(kind="replica").inc()
+        return replica.execute_query(query, params)
+    
     def execute_insert(self, query: str, params: tuple = ()) -> int:
         """
         Execute an INSERT query and return the last row ID
@@ -135,6 +418,8 @@ class DatabaseManager:
         Returns:
             Last inserted row ID
         """
+        DB_QUERIES_TOTAL.labels(kind="insert").inc()
+        # Instrumented transactions time the statement themselves
         with self.get_transaction() as conn:
             cursor = conn.cursor()
             cursor.execute(query, params)
@@ -151,30 +436,43 @@ class DatabaseManager:
         Returns:
             Number of affected rows
         """
+        DB_QUERIES_TOTAL.labels(kind="update").inc()
         with self.get_transaction() as conn:
             cursor = conn.cursor()
             cursor.execute(query, params)
             return cursor.rowcount
     
-    def get_vote_count(self) -> int:
+    def get_vote_count(self, talk_id: Optional[str] = None) -> int:
         """
-        Get total number of votes
+        Get total number of votes in the current round
+        
+        Args:
+            talk_id: Only count this talk's votes (default: every talk in this database)
         
         Returns:
             Total vote count
         """
-        result = self.execute_query("SELECT COUNT(*) FROM votes")
+        talk_sql, params = _talk_filter(talk_id)
+        result = self.execute_read(
+            f"SELECT COUNT(*) FROM votes WHERE round_id = {CURRENT_ROUND}{talk_sql}", params
+        )
         return result[0][0] if result else 0
     
-    def get_votes_by_rating(self) -> dict:
+    def get_votes_by_rating(self, talk_id: Optional[str] = None) -> dict:
         """
-        Get vote counts grouped by rating
+        Get vote counts of the current round grouped by rating
+        
+        Args:
+            talk_id: Only count this talk's votes (default: every talk in this database)
         
         Returns:
             Dictionary mapping rating (1-5) to count
         """
-        results = self.execute_query(
-            "SELECT rating, COUNT(*) as count FROM votes GROUP BY rating"
+        talk_sql, params = _talk_filter(talk_id)
+        results = self.execute_read(
+            f"SELECT rating, COUNT(*) as count FROM votes "
+            f"WHERE round_id = {CURRENT_ROUND}{talk_sql} GROUP BY rating",
+            params
         )
         
         # Initialize all ratings with 0
@@ -186,80 +484,348 @@ class DatabaseManager:
         
         return vote_counts
     
-    def get_average_rating(self) -> float:
+    def get_average_rating(self, talk_id: Optional[str] = None) -> float:
         """
-        Calculate average rating across all votes
+        Calculate average rating across the votes of the current round
+        
+        Args:
+            talk_id: Only average this talk's votes (default: every talk in this database)
         
         Returns:
             Average rating (0.0 if no votes)
         """
-        result = self.execute_query(
-            "SELECT AVG(CAST(rating AS FLOAT)) FROM votes"
+        talk_sql, params = _talk_filter(talk_id)
+        result = self.execute_read(
+            f"SELECT AVG(CAST(rating AS FLOAT)) FROM votes WHERE round_id = {CURRENT_ROUND}{talk_sql}",
+            params
         )
         avg = result[0][0] if result and result[0][0] is not None else 0.0
         return round(avg, 2)
     
-    def get_comment_count(self) -> int:
+    def get_comment_count(self, talk_id: Optional[str] = None) -> int:
         """
-        Get total number of comments
+        Get the number of approved comments in the current round
+        
+        Args:
+            talk_id: Only count comments on this talk's votes (default: every talk)
         
         Returns:
-            Total comment count
+            Approved comment count
         """
-        result = self.execute_query("SELECT COUNT(*) FROM comments")
+        talk_sql, params = _talk_filter(talk_id, "v.talk_id")
+        result = self.execute_read(f"""
+            SELECT COUNT(*)
+            FROM comments c
+            JOIN votes v ON c.vote_id = v.id
+            WHERE v.round_id = {CURRENT_ROUND} AND c.comment_status = 'approved'{talk_sql}
+        """, params)
         return result[0][0] if result else 0
     
-    def get_all_comments_with_ratings(self) -> List[Tuple[str, int, str]]:
+    def get_all_comments_with_ratings(self, talk_id: Optional[str] = None) -> List[Tuple[str, int, str]]:
         """
-        Get all comments with their associated ratings and timestamps
+        Get the current round's approved comments with their ratings and timestamps
+        
+        Args:
+            talk_id: Only comments on this talk's votes (default: every talk)
         
         Returns:
             List of tuples (comment, rating, timestamp)
         """
-        return self.execute_query("""
+        talk_sql, params = _talk_filter(talk_id, "v.talk_id")
+        return self.execute_read(f"""
             SELECT c.comment, v.rating, c.timestamp
             FROM comments c
             JOIN votes v ON c.vote_id = v.id
+            WHERE v.round_id = {CURRENT_ROUND} AND c.comment_status = 'approved'{talk_sql}
             ORDER BY c.timestamp DESC
+        """, params)
+    
+    def get_comment_status_counts(self) -> Dict[str, int]:
+        """
+        Count the current round's comments by moderation status
+        
+        Returns:
+            Dictionary mapping comment_status to count
+        """
+        return dict(self.execute_read(f"""
+            SELECT c.comment_status, COUNT(*)
+            FROM comments c
+            JOIN votes v ON c.vote_id = v.id
+            WHERE v.round_id = {CURRENT_ROUND}
+            GROUP BY c.comment_status
+        """))
+    
+    def claim_pending_comments(self, limit: int, claim_timeout: float) -> List[Tuple[int, str, str]]:
+        """
+        Atomically claim a batch of comments for moderation
+        Claimed comments move to 'processing'; a claim older than
+        claim_timeout (a worker that died) can be taken again, so several
+        workers and processes never moderate the same fresh comment twice
+        
+        Args:
+            limit: Maximum number of comments to claim
+            claim_timeout: Seconds after which a 'processing' claim expires
+        
+        Returns:
+            List of tuples (comment_id, comment, talk_id of the vote) in id order
+        """
+        with self.get_transaction() as conn:
+            rows = conn.execute("""
+                UPDATE comments
+                SET comment_status = 'processing', moderated_at = CURRENT_TIMESTAMP
+                WHERE id IN (
+                    SELECT id FROM comments
+                    WHERE comment_status = 'pending'
+                       OR (comment_status = 'processing' AND moderated_at < datetime('now', ?))
+                    ORDER BY id
+                    LIMIT ?
+                )
+                RETURNING id, comment, (SELECT talk_id FROM votes WHERE votes.id = comments.vote_id)
+            """, (f"-{int(claim_timeout)} seconds", limit)).fetchall()
+        return sorted(rows)
+    
+    def complete_comment_moderation(
+        self,
+        outcomes: Sequence[Tuple[int, str, str, Optional[float]]]
+    ) -> int:
+        """
+        Store the outcome of moderated comments
+        
+        Args:
+            outcomes: Tuples (comment_id, comment_status, normalized comment, sentiment or None)
+        
+        Returns:
+            Number of comments updated
+        """
+        with self.get_transaction() as conn:
+            cursor = conn.executemany("""
+                UPDATE comments
+                SET comment_status = ?, comment = ?, sentiment = ?, moderated_at = CURRENT_TIMESTAMP
+                WHERE id = ? AND comment_status = 'processing'
+            """, [(status, comment, sentiment, comment_id)
+                  for comment_id, status, comment, sentiment in outcomes])
+            return cursor.rowcount
+    
+    def release_comment_claims(self, comment_ids: Sequence[int]) -> int:
+        """
+        Put claimed comments back in the queue (after a failed batch)
+        Only comments still in 'processing' are released, so a claim that
+        expired and was taken by another worker is left alone
+        
+        Args:
+            comment_ids: Ids returned by claim_pending_comments
+        
+        Returns:
+            Number of comments released
+        """
+        with self.get_transaction() as conn:
+            cursor = conn.executemany("""
+                UPDATE comments
+                SET comment_status = 'pending', moderated_at = NULL
+                WHERE id = ? AND comment_status = 'processing'
+            """, [(comment_id,) for comment_id in comment_ids])
+            return cursor.rowcount
+    
+    def get_approved_comments(self, after_id: int = 0, talk_id: Optional[str] = None) -> List[Tuple[int, str]]:
+        """
+        Get the current round's approved comments with an id above after_id
+        
+        Args:
+            after_id: Last comment id already seen
+            talk_id: Only comments on this talk's votes (default: every talk)
+        
+        Returns:
+            List of tuples (comment_id, comment) in id order
+        """
+        # CROSS JOIN fixes the join order: a range scan of comments by id,
+        # so an incremental read costs the new comments, not the whole round
+        talk_sql, params = _talk_filter(talk_id, "v.talk_id")
+        return self.execute_query(f"""
+            SELECT c.id, c.comment
+            FROM comments c
+            CROSS JOIN votes v ON c.vote_id = v.id
+            WHERE c.id > ? AND c.comment_status = 'approved' AND v.round_id = {CURRENT_ROUND}{talk_sql}
+            ORDER BY c.id
+        """, (after_id,) + params)
+    
+    def get_moderation_watermark(self) -> int:
+        """
+        Get the highest comment id up to which every comment is moderated
+        Workers complete batches out of order, so approved comments can
+        appear below the highest approved id; readers that page with
+        after_id can safely advance only up to this id
+        
+        Returns:
+            Id below the oldest pending or processing comment, or the
+            highest comment id when the queue is empty (0 without comments)
+        """
+        result = self.execute_query("""
+            SELECT COALESCE(
+                (SELECT MIN(id) FROM comments WHERE comment_status IN ('pending', 'processing')) - 1,
+                (SELECT MAX(id) FROM comments),
+                0
+            )
         """)
+        return result[0][0]
+    
+    def get_votes_by_talk(self) -> Dict[str, Dict[int, int]]:
+        """
+        Get vote counts per rating for every talk in this database
+        Aggregated from the rollup table, so the cost depends on the number
+        of (talk, minute) rows rather than on the number of votes
+        
+        Returns:
+            Dictionary mapping talk_id to {rating: count} for ratings 1-5
+        """
+        rows = self.execute_read("""
+            SELECT talk_id, SUM(rating_1), SUM(rating_2), SUM(rating_3), SUM(rating_4), SUM(rating_5)
+            FROM vote_rollup_minute
+            GROUP BY talk_id
+        """)
+        return {
+            talk_id: {rating: count for rating, count in enumerate(counts, start=1)}
+            for talk_id, *counts in rows
+        }
+    
+    def get_talk_stats(self) -> List[Tuple[str, int, int, int]]:
+        """
+        Get per-talk sufficient statistics for the leaderboard
+        
+        Returns:
+            List of tuples (talk_id, votes, rating_sum, rating_sumsq) for talks with votes
+        """
+        return self.execute_read(
+            "SELECT talk_id, votes, rating_sum, rating_sumsq FROM talk_stats WHERE votes > 0"
+        )
     
-    def reset_all_data(self):
+    def get_vote_timeline(
+        self,
+        talk_id: str = "main",
+        since: Optional[str] = None,
+        until: Optional[str] = None
+    ) -> List[Tuple[str, int, int, int, int, int]]:
         """
-        Delete all votes and comments (admin function)
-        Uses CASCADE to automatically delete related comments
+        Get per-minute vote counts from the rollup table
+        Served by a single range scan on the (talk_id, minute) primary key
+        
+        Args:
+            talk_id: Talk identifier
+            since: Optional first minute ('YYYY-MM-DD HH:MM', inclusive)
+            until: Optional last minute ('YYYY-MM-DD HH:MM', inclusive)
+        
+        Returns:
+            List of tuples (minute, rating_1, ..., rating_5) in chronological order
+        """
+        return self.execute_read("""
+            SELECT minute, rating_1, rating_2, rating_3, rating_4, rating_5
+            FROM vote_rollup_minute
+            WHERE talk_id = ? AND minute >= ? AND minute <= ?
+            ORDER BY minute
+        """, (talk_id, since or "", until or "9999"))
+    
+    def start_new_round(self) -> int:
+        """
+        Start a new voting round (admin reset)
+        Votes and comments of earlier rounds stay in place, invisible to
+        every read, until the archiver moves them out (database/archiver.py);
+        only the per-round aggregate tables are cleared, so the cost does
+        not depend on the number of votes
+        
+        Returns:
+            ID of the new round
         """
         with self.get_transaction() as conn:
             cursor = conn.cursor()
-            cursor.execute("DELETE FROM comments")
-            cursor.execute("DELETE FROM votes")
+            cursor.execute("INSERT INTO rounds DEFAULT VALUES")
+            round_id = cursor.lastrowid
+            cursor.execute("DELETE FROM vote_rollup_minute")
+            cursor.execute("DELETE FROM talk_stats")
+        
+        self.notify_data_replaced()
+        return round_id
     
-    def check_session_exists(self, session_id: str) -> bool:
+    def get_current_round(self) -> int:
         """
-        Check if a session has already voted
+        Get the ID of the current voting round
+        
+        Returns:
+            Current round ID
+        """
+        result = self.execute_query("SELECT MAX(id) FROM rounds")
+        return result[0][0] if result and result[0][0] is not None else 1
+    
+    def get_rounds(self) -> List[Tuple[int, str, Optional[str], int]]:
+        """
+        Get every voting round, newest first
+        
+        Returns:
+            List of tuples (round_id, started_at, archived_at, votes); votes
+            is the live count, or the archived count once the round was archived
+        """
+        return self.execute_query("""
+            SELECT r.id, r.started_at, r.archived_at,
+                   COALESCE(r.archived_votes, (SELECT COUNT(*) FROM votes v WHERE v.round_id = r.id))
+            FROM rounds r
+            ORDER BY r.id DESC
+        """)
+    
+    def notify_data_replaced(self):
+        """
+        Reload the session index and signal a reset to every process
+        Called after the data was deleted or replaced wholesale (reset, restore)
+        """
+        self.session_index.clear()
+        self.warm_session_index()
+        self.change_notifier.notify(reset=True)
+        self._seen_resets = self.change_notifier.resets
+        if self.replica is not None:
+            self.replica.invalidate()
+    
+    def _sync_session_index(self):
+        """Re-warm the session index if another process reset the data"""
+        resets = self.change_notifier.resets
+        if resets == self._seen_resets:
+            return
+        self._seen_resets = resets
+        self.session_index.clear()
+        self.warm_session_index()
+    
+    def check_session_exists(self, session_id: str, talk_id: str = "main") -> bool:
+        """
+        Check if a session has already voted for a talk in the current round
+        Answered from the in-memory session index when possible; the
+        database is only consulted when the index is not definitive
         
         Args:
-            session_id: Session identifier
+            session_id: Session identifier (hex string or 16-byte key)
+            talk_id: Talk identifier
         
         Returns:
-            True if session has voted, False otherwise
+            True if session has voted for the talk, False otherwise
         """
+        session_key = to_session_key(session_id)
+        self._sync_session_index()
+        known = self.session_index.lookup(session_key, talk_id)
+        if known is not None:
+            return known
+        
         result = self.execute_query(
-            "SELECT COUNT(*) FROM votes WHERE session_id = ?",
-            (session_id,)
+            f"SELECT 1 FROM votes WHERE round_id = {CURRENT_ROUND} AND talk_id = ? AND session_id = ? LIMIT 1",
+            (talk_id, session_key)
         )
-        return result[0][0] > 0 if result else False
+        return bool(result)
 
 
 # Singleton instance for application-wide use
 _db_manager_instance: Optional[DatabaseManager] = None
 
 
-def get_db_manager(db_path: str = "database/votes.db") -> DatabaseManager:
+def get_db_manager(db_path: Optional[str] = None) -> DatabaseManager:
     """
     Get or create singleton DatabaseManager instance
     
     Args:
-        db_path: Path to database file
+        db_path: Path to database file (default: settings db_path)
     
     Returns:
         DatabaseManager instance
@@ -268,6 +834,8 @@ def get_db_manager(db_path: str = "database/votes.db") -> DatabaseManager:
     
     if _db_manager_instance is None:
         _db_manager_instance = DatabaseManager(db_path)
+        if get_settings().db_instrumentation:
+            _db_manager_instance.enable_instrumentation()
         _db_manager_instance.initialize_database()
     
     return _db_manager_instance
@@ -0,0 +1,176 @@
+"""
+Streaming export for VibeTheForce
+Pages through votes and comments with a stepping SQLite cursor and writes
+CSV, JSON Lines or Parquet in constant memory
+
+Usage:
+    python -m database.export --table votes --format csv --output votes.csv
+"""
+
+import argparse
+import csv
+import io
+import json
+import sys
+from typing import BinaryIO, Dict, Iterator, List, Tuple
+
+from database.db_manager import DatabaseManager
+from utils.settings import get_settings
+
+
+# Exportable tables: column names and SELECT statement (ordered by primary key)
+EXPORT_TABLES: Dict[str, Tuple[Tuple[str, ...], str]] = {
+    "votes": (
+        ("id", "rating", "session_id", "timestamp", "talk_id", "round_id"),
+        "SELECT id, rating, lower(hex(session_id)), timestamp, talk_id, round_id FROM votes ORDER BY id"
+    ),
+    "comments": (
+        ("id", "vote_id", "comment", "timestamp", "comment_status"),
+        "SELECT id, vote_id, comment, timestamp, comment_status FROM comments ORDER BY id"
+    ),
+}
+
+EXPORT_FORMATS = ("csv", "jsonl", "parquet")
+
+DEFAULT_BATCH_SIZE = 10_000
+
+
+def iter_batches(
+    db_manager: DatabaseManager,
+    table: str,
+    batch_size: int = DEFAULT_BATCH_SIZE
+) -> Iterator[List[Tuple]]:
+    """
+    Iterate over a table in batches without materializing it
+
+    The statement is stepped with fetchmany on one read connection, so only
+    batch_size rows are held in memory at any time.
+
+    Args:
+        db_manager: DatabaseManager to read from
+        table: Table name (see EXPORT_TABLES)
+        batch_size: Rows per batch
+
+    Yields:
+        Lists of row tuples
+    """
+    if table not in EXPORT_TABLES:
+        raise ValueError(f"Unknown table: {table}")
+    _, query = EXPORT_TABLES[table]
+
+    with db_manager.get_connection() as conn:
+        cursor = conn.execute(query)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+
+
+def _write_csv(columns, batches, out: BinaryIO) -> int:
+    """Write batches as CSV with a header row"""
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="", write_through=True)
+    writer = csv.writer(text)
+    writer.writerow(columns)
+    count = 0
+    for rows in batches:
+        writer.writerows(rows)
+        count += len(rows)
+    text.flush()
+    text.detach()
+    return count
+
+
+def _write_jsonl(columns, batches, out: BinaryIO) -> int:
+    """Write batches as JSON Lines, one object per row"""
+    count = 0
+    for rows in batches:
+        chunk = "".join(
+            json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n" for row in rows
+        )
+        out.write(chunk.encode("utf-8"))
+        count += len(rows)
+    return count
+
+
+def _write_parquet(columns, batches, out: BinaryIO) -> int:
+    """Write batches as Parquet, one row group per batch (requires pyarrow)"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export requires pyarrow: pip install pyarrow")
+
+    writer = None
+    count = 0
+    try:
+        for rows in batches:
+            # One row group per batch keeps memory bounded by batch_size
+            table = pa.Table.from_pydict(
+                {name: [row[i] for row in rows] for i, name in enumerate(columns)}
+            )
+            if writer is None:
+                writer = pq.ParquetWriter(out, table.schema)
+            writer.write_table(table)
+            count += len(rows)
+    finally:
+        if writer is not None:
+            writer.close()
+    return count
+
+
+_WRITERS = {
+    "csv": _write_csv,
+    "jsonl": _write_jsonl,
+    "parquet": _write_parquet,
+}
+
+
+def export_table(
+    db_manager: DatabaseManager,
+    table: str,
+    fmt: str,
+    out: BinaryIO,
+    batch_size: int = DEFAULT_BATCH_SIZE
+) -> int:
+    """
+    Stream a table to a binary file object
+
+    Args:
+        db_manager: DatabaseManager to read from
+        table: "votes" or "comments"
+        fmt: "csv", "jsonl" or "parquet"
+        out: Writable binary file object
+        batch_size: Rows fetched per step
+
+    Returns:
+        Number of exported rows
+    """
+    if fmt not in _WRITERS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    columns, _ = EXPORT_TABLES[table]
+    return _WRITERS[fmt](columns, iter_batches(db_manager, table, batch_size), out)
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Export votes or comments")
+    parser.add_argument("--table", choices=sorted(EXPORT_TABLES), default="votes")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv")
+    parser.add_argument("--output", default="-", help="Output file ('-' for stdout)")
+    parser.add_argument("--db", default=get_settings().db_path, help="SQLite database path")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    # Plain manager: no schema setup or session-index warm-up needed to read
+    db_manager = DatabaseManager(args.db)
+    if args.output == "-":
+        count = export_table(db_manager, args.table, args.format, sys.stdout.buffer, args.batch_size)
+    else:
+        with open(args.output, "wb") as out:
+            count = export_table(db_manager, args.table, args.format, out, args.batch_size)
+    print(f"Exported {count} rows from {args.table}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
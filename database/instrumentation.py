@@ -0,0 +1,337 @@
+"""
+Query Instrumentation for VibeTheForce
+Optional timing hooks for DatabaseManager: per-statement latency histograms,
+row counts, lock-wait time and a slow-query log with EXPLAIN QUERY PLAN
+
+Statements run through the execute_* helpers are timed by
+QueryInstrumentation.run; statements issued inside get_transaction go
+through an InstrumentedConnection, so they get their own keys next to the
+whole-transaction TRANSACTION timing.
+"""
+
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+# Latency histogram bucket upper bounds, in milliseconds
+LATENCY_BUCKETS_MS: Tuple[float, ...] = (
+    0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, 500.0, 1000.0
+)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_LINE_COMMENT = re.compile(r"--[^\n]*")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(query: str) -> str:
+    """
+    Normalize a SQL statement so that equivalent queries share one key
+
+    Strips comments, replaces string and numeric literals with '?'
+    and collapses whitespace.
+
+    Args:
+        query: Raw SQL statement
+
+    Returns:
+        Normalized SQL string
+    """
+    query = _LINE_COMMENT.sub(" ", query)
+    query = _STRING_LITERAL.sub("?", query)
+    query = _NUMBER_LITERAL.sub("?", query)
+    return _WHITESPACE.sub(" ", query).strip()
+
+
+@dataclass
+class QueryEvent:
+    """A single instrumented statement or transaction"""
+    sql: str
+    duration_ms: float
+    rows: int = 0
+    lock_wait_ms: float = 0.0
+    error: Optional[str] = None
+    plan: Optional[List[str]] = None
+    timestamp: float = field(default_factory=time.time)
+
+    @property
+    def slow(self) -> bool:
+        """True if a query plan was captured because the statement was slow"""
+        return self.plan is not None
+
+
+@dataclass
+class StatementStats:
+    """Aggregated statistics for one normalized SQL statement"""
+    count: int = 0
+    errors: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    rows: int = 0
+    lock_wait_ms: float = 0.0
+    buckets: List[int] = field(
+        default_factory=lambda: [0] * (len(LATENCY_BUCKETS_MS) + 1)
+    )
+
+    @property
+    def avg_ms(self) -> float:
+        """Average latency in milliseconds"""
+        return self.total_ms / self.count if self.count else 0.0
+
+    def percentile(self, p: float) -> float:
+        """
+        Estimate a latency percentile from the histogram buckets
+
+        Args:
+            p: Percentile in the range 0-100
+
+        Returns:
+            Upper bound (ms) of the bucket containing the percentile
+        """
+        if not self.count:
+            return 0.0
+        target = self.count * p / 100.0
+        seen = 0
+        for i, bucket_count in enumerate(self.buckets):
+            seen += bucket_count
+            if seen >= target:
+                return LATENCY_BUCKETS_MS[i] if i < len(LATENCY_BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def record(self, event: QueryEvent):
+        """Add an event to the aggregate"""
+        self.count += 1
+        self.total_ms += event.duration_ms
+        self.max_ms = max(self.max_ms, event.duration_ms)
+        self.rows += event.rows
+        self.lock_wait_ms += event.lock_wait_ms
+        if event.error:
+            self.errors += 1
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if event.duration_ms <= bound:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+
+
+class QueryInstrumentation:
+    """Collects timing data for statements run through DatabaseManager"""
+
+    # Key used for whole-transaction timings in the statistics table
+    TRANSACTION_KEY = "TRANSACTION"
+
+    def __init__(self, slow_query_ms: float = 50.0, slow_log_size: int = 100):
+        """
+        Initialize QueryInstrumentation
+
+        Args:
+            slow_query_ms: Threshold above which the query plan is captured
+            slow_log_size: Maximum number of entries kept in the slow-query log
+        """
+        self.slow_query_ms = slow_query_ms
+        self._stats: Dict[str, StatementStats] = {}
+        self._slow_log: deque = deque(maxlen=slow_log_size)
+        self._callbacks: List[Callable[[QueryEvent], None]] = []
+        self._lock = threading.Lock()
+
+    def register_callback(self, callback: Callable[[QueryEvent], None]):
+        """
+        Register a callback invoked with every QueryEvent (e.g. for export)
+
+        Args:
+            callback: Callable receiving a QueryEvent
+        """
+        with self._lock:
+            self._callbacks.append(callback)
+
+    def unregister_callback(self, callback: Callable[[QueryEvent], None]):
+        """Remove a previously registered callback"""
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def run(self, conn, query: str, params: tuple, fetch: bool):
+        """
+        Execute a statement on conn and record its timing
+
+        Args:
+            conn: Open sqlite3 connection
+            query: SQL statement
+            params: Query parameters
+            fetch: If True fetch and return all rows, otherwise return the cursor
+
+        Returns:
+            List of rows if fetch is True, else the executed cursor
+        """
+        return self.run_on_cursor(conn.cursor(), query, params, fetch=fetch)
+
+    def run_on_cursor(self, cursor, query: str, params, fetch: bool = False, many: bool = False):
+        """
+        Execute a statement on an existing cursor and record its timing
+
+        Args:
+            cursor: sqlite3 cursor (its connection is used for EXPLAIN)
+            query: SQL statement
+            params: Query parameters, or a sequence of them if many is True
+            fetch: If True fetch and return all rows, otherwise return the cursor
+            many: Run the statement with executemany
+
+        Returns:
+            List of rows if fetch is True, else the executed cursor
+        """
+        start = time.perf_counter()
+        error = None
+        rows = 0
+        try:
+            if many:
+                cursor.executemany(query, params)
+            else:
+                cursor.execute(query, params)
+            if fetch:
+                result = cursor.fetchall()
+                rows = len(result)
+            else:
+                result = cursor
+                rows = max(cursor.rowcount, 0)
+            return result
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000.0
+            plan = None
+            # executemany parameters may be a consumed iterator: no plan for those
+            if error is None and not many and duration_ms >= self.slow_query_ms:
+                plan = self._explain(cursor.connection, query, params)
+            self.record(QueryEvent(
+                sql=normalize_sql(query),
+                duration_ms=duration_ms,
+                rows=rows,
+                error=error,
+                plan=plan
+            ))
+
+    def record(self, event: QueryEvent):
+        """
+        Aggregate an event and forward it to registered callbacks
+
+        Args:
+            event: QueryEvent to record
+        """
+        with self._lock:
+            stats = self._stats.get(event.sql)
+            if stats is None:
+                stats = self._stats[event.sql] = StatementStats()
+            stats.record(event)
+            if event.slow:
+                self._slow_log.append(event)
+            callbacks = list(self._callbacks)
+
+        for callback in callbacks:
+            try:
+                callback(event)
+            except Exception:
+                # Export hooks must never break the query path
+                pass
+
+    def _explain(self, conn, query: str, params: tuple) -> List[str]:
+        """Capture EXPLAIN QUERY PLAN output for a statement"""
+        try:
+            cursor = conn.execute(f"EXPLAIN QUERY PLAN {query}", params)
+            return [row[-1] for row in cursor.fetchall()]
+        except Exception as e:
+            return [f"EXPLAIN non disponibile: {e}"]
+
+    def get_stats(self) -> Dict[str, StatementStats]:
+        """
+        Get a copy of per-statement statistics
+
+        Returns:
+            Dictionary mapping normalized SQL to StatementStats
+        """
+        with self._lock:
+            return {
+                sql: StatementStats(
+                    count=s.count,
+                    errors=s.errors,
+                    total_ms=s.total_ms,
+                    max_ms=s.max_ms,
+                    rows=s.rows,
+                    lock_wait_ms=s.lock_wait_ms,
+                    buckets=list(s.buckets)
+                )
+                for sql, s in self._stats.items()
+            }
+
+    def get_slow_queries(self) -> List[QueryEvent]:
+        """
+        Get the slow-query log, most recent first
+
+        Returns:
+            List of QueryEvent with captured query plans
+        """
+        with self._lock:
+            return list(reversed(self._slow_log))
+
+    def reset(self):
+        """Clear all collected statistics and the slow-query log"""
+        with self._lock:
+            self._stats.clear()
+            self._slow_log.clear()
+
+
+class InstrumentedCursor:
+    """sqlite3.Cursor wrapper that records every execute through a QueryInstrumentation"""
+
+    def __init__(self, cursor, instrumentation: QueryInstrumentation):
+        self._cursor = cursor
+        self._instrumentation = instrumentation
+
+    def execute(self, query: str, params=()) -> "InstrumentedCursor":
+        """Timed cursor.execute (returns self, like sqlite3)"""
+        self._instrumentation.run_on_cursor(self._cursor, query, params)
+        return self
+
+    def executemany(self, query: str, seq_of_params) -> "InstrumentedCursor":
+        """Timed cursor.executemany (returns self, like sqlite3)"""
+        self._instrumentation.run_on_cursor(self._cursor, query, seq_of_params, many=True)
+        return self
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class InstrumentedConnection:
+    """
+    sqlite3.Connection wrapper handed out by instrumented transactions
+
+    execute, executemany and cursor() are timed per statement; everything
+    else (commit, total_changes, ...) goes to the wrapped connection.
+    """
+
+    def __init__(self, conn, instrumentation: QueryInstrumentation):
+        self._conn = conn
+        self._instrumentation = instrumentation
+
+    def cursor(self) -> InstrumentedCursor:
+        """Cursor whose statements are timed"""
+        return InstrumentedCursor(self._conn.cursor(), self._instrumentation)
+
+    def execute(self, query: str, params=()) -> InstrumentedCursor:
+        """Timed connection.execute"""
+        return self.cursor().execute(query, params)
+
+    def executemany(self, query: str, seq_of_params) -> InstrumentedCursor:
+        """Timed connection.executemany"""
+        return self.cursor().executemany(query, seq_of_params)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
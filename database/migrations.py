@@ -0,0 +1,281 @@
+"""
+Schema migrations for VibeTheForce
+Idempotent upgrade steps applied to existing databases before schema.sql
+"""
+
+import sqlite3
+from typing import Callable, List
+
+from utils.session_identity import to_session_key
+
+
+def _table_exists(conn: sqlite3.Connection, table: str) -> bool:
+    """Check whether a table exists"""
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone()
+    return row is not None
+
+
+def _column_type(conn: sqlite3.Connection, table: str, column: str) -> str:
+    """Return the declared type of a column ('' if missing)"""
+    for row in conn.execute(f"PRAGMA table_info({table})"):
+        if row[1] == column:
+            return (row[2] or "").upper()
+    return ""
+
+
+def _unique_constraints(conn: sqlite3.Connection, table: str) -> List[tuple]:
+    """Return the column tuples of a table's UNIQUE constraints"""
+    constraints = []
+    for _, name, unique, origin, _ in conn.execute(f"PRAGMA index_list({table})"):
+        if unique and origin == "u":
+            columns = conn.execute(f'PRAGMA index_info("{name}")').fetchall()
+            constraints.append(tuple(row[2] for row in sorted(columns)))
+    return constraints
+
+
+def _carry_sequence(conn: sqlite3.Connection, table: str, new_table: str) -> None:
+    """
+    Copy a table's AUTOINCREMENT high-water mark to its rebuilt copy
+
+    Without it the rebuilt table restarts from MAX(id), and ids of deleted
+    or archived rows would be handed out again.
+    """
+    conn.execute("DELETE FROM sqlite_sequence WHERE name = ?", (new_table,))
+    conn.execute(
+        "INSERT INTO sqlite_sequence (name, seq) SELECT ?, seq FROM sqlite_sequence WHERE name = ?",
+        (new_table, table),
+    )
+
+
+def migrate_session_ids_to_blob(conn: sqlite3.Connection) -> bool:
+    """
+    Convert votes.session_id from variable-length TEXT to a 16-byte BLOB
+
+    Legacy IDs are mapped with utils.session_identity.to_session_key, so a
+    session that voted before the migration is still recognised afterwards.
+    Follows SQLite's table-rebuild procedure with foreign keys disabled so
+    that comments are not cascaded away.
+
+    Args:
+        conn: Open connection (must not be inside a transaction)
+
+    Returns:
+        True if the migration was applied
+    """
+    if not _table_exists(conn, "votes") or _column_type(conn, "votes", "session_id") == "BLOB":
+        return False
+
+    conn.create_function("session_key", 1, to_session_key, deterministic=True)
+    conn.execute("PRAGMA foreign_keys = OFF")
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("""
+            CREATE TABLE votes_new (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                rating INTEGER NOT NULL CHECK(
+                    rating >= 1
+                    AND rating <= 5
+                ),
+                session_id BLOB NOT NULL UNIQUE CHECK(length(session_id) = 16),
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.execute("""
+            INSERT INTO votes_new (id, rating, session_id, timestamp)
+            SELECT id, rating, session_key(session_id), timestamp FROM votes
+        """)
+        _carry_sequence(conn, "votes", "votes_new")
+        conn.execute("DROP TABLE votes")
+        conn.execute("ALTER TABLE votes_new RENAME TO votes")
+        violations = conn.execute("PRAGMA foreign_key_check").fetchall()
+        if violations:
+            raise sqlite3.IntegrityError(f"Foreign key violations after migration: {violations}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.execute("PRAGMA foreign_keys = ON")
+    return True
+
+
+def add_votes_talk_id(conn: sqlite3.Connection) -> bool:
+    """
+    Add votes.talk_id (existing votes belong to the default talk 'main')
+
+    Args:
+        conn: Open connection
+
+    Returns:
+        True if the column was added
+    """
+    if not _table_exists(conn, "votes") or _column_type(conn, "votes", "talk_id"):
+        return False
+    conn.execute("ALTER TABLE votes ADD COLUMN talk_id TEXT NOT NULL DEFAULT 'main'")
+    conn.commit()
+    return True
+
+
+def add_votes_round_id(conn: sqlite3.Connection) -> bool:
+    """
+    Add votes.round_id and make session uniqueness per round
+
+    Existing votes belong to round 1. Rebuilds the table (the UNIQUE
+    constraint changes from session_id to (round_id, session_id)) with
+    foreign keys disabled so that comments are kept; triggers and indexes
+    dropped with the old table are recreated by schema.sql.
+
+    Args:
+        conn: Open connection (must not be inside a transaction)
+
+    Returns:
+        True if the migration was applied
+    """
+    if not _table_exists(conn, "votes") or _column_type(conn, "votes", "round_id"):
+        return False
+
+    conn.execute("PRAGMA foreign_keys = OFF")
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("""
+            CREATE TABLE votes_new (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                rating INTEGER NOT NULL CHECK(
+                    rating >= 1
+                    AND rating <= 5
+                ),
+                session_id BLOB NOT NULL CHECK(length(session_id) = 16),
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                talk_id TEXT NOT NULL DEFAULT 'main',
+                round_id INTEGER NOT NULL DEFAULT 1,
+                UNIQUE (round_id, session_id)
+            )
+        """)
+        conn.execute("""
+            INSERT INTO votes_new (id, rating, session_id, timestamp, talk_id, round_id)
+            SELECT id, rating, session_id, timestamp, talk_id, 1 FROM votes
+        """)
+        _carry_sequence(conn, "votes", "votes_new")
+        conn.execute("DROP TABLE votes")
+        conn.execute("ALTER TABLE votes_new RENAME TO votes")
+        violations = conn.execute("PRAGMA foreign_key_check").fetchall()
+        if violations:
+            raise sqlite3.IntegrityError(f"Foreign key violations after migration: {violations}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.execute("PRAGMA foreign_keys = ON")
+    return True
+
+
+def make_votes_unique_per_talk(conn: sqlite3.Connection) -> bool:
+    """
+    Make session uniqueness per talk: (round_id, session_id) becomes
+    (round_id, talk_id, session_id)
+
+    With several talks in one database a session can then vote once per
+    talk in each round, as it already could with one talk per shard.
+    Rebuilds the table with foreign keys disabled so that comments are
+    kept; triggers and indexes dropped with the old table are recreated
+    by schema.sql.
+
+    Args:
+        conn: Open connection (must not be inside a transaction)
+
+    Returns:
+        True if the migration was applied
+    """
+    if not _table_exists(conn, "votes") or ("round_id", "session_id") not in _unique_constraints(conn, "votes"):
+        return False
+
+    conn.execute("PRAGMA foreign_keys = OFF")
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("""
+            CREATE TABLE votes_new (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                rating INTEGER NOT NULL CHECK(
+                    rating >= 1
+                    AND rating <= 5
+                ),
+                session_id BLOB NOT NULL CHECK(length(session_id) = 16),
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                talk_id TEXT NOT NULL DEFAULT 'main',
+                round_id INTEGER NOT NULL DEFAULT 1,
+                UNIQUE (round_id, talk_id, session_id)
+            )
+        """)
+        conn.execute("""
+            INSERT INTO votes_new (id, rating, session_id, timestamp, talk_id, round_id)
+            SELECT id, rating, session_id, timestamp, talk_id, round_id FROM votes
+        """)
+        _carry_sequence(conn, "votes", "votes_new")
+        conn.execute("DROP TABLE votes")
+        conn.execute("ALTER TABLE votes_new RENAME TO votes")
+        violations = conn.execute("PRAGMA foreign_key_check").fetchall()
+        if violations:
+            raise sqlite3.IntegrityError(f"Foreign key violations after migration: {violations}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.execute("PRAGMA foreign_keys = ON")
+    return True
+
+
+def add_comments_moderation(conn: sqlite3.Connection) -> bool:
+    """
+    Add the moderation columns to comments
+
+    Existing comments become 'pending', so the comment pipeline moderates
+    them like new ones.
+
+    Args:
+        conn: Open connection
+
+    Returns:
+        True if the columns were added
+    """
+    if not _table_exists(conn, "comments") or _column_type(conn, "comments", "comment_status"):
+        return False
+    conn.execute("""
+        ALTER TABLE comments ADD COLUMN comment_status TEXT NOT NULL DEFAULT 'pending' CHECK(
+            comment_status IN ('pending', 'processing', 'approved', 'duplicate', 'rejected')
+        )
+    """)
+    conn.execute("ALTER TABLE comments ADD COLUMN sentiment REAL")
+    conn.execute("ALTER TABLE comments ADD COLUMN moderated_at DATETIME")
+    conn.commit()
+    return True
+
+
+# Ordered list of migration steps; each one must be idempotent
+MIGRATIONS: List[Callable[[sqlite3.Connection], bool]] = [
+    migrate_session_ids_to_blob,
+    add_votes_talk_id,
+    add_votes_round_id,
+    add_comments_moderation,
+    make_votes_unique_per_talk,
+]
+
+
+def run_migrations(conn: sqlite3.Connection) -> List[str]:
+    """
+    Apply all pending migrations
+
+    Args:
+        conn: Open connection
+
+    Returns:
+        Names of the migrations that were applied
+    """
+    applied = []
+    for migration in MIGRATIONS:
+        if migration(conn):
+            applied.append(migration.__name__)
+    return applied
@@ -0,0 +1,209 @@
+"""
+Read Replica for VibeTheForce
+Periodically refreshed in-memory copy of the database for aggregate reads
+
+Every results page polls aggregate queries every few seconds. On the
+primary file each of those reads opens a connection and holds a SHARED
+lock, and in rollback-journal mode a vote commit has to wait until no
+reader holds one. The replica moves that load off the file: a background
+thread copies the database into a private ":memory:" database through
+the SQLite backup API every `interval` seconds, and routed reads
+(DatabaseManager.execute_read) run against the copy, never touching the
+primary's locks.
+
+A refresh reads the shared change counter (database/change_notifier.py)
+first and skips the copy when nothing was committed since the previous
+one, so an idle event costs one memory read per interval. Each copy goes
+into a fresh connection that replaces the previous one when complete
+(double buffering): readers keep using the old copy until the swap and
+never see a partial one.
+
+Staleness is bounded: a read that finds the copy older than
+`max_staleness` (the refresh thread fell behind or was never started)
+refreshes synchronously first, and a reset invalidates the copy so the
+next read comes from a fresh one. `version` and `as_of` describe the
+data currently served, for cache validation and "as of" labels.
+"""
+
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from database.change_notifier import ChangeNotifier
+from utils.metrics import DB_REPLICA_AGE_SECONDS, DB_REPLICA_REFRESH_SECONDS
+
+
+class ReadReplica:
+    """In-memory copy of one database file, refreshed in the background"""
+
+    def __init__(
+        self,
+        db_path: str,
+        change_notifier: ChangeNotifier,
+        interval: float,
+        max_staleness: float,
+        timeout: float = 10.0
+    ):
+        """
+        Initialize ReadReplica (no copy is made until refresh or start)
+
+        Args:
+            db_path: Path of the primary database file
+            change_notifier: Change counters of the primary
+            interval: Seconds between background refreshes
+            max_staleness: Age in seconds above which a read refreshes first
+            timeout: Seconds to wait for a lock on the primary while copying
+        """
+        self.db_path = db_path
+        self.change_notifier = change_notifier
+        self.interval = interval
+        self.max_staleness = max_staleness
+        self.timeout = timeout
+        # Served copy; replaced as a whole, with version assigned after the
+        # connection so a reader never pairs new version with old data
+        self._conn: Optional[sqlite3.Connection] = None
+        self._read_lock = threading.Lock()
+        self.version: Optional[int] = None
+        self.as_of: Optional[datetime] = None
+        self._refreshed_at = 0.0
+        self._stale = True
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.refreshes = 0
+        self.copies = 0
+
+    def configure(self, interval: float, max_staleness: float):
+        """
+        Change the refresh interval and staleness bound of a running replica
+
+        Args:
+            interval: Seconds between background refreshes
+            max_staleness: Age in seconds above which a read refreshes first
+        """
+        self.interval = interval
+        self.max_staleness = max_staleness
+
+    @property
+    def age(self) -> float:
+        """Seconds since the served copy was last known current (inf before the first copy)"""
+        if self._conn is None:
+            return float('inf')
+        return time.monotonic() - self._refreshed_at
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Bring the replica up to date with the primary
+
+        Args:
+            force: Copy even if the change counter did not move
+
+        Returns:
+            True if a new copy was made, False if the served one was still current
+        """
+        with self._refresh_lock:
+            return self._refresh(force)
+
+    def _refresh(self, force: bool) -> bool:
+        """Refresh with _refresh_lock held"""
+        self.refreshes += 1
+        # Read before copying: a commit during the copy leaves the version
+        # behind the data, so the next refresh copies again
+        version = self.change_notifier.version
+        started_at, as_of = time.monotonic(), datetime.now()
+        if not force and not self._stale and version is not None and version == self.version:
+            self._refreshed_at, self.as_of = started_at, as_of
+            return False
+
+        copy = sqlite3.connect(":memory:", check_same_thread=False)
+        source = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, timeout=self.timeout)
+        try:
+            # One step: the primary is read-locked for a single in-memory copy
+            source.backup(copy)
+        except sqlite3.Error:
+            copy.close()
+            raise
+        finally:
+            source.close()
+        DB_REPLICA_REFRESH_SECONDS.observe(time.monotonic() - started_at)
+
+        self._conn = copy
+        self.version = version
+        self._refreshed_at, self.as_of = started_at, as_of
+        self._stale = False
+        self.copies += 1
+        return True
+
+    def invalidate(self):
+        """Force the next read to make a new copy (after a reset or restore)"""
+        self._stale = True
+
+    def ensure_fresh(self):
+        """
+        Refresh synchronously if the copy is missing, invalidated or too old
+
+        Raises:
+            sqlite3.Error: If the copy fails
+        """
+        if not self._stale and self.age <= self.max_staleness:
+            return
+        with self._refresh_lock:
+            # Another reader may have refreshed while this one waited
+            if self._stale or self.age > self.max_staleness:
+                self._refresh(force=False)
+
+    def execute_query(self, query: str, params: tuple = ()) -> List[Tuple]:
+        """
+        Execute a SELECT query on the replica
+
+        Args:
+            query: SQL query string
+            params: Query parameters
+
+        Returns:
+            List of tuples containing query results
+
+        Raises:
+            sqlite3.Error: If the query or a synchronous refresh fails
+        """
+        self.ensure_fresh()
+        conn = self._conn
+        # One connection is shared by every reader of the copy
+        with self._read_lock:
+            return conn.execute(query, params).fetchall()
+
+    def start(self):
+        """Start the background refresh thread (no-op if running)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="read-replica-refresh", daemon=True)
+        self._thread.start()
+        DB_REPLICA_AGE_SECONDS.labels(db=self.db_path).set_function(
+            lambda: min(self.age, 1e9)
+        )
+
+    def _run(self):
+        """Refresh loop of the background thread"""
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except sqlite3.Error:
+                # Primary busy or being replaced: reads refresh on their own
+                # once the copy exceeds max_staleness
+                pass
+            self._stop.wait(self.interval)
+
+    def close(self):
+        """
+        Stop the refresh thread
+        The copy is released with the last reference to the replica, so
+        readers that already hold one can finish their query
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + self.timeout)
+            self._thread = None
+        DB_REPLICA_AGE_SECONDS.labels(db=self.db_path).set_function(lambda: 0.0)
@@ -1,31 +1,143 @@
 -- VibeTheForce Database Schema
 -- SQLite database for storing votes and comments
+-- Rounds table
+-- A reset starts a new round instead of deleting rows: reads only see the
+-- latest round, older rounds are moved to the archive in the background
+-- (see database/archiver.py)
+CREATE TABLE IF NOT EXISTS rounds (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    archived_at DATETIME,
+    archived_votes INTEGER
+);
+INSERT INTO rounds (id)
+SELECT 1
+WHERE NOT EXISTS (SELECT 1 FROM rounds);
 -- Votes table
 -- Stores individual votes with rating (1-5) and session tracking
+-- session_id is a 128-bit key (see utils/session_identity.py); a session
+-- votes once per talk in each round. Writers set round_id to the current round.
 CREATE TABLE IF NOT EXISTS votes (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     rating INTEGER NOT NULL CHECK(
         rating >= 1
         AND rating <= 5
     ),
-    session_id TEXT NOT NULL UNIQUE,
-    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+    session_id BLOB NOT NULL CHECK(length(session_id) = 16),
+    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+    talk_id TEXT NOT NULL DEFAULT 'main',
+    round_id INTEGER NOT NULL DEFAULT 1,
+    UNIQUE (round_id, talk_id, session_id)
 );
 -- Comments table
--- Stores optional comments associated with votes
+-- Stores optional comments associated with votes. Comments are written as
+-- 'pending' with the vote and moderated in the background
+-- (services/comment_pipeline.py); only 'approved' ones are shown.
+-- moderated_at is the claim time while 'processing', then the completion time
 CREATE TABLE IF NOT EXISTS comments (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     vote_id INTEGER NOT NULL,
     comment TEXT NOT NULL CHECK(LENGTH(comment) <= 500),
     timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+    comment_status TEXT NOT NULL DEFAULT 'pending' CHECK(
+        comment_status IN ('pending', 'processing', 'approved', 'duplicate', 'rejected')
+    ),
+    sentiment REAL,
+    moderated_at DATETIME,
     FOREIGN KEY (vote_id) REFERENCES votes(id) ON DELETE CASCADE
 );
 -- Indexes for performance optimization
--- Index on rating for fast aggregation queries
-CREATE INDEX IF NOT EXISTS idx_votes_rating ON votes(rating);
+-- Index on (round, talk, rating) for fast aggregation of one talk (or,
+-- by its round_id prefix, of every talk) in the current round
+CREATE INDEX IF NOT EXISTS idx_votes_round_talk_rating ON votes(round_id, talk_id, rating);
+DROP INDEX IF EXISTS idx_votes_round_rating;
+DROP INDEX IF EXISTS idx_votes_rating;
 -- Index on timestamp for chronological queries
 CREATE INDEX IF NOT EXISTS idx_votes_timestamp ON votes(timestamp);
 -- Index on vote_id for fast comment lookups
 CREATE INDEX IF NOT EXISTS idx_comments_vote_id ON comments(vote_id);
--- Index on session_id for duplicate vote prevention
-CREATE INDEX IF NOT EXISTS idx_votes_session_id ON votes(session_id);
\ No newline at end of file
+-- Moderation queue: only unfinished comments are indexed
+CREATE INDEX IF NOT EXISTS idx_comments_pending ON comments(id)
+    WHERE comment_status IN ('pending', 'processing');
+-- Duplicate vote prevention relies on the UNIQUE constraint on
+-- (round_id, talk_id, session_id) and its automatic index; the former explicit
+-- index only doubled write cost
+DROP INDEX IF EXISTS idx_votes_session_id;
+-- Per-minute vote rollup
+-- One row per (talk, minute) with a counter per rating for the current
+-- round, maintained by the triggers below so timeline reads are a single
+-- primary-key range scan; cleared when a new round starts
+CREATE TABLE IF NOT EXISTS vote_rollup_minute (
+    talk_id TEXT NOT NULL,
+    minute TEXT NOT NULL,
+    rating_1 INTEGER NOT NULL DEFAULT 0,
+    rating_2 INTEGER NOT NULL DEFAULT 0,
+    rating_3 INTEGER NOT NULL DEFAULT 0,
+    rating_4 INTEGER NOT NULL DEFAULT 0,
+    rating_5 INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (talk_id, minute)
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS trg_votes_rollup_insert
+AFTER INSERT ON votes
+BEGIN
+    INSERT INTO vote_rollup_minute (
+        talk_id, minute, rating_1, rating_2, rating_3, rating_4, rating_5
+    )
+    VALUES (
+        NEW.talk_id,
+        strftime('%Y-%m-%d %H:%M', NEW.timestamp),
+        NEW.rating = 1,
+        NEW.rating = 2,
+        NEW.rating = 3,
+        NEW.rating = 4,
+        NEW.rating = 5
+    )
+    ON CONFLICT(talk_id, minute) DO UPDATE SET
+        rating_1 = rating_1 + excluded.rating_1,
+        rating_2 = rating_2 + excluded.rating_2,
+        rating_3 = rating_3 + excluded.rating_3,
+        rating_4 = rating_4 + excluded.rating_4,
+        rating_5 = rating_5 + excluded.rating_5;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_votes_rollup_delete
+AFTER DELETE ON votes
+WHEN OLD.round_id = (SELECT MAX(id) FROM rounds)
+BEGIN
+    UPDATE vote_rollup_minute SET
+        rating_1 = rating_1 - (OLD.rating = 1),
+        rating_2 = rating_2 - (OLD.rating = 2),
+        rating_3 = rating_3 - (OLD.rating = 3),
+        rating_4 = rating_4 - (OLD.rating = 4),
+        rating_5 = rating_5 - (OLD.rating = 5)
+    WHERE talk_id = OLD.talk_id
+        AND minute = strftime('%Y-%m-%d %H:%M', OLD.timestamp);
+END;
+-- Per-talk sufficient statistics for the leaderboard
+-- Count, sum and sum of squares of ratings per talk in the current round,
+-- maintained by the triggers below so ranking reads one row per talk
+CREATE TABLE IF NOT EXISTS talk_stats (
+    talk_id TEXT PRIMARY KEY,
+    votes INTEGER NOT NULL DEFAULT 0,
+    rating_sum INTEGER NOT NULL DEFAULT 0,
+    rating_sumsq INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS trg_votes_talk_stats_insert
+AFTER INSERT ON votes
+BEGIN
+    INSERT INTO talk_stats (talk_id, votes, rating_sum, rating_sumsq)
+    VALUES (NEW.talk_id, 1, NEW.rating, NEW.rating * NEW.rating)
+    ON CONFLICT(talk_id) DO UPDATE SET
+        votes = votes + 1,
+        rating_sum = rating_sum + excluded.rating_sum,
+        rating_sumsq = rating_sumsq + excluded.rating_sumsq;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_votes_talk_stats_delete
+AFTER DELETE ON votes
+WHEN OLD.round_id = (SELECT MAX(id) FROM rounds)
+BEGIN
+    UPDATE talk_stats SET
+        votes = votes - 1,
+        rating_sum = rating_sum - OLD.rating,
+        rating_sumsq = rating_sumsq - OLD.rating * OLD.rating
+    WHERE talk_id = OLD.talk_id;
+END;
\ No newline at end of file
@@ -0,0 +1,145 @@
+"""
+Session Index for VibeTheForce
+In-memory index of (talk_id, session key) pairs that have already voted
+in the current round, used to reject duplicate votes without a round-trip
+to SQLite. A session that voted for one talk can still vote for another.
+
+The UNIQUE constraint on votes (round_id, talk_id, session_id) remains the
+final authority: the index only short-circuits the common case.
+"""
+
+import hashlib
+import math
+import threading
+from typing import Iterable, Optional, Tuple, Union
+
+SessionKey = Union[bytes, str]
+
+
+def _index_key(session_id: SessionKey, talk_id: str) -> bytes:
+    """Single bytes key for a (talk_id, session) pair"""
+    session = session_id.encode('utf-8') if isinstance(session_id, str) else bytes(session_id)
+    return talk_id.encode('utf-8') + b"\x00" + session
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over bytes or string keys"""
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.001):
+        """
+        Initialize BloomFilter
+
+        Args:
+            capacity: Expected number of keys
+            error_rate: Target false-positive probability at capacity
+        """
+        if capacity <= 0 or not 0 < error_rate < 1:
+            raise ValueError("capacity must be > 0 and 0 < error_rate < 1")
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self._lock = threading.Lock()
+
+    def _positions(self, key: SessionKey):
+        """Bit positions for a key (double hashing over one blake2b digest)"""
+        data = key.encode('utf-8') if isinstance(key, str) else bytes(key)
+        digest = hashlib.blake2b(data, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, key: SessionKey):
+        """Add a key to the filter"""
+        with self._lock:
+            for pos in self._positions(key):
+                self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: SessionKey) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def clear(self):
+        """Remove all keys"""
+        with self._lock:
+            self._bits = bytearray(len(self._bits))
+
+    @property
+    def size_bytes(self) -> int:
+        """Size of the bit array in bytes"""
+        return len(self._bits)
+
+
+class SessionIndex:
+    """
+    Index of voted (talk_id, session ID) pairs
+
+    In "exact" mode a Python set is used: lookups are definitive in both
+    directions. In "bloom" mode a BloomFilter is used: a negative answer is
+    definitive, a positive answer must be confirmed against the database.
+    """
+
+    MODES = ("exact", "bloom")
+
+    def __init__(self, mode: str = "exact", capacity: int = 1_000_000,
+                 error_rate: float = 0.001):
+        """
+        Initialize SessionIndex
+
+        Args:
+            mode: "exact" (set) or "bloom" (BloomFilter)
+            capacity: Expected number of sessions (bloom mode only)
+            error_rate: Target false-positive rate (bloom mode only)
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown session index mode: {mode}")
+        self.mode = mode
+        self._capacity = capacity
+        self._error_rate = error_rate
+        self._keys = set() if mode == "exact" else BloomFilter(capacity, error_rate)
+        self.warmed = False
+
+    @property
+    def exact(self) -> bool:
+        """True if positive lookups are definitive"""
+        return self.mode == "exact"
+
+    def warm(self, votes: Iterable[Tuple[str, SessionKey]]):
+        """
+        Load existing votes (called once at startup)
+
+        Args:
+            votes: Iterable of (talk_id, session key) pairs already in the database
+        """
+        for talk_id, session_id in votes:
+            self._keys.add(_index_key(session_id, talk_id))
+        self.warmed = True
+
+    def add(self, session_id: SessionKey, talk_id: str = 'main'):
+        """Record a session's vote for a talk after it has been committed"""
+        self._keys.add(_index_key(session_id, talk_id))
+
+    def lookup(self, session_id: SessionKey, talk_id: str = 'main') -> Optional[bool]:
+        """
+        Look up a session's vote for a talk
+
+        Args:
+            session_id: Session key
+            talk_id: Talk identifier
+
+        Returns:
+            True if the session has definitely voted, False if it definitely
+            has not (as far as this process knows), None if the database
+            must be consulted
+        """
+        if not self.warmed:
+            return None
+        if _index_key(session_id, talk_id) not in self._keys:
+            return False
+        return True if self.exact else None
+
+    def clear(self):
+        """Forget all session IDs (after a reset)"""
+        if self.exact:
+            self._keys = set()
+        else:
+            self._keys.clear()
@@ -0,0 +1,418 @@
+"""
+Sharding for VibeTheForce
+Routes each talk to its own SQLite file so talks do not share a writer lock
+
+A ShardMap resolves a talk_id to a database path: explicit routes first,
+then a path pattern such as "database/shards/{talk_id}.db", then the
+default database. ShardedDatabaseManager keeps one DatabaseManager per
+shard file (each with its own writer lock, session index and change
+notifier) and aggregates per-talk counts across all shards.
+
+A session votes once per talk in each round (UNIQUE constraint on
+(round_id, talk_id, session_id)), whether talks share a file or not. Rounds
+are numbered per file, so a reset starts a new round in every shard.
+
+Usage (split an existing database into shards):
+    python -m database.sharding database/votes.db --map database/shards.json
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from database.db_manager import CURRENT_ROUND, DatabaseManager, get_db_manager
+from utils.settings import get_settings
+
+# talk_id values allowed in a path pattern (no separators or dots)
+_TALK_ID_RE = re.compile(r"^[A-Za-z0-9_-]+$")
+# Longest talk_id accepted from clients
+MAX_TALK_ID_LENGTH = 64
+
+
+def is_valid_talk_id(talk_id) -> bool:
+    """
+    Check a client-supplied talk identifier
+
+    Args:
+        talk_id: Value to check
+
+    Returns:
+        True for a string of letters, digits, '_' or '-' up to MAX_TALK_ID_LENGTH
+    """
+    return (
+        isinstance(talk_id, str)
+        and len(talk_id) <= MAX_TALK_ID_LENGTH
+        and _TALK_ID_RE.match(talk_id) is not None
+    )
+
+
+class ShardMap:
+    """Maps talk identifiers to SQLite database paths"""
+
+    def __init__(
+        self,
+        routes: Optional[Dict[str, str]] = None,
+        pattern: Optional[str] = None,
+        default: Optional[str] = None
+    ):
+        """
+        Initialize ShardMap
+
+        Args:
+            routes: Explicit talk_id -> database path routes
+            pattern: Path pattern with a {talk_id} placeholder for other talks
+            default: Database for talks not matched by routes or pattern
+                (default: settings db_path)
+        """
+        if pattern is not None and "{talk_id}" not in pattern:
+            raise ValueError("pattern must contain {talk_id}")
+        self.routes = dict(routes or {})
+        self.pattern = pattern
+        self.default = default or get_settings().db_path
+
+    @classmethod
+    def from_file(cls, path: str) -> "ShardMap":
+        """
+        Load a shard map from a JSON file
+
+        The file contains {"default": ..., "pattern": ..., "talks": {talk_id: path}},
+        all keys optional.
+
+        Args:
+            path: JSON file path
+
+        Returns:
+            ShardMap instance
+        """
+        with open(path, encoding="utf-8") as f:
+            config = json.load(f)
+        return cls(
+            routes=config.get("talks"),
+            pattern=config.get("pattern"),
+            default=config.get("default")
+        )
+
+    def path_for(self, talk_id: str) -> str:
+        """
+        Resolve the database path for a talk
+
+        Args:
+            talk_id: Talk identifier
+
+        Returns:
+            Database file path
+        """
+        if talk_id in self.routes:
+            return self.routes[talk_id]
+        if self.pattern is not None:
+            if not _TALK_ID_RE.match(talk_id):
+                raise ValueError(f"Invalid talk_id for shard pattern: {talk_id!r}")
+            return self.pattern.format(talk_id=talk_id)
+        return self.default
+
+    def known_paths(self) -> List[str]:
+        """
+        List every shard file that may hold votes
+
+        Returns:
+            Default database, explicit routes and existing files matching the pattern
+        """
+        paths = [self.default] + list(self.routes.values())
+        if self.pattern is not None:
+            paths.extend(sorted(glob.glob(self.pattern.format(talk_id="*"))))
+        return list(dict.fromkeys(os.path.normpath(p) for p in paths))
+
+
+class ShardedDatabaseManager:
+    """One DatabaseManager per shard file, with cross-shard aggregation"""
+
+    def __init__(self, shard_map: ShardMap):
+        """
+        Initialize ShardedDatabaseManager
+
+        Args:
+            shard_map: Talk-to-file routing
+        """
+        self.shard_map = shard_map
+        self._shards: Dict[str, DatabaseManager] = {}
+        self._lock = threading.Lock()
+
+    def _manager(self, path: str) -> DatabaseManager:
+        """
+        Get or create the initialized DatabaseManager for a shard file
+        The settings database reuses the get_db_manager() singleton, so the
+        process keeps one session index, replica and change notifier for it
+        """
+        path = os.path.normpath(path)
+        with self._lock:
+            manager = self._shards.get(path)
+            if manager is None:
+                if path == os.path.normpath(get_settings().db_path):
+                    manager = get_db_manager(path)
+                if manager is None or os.path.normpath(manager.db_path) != path:
+                    manager = DatabaseManager(path)
+                    manager.initialize_database()
+                self._shards[path] = manager
+            return manager
+
+    def shard_for(self, talk_id: str) -> DatabaseManager:
+        """
+        Get the DatabaseManager owning a talk
+
+        Args:
+            talk_id: Talk identifier
+
+        Returns:
+            DatabaseManager for the talk's shard
+        """
+        return self._manager(self.shard_map.path_for(talk_id))
+
+    def shards(self) -> List[DatabaseManager]:
+        """
+        Get a DatabaseManager for every known shard file
+
+        Returns:
+            List of DatabaseManager instances
+        """
+        return [
+            self._manager(path)
+            for path in self.shard_map.known_paths()
+            if os.path.exists(path) or os.path.normpath(path) in self._shards
+        ]
+
+    def get_votes_by_talk(self) -> Dict[str, Dict[int, int]]:
+        """
+        Aggregate vote counts per talk across all shards
+
+        Returns:
+            Dictionary mapping talk_id to {rating: count} for ratings 1-5
+        """
+        totals: Dict[str, Dict[int, int]] = {}
+        for shard in self.shards():
+            for talk_id, counts in shard.get_votes_by_talk().items():
+                talk_totals = totals.setdefault(talk_id, {rating: 0 for rating in range(1, 6)})
+                for rating, count in counts.items():
+                    talk_totals[rating] += count
+        return totals
+
+    def get_talk_stats(self) -> Dict[str, Tuple[int, int, int]]:
+        """
+        Per-talk sufficient statistics summed across all shards
+
+        Returns:
+            Dictionary mapping talk_id to (votes, rating_sum, rating_sumsq)
+        """
+        totals: Dict[str, Tuple[int, int, int]] = {}
+        for shard in self.shards():
+            for talk_id, votes, rating_sum, rating_sumsq in shard.get_talk_stats():
+                prev_votes, prev_sum, prev_sumsq = totals.get(talk_id, (0, 0, 0))
+                totals[talk_id] = (prev_votes + votes, prev_sum + rating_sum, prev_sumsq + rating_sumsq)
+        return totals
+
+    def get_source_version(self) -> Tuple:
+        """
+        Change counters of the data every shard serves, for cache validation
+
+        Returns:
+            Tuple of (path, version) pairs; versions are None where notifications are disabled
+        """
+        return tuple((shard.db_path, shard.read_version) for shard in self.shards())
+
+    def get_event_votes_by_rating(self) -> Dict[int, int]:
+        """
+        Event-wide vote counts per rating across all shards and talks
+
+        Returns:
+            Dictionary {rating: count} for ratings 1-5
+        """
+        totals = {rating: 0 for rating in range(1, 6)}
+        for counts in self.get_votes_by_talk().values():
+            for rating, count in counts.items():
+                totals[rating] += count
+        return totals
+
+
+# Singleton instance for application-wide use
+_sharded_db_manager_instance: Optional[ShardedDatabaseManager] = None
+
+
+def get_sharded_db_manager() -> ShardedDatabaseManager:
+    """
+    Get or create the singleton ShardedDatabaseManager
+
+    The shard map is read from the JSON file named by the shard_map
+    setting; without it every talk is routed to the default database.
+
+    Returns:
+        ShardedDatabaseManager instance
+    """
+    global _sharded_db_manager_instance
+
+    if _sharded_db_manager_instance is None:
+        map_path = get_settings().shard_map
+        shard_map = ShardMap.from_file(map_path) if map_path else ShardMap()
+        _sharded_db_manager_instance = ShardedDatabaseManager(shard_map)
+
+    return _sharded_db_manager_instance
+
+
+def split_database(source_path: str, shard_map: ShardMap, prune: bool = False) -> Dict[str, int]:
+    """
+    Copy each talk's votes and comments from one database into its shard
+
+    Only the current round is copied, into each shard's current round.
+    Vote and comment ids are preserved, so comments keep pointing at their
+    votes; rows already copied by an earlier run are skipped, so the split
+    can be re-run. A talk whose rows clash with different rows in the
+    shard (same id, or the same session already voted there) is not copied
+    at all. Talks routed to the source file stay in place.
+
+    Args:
+        source_path: Existing database to split
+        shard_map: Target routing
+        prune: Delete moved talks from the source afterwards
+
+    Returns:
+        Dictionary mapping talk_id to the number of votes copied
+
+    Raises:
+        ValueError: If a talk's rows clash with different rows in its shard
+            (talks copied before it stay copied)
+    """
+    source = DatabaseManager(source_path)
+    source.initialize_database()
+    source_norm = os.path.normpath(source_path)
+    talks = [row[0] for row in source.execute_query(
+        f"SELECT DISTINCT talk_id FROM votes WHERE round_id = {CURRENT_ROUND}"
+    )]
+
+    copied = {}
+    for talk_id in talks:
+        target_path = shard_map.path_for(talk_id)
+        if os.path.normpath(target_path) == source_norm:
+            continue
+
+        target = DatabaseManager(target_path)
+        target.initialize_database()
+        with target.get_connection() as conn:
+            # ATTACH is not allowed inside a transaction: attach first, then begin
+            conn.execute("ATTACH DATABASE ? AS source", (source_path,))
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("""
+                CREATE TEMP TABLE split_votes AS
+                SELECT id, rating, session_id, timestamp, talk_id
+                FROM source.votes
+                WHERE talk_id = ? AND round_id = (SELECT MAX(id) FROM source.rounds)
+            """, (talk_id,))
+            conflicts = _split_conflicts(conn)
+            if conflicts:
+                conn.rollback()
+                raise ValueError(
+                    f"Talk {talk_id!r} not copied to {target_path}: " + "; ".join(conflicts)
+                )
+            cursor = conn.execute("""
+                INSERT INTO votes (id, rating, session_id, timestamp, talk_id, round_id)
+                SELECT id, rating, session_id, timestamp, talk_id, (SELECT MAX(id) FROM main.rounds)
+                FROM split_votes s
+                WHERE NOT EXISTS (SELECT 1 FROM main.votes t WHERE t.id = s.id)
+            """)
+            copied[talk_id] = cursor.rowcount
+            conn.execute("""
+                INSERT INTO comments (
+                    id, vote_id, comment, timestamp, comment_status, sentiment, moderated_at
+                )
+                SELECT c.id, c.vote_id, c.comment, c.timestamp,
+                       c.comment_status, c.sentiment, c.moderated_at
+                FROM source.comments c
+                JOIN split_votes s ON s.id = c.vote_id
+                WHERE NOT EXISTS (SELECT 1 FROM main.comments t WHERE t.id = c.id)
+            """)
+            conn.execute("DROP TABLE temp.split_votes")
+            conn.commit()
+            conn.execute("DETACH DATABASE source")
+        target.change_notifier.notify()
+        target.warm_session_index()
+        target.change_notifier.close()
+
+        if prune:
+            # Comments follow through ON DELETE CASCADE, the rollup through its trigger
+            source.execute_update(
+                f"DELETE FROM votes WHERE talk_id = ? AND round_id = {CURRENT_ROUND}", (talk_id,)
+            )
+
+    source.change_notifier.close()
+    return copied
+
+
+def _split_conflicts(conn: sqlite3.Connection) -> List[str]:
+    """
+    Describe rows of temp.split_votes that cannot be copied as they are
+
+    A row already in the shard with the same id is fine only if it is the
+    same vote (an earlier run); comments are checked the same way.
+
+    Args:
+        conn: Shard connection with the source attached and split_votes filled
+
+    Returns:
+        One message per kind of conflict (empty if the copy is safe)
+    """
+    checks = (
+        ("vote ids used by other votes", """
+            SELECT COUNT(*) FROM split_votes s JOIN main.votes t ON t.id = s.id
+            WHERE t.session_id IS NOT s.session_id OR t.talk_id IS NOT s.talk_id
+               OR t.rating IS NOT s.rating
+        """),
+        ("sessions that already voted for the talk in the shard", """
+            SELECT COUNT(*) FROM split_votes s JOIN main.votes t
+                ON t.session_id = s.session_id AND t.talk_id = s.talk_id
+            WHERE t.round_id = (SELECT MAX(id) FROM main.rounds) AND t.id != s.id
+        """),
+        ("comment ids used by other comments", """
+            SELECT COUNT(*) FROM source.comments c
+            JOIN split_votes s ON s.id = c.vote_id
+            JOIN main.comments t ON t.id = c.id
+            WHERE t.vote_id IS NOT c.vote_id OR t.comment IS NOT c.comment
+        """),
+    )
+    conflicts = []
+    for label, query in checks:
+        count = conn.execute(query).fetchone()[0]
+        if count:
+            conflicts.append(f"{count} {label}")
+    return conflicts
+
+
+def main(argv=None):
+    """Command-line entry point for splitting a database into shards"""
+    parser = argparse.ArgumentParser(description="Split a vote database into per-talk shards")
+    parser.add_argument("source", nargs="?", default=get_settings().db_path, help="Database to split")
+    parser.add_argument("--map", dest="map_path", help="Shard map JSON file")
+    parser.add_argument("--pattern", default="database/shards/{talk_id}.db",
+                        help="Shard path pattern when no map file is given")
+    parser.add_argument("--prune", action="store_true", help="Delete moved talks from the source")
+    args = parser.parse_args(argv)
+
+    if args.map_path:
+        shard_map = ShardMap.from_file(args.map_path)
+    else:
+        shard_map = ShardMap(pattern=args.pattern, default=args.source)
+
+    try:
+        copied = split_database(args.source, shard_map, prune=args.prune)
+    except (sqlite3.Error, ValueError) as e:
+        print(f"Split failed: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    for talk_id, count in copied.items():
+        print(f"{talk_id}: {count} votes -> {shard_map.path_for(talk_id)}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,8 +4,10 @@ Interfaccia per votare il talk con tema Star Wars
 """
 
 import streamlit as st
-from services.vote_service import VoteService
+from services.streamlit_adapters import StreamlitVoteService, bootstrap_services
 from utils.theme import apply_star_wars_theme, RATING_LABELS
+from utils.metrics import track_streamlit_session
+from utils.session_identity import ensure_session_id
 
 # Page configuration
 st.set_page_config(
@@ -17,6 +19,12 @@ st.set_page_config(
 # Apply Star Wars theme
 apply_star_wars_theme()
 
+# Track active session for metrics
+track_streamlit_session()
+
+# Servizi in background (una volta per processo)
+bootstrap_services()
+
 # Additional CSS for voting page specific styling
 st.markdown("""
 <style>
@@ -38,9 +46,7 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Initialize session state
-if 'session_id' not in st.session_state:
-    import time
-    st.session_state.session_id = f"session_{int(time.time() * 1000)}"
+ensure_session_id(st.session_state)
 
 if 'has_voted' not in st.session_state:
     st.session_state.has_voted = False
@@ -139,7 +145,7 @@ if st.button("🚀 Invia Voto", type="primary", use_container_width=True):
         st.error("⚠️ Seleziona prima un livello di valutazione!")
     else:
         # Submit vote using VoteService
-        vote_service = VoteService()
+        vote_service = StreamlitVoteService()
         success = vote_service.submit_vote(
             rating=st.session_state.selected_rating,
             comment=comment if comment.strip() else None
@@ -7,9 +7,10 @@ import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
 import time
-from services.vote_service import VoteService
-from services.analytics_service import AnalyticsService
+from services.streamlit_adapters import StreamlitAnalyticsService, StreamlitVoteService, bootstrap_services, get_app_settings
 from utils.theme import apply_star_wars_theme, RATING_COLORS, RATING_LABELS
+from utils.charts import build_keyword_cloud, build_timeline_chart
+from utils.metrics import track_streamlit_session
 
 # Page configuration
 st.set_page_config(
@@ -21,6 +22,14 @@ st.set_page_config(
 # Apply Star Wars theme
 apply_star_wars_theme()
 
+# Track active session for metrics
+track_streamlit_session()
+
+# Servizi in background (una volta per processo)
+bootstrap_services()
+
+settings = get_app_settings()
+
 # Additional CSS for results page - Ottimizzato per leggibilità da 5 metri
 st.markdown("""
 <style>
@@ -66,7 +75,7 @@ st.title("📊 Risultati in Tempo Reale")
 st.markdown("---")
 
 # Get results from VoteService
-vote_service = VoteService()
+vote_service = StreamlitVoteService()
 results = vote_service.get_results()
 
 # Key metrics - 3 columns
@@ -90,6 +99,37 @@ with col3:
         value=results['total_comments']
     )
 
+# Statistiche descrittive (precalcolate con lo snapshot dei risultati)
+stats = results['stats']
+if stats.total > 0:
+    col4, col5, col6 = st.columns(3)
+
+    with col4:
+        st.metric(
+            label="📍 Mediana",
+            value=f"{stats.median:g}",
+            help=f"Deviazione standard: {stats.std_dev:.2f}"
+        )
+
+    with col5:
+        st.metric(
+            label="🎯 IC 95% Media",
+            value=f"{stats.mean_ci[0]:.2f}–{stats.mean_ci[1]:.2f}"
+        )
+
+    with col6:
+        st.metric(
+            label="👍 Top-2-box",
+            value=f"{stats.top2_box:.0f}%",
+            delta=f"Net {stats.net_score:+.0f}",
+            help=f"Voti 4-5 stelle (IC 95%: {stats.top2_box_ci[0]:.0f}-{stats.top2_box_ci[1]:.0f}%)"
+        )
+
+# Istante dei dati: con la replica di lettura attiva conteggi e andamento
+# possono essere indietro fino a replica_max_staleness secondi
+if results['as_of'] is not None:
+    st.caption(f"🕒 Dati aggiornati alle {results['as_of']:%H:%M:%S}")
+
 st.markdown("---")
 
 # Vote distribution chart with Plotly
@@ -154,16 +194,41 @@ fig.update_layout(
 # Display chart
 st.plotly_chart(fig, use_container_width=True)
 
-# LLM Automatic Comment (if >= 10 votes)
+# Andamento dei voti nel tempo (letto dalla tabella di rollup per minuto)
+timeline = vote_service.get_timeline()
+if timeline:
+    st.subheader("Andamento Voti")
+    st.plotly_chart(build_timeline_chart(timeline), use_container_width=True)
+
+# Sentiment e parole chiave dei commenti (analisi locale, aggiornata con i soli commenti nuovi)
+insights = vote_service.get_comment_insights()
+if insights.total:
+    st.subheader("💬 Di cosa parlano i commenti")
+
+    col7, col8, col9 = st.columns(3)
+    with col7:
+        st.metric(label="😀 Positivi", value=f"{insights.share('positive'):.0f}%")
+    with col8:
+        st.metric(label="😐 Neutri", value=f"{insights.share('neutral'):.0f}%")
+    with col9:
+        st.metric(label="🙁 Negativi", value=f"{insights.share('negative'):.0f}%")
+
+    if insights.keywords:
+        st.plotly_chart(build_keyword_cloud(insights.keywords), use_container_width=True)
+
+# LLM Automatic Comment (if >= llm_min_votes votes)
 st.markdown("---")
 
-if results['total_votes'] >= 10:
-    st.subheader("🤖 Commento Automatico (Gemini AI)")
-    
+if results['total_votes'] >= settings.llm_min_votes:
     # Initialize analytics service
-    analytics_service = AnalyticsService()
+    analytics_service = StreamlitAnalyticsService()
+    
+    if analytics_service.llm.is_configured():
+        st.subheader(f"🤖 Commento Automatico ({analytics_service.llm.label})")
+    else:
+        st.subheader("🤖 Commento Automatico (analisi locale)")
     
-    # Generate automatic comment with caching (updates every 30 seconds)
+    # Generate automatic comment with caching (updates every llm_cache_ttl seconds)
     with st.spinner("Generazione analisi AI..."):
         auto_comment = analytics_service.generate_automatic_comment()
     
@@ -175,16 +240,17 @@ if results['total_votes'] >= 10:
         st.warning("⚠️ Analisi LLM temporaneamente non disponibile. Verifica la configurazione di GEMINI_API_KEY.")
 else:
     # Show message when not enough votes
-    votes_needed = 10 - results['total_votes']
-    st.info(f"ℹ️ Servono almeno 10 voti per generare il commento automatico AI. Mancano ancora {votes_needed} voti!")
+    votes_needed = settings.llm_min_votes - results['total_votes']
+    st.info(f"ℹ️ Servono almeno {settings.llm_min_votes} voti per generare il commento automatico AI. Mancano ancora {votes_needed} voti!")
 
 # Footer
 st.markdown("---")
 st.markdown(
-    '<p class="caption-text">Aggiornamento automatico ogni 2 secondi | Powered by VibeTheForce 🌟</p>',
+    f'<p class="caption-text">Aggiornamento automatico ogni {settings.refresh_seconds:g} secondi '
+    '| Powered by VibeTheForce 🌟</p>',
     unsafe_allow_html=True
 )
 
-# Auto-refresh every 2 seconds
-time.sleep(2)
+# Auto-refresh every refresh_seconds
+time.sleep(settings.refresh_seconds)
 st.rerun()
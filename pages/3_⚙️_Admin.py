@@ -3,10 +3,21 @@ Admin Panel - VibeTheForce
 Gestione amministrativa: reset voti, statistiche database, QR code
 """
 import streamlit as st
-from services.vote_service import VoteService
+import pandas as pd
+from services.streamlit_adapters import StreamlitVoteService, bootstrap_services, get_app_settings, reload_app_settings
+from services.rate_limiter import get_vote_rate_limiter
+from services.vote_service import invalidate_results_cache
 from utils.theme import apply_star_wars_theme
+from utils.metrics import RATE_LIMITED_TOTAL, VOTES_TOTAL, track_streamlit_session
+from utils.charts import build_timeline_chart
+import os
 import sqlite3
+import tempfile
 from datetime import datetime
+from database.backup import BackupManager
+from database.db_manager import CURRENT_ROUND
+from database.export import EXPORT_FORMATS, EXPORT_TABLES, export_table
+from utils.settings import LLM_PROVIDERS, SettingsError, restart_required, setting_fields, update_settings
 
 
 def get_database_stats():
@@ -16,29 +27,19 @@ def get_database_stats():
     Returns:
         Dict con statistiche database
     """
-    vote_service = VoteService()
+    vote_service = StreamlitVoteService()
+    
+    db_manager = vote_service.db_manager
     
     try:
-        conn = sqlite3.connect(vote_service.db_path)
-        cursor = conn.cursor()
-        
-        # Totale voti
-        cursor.execute('SELECT COUNT(*) FROM votes')
-        total_votes = cursor.fetchone()[0]
+        # Totale voti, primo e ultimo voto del round corrente in una sola query
+        # (dalla replica di lettura se attiva, come il totale dei commenti)
+        total_votes, first_vote_timestamp, last_vote_timestamp = db_manager.execute_read(
+            f'SELECT COUNT(*), MIN(timestamp), MAX(timestamp) FROM votes WHERE round_id = {CURRENT_ROUND}'
+        )[0]
         
         # Totale commenti
-        cursor.execute('SELECT COUNT(*) FROM comments')
-        total_comments = cursor.fetchone()[0]
-        
-        # Timestamp ultimo voto
-        cursor.execute('SELECT MAX(timestamp) FROM votes')
-        last_vote_timestamp = cursor.fetchone()[0]
-        
-        # Timestamp primo voto
-        cursor.execute('SELECT MIN(timestamp) FROM votes')
-        first_vote_timestamp = cursor.fetchone()[0]
-        
-        conn.close()
+        total_comments = db_manager.get_comment_count()
         
         return {
             'total_votes': total_votes,
@@ -57,11 +58,327 @@ def get_database_stats():
         }
 
 
+def render_db_performance_panel():
+    """Render del pannello "DB performance" con le metriche di instrumentation"""
+    st.header("⏱️ DB Performance")
+    
+    db_manager = StreamlitVoteService().db_manager
+    instrumentation = db_manager.instrumentation
+    
+    enabled = st.toggle("Instrumentation query attiva", value=instrumentation is not None)
+    if enabled and instrumentation is None:
+        instrumentation = db_manager.enable_instrumentation()
+    elif not enabled and instrumentation is not None:
+        db_manager.disable_instrumentation()
+        instrumentation = None
+    
+    if instrumentation is None:
+        st.info("Attiva l'instrumentation per raccogliere latenze e slow query.")
+        return
+    
+    stats = instrumentation.get_stats()
+    if not stats:
+        st.info("Nessuna query registrata finora.")
+    else:
+        rows = [
+            {
+                'Statement': sql,
+                'Esecuzioni': s.count,
+                'Errori': s.errors,
+                'Media (ms)': round(s.avg_ms, 2),
+                'p95 (ms)': round(s.percentile(95), 2),
+                'Max (ms)': round(s.max_ms, 2),
+                'Righe': s.rows,
+                'Lock wait (ms)': round(s.lock_wait_ms, 2),
+            }
+            for sql, s in sorted(stats.items(), key=lambda item: item[1].total_ms, reverse=True)
+        ]
+        st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+    
+    slow_queries = instrumentation.get_slow_queries()
+    st.subheader(f"🐢 Slow query (> {instrumentation.slow_query_ms:.0f} ms)")
+    if not slow_queries:
+        st.caption("Nessuna slow query registrata.")
+    for event in slow_queries[:20]:
+        with st.expander(f"{event.duration_ms:.1f} ms — {event.sql[:80]}"):
+            st.code(event.sql, language="sql")
+            st.text("\n".join(event.plan or []))
+    
+    if st.button("🧹 Azzera metriche DB"):
+        instrumentation.reset()
+        st.rerun()
+
+
+def _discard_export():
+    """Rimuove il file dell'export preparato in precedenza (dopo il download o a un nuovo export)"""
+    export_file = st.session_state.pop('export_file', None)
+    if export_file and os.path.exists(export_file['path']):
+        os.remove(export_file['path'])
+
+
+def render_export_panel():
+    """Render della sezione export streaming di voti e commenti"""
+    st.header("📦 Export Dati")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        table = st.selectbox("Tabella", sorted(EXPORT_TABLES))
+    with col2:
+        fmt = st.selectbox("Formato", EXPORT_FORMATS)
+    
+    if st.button("⚙️ Prepara export"):
+        _discard_export()
+        max_mb = get_app_settings().export_max_mb
+        # L'export scrive a blocchi su file temporaneo; in sessione resta solo
+        # il percorso, i byte non restano in memoria tra un rerun e l'altro
+        out = tempfile.NamedTemporaryFile(prefix="vibetheforce-export-", suffix=f".{fmt}", delete=False)
+        try:
+            with out:
+                with st.spinner("Export in corso..."):
+                    rows = export_table(StreamlitVoteService().db_manager, table, fmt, out)
+            size = os.path.getsize(out.name)
+            if size > max_mb * 1024 * 1024:
+                raise RuntimeError(
+                    f"Export di {size / 1024 / 1024:.0f} MiB oltre il limite di {max_mb} MiB "
+                    "(export_max_mb): usa `python -m database.export` dalla riga di comando."
+                )
+        except RuntimeError as e:
+            os.remove(out.name)
+            st.error(str(e))
+            return
+        except BaseException:
+            os.remove(out.name)
+            raise
+        st.session_state.export_file = {'path': out.name, 'table': table, 'fmt': fmt, 'rows': rows}
+    
+    export_file = st.session_state.get('export_file')
+    if export_file and os.path.exists(export_file['path']):
+        st.caption(f"{export_file['rows']} righe esportate da {export_file['table']}")
+        with open(export_file['path'], 'rb') as f:
+            st.download_button(
+                label=f"⬇️ Scarica {export_file['table']}.{export_file['fmt']}",
+                data=f,
+                file_name=f"vibetheforce_{export_file['table']}.{export_file['fmt']}",
+                mime="application/octet-stream",
+                # Il file è già stato servito: al click si rimuove
+                on_click=_discard_export
+            )
+
+
+def render_backup_panel():
+    """Render della sezione snapshot: elenco, creazione e ripristino"""
+    st.header("💾 Backup")
+    
+    vote_service = StreamlitVoteService()
+    backups = BackupManager(vote_service.db_manager)
+    st.caption(
+        f"Snapshot online in {backups.backup_dir} (ultimi {backups.retention} conservati). "
+        "Uno snapshot viene salvato automaticamente prima di archiviare i round resettati."
+    )
+    
+    if st.button("📸 Crea snapshot"):
+        try:
+            with st.spinner("Snapshot in corso..."):
+                info = backups.create_snapshot("manual")
+            st.success(f"✅ Snapshot creato in {info.duration_s:.2f}s ({info.size_bytes / 1024:.1f} KiB)")
+        except (sqlite3.Error, OSError) as e:
+            st.error(f"Errore durante lo snapshot: {e}")
+    
+    snapshots = backups.list_snapshots()
+    if not snapshots:
+        st.info("Nessuno snapshot disponibile.")
+        return
+    
+    st.dataframe(
+        pd.DataFrame([
+            {
+                'Data': datetime.fromisoformat(info.created_at).strftime('%d/%m/%Y %H:%M:%S'),
+                'Motivo': info.label,
+                'Dimensione (KiB)': round(info.size_bytes / 1024, 1),
+                'Durata (s)': info.duration_s,
+                'File': info.path,
+            }
+            for info in snapshots
+        ]),
+        use_container_width=True,
+        hide_index=True
+    )
+    
+    labels = {
+        f"{info.created_at} — {info.label}": info.path
+        for info in snapshots
+    }
+    selected = st.selectbox("Snapshot da ripristinare", list(labels))
+    confirm_restore = st.checkbox("Confermo di voler sostituire i dati attuali con lo snapshot")
+    if st.button("♻️ Ripristina snapshot", disabled=not confirm_restore):
+        try:
+            with st.spinner("Ripristino in corso..."):
+                backups.restore_snapshot(labels[selected])
+            invalidate_results_cache()
+            st.success("✅ Snapshot ripristinato (i dati precedenti sono stati salvati in uno snapshot pre-restore)")
+        except (sqlite3.Error, OSError) as e:
+            st.error(f"Errore durante il ripristino: {e}")
+
+
+def render_rate_limit_panel():
+    """Render del pannello con il traffico rifiutato dal rate limiter dei voti"""
+    st.header("🛡️ Rate Limiting")
+    
+    limiter = get_vote_rate_limiter()
+    st.caption(
+        f"Per IP: {limiter.by_ip.rate:g} voti/s, burst {limiter.by_ip.burst:g} — "
+        f"per sessione: {limiter.by_session.rate:g} tentativi/s, burst {limiter.by_session.burst:g} "
+        f"(contatori di questo processo)"
+    )
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Rifiutati per IP", int(RATE_LIMITED_TOTAL.labels(scope="ip").value))
+    with col2:
+        st.metric("Rifiutati per sessione", int(RATE_LIMITED_TOTAL.labels(scope="session").value))
+    with col3:
+        st.metric("Voti accettati", int(VOTES_TOTAL.labels(outcome="accepted").value))
+    
+    st.caption(f"Bucket in memoria: {len(limiter.by_ip)} IP, {len(limiter.by_session)} sessioni "
+               f"(massimo {limiter.by_ip.max_keys} ciascuno)")
+    
+    top_ips = limiter.by_ip.top_limited()
+    if top_ips:
+        st.dataframe(
+            pd.DataFrame([{'IP': ip, 'Rifiuti': count} for ip, count in top_ips]),
+            use_container_width=True,
+            hide_index=True
+        )
+        if st.button("🔓 Sblocca tutti"):
+            limiter.clear()
+            st.rerun()
+    else:
+        st.caption("Nessun IP limitato di recente.")
+
+
+def _report_settings_change(old, new):
+    """Mostra i valori cambiati e quelli che richiedono un riavvio"""
+    changed = [f.name for f in setting_fields() if getattr(old, f.name) != getattr(new, f.name)]
+    if not changed:
+        st.info("Nessuna impostazione cambiata.")
+        return
+    st.success("✅ Impostazioni aggiornate: " + ", ".join(
+        f"{name} {getattr(old, name)} → {getattr(new, name)}" for name in changed
+    ))
+    pending = restart_required(old, new)
+    if pending:
+        st.warning(f"⚠️ Hanno effetto solo dopo il riavvio dell'app: {', '.join(pending)}")
+
+
+def render_settings_panel():
+    """Render delle impostazioni correnti, con modifica a runtime e ricaricamento"""
+    st.header("🎛️ Impostazioni")
+    settings = get_app_settings()
+    st.caption(
+        "Fonti in ordine di precedenza: secrets, variabili d'ambiente VIBETHEFORCE_<NOME>, "
+        "file vibetheforce.toml, default. Le modifiche da qui valgono per questo processo "
+        "fino al prossimo ricaricamento o riavvio."
+    )
+    st.dataframe(
+        pd.DataFrame([
+            {
+                'Impostazione': f.name,
+                'Valore': str(getattr(settings, f.name)),
+                'Fonte': settings.sources.get(f.name, 'default'),
+                'Descrizione': f.metadata['help'],
+                'Riavvio': '🔁' if f.metadata['restart'] else '',
+            }
+            for f in setting_fields()
+        ]),
+        use_container_width=True,
+        hide_index=True
+    )
+    
+    with st.form("settings_form"):
+        st.caption("Valori modificabili senza riavvio")
+        values = {}
+        columns = st.columns(3)
+        editable = [f for f in setting_fields() if not f.metadata['restart'] and f.type is not str]
+        for i, f in enumerate(editable):
+            with columns[i % 3]:
+                current = getattr(settings, f.name)
+                if f.type is bool:
+                    values[f.name] = st.checkbox(f.name, value=current, help=f.metadata['help'])
+                    continue
+                values[f.name] = st.number_input(
+                    f.name, value=current, help=f.metadata['help'],
+                    step=1 if f.type is int else None, format=None if f.type is int else "%g"
+                )
+        values['llm_provider'] = st.selectbox(
+            "llm_provider", LLM_PROVIDERS, index=LLM_PROVIDERS.index(settings.llm_provider)
+        )
+        submitted = st.form_submit_button("💾 Applica")
+    if submitted:
+        changes = {name: value for name, value in values.items() if value != getattr(settings, name)}
+        try:
+            _report_settings_change(settings, update_settings(**changes) if changes else settings)
+        except SettingsError as e:
+            st.error(str(e))
+    
+    if st.button("🔄 Ricarica da secrets, ambiente e file"):
+        try:
+            _report_settings_change(settings, reload_app_settings())
+        except SettingsError as e:
+            st.error(f"{e} (restano attive le impostazioni precedenti)")
+
+
+def render_moderation_panel():
+    """Render dello stato della moderazione dei commenti del round corrente"""
+    st.subheader("🧹 Moderazione commenti")
+    db_manager = StreamlitVoteService().db_manager
+    try:
+        counts = db_manager.get_comment_status_counts()
+    except sqlite3.Error as e:
+        st.error(f"Errore nel recupero della moderazione: {e}")
+        return
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("In coda", counts.get('pending', 0) + counts.get('processing', 0))
+    with col2:
+        st.metric("Approvati", counts.get('approved', 0))
+    with col3:
+        st.metric("Duplicati", counts.get('duplicate', 0))
+    with col4:
+        st.metric("Rifiutati", counts.get('rejected', 0))
+
+
+def render_rounds_panel():
+    """Render dell'elenco dei round di votazione"""
+    db_manager = StreamlitVoteService().db_manager
+    try:
+        rounds = db_manager.get_rounds()
+    except sqlite3.Error as e:
+        st.error(f"Errore nel recupero dei round: {e}")
+        return
+    
+    st.dataframe(
+        pd.DataFrame([
+            {
+                'Round': round_id,
+                'Inizio': started_at,
+                'Archiviato': archived_at or ('in corso' if i == 0 else 'in archiviazione'),
+                'Voti': votes,
+            }
+            for i, (round_id, started_at, archived_at, votes) in enumerate(rounds)
+        ]),
+        use_container_width=True,
+        hide_index=True
+    )
+
+
 def render_admin_page():
     """Render della pagina Admin"""
     
     # Applica tema Star Wars
     apply_star_wars_theme()
+    track_streamlit_session()
+    bootstrap_services()
     
     st.title("⚙️ Admin Panel - VibeTheForce")
     st.markdown("---")
@@ -104,22 +421,61 @@ def render_admin_page():
     if stats['first_vote_timestamp'] and stats['last_vote_timestamp']:
         st.info(f"📅 Primo voto: {datetime.fromisoformat(stats['first_vote_timestamp']).strftime('%d/%m/%Y %H:%M:%S')}")
     
+    render_moderation_panel()
+    
+    # Sparkline dell'andamento voti (dalla tabella di rollup)
+    timeline = StreamlitVoteService().get_timeline()
+    if timeline:
+        st.caption("📈 Voti al minuto")
+        st.plotly_chart(
+            build_timeline_chart(timeline, height=120, sparkline=True),
+            use_container_width=True
+        )
+    
+    st.markdown("---")
+    
+    # Sezione DB Performance
+    render_db_performance_panel()
+    
+    st.markdown("---")
+    
+    # Sezione Rate Limiting
+    render_rate_limit_panel()
+    
+    st.markdown("---")
+    
+    # Sezione Impostazioni
+    render_settings_panel()
+    
+    st.markdown("---")
+    
+    # Sezione Export
+    render_export_panel()
+    
+    st.markdown("---")
+    
+    # Sezione Backup
+    render_backup_panel()
+    
     st.markdown("---")
     
     # Sezione Reset Voti
     st.header("🔄 Reset Voti")
-    st.warning("⚠️ Attenzione: questa operazione eliminerà tutti i voti e commenti in modo permanente!")
+    st.warning("⚠️ Attenzione: il reset avvia un nuovo round e azzera voti e commenti visibili! "
+               "I round precedenti vengono spostati nell'archivio in background, dopo uno "
+               "snapshot ripristinabile dalla sezione Backup.")
+    render_rounds_panel()
     
     # Conferma con checkbox
     confirm_reset = st.checkbox("Confermo di voler eliminare tutti i dati")
     
     if confirm_reset:
         if st.button("🗑️ Reset Database", type="primary"):
-            vote_service = VoteService()
+            vote_service = StreamlitVoteService()
             success = vote_service.reset_votes()
             
             if success:
-                st.success("✅ Database resettato con successo!")
+                st.success("✅ Nuovo round avviato!")
                 st.balloons()
                 # Aggiorna la pagina dopo 2 secondi
                 st.rerun()
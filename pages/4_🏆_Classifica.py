@@ -0,0 +1,94 @@
+"""
+VibeTheForce - Classifica dei Talk
+Classifica live dei talk dell'evento per media bayesiana
+"""
+
+import streamlit as st
+import pandas as pd
+import plotly.graph_objects as go
+import time
+from services.streamlit_adapters import bootstrap_services, get_app_settings, get_leaderboard
+from utils.theme import apply_star_wars_theme
+from utils.metrics import track_streamlit_session
+
+# Page configuration
+st.set_page_config(
+    page_title="Classifica - VibeTheForce",
+    page_icon="🏆",
+    layout="wide"
+)
+
+# Apply Star Wars theme
+apply_star_wars_theme()
+
+# Track active session for metrics
+track_streamlit_session()
+
+# Servizi in background (una volta per processo)
+bootstrap_services()
+
+st.title("🏆 Classifica dei Talk")
+st.markdown("---")
+
+snapshot = get_leaderboard(top_k=10)
+
+if snapshot is not None and snapshot.entries:
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        st.metric(label="🎤 Talk votati", value=snapshot.total_talks)
+
+    with col2:
+        st.metric(label="🗳️ Voti totali", value=snapshot.total_votes)
+
+    with col3:
+        st.metric(label="⭐ Media evento", value=f"{snapshot.prior_mean:.2f}")
+
+    # Podio e classifica completa
+    table = pd.DataFrame([
+        {
+            'Posizione': entry.rank,
+            'Talk': entry.talk_id,
+            'Punteggio': entry.score,
+            'Media': entry.mean,
+            'Dev. std': entry.std_dev,
+            'Voti': entry.votes,
+        }
+        for entry in snapshot.entries
+    ])
+
+    fig = go.Figure(data=[
+        go.Bar(
+            x=table['Punteggio'],
+            y=table['Talk'],
+            orientation='h',
+            marker=dict(color='#FFD700', line=dict(color='#FFFFFF', width=2)),
+            text=[f"{score:.2f}" for score in table['Punteggio']],
+            textposition='outside',
+            textfont=dict(size=20, color='#FFFFFF')
+        )
+    ])
+    fig.update_layout(
+        plot_bgcolor='rgba(0, 0, 0, 0)',
+        paper_bgcolor='rgba(0, 0, 0, 0)',
+        height=max(300, 60 * len(table)),
+        margin=dict(t=20, b=40, l=120, r=60),
+        font=dict(size=18, color='#FFFFFF', family='Arial'),
+        yaxis=dict(autorange='reversed'),
+        xaxis=dict(range=[1, 5.5], gridcolor='rgba(255, 255, 255, 0.2)')
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+    st.dataframe(table, hide_index=True, use_container_width=True)
+
+    st.caption(
+        f"Punteggio = media bayesiana con prior {snapshot.prior_mean:.2f} "
+        f"(peso {snapshot.prior_weight:.1f} voti) · snapshot v{snapshot.version} "
+        f"delle {snapshot.generated_at[11:]}"
+    )
+elif snapshot is not None:
+    st.info("ℹ️ Nessun voto ancora registrato: la classifica apparirà con i primi voti.")
+
+# Auto-refresh every refresh_seconds
+time.sleep(get_app_settings().refresh_seconds)
+st.rerun()
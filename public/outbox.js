@@ -0,0 +1,149 @@
+// VibeTheForce - Vote Outbox
+// Durable queue of votes in IndexedDB, flushed in batches to the
+// idempotent batch endpoint. Loaded by the page (script.js) and by the
+// Service Worker (sw.js), so it must not touch the DOM.
+
+const VoteOutbox = {
+    DB_NAME: 'vibetheforce',
+    STORE: 'outbox',
+    BATCH_ENDPOINT: '/api/votes/batch',
+    SYNC_TAG: 'vote-outbox',
+    BATCH_SIZE: 50,
+
+    // Backoff between failed flushes: full jitter on an exponential cap
+    BASE_DELAY_MS: 1000,
+    MAX_DELAY_MS: 60000,
+
+    dbPromise: null,
+    flushPromise: null,
+
+    // True if votes can be stored durably in this browser
+    isAvailable() {
+        return typeof indexedDB !== 'undefined';
+    },
+
+    // Open (once) the outbox database
+    open() {
+        if (!this.dbPromise) {
+            this.dbPromise = new Promise((resolve, reject) => {
+                const request = indexedDB.open(this.DB_NAME, 1);
+                request.onupgradeneeded = () => {
+                    request.result.createObjectStore(this.STORE, { keyPath: 'id' });
+                };
+                request.onsuccess = () => resolve(request.result);
+                request.onerror = () => {
+                    this.dbPromise = null;
+                    reject(request.error);
+                };
+            });
+        }
+        return this.dbPromise;
+    },
+
+    // Run fn(store) in a transaction and resolve with its request result
+    async withStore(mode, fn) {
+        const db = await this.open();
+        return new Promise((resolve, reject) => {
+            const tx = db.transaction(this.STORE, mode);
+            const request = fn(tx.objectStore(this.STORE));
+            tx.oncomplete = () => resolve(request ? request.result : undefined);
+            tx.onerror = () => reject(tx.error);
+            tx.onabort = () => reject(tx.error);
+        });
+    },
+
+    // Queue a vote; resolves once it is safely stored
+    add(vote) {
+        return this.withStore('readwrite', store => store.put(vote));
+    },
+
+    // Oldest queued votes, up to limit
+    peek(limit) {
+        return this.withStore('readonly', store => store.getAll(null, limit));
+    },
+
+    count() {
+        return this.withStore('readonly', store => store.count());
+    },
+
+    remove(ids) {
+        return this.withStore('readwrite', store => {
+            ids.forEach(id => store.delete(id));
+            return null;
+        });
+    },
+
+    // Random delay in [0, min(MAX_DELAY_MS, BASE_DELAY_MS * 2^attempt)]
+    backoffDelay(attempt) {
+        const cap = Math.min(this.MAX_DELAY_MS, this.BASE_DELAY_MS * Math.pow(2, attempt));
+        return Math.random() * cap;
+    },
+
+    // Send queued votes in batches until the outbox is empty.
+    // Resolves with { sent, pending, retryAfterMs }: retryAfterMs is set when
+    // the server or the network asked us to stop, pending counts what is left.
+    // Concurrent calls (page and Service Worker) share one flush per context.
+    flush() {
+        if (!this.flushPromise) {
+            this.flushPromise = this.flushBatches().finally(() => {
+                this.flushPromise = null;
+            });
+        }
+        return this.flushPromise;
+    },
+
+    async flushBatches() {
+        let sent = 0;
+        while (true) {
+            const votes = await this.peek(this.BATCH_SIZE);
+            if (votes.length === 0) {
+                return { sent, pending: 0, retryAfterMs: null };
+            }
+
+            let response;
+            try {
+                response = await fetch(this.BATCH_ENDPOINT, {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({
+                        votes: votes.map(vote => ({
+                            id: vote.id,
+                            sessionId: vote.sessionId,
+                            rating: vote.rating,
+                            talkId: vote.talkId,
+                            timestamp: vote.timestamp
+                        }))
+                    })
+                });
+            } catch (error) {
+                // Offline or connection reset: keep everything for the next attempt
+                return { sent, pending: await this.count(), retryAfterMs: null };
+            }
+
+            if (!response.ok) {
+                const retryAfter = parseFloat(response.headers.get('Retry-After'));
+                return {
+                    sent,
+                    pending: await this.count(),
+                    retryAfterMs: isNaN(retryAfter) ? null : retryAfter * 1000
+                };
+            }
+
+            // Accepted, duplicate (already stored by an earlier attempt) and
+            // rejected votes are done; only "retry" votes stay queued
+            const body = await response.json();
+            const done = body.results
+                .filter(result => result.status !== 'retry')
+                .map(result => result.id);
+            await this.remove(done);
+            sent += done.length;
+            if (done.length < votes.length) {
+                return { sent, pending: await this.count(), retryAfterMs: null };
+            }
+        }
+    }
+};
+
+if (typeof self !== 'undefined') {
+    self.VoteOutbox = VoteOutbox;
+}
@@ -5,53 +5,173 @@ console.log('VibeTheForce initialized');
 const VoteManager = {
     USER_VOTED_KEY: 'vibetheforce_user_voted',
     SESSION_KEY: 'vibetheforce_session',
+    RESULTS_ENDPOINT: '/api/results',
 
-    // Submit vote to backend
+    // Spread reconnecting clients over this window after an 'online' event
+    ONLINE_JITTER_MS: 5000,
+    // Jitter added to a server-advised Retry-After
+    BASE_JITTER_MS: 1000,
+
+    retryAttempt: 0,
+    retryTimer: null,
+
+    // Queue the vote in the durable outbox and start a sync.
+    // Resolves true once the vote is stored on the device (or, without
+    // IndexedDB, accepted by the server).
     async submitVote(rating) {
         if (this.hasUserVoted()) {
             console.log('User has already voted');
             return false;
         }
 
+        const vote = {
+            id: this.newSessionId(),
+            sessionId: this.getSessionId(),
+            rating: parseInt(rating),
+            talkId: 'main',
+            timestamp: new Date().toISOString()
+        };
+
+        if (!VoteOutbox.isAvailable()) {
+            return this.sendDirect(vote);
+        }
+
         try {
-            const response = await fetch('/.netlify/functions/vote', {
+            await VoteOutbox.add(vote);
+        } catch (error) {
+            // e.g. storage blocked in private mode
+            console.error('Error queuing vote:', error);
+            return this.sendDirect(vote);
+        }
+
+        localStorage.setItem(this.USER_VOTED_KEY, 'true');
+        console.log('Vote queued');
+        this.scheduleSync();
+        return true;
+    },
+
+    // Single attempt through the batch endpoint, when votes cannot be queued
+    async sendDirect(vote) {
+        try {
+            const response = await fetch(VoteOutbox.BATCH_ENDPOINT, {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({
-                    rating: parseInt(rating),
-                    timestamp: new Date().toISOString(),
-                    sessionId: this.getSessionId()
-                })
+                body: JSON.stringify({ votes: [vote] })
             });
 
-            if (response.ok) {
+            if (!response.ok) {
+                console.error('Failed to submit vote:', response.status);
+                return false;
+            }
+            const [result] = (await response.json()).results;
+            if (result.status === 'accepted' || result.status === 'duplicate') {
                 localStorage.setItem(this.USER_VOTED_KEY, 'true');
                 console.log('Vote submitted successfully');
                 return true;
-            } else {
-                console.error('Failed to submit vote:', response.status);
-                return false;
             }
+            console.error('Vote not accepted:', result.error);
+            return false;
         } catch (error) {
             console.error('Error submitting vote:', error);
             return false;
         }
     },
 
+    // Register the Service Worker and resume syncing votes left in the outbox
+    initOutbox() {
+        if (!VoteOutbox.isAvailable()) {
+            return;
+        }
+
+        if ('serviceWorker' in navigator) {
+            navigator.serviceWorker.register('sw.js').catch(error => {
+                console.error('Service Worker registration failed:', error);
+            });
+        }
+
+        window.addEventListener('online', () => {
+            this.retryAttempt = 0;
+            clearTimeout(this.retryTimer);
+            this.retryTimer = setTimeout(() => this.scheduleSync(), Math.random() * this.ONLINE_JITTER_MS);
+        });
+
+        VoteOutbox.count().then(pending => {
+            if (pending > 0) {
+                this.scheduleSync();
+            }
+        }).catch(error => console.error('Error reading outbox:', error));
+    },
+
+    // Hand the flush to Background Sync if available (it survives closing
+    // the page), otherwise flush from the page with jittered backoff
+    async scheduleSync() {
+        if ('serviceWorker' in navigator && 'SyncManager' in window) {
+            try {
+                const registration = await navigator.serviceWorker.getRegistration();
+                if (registration && registration.active) {
+                    await registration.sync.register(VoteOutbox.SYNC_TAG);
+                    return;
+                }
+            } catch (error) {
+                console.error('Background Sync unavailable:', error);
+            }
+        }
+        this.flushOutbox();
+    },
+
+    async flushOutbox() {
+        clearTimeout(this.retryTimer);
+        this.retryTimer = null;
+
+        // Known offline: the 'online' listener restarts the flush
+        if (navigator.onLine === false) {
+            return;
+        }
+
+        let result;
+        try {
+            result = await VoteOutbox.flush();
+        } catch (error) {
+            console.error('Error flushing outbox:', error);
+            result = { sent: 0, pending: 1, retryAfterMs: null };
+        }
+        if (result.pending === 0) {
+            this.retryAttempt = 0;
+            return;
+        }
+
+        // Server-advised delay (plus jitter) wins over our own backoff
+        const delay = result.retryAfterMs !== null
+            ? result.retryAfterMs + Math.random() * this.BASE_JITTER_MS
+            : VoteOutbox.backoffDelay(this.retryAttempt);
+        this.retryAttempt++;
+        console.log(`${result.pending} votes queued, retrying in ${Math.round(delay)} ms`);
+        this.retryTimer = setTimeout(() => this.flushOutbox(), delay);
+    },
+
     // Get current vote counts from backend
+    // Fetch the current counts and the server's next-poll hint.
+    // Resolves with { counts, retryAfterMs } (counts is null on failure);
+    // retryAfterMs comes from the Retry-After header, also on errors.
     async getVoteCounts() {
+        let response;
         try {
-            const response = await fetch('/.netlify/functions/results');
-            if (response.ok) {
-                return await response.json();
-            } else {
-                console.error('Failed to get results:', response.status);
-                return null;
-            }
+            response = await fetch(this.RESULTS_ENDPOINT);
         } catch (error) {
             console.error('Error getting results:', error);
-            return null;
+            return { counts: null, retryAfterMs: null };
+        }
+
+        const retryAfter = parseFloat(response.headers.get('Retry-After'));
+        const retryAfterMs = isNaN(retryAfter) ? null : retryAfter * 1000;
+        if (!response.ok) {
+            console.error('Failed to get results:', response.status);
+            return { counts: null, retryAfterMs };
         }
+        // The browser revalidates with If-None-Match: a 304 arrives here as
+        // the cached 200 with the fresh Retry-After
+        const body = await response.json();
+        return { counts: body.votes, retryAfterMs };
     },
 
     // Check if user has already voted
@@ -60,15 +180,24 @@ const VoteManager = {
     },
 
     // Get or create session ID
+    // 128-bit ID as 32 hex chars, same format as utils/session_identity.py
     getSessionId() {
         let sessionId = localStorage.getItem(this.SESSION_KEY);
         if (!sessionId) {
-            sessionId = Date.now() + '-' + Math.random().toString(36).substring(2, 11);
+            sessionId = this.newSessionId();
             localStorage.setItem(this.SESSION_KEY, sessionId);
         }
         return sessionId;
     },
 
+    // Generate a session ID: 48-bit millisecond timestamp + 80 random bits
+    newSessionId() {
+        const random = new Uint8Array(10);
+        crypto.getRandomValues(random);
+        const millis = Date.now().toString(16).padStart(12, '0').slice(-12);
+        return millis + Array.from(random, b => b.toString(16).padStart(2, '0')).join('');
+    },
+
     // Reset vote status (for testing)
     resetVoteStatus() {
         localStorage.removeItem(this.USER_VOTED_KEY);
@@ -136,7 +265,7 @@ const VotingInterface = {
         if (resultsSection) {
             resultsSection.classList.remove('hidden');
             // Initialize results dashboard if not already done
-            if (!ResultsDashboard.updateInterval) {
+            if (!ResultsDashboard.active) {
                 ResultsDashboard.init();
             }
         }
@@ -148,7 +277,7 @@ const VotingInterface = {
         const resultsSection = document.getElementById('results-section');
 
         // Clean up results dashboard when leaving
-        if (ResultsDashboard.updateInterval) {
+        if (ResultsDashboard.active) {
             ResultsDashboard.cleanup();
         }
 
@@ -290,55 +419,74 @@ const VotingInterface = {
 };
 
 // Results Dashboard - Handles real-time results display
+// Polls at the interval advised by the server (Retry-After: a few seconds
+// while votes come in, longer when idle), pauses while the tab is hidden
+// and backs off exponentially on errors.
 const ResultsDashboard = {
-    updateInterval: null,
+    // Used until the server sends its first hint
+    DEFAULT_POLL_MS: 2000,
+    // +/- fraction applied to every delay, so dashboards do not poll in lockstep
+    POLL_JITTER: 0.1,
+    // Error backoff: BASE * 2^(retries - 1), capped
+    ERROR_BASE_DELAY_MS: 2000,
+    ERROR_MAX_DELAY_MS: 60000,
+
+    pollTimer: null,
+    active: false,
     retryCount: 0,
     maxRetries: 3,
     isUpdating: false,
+    visibilityListener: null,
 
     init() {
         console.log('ResultsDashboard initialized');
-        this.updateResults();
         this.startAutoUpdate();
     },
 
-    // Update results display with error handling
+    // Update results display; resolves with the delay before the next poll
     async updateResults() {
         // Prevent concurrent updates
         if (this.isUpdating) {
-            return;
+            return this.DEFAULT_POLL_MS;
         }
 
         this.isUpdating = true;
 
         try {
-            const results = await VoteManager.getVoteCounts();
+            const { counts, retryAfterMs } = await VoteManager.getVoteCounts();
 
-            if (results) {
-                this.renderResults(results);
+            if (counts) {
+                this.renderResults(counts);
                 this.retryCount = 0; // Reset retry count on success
                 this.hideConnectionError();
-            } else {
-                throw new Error('Failed to fetch results');
+                return retryAfterMs !== null ? retryAfterMs : this.DEFAULT_POLL_MS;
             }
+            return this.handleUpdateError(retryAfterMs);
         } catch (error) {
             console.error('Error updating results:', error);
-            this.handleUpdateError();
+            return this.handleUpdateError(null);
         } finally {
             this.isUpdating = false;
         }
     },
 
-    // Handle update errors with retry logic
-    handleUpdateError() {
+    // Handle update errors: exponential backoff, or the server's Retry-After
+    // if longer (e.g. 503 while the database is busy)
+    handleUpdateError(retryAfterMs) {
         this.retryCount++;
 
         if (this.retryCount >= this.maxRetries) {
             this.showConnectionError();
-            console.warn(`Failed to update results after ${this.maxRetries} attempts`);
+            console.warn(`Failed to update results after ${this.retryCount} attempts`);
         } else {
             console.log(`Retry ${this.retryCount}/${this.maxRetries} for results update`);
         }
+
+        const backoff = Math.min(
+            this.ERROR_MAX_DELAY_MS,
+            this.ERROR_BASE_DELAY_MS * Math.pow(2, this.retryCount - 1)
+        );
+        return Math.max(backoff, retryAfterMs || 0);
     },
 
     // Show connection error message
@@ -457,22 +605,58 @@ const ResultsDashboard = {
         }
     },
 
-    // Start automatic updates every 2 seconds
+    // Start polling: now, then at the advised interval while the tab is visible
     startAutoUpdate() {
-        // Clear any existing interval
         this.stopAutoUpdate();
+        this.active = true;
 
-        console.log('Starting auto-update every 2 seconds');
-        this.updateInterval = setInterval(() => {
-            this.updateResults();
-        }, 2000);
+        if (!this.visibilityListener) {
+            this.visibilityListener = () => this.handleVisibilityChange();
+            document.addEventListener('visibilitychange', this.visibilityListener);
+        }
+
+        console.log('Starting adaptive auto-update');
+        if (!document.hidden) {
+            this.poll();
+        }
+    },
+
+    // Fetch once and schedule the next poll, unless stopped or hidden meanwhile
+    async poll() {
+        clearTimeout(this.pollTimer);
+        this.pollTimer = null;
+
+        const delay = await this.updateResults();
+        if (!this.active || document.hidden || this.pollTimer) {
+            return;
+        }
+        const jitter = 1 + (Math.random() * 2 - 1) * this.POLL_JITTER;
+        this.pollTimer = setTimeout(() => this.poll(), delay * jitter);
+    },
+
+    // Hidden tabs do not poll; coming back refreshes immediately
+    handleVisibilityChange() {
+        if (!this.active) {
+            return;
+        }
+        if (document.hidden) {
+            clearTimeout(this.pollTimer);
+            this.pollTimer = null;
+        } else {
+            this.poll();
+        }
     },
 
     // Stop automatic updates
     stopAutoUpdate() {
-        if (this.updateInterval) {
-            clearInterval(this.updateInterval);
-            this.updateInterval = null;
+        clearTimeout(this.pollTimer);
+        this.pollTimer = null;
+        if (this.visibilityListener) {
+            document.removeEventListener('visibilitychange', this.visibilityListener);
+            this.visibilityListener = null;
+        }
+        if (this.active) {
+            this.active = false;
             console.log('Auto-update stopped');
         }
     },
@@ -656,6 +840,7 @@ document.addEventListener('DOMContentLoaded', () => {
     console.log('VibeTheForce DOM loaded, initializing...');
 
     // Initialize all components
+    VoteManager.initOutbox();
     ThemeEngine.init();
     VotingInterface.init();
     QRCodeManager.init();
@@ -0,0 +1,73 @@
+// VibeTheForce - Service Worker
+// Serves the built assets cache-first and flushes the vote outbox on
+// Background Sync, also after the page was closed.
+// utils/asset_pipeline.py prepends PRECACHE_VERSION and PRECACHE_URLS to the
+// built copy; the unbuilt public/ folder runs without a precache.
+
+importScripts('outbox.js');
+
+const CACHE_PREFIX = 'vibetheforce-';
+const PRECACHE = self.PRECACHE_VERSION ? `${CACHE_PREFIX}${self.PRECACHE_VERSION}` : null;
+const FONT_CACHE = `${CACHE_PREFIX}fonts`;
+const FONT_HOSTS = ['fonts.googleapis.com', 'fonts.gstatic.com'];
+
+self.addEventListener('install', event => {
+    const ready = PRECACHE
+        ? caches.open(PRECACHE).then(cache => cache.addAll(self.PRECACHE_URLS))
+        : Promise.resolve();
+    event.waitUntil(ready.then(() => self.skipWaiting()));
+});
+
+self.addEventListener('activate', event => {
+    // Drop the caches of previous builds
+    const cleanup = caches.keys().then(keys => Promise.all(
+        keys
+            .filter(key => key.startsWith(CACHE_PREFIX) && key !== PRECACHE && key !== FONT_CACHE)
+            .map(key => caches.delete(key))
+    ));
+    event.waitUntil(cleanup.then(() => self.clients.claim()));
+});
+
+// Cached response if present, otherwise the network (stored for next time)
+async function cacheFirst(cacheName, request, cacheKey) {
+    const cache = await caches.open(cacheName);
+    const cached = await cache.match(cacheKey || request, { ignoreSearch: true });
+    if (cached) {
+        return cached;
+    }
+    const response = await fetch(request);
+    if (response.ok || response.type === 'opaque') {
+        cache.put(cacheKey || request, response.clone());
+    }
+    return response;
+}
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    if (request.method !== 'GET') {
+        return;
+    }
+    const url = new URL(request.url);
+
+    if (FONT_HOSTS.includes(url.hostname)) {
+        event.respondWith(cacheFirst(FONT_CACHE, request));
+    } else if (PRECACHE && url.origin === self.location.origin && !url.pathname.startsWith('/api/')) {
+        // Every navigation opens the precached page of this build
+        const cacheKey = request.mode === 'navigate'
+            ? new URL('index.html', self.registration.scope).href
+            : null;
+        event.respondWith(cacheFirst(PRECACHE, request, cacheKey));
+    }
+});
+
+self.addEventListener('sync', event => {
+    if (event.tag !== VoteOutbox.SYNC_TAG) {
+        return;
+    }
+    // Rejecting tells the browser to retry the sync later with its own backoff
+    event.waitUntil(VoteOutbox.flush().then(result => {
+        if (result.pending > 0) {
+            throw new Error(`${result.pending} votes still queued`);
+        }
+    }));
+});
@@ -1,13 +1,51 @@
 """
-Analytics Service - Analisi automatica dei risultati di votazione con Google Gemini
+Analytics Service - Analisi automatica dei risultati di votazione con un LLM
 Genera commenti descrittivi sui pattern di votazione in linguaggio naturale italiano
+
+Core senza dipendenze da Streamlit; la cache del commento è condivisa a
+livello di processo, quindi tutte le sessioni riusano la stessa analisi.
+Il modello è un LLMProvider (services.llm_providers: Gemini, locale o
+simulato, scelto da configurazione). Un solo aggiornamento alla volta:
+con un commento in cache le sessioni ricevono quello, anche se scaduto,
+mentre un thread in background lo rigenera; al primo commento le
+sessioni attendono la stessa chiamata invece di farne una ciascuna.
+Senza provider configurato il commento è composto localmente dalle
+statistiche dei voti e dall'analisi dei commenti (services.comment_analytics).
 """
 
-import streamlit as st
+import logging
+import threading
 from datetime import datetime, timedelta
 from typing import Optional, Dict
-from services.gemini_client import GeminiClient
-from services.vote_service import VoteService
+from services.llm_providers import LLMProvider, create_llm_provider
+from services.prompt_builder import PromptBuilder
+from services.vote_service import VoteService, VoteServiceError
+from utils.metrics import ANALYTICS_COMMENTS_TOTAL
+from utils.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Attesa oltre il timeout del provider per chi aspetta la chiamata di un'altra sessione
+COALESCE_GRACE_SECONDS = 5
+
+UNAVAILABLE_MESSAGE = "⚠️ Analisi temporaneamente non disponibile."
+GENERATION_FAILED_MESSAGE = "⚠️ Impossibile generare commento automatico al momento."
+
+
+def _empty_cache() -> Dict:
+    """Stato iniziale della cache del commento automatico"""
+    return {
+        'comment': None,
+        'last_update': None,
+        'last_vote_count': 0,
+        # Event dell'aggiornamento in corso (None se nessuno)
+        'in_flight': None
+    }
+
+
+# Cache di processo del commento automatico (aggiornamento ogni llm_cache_ttl secondi)
+_analytics_cache: Dict = _empty_cache()
+_analytics_cache_lock = threading.Lock()
 
 
 class AnalyticsService:
@@ -17,141 +55,197 @@ class AnalyticsService:
     Requisiti: 7.1, 7.2, 7.3, 7.4, 7.5
     """
     
-    def __init__(self):
-        """Inizializza Analytics Service con Gemini client e Vote service"""
-        self.gemini_client = GeminiClient(timeout=30)
-        self.vote_service = VoteService()
-        
-        # Cache per commento automatico (aggiornamento ogni 30 secondi)
-        if 'analytics_cache' not in st.session_state:
-            st.session_state.analytics_cache = {
-                'comment': None,
-                'last_update': None,
-                'last_vote_count': 0
-            }
+    def __init__(
+        self,
+        llm: Optional[LLMProvider] = None,
+        vote_service: Optional[VoteService] = None,
+        prompt_builder: Optional[PromptBuilder] = None
+    ):
+        """
+        Inizializza Analytics Service con provider LLM e Vote service
+        
+        Args:
+            llm: Provider LLM (default: create_llm_provider() dalle impostazioni)
+            vote_service: VoteService da cui leggere i risultati
+            prompt_builder: Builder dei prompt (default: budget di token di default)
+        """
+        self.llm = llm or create_llm_provider()
+        self.vote_service = vote_service or VoteService()
+        self.prompt_builder = prompt_builder or PromptBuilder()
     
     def generate_automatic_comment(self) -> Optional[str]:
         """
-        Genera commento automatico sui risultati di votazione usando Gemini LLM
+        Genera commento automatico sui risultati di votazione usando l'LLM
         
         Analizza la distribuzione numerica dei voti e genera un commento descrittivo
         di 3-4 frasi in italiano che identifica pattern e fornisce insights.
         
         Implementa caching per evitare chiamate ripetute:
-        - Aggiornamento ogni 30 secondi
+        - Aggiornamento ogni llm_cache_ttl secondi (impostazioni)
         - Solo se ci sono nuovi voti
+        - Una sola chiamata alla volta per processo; nel frattempo si serve
+          il commento in cache, anche se scaduto
+        
+        Senza LLM configurato il commento è generato localmente, senza cache.
         
         Returns:
             Commento automatico generato o None se non disponibile
-            Stringa vuota se meno di 10 voti
+            Stringa vuota se meno di llm_min_votes voti
         
         Requisiti: 7.1, 7.2, 7.3, 7.4, 7.5
         """
-        # Verifica se Gemini è configurato
-        if not self.gemini_client.is_configured():
-            return "⚠️ Analisi LLM non disponibile: GEMINI_API_KEY non configurata."
-        
         # Recupera risultati correnti
-        results = self.vote_service.get_results()
-        
-        # Requisito 7.1: Minimo 10 voti per generare commento
-        if results['total_votes'] < 10:
+        try:
+            results = self.vote_service.get_results()
+        except VoteServiceError as e:
+            logger.error(str(e))
+            return UNAVAILABLE_MESSAGE
+        
+        # Requisito 7.1: Minimo llm_min_votes voti (10 di default) per generare commento
+        settings = get_settings()
+        if results['total_votes'] < settings.llm_min_votes:
             return ""
         
-        # Controlla cache per evitare chiamate ripetute
-        cache = st.session_state.analytics_cache
+        # Senza LLM: commento locale, abbastanza economico da non servire cache
+        if not self.llm.is_configured():
+            ANALYTICS_COMMENTS_TOTAL.labels(source="local").inc()
+            return self._generate_local_comment(results)
+        
+        # Controlla cache e, se scaduta, chi rigenera il commento
         current_time = datetime.now()
+        with _analytics_cache_lock:
+            comment = _analytics_cache['comment']
+            last_update = _analytics_cache['last_update']
+            fresh = (
+                comment is not None and
+                last_update is not None and
+                (current_time - last_update) <= timedelta(seconds=settings.llm_cache_ttl) and
+                results['total_votes'] == _analytics_cache['last_vote_count']
+            )
+            refresh = _analytics_cache['in_flight']
+            leader = not fresh and refresh is None
+            if leader:
+                refresh = _analytics_cache['in_flight'] = threading.Event()
+        
+        if fresh:
+            ANALYTICS_COMMENTS_TOTAL.labels(source="cache").inc()
+            return comment
+        
+        # Commento scaduto: si serve quello, il leader lo rigenera in background
+        if comment is not None:
+            if leader:
+                threading.Thread(
+                    target=self._refresh, args=(results, refresh),
+                    name="analytics-refresh", daemon=True
+                ).start()
+            ANALYTICS_COMMENTS_TOTAL.labels(source="stale").inc()
+            return comment
         
-        # Determina se serve aggiornamento
-        needs_update = (
-            cache['comment'] is None or
-            cache['last_update'] is None or
-            (current_time - cache['last_update']) > timedelta(seconds=30) or
-            results['total_votes'] != cache['last_vote_count']
-        )
+        # Primo commento: il leader chiama l'LLM, le altre sessioni attendono lui
+        if leader:
+            ANALYTICS_COMMENTS_TOTAL.labels(source="llm").inc()
+            return self._refresh(results, refresh) or UNAVAILABLE_MESSAGE
+        ANALYTICS_COMMENTS_TOTAL.labels(source="coalesced").inc()
+        refresh.wait(self.llm.timeout + COALESCE_GRACE_SECONDS)
+        with _analytics_cache_lock:
+            return _analytics_cache['comment'] or UNAVAILABLE_MESSAGE
+    
+    def _refresh(self, results: Dict, done: threading.Event) -> Optional[str]:
+        """
+        Rigenera il commento e aggiorna la cache
         
-        # Usa cache se non serve aggiornamento
-        if not needs_update and cache['comment']:
-            return cache['comment']
+        Se l'LLM fallisce e c'è già un commento, resta quello fino al
+        prossimo aggiornamento.
         
-        # Genera nuovo commento
+        Args:
+            results: Risultati da cui generare il commento
+            done: Event dell'aggiornamento, segnalato alla fine
+        
+        Returns:
+            Commento in cache dopo l'aggiornamento, None in caso di errore
+        """
         try:
             comment = self._generate_comment_from_results(results)
-            
-            # Aggiorna cache
-            st.session_state.analytics_cache = {
-                'comment': comment,
-                'last_update': current_time,
-                'last_vote_count': results['total_votes']
-            }
-            
+            with _analytics_cache_lock:
+                if comment is None:
+                    comment = _analytics_cache['comment'] or GENERATION_FAILED_MESSAGE
+                _analytics_cache.update({
+                    'comment': comment,
+                    'last_update': datetime.now(),
+                    'last_vote_count': results['total_votes']
+                })
             return comment
-            
         except Exception as e:
-            st.error(f"Errore nella generazione commento automatico: {e}")
-            return "⚠️ Analisi temporaneamente non disponibile."
+            logger.error(f"Errore nella generazione commento automatico: {e}")
+            return None
+        finally:
+            with _analytics_cache_lock:
+                if _analytics_cache['in_flight'] is done:
+                    _analytics_cache['in_flight'] = None
+            done.set()
     
-    def _generate_comment_from_results(self, results: Dict) -> str:
+    def _generate_comment_from_results(self, results: Dict) -> Optional[str]:
         """
-        Genera commento usando Gemini basato sui risultati di votazione
+        Genera commento con l'LLM basato sui risultati di votazione
         
         Args:
             results: Dizionario con risultati da vote_service.get_results()
         
         Returns:
-            Commento generato da Gemini
+            Commento generato o None se l'LLM non risponde
         """
-        vote_distribution = results['votes']
-        total_votes = results['total_votes']
-        average_rating = results['average_rating']
-        
-        # Calcola percentuali per ogni rating
-        percentages = {
-            rating: round((count / total_votes * 100), 1) if total_votes > 0 else 0
-            for rating, count in vote_distribution.items()
-        }
-        
-        # Identifica rating più votato
-        max_rating = max(vote_distribution.items(), key=lambda x: x[1])
+        # Commenti approvati nel prompt, campionati per rating entro il budget
+        try:
+            comments = self.vote_service.get_all_comments()
+        except VoteServiceError as e:
+            logger.error(str(e))
+            comments = []
+        prompt = self.prompt_builder.build_results_prompt(results, comments)
         
-        # Crea prompt per Gemini (Requisito 7.2, 7.3)
-        prompt = f"""Analizza questi dati di votazione per una conference sul VibeCoding e genera un commento descrittivo in italiano.
-
-Distribuzione voti (scala 1-5 stelle con tematiche Star Wars):
-- 1 stella (Youngling): {vote_distribution[1]} voti ({percentages[1]:.1f}%)
-- 2 stelle (Padawan): {vote_distribution[2]} voti ({percentages[2]:.1f}%)
-- 3 stelle (Cavaliere Jedi): {vote_distribution[3]} voti ({percentages[3]:.1f}%)
-- 4 stelle (Maestro Jedi): {vote_distribution[4]} voti ({percentages[4]:.1f}%)
-- 5 stelle (Gran Maestro): {vote_distribution[5]} voti ({percentages[5]:.1f}%)
-
-Totale voti: {total_votes}
-Media: {average_rating:.2f} stelle
-Rating più votato: {max_rating[0]} stelle con {max_rating[1]} voti
-
-Genera un commento di esattamente 3-4 frasi in italiano che:
-1. Descriva il sentiment generale (positivo/negativo/misto) basato sulla distribuzione
-2. Identifichi il pattern più interessante nella distribuzione dei voti
-3. Fornisca un'osservazione comparativa o statistica significativa
-
-Usa un tono coinvolgente e a tema Star Wars quando appropriato (es. "La Forza è forte in questo talk", "Il lato luminoso prevale").
-Rispondi SOLO con il testo del commento, senza titoli, formattazione markdown o introduzioni.
-"""
+        return self.llm.generate_comment(prompt) or None
+    
+    def _generate_local_comment(self, results: Dict) -> str:
+        """
+        Genera il commento senza LLM da statistiche dei voti e commenti approvati
         
-        # Genera commento con Gemini
-        comment = self.gemini_client.generate_text(prompt)
+        Args:
+            results: Dizionario con risultati da vote_service.get_results()
         
-        if comment:
-            return comment
+        Returns:
+            Commento di 2-3 frasi in italiano
+        """
+        stats = results['stats']
+        if stats.net_score >= 50:
+            verdict = "La Forza è forte in questo talk"
+        elif stats.net_score >= 0:
+            verdict = "Il lato luminoso prevale"
         else:
-            return "⚠️ Impossibile generare commento automatico al momento."
+            verdict = "Il lato oscuro si fa sentire"
+        sentences = [
+            f"{verdict}: media di {results['average_rating']:.2f} stelle su "
+            f"{results['total_votes']} voti, con il {stats.top2_box:.0f}% di 4-5 stelle."
+        ]
+        
+        try:
+            insights = self.vote_service.get_comment_insights(limit=3)
+        except VoteServiceError as e:
+            logger.error(str(e))
+            insights = None
+        if insights and insights.total:
+            sentences.append(
+                f"Nei {insights.total} commenti il tono è positivo per il "
+                f"{insights.share('positive'):.0f}% e negativo per il {insights.share('negative'):.0f}%."
+            )
+            if insights.keywords:
+                keywords = ", ".join(f"«{term}»" for term, _ in insights.keywords)
+                sentences.append(f"I temi più citati: {keywords}.")
+        
+        return " ".join(sentences)
     
     def clear_cache(self):
         """
         Pulisce la cache del commento automatico
         Utile per forzare rigenerazione immediata
         """
-        st.session_state.analytics_cache = {
-            'comment': None,
-            'last_update': None,
-            'last_vote_count': 0
-        }
+        with _analytics_cache_lock:
+            _analytics_cache.update(_empty_cache())
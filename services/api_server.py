@@ -0,0 +1,388 @@
+"""
+API Server - Endpoint JSON per client esterni (tabelloni, app, integrazioni)
+
+Server HTTP minimale della libreria standard, avviato in un thread daemon
+accanto all'app Streamlit (VIBETHEFORCE_API_PORT) o da solo:
+
+    python -m services.api_server --port 8080
+
+Endpoint:
+    GET  /api/leaderboard   Classifica dei talk (ETag = versione dello snapshot)
+    GET  /api/results       Risultati della pagina Risultati con ETag e Retry-After:
+                            secondi suggeriti prima del prossimo polling, in
+                            base al ritmo recente dei voti
+    POST /api/votes/batch   Lotto di voti dall'outbox del frontend statico
+                            (idempotente: un voto ripetuto risulta "duplicate";
+                            429 con Retry-After oltre il limite per IP)
+
+Gli errori sono JSON {"error": ...}: 400/413 per un corpo non valido,
+503 con Retry-After se il database è occupato o non disponibile, 500 per
+ogni altro errore (registrato con il traceback).
+
+L'IP del client è quello della connessione; con VIBETHEFORCE_TRUST_PROXY=1
+(server dietro un reverse proxy) è il primo di X-Forwarded-For.
+
+Con --static (o VIBETHEFORCE_STATIC_DIR) serve anche la build del frontend
+statico (python -m utils.asset_pipeline) sulla stessa origine delle API:
+file con hash in cache per un anno, index.html e sw.js sempre rivalidati,
+varianti .gz precompresse quando il client accetta gzip.
+"""
+import argparse
+import json
+import logging
+import math
+import mimetypes
+import os
+import re
+import sqlite3
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+from database.sharding import is_valid_talk_id
+from services.leaderboard import LeaderboardService
+from services.rate_limiter import get_vote_rate_limiter
+from services.sharded_vote_service import ShardedVoteService
+from services.vote_service import (
+    VoteError, VoteResult, VoteServiceError, VoteSubmission, suggest_poll_interval
+)
+from utils.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Risposta di una route: (status, corpo JSON, header aggiuntivi)
+Response = Tuple[int, Optional[Dict], Dict[str, str]]
+
+
+def leaderboard_route(handler: "_ApiHandler") -> Response:
+    """GET /api/leaderboard con supporto a If-None-Match"""
+    snapshot = LeaderboardService().get_snapshot()
+    etag = f'"{snapshot.version}"'
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+    if handler.headers.get('If-None-Match') == etag:
+        return 304, None, headers
+    return 200, snapshot.to_dict(), headers
+
+
+def results_route(handler: "_ApiHandler") -> Response:
+    """
+    GET /api/results: i risultati dello shard del talk principale
+
+    Il Retry-After (anche sui 304) indica quando ripetere la richiesta:
+    pochi secondi durante la votazione, fino a poll_max_seconds (impostazioni)
+    senza voti recenti. Il corpo non lo contiene, così resta valido anche dalla cache.
+    """
+    service = ShardedVoteService().for_talk('main')
+    results = service.get_results('main')
+    poll_after = suggest_poll_interval(service.get_vote_rate('main'))
+
+    counts = [results['votes'][rating] for rating in range(1, 6)]
+    etag = '"' + '-'.join(map(str, counts)) + '"'
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache', 'Retry-After': str(poll_after)}
+    if handler.headers.get('If-None-Match') == etag:
+        return 304, None, headers
+    return 200, {
+        'votes': results['votes'],
+        'total_votes': results['total_votes'],
+        'average_rating': results['average_rating'],
+    }, headers
+
+
+# Nomi prodotti dalla pipeline degli asset (style.3f2a9c1b0d.css): contenuto immutabile
+_HASHED_NAME_RE = re.compile(r"\.[0-9a-f]{10}\.[a-z]+$")
+
+# Limiti di un lotto di voti
+MAX_BATCH_VOTES = 100
+MAX_BODY_BYTES = 64 * 1024
+
+
+class BadRequest(Exception):
+    """Corpo della richiesta non valido (risposta 400 o 413)"""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def _parse_vote(item) -> Optional[VoteSubmission]:
+    """Converte un voto JSON in VoteSubmission (None se malformato)"""
+    if not isinstance(item, dict):
+        return None
+    session_id, rating = item.get('sessionId'), item.get('rating')
+    talk_id, comment = item.get('talkId', 'main'), item.get('comment')
+    if not isinstance(session_id, str) or not 0 < len(session_id) <= 128:
+        return None
+    # Solo identificativi validi: un client non può creare talk arbitrari
+    # (classifica, talk_stats) né votare una volta per ogni talk inventato
+    if not is_valid_talk_id(talk_id) or (comment is not None and not isinstance(comment, str)):
+        return None
+    return VoteSubmission(rating=rating, session_id=session_id, comment=comment, talk_id=talk_id)
+
+
+def _vote_status(result: Optional[VoteResult]) -> Dict:
+    """Esito di un voto per il client: accepted, duplicate, rejected o retry"""
+    if result is None:
+        return {'status': 'rejected', 'error': 'invalid_request'}
+    if result.success:
+        return {'status': 'accepted'}
+    if result.error is VoteError.DUPLICATE:
+        return {'status': 'duplicate'}
+    if result.error in (VoteError.DATABASE, VoteError.RATE_LIMITED):
+        # Errore transitorio: il client tiene il voto in coda
+        return {'status': 'retry', 'error': result.error.value}
+    return {'status': 'rejected', 'error': result.error.value}
+
+
+def votes_batch_route(handler: "_ApiHandler") -> Response:
+    """
+    POST /api/votes/batch
+
+    Corpo: {"votes": [{"id", "sessionId", "rating", "talkId"?, "comment"?}]}.
+    Risposta: {"results": [{"id", "status", "error"?}]} nello stesso ordine;
+    il client rimuove dall'outbox tutto tranne i voti in stato "retry".
+
+    I limiti per IP (sull'intero lotto) e per sessione sono controllati
+    prima di qualsiasi accesso al database.
+    """
+    body = handler.read_json()
+    items = body.get('votes') if isinstance(body, dict) else None
+    if not isinstance(items, list):
+        raise BadRequest("expected {\"votes\": [...]}")
+    if len(items) > MAX_BATCH_VOTES:
+        raise BadRequest(f"at most {MAX_BATCH_VOTES} votes per batch", 413)
+
+    limiter = get_vote_rate_limiter()
+    wait = limiter.check_ip(handler.client_ip(), len(items))
+    if wait:
+        return 429, {'error': VoteError.RATE_LIMITED.value}, {'Retry-After': str(math.ceil(wait))}
+
+    submissions = [_parse_vote(item) for item in items]
+    results: List[Optional[VoteResult]] = [None] * len(items)
+    valid = []
+    for i, submission in enumerate(submissions):
+        if submission is None:
+            continue
+        if limiter.check_session(submission.session_id):
+            results[i] = VoteResult(False, error=VoteError.RATE_LIMITED)
+        else:
+            valid.append(i)
+    for i, result in zip(valid, ShardedVoteService().submit_votes([submissions[i] for i in valid])):
+        results[i] = result
+
+    return 200, {
+        'results': [
+            {'id': item.get('id') if isinstance(item, dict) else None, **_vote_status(result)}
+            for item, result in zip(items, results)
+        ]
+    }, {'Cache-Control': 'no-store'}
+
+
+# Route GET: percorso -> funzione
+GET_ROUTES: Dict[str, Callable[["_ApiHandler"], Response]] = {
+    '/api/leaderboard': leaderboard_route,
+    '/api/results': results_route,
+}
+
+# Route POST: percorso -> funzione
+POST_ROUTES: Dict[str, Callable[["_ApiHandler"], Response]] = {
+    '/api/votes/batch': votes_batch_route,
+}
+
+
+class _ApiHandler(BaseHTTPRequestHandler):
+    """Handler HTTP che instrada le richieste alle route registrate"""
+
+    def _send_json(self, status: int, body: Optional[Dict], headers: Dict[str, str]):
+        payload = json.dumps(body, ensure_ascii=False).encode('utf-8') if body is not None else b''
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if body is not None:
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def client_ip(self) -> str:
+        """IP del client (primo X-Forwarded-For con l'impostazione trust_proxy)"""
+        if get_settings().trust_proxy:
+            forwarded = self.headers.get('X-Forwarded-For')
+            if forwarded:
+                return forwarded.split(',')[0].strip()
+        return self.client_address[0]
+
+    def read_json(self):
+        """Legge il corpo JSON della richiesta (BadRequest se assente, troppo grande o non valido)"""
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise BadRequest("invalid Content-Length")
+        if length > MAX_BODY_BYTES:
+            raise BadRequest(f"body larger than {MAX_BODY_BYTES} bytes", 413)
+        try:
+            return json.loads(self.rfile.read(length))
+        except ValueError:
+            raise BadRequest("invalid JSON")
+
+    def _dispatch(self, routes: Dict[str, Callable[["_ApiHandler"], Response]]):
+        route = routes.get(self.path.split('?')[0])
+        if route is None:
+            self._send_json(404, {'error': 'not found'}, {})
+            return
+        try:
+            response = route(self)
+        except BadRequest as e:
+            # Il corpo potrebbe non essere stato letto: chiude la connessione
+            self.close_connection = True
+            response = e.status, {'error': str(e)}, {}
+        except (VoteServiceError, sqlite3.Error) as e:
+            # Database occupato o non disponibile: il client riprova
+            response = 503, {'error': str(e)}, {'Retry-After': '1'}
+        except Exception:
+            logger.exception("Errore non gestito in %s %s", self.command, self.path)
+            self.close_connection = True
+            response = 500, {'error': 'internal server error'}, {}
+        self._send_json(*response)
+
+    def do_GET(self):
+        path = self.path.split('?')[0]
+        if path not in GET_ROUTES and getattr(self.server, 'static_dir', None):
+            self._send_static(path)
+            return
+        self._dispatch(GET_ROUTES)
+
+    def _send_static(self, path: str):
+        """Serve un file della build statica (404 se fuori dalla cartella o assente)"""
+        root = os.path.realpath(self.server.static_dir)
+        name = 'index.html' if path.endswith('/') else path.lstrip('/')
+        file_path = os.path.realpath(os.path.join(root, name))
+        if not file_path.startswith(root + os.sep) or not os.path.isfile(file_path):
+            self._send_json(404, {'error': 'not found'}, {})
+            return
+
+        stat = os.stat(file_path)
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        headers = {
+            'Content-Type': mimetypes.guess_type(file_path)[0] or 'application/octet-stream',
+            'Cache-Control': (
+                'public, max-age=31536000, immutable'
+                if _HASHED_NAME_RE.search(file_path) else 'no-cache'
+            ),
+            'ETag': etag,
+            'Vary': 'Accept-Encoding',
+        }
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            for header, value in headers.items():
+                self.send_header(header, value)
+            self.end_headers()
+            return
+
+        if 'gzip' in self.headers.get('Accept-Encoding', '') and os.path.isfile(f"{file_path}.gz"):
+            file_path = f"{file_path}.gz"
+            headers['Content-Encoding'] = 'gzip'
+        with open(file_path, 'rb') as f:
+            payload = f.read()
+        self.send_response(200)
+        for header, value in headers.items():
+            self.send_header(header, value)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        self._dispatch(POST_ROUTES)
+
+    def log_message(self, format, *args):
+        # Niente log per ogni richiesta
+        pass
+
+
+_server: Optional[ThreadingHTTPServer] = None
+_server_lock = threading.Lock()
+
+
+def make_api_server(
+    port: int = 8080,
+    host: str = "127.0.0.1",
+    static_dir: Optional[str] = None
+) -> ThreadingHTTPServer:
+    """
+    Crea (senza avviarlo) un server API
+
+    Args:
+        port: Porta (0 per una porta libera)
+        host: Indirizzo di bind
+        static_dir: Build del frontend statico da servire (opzionale)
+
+    Returns:
+        Server HTTP
+    """
+    server = ThreadingHTTPServer((host, port), _ApiHandler)
+    server.daemon_threads = True
+    server.static_dir = static_dir
+    return server
+
+
+def start_api_server(
+    port: int = 8080,
+    host: str = "127.0.0.1",
+    static_dir: Optional[str] = None
+) -> ThreadingHTTPServer:
+    """
+    Avvia (una sola volta per processo) il server API
+
+    Args:
+        port: Porta (0 per una porta libera)
+        host: Indirizzo di bind (default solo locale)
+        static_dir: Build del frontend statico da servire (opzionale)
+
+    Returns:
+        Server HTTP in esecuzione in un thread daemon
+    """
+    global _server
+
+    with _server_lock:
+        if _server is None:
+            _server = make_api_server(port, host, static_dir)
+            thread = threading.Thread(
+                target=_server.serve_forever, name="api-server", daemon=True
+            )
+            thread.start()
+        return _server
+
+
+def start_api_server_from_settings() -> Optional[ThreadingHTTPServer]:
+    """
+    Avvia il server API se l'impostazione api_port è impostata
+
+    Returns:
+        Server HTTP o None se il server non è abilitato
+    """
+    settings = get_settings()
+    if not settings.api_port:
+        return None
+    return start_api_server(settings.api_port, settings.api_host, settings.static_dir or None)
+
+
+def main(argv=None):
+    """Entry point da riga di comando (server in primo piano)"""
+    parser = argparse.ArgumentParser(description="Server API JSON di VibeTheForce")
+    settings = get_settings()
+    parser.add_argument("--port", type=int, default=settings.api_port or 8080)
+    parser.add_argument("--host", default=settings.api_host)
+    parser.add_argument("--static", default=settings.static_dir or None,
+                        help="Build del frontend statico da servire (es. dist)")
+    args = parser.parse_args(argv)
+
+    server = make_api_server(args.port, args.host, args.static)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Async Vote Service - Versione asyncio delle API di voto e risultati
+
+Pensata per un front end HTTP asincrono: la logica resta quella del core
+VoteService, eseguita sugli executor di AsyncDatabaseManager (un writer
+dedicato, un pool di lettori). I risultati in cache vengono serviti
+direttamente dall'event loop senza passaggi di thread.
+"""
+from typing import Dict, List, Optional, Tuple
+
+from database.async_db_manager import AsyncDatabaseManager
+from services.vote_service import VoteResult, VoteService, get_cached_results
+
+
+class AsyncVoteService:
+    """Facade asyncio sopra VoteService"""
+
+    def __init__(self, vote_service: Optional[VoteService] = None, readers: int = 8):
+        """
+        Inizializza AsyncVoteService
+
+        Args:
+            vote_service: VoteService core (default: nuovo VoteService)
+            readers: Thread lettori per le query
+        """
+        self.core = vote_service or VoteService()
+        self.db = AsyncDatabaseManager(self.core.db_manager, readers=readers)
+
+    async def submit_vote(
+        self,
+        rating: int,
+        comment: Optional[str] = None,
+        session_id: Optional[str] = None
+    ) -> VoteResult:
+        """Versione async di VoteService.submit_vote"""
+        return await self.db.run_write(self.core.submit_vote, rating, comment, session_id)
+
+    async def get_results(self, talk_id: str = 'main') -> Dict:
+        """
+        Versione async di VoteService.get_results
+
+        Raises:
+            VoteServiceError: Se la lettura dal database fallisce
+        """
+        cached = get_cached_results(self.core.db_manager.read_version, self.core.db_path, talk_id)
+        if cached is not None:
+            return cached
+        return await self.db.run_read(self.core.get_results, talk_id)
+
+    async def get_all_comments(self, talk_id: str = 'main') -> List[Tuple[str, int, str]]:
+        """
+        Versione async di VoteService.get_all_comments
+
+        Raises:
+            VoteServiceError: Se la lettura dal database fallisce
+        """
+        return await self.db.run_read(self.core.get_all_comments, talk_id)
+
+    def close(self):
+        """Arresta i thread degli executor"""
+        self.db.close()
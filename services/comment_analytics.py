@@ -0,0 +1,396 @@
+"""
+Comment Analytics - Sentiment e parole chiave dei commenti senza LLM
+
+Analisi locale, solo CPU, dei commenti approvati dalla moderazione:
+
+- tokenizzazione sul testo ripiegato (minuscole, senza accenti), con le
+  lettere allungate ridotte ("bellooo" -> "bello") e senza stopword
+  italiane;
+- sentiment a lessico: punteggi per parola ed emoji, negazioni ("non
+  chiaro"), intensificatori ("molto utile") e contrasto ("ma", "però":
+  conta di più quello che segue), normalizzato in [-1, 1];
+- parole chiave TF-IDF (parole e coppie di parole consecutive) da un
+  indice di frequenze mantenuto in modo incrementale.
+
+L'indice è per database e condiviso dalle sessioni: ogni lettura applica
+solo i commenti approvati dopo la precedente (costo proporzionale ai
+commenti nuovi) e ricomincia da capo a un nuovo round. La classifica
+delle parole chiave scorre il vocabolario, ma solo quando sono arrivati
+commenti nuovi. È il fallback del commento automatico quando Gemini non è
+configurato.
+"""
+import heapq
+import math
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from database.db_manager import DatabaseManager
+from services.comment_pipeline import ApprovedCommentCursor, fold_comment, normalize_comment
+
+# Parole chiave mostrate di default e documenti minimi per una coppia di parole
+KEYWORDS_LIMIT = 30
+MIN_BIGRAM_DOCUMENTS = 2
+# Parole più corte escluse dalle parole chiave (non dal sentiment)
+MIN_KEYWORD_LENGTH = 3
+
+# Soglie del sentiment normalizzato per positivo / negativo
+SENTIMENT_THRESHOLD = 0.05
+# Costante di normalizzazione: punteggio / sqrt(punteggio^2 + alpha)
+SENTIMENT_ALPHA = 15.0
+# Parole dopo una negazione il cui punteggio viene invertito e attenuato
+NEGATION_WINDOW = 3
+NEGATION_FACTOR = -0.75
+# Peso delle parole prima e dopo un "ma" / "però"
+CONTRAST_BEFORE = 0.5
+CONTRAST_AFTER = 1.5
+
+# Stopword italiane, in forma ripiegata (senza accenti)
+ITALIAN_STOPWORDS = frozenset("""
+a ad agli ai al alla alle allo anche ancora avere aveva avevo c che chi ci come con contro cosa cosi
+cui da dagli dai dal dalla dalle dallo degli dei del della delle dello di dopo dove e ed era eravamo
+essere fa fare fatto gli ha hai hanno ho i il in io l la le lei li lo loro lui ma me mi mia mie miei
+mio ne negli nei nel nella nelle nello noi nostro o ogni oppure per perche pero piu po poi qua quale
+quando quanto quella quelle quelli quello questa queste questi questo qui se sei si sia siamo sono
+sta stata stati stato su sua sue sui sul sulla suo suoi te ti tra tu tua tuo tutta tutte tutti tutto
+un una uno vi voi vostro sempre gia cioe quindi allora invece ecc tipo talk relatore speaker
+""".split())
+
+# Negazioni e contrasti (forma ripiegata)
+NEGATIONS = frozenset({"non", "mai", "nessun", "nessuno", "nessuna", "niente", "nulla", "neanche", "nemmeno", "senza"})
+CONTRASTS = frozenset({"ma", "pero", "tuttavia", "eppure"})
+
+# Intensificatori: moltiplicano il punteggio della parola successiva
+# ("poco chiaro" è negativo)
+INTENSIFIERS = {
+    "molto": 1.3, "davvero": 1.3, "veramente": 1.3, "proprio": 1.2, "super": 1.4, "troppo": 1.3,
+    "estremamente": 1.5, "assolutamente": 1.4, "parecchio": 1.2, "poco": -0.5, "abbastanza": 0.8,
+}
+
+# Parole escluse dalle parole chiave: stopword e modificatori del sentiment
+KEYWORD_STOPWORDS = ITALIAN_STOPWORDS | NEGATIONS | CONTRASTS | frozenset(INTENSIFIERS)
+
+# Lessico del sentiment: forma ripiegata -> punteggio (-4..4)
+SENTIMENT_LEXICON = {
+    # Positivi
+    "bello": 2.0, "bella": 2.0, "belli": 2.0, "belle": 2.0, "bellissimo": 3.0, "bellissima": 3.0,
+    "bravo": 2.0, "brava": 2.0, "bravi": 2.0, "bravissimo": 3.0, "bravissima": 3.0,
+    "ottimo": 3.0, "ottima": 3.0, "ottimi": 3.0, "ottime": 3.0, "eccellente": 3.5,
+    "fantastico": 3.5, "fantastica": 3.5, "stupendo": 3.5, "stupenda": 3.5, "magnifico": 3.5,
+    "spettacolare": 3.5, "geniale": 3.0, "incredibile": 3.0, "perfetto": 3.0, "perfetta": 3.0,
+    "buono": 1.5, "buona": 1.5, "bene": 1.5, "benissimo": 3.0, "grande": 2.0, "grandioso": 3.0,
+    "interessante": 2.0, "interessanti": 2.0, "utile": 2.0, "utili": 2.0, "chiaro": 2.0,
+    "chiara": 2.0, "chiari": 2.0, "chiarissimo": 3.0, "coinvolgente": 2.5, "divertente": 2.5,
+    "divertenti": 2.5, "stimolante": 2.5, "illuminante": 3.0, "pratico": 1.5, "pratica": 1.5,
+    "concreto": 1.5, "concreta": 1.5, "efficace": 2.0, "originale": 2.0, "piaciuto": 2.0,
+    "piaciuta": 2.0, "piaciuti": 2.0, "piace": 2.0, "adoro": 3.0, "amato": 2.5, "consiglio": 1.5,
+    "grazie": 1.5, "complimenti": 2.5, "top": 2.5, "wow": 2.5, "epico": 3.0, "forza": 1.0,
+    "ispirante": 2.5, "approfondito": 1.5, "preciso": 1.5, "fluido": 1.5, "semplice": 1.0,
+    "great": 3.0, "good": 2.0, "awesome": 3.5, "amazing": 3.5, "cool": 2.0, "nice": 2.0,
+    "love": 3.0, "loved": 3.0, "useful": 2.0, "clear": 2.0, "fun": 2.0, "thanks": 1.5,
+    # Negativi
+    "brutto": -2.0, "brutta": -2.0, "pessimo": -3.0, "pessima": -3.0, "orribile": -3.5,
+    "terribile": -3.5, "scarso": -2.0, "scarsa": -2.0, "deludente": -2.5, "delusione": -2.5,
+    "deluso": -2.5, "delusa": -2.5, "noioso": -2.5, "noiosa": -2.5, "noia": -2.5, "inutile": -2.5,
+    "inutili": -2.5, "confuso": -2.0, "confusa": -2.0, "confusionario": -2.5, "lento": -1.0,
+    "lenta": -1.0, "lungo": -0.5, "lunga": -0.5, "difficile": -1.0, "superficiale": -2.0,
+    "banale": -2.0, "sbagliato": -2.0, "sbagliata": -2.0, "male": -2.0, "malissimo": -3.0,
+    "peccato": -1.5, "problema": -1.0, "problemi": -1.0, "errore": -1.5, "errori": -1.5,
+    "incomprensibile": -3.0, "dispersivo": -2.0, "dispersiva": -2.0, "poco": -0.5,
+    "bad": -2.5, "boring": -2.5, "awful": -3.5, "confusing": -2.0, "useless": -2.5, "slow": -1.0,
+}
+
+# Emoji riconosciute nel testo normalizzato (fold_comment le rimuove)
+EMOJI_LEXICON = {
+    "👍": 2.0, "👏": 2.5, "🔥": 2.5, "❤": 3.0, "😍": 3.0, "🤩": 3.0, "🚀": 2.0, "💯": 2.5,
+    "🙌": 2.5, "😀": 2.0, "😃": 2.0, "😄": 2.0, "🙂": 1.0, "😊": 2.0, "⭐": 1.5, "🌟": 2.0,
+    "👎": -2.0, "😴": -2.5, "🥱": -2.5, "😡": -3.0, "😠": -2.5, "🙁": -1.5, "😕": -1.5,
+    "😞": -2.0, "😢": -1.5, "🤮": -3.5, "💤": -2.0,
+}
+
+# Lettere ripetute tre o più volte: allungamento enfatico ("bellooo")
+_ELONGATED_RE = re.compile(r"(.)\1{2,}")
+_EMOJI_RE = re.compile("|".join(map(re.escape, EMOJI_LEXICON)))
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Parole di un commento in forma ripiegata, con allungamenti ridotti
+
+    Args:
+        text: Commento
+
+    Returns:
+        Parole in ordine, stopword incluse
+    """
+    return _tokenize_normalized(normalize_comment(text))
+
+
+def _tokenize_normalized(normalized: str) -> List[str]:
+    return _ELONGATED_RE.sub(r"\1", fold_comment(normalized)).split()
+
+
+def keyword_terms(tokens: Sequence[str]) -> List[str]:
+    """
+    Termini indicizzati per le parole chiave: parole e coppie consecutive
+
+    Args:
+        tokens: Output di tokenize()
+
+    Returns:
+        Parole senza stopword, numeri e parole brevi, seguite dalle coppie
+        di parole adiacenti entrambe significative ("live coding")
+    """
+    words = [
+        token if len(token) >= MIN_KEYWORD_LENGTH and not token.isdigit()
+        and token not in KEYWORD_STOPWORDS else None
+        for token in tokens
+    ]
+    terms = [word for word in words if word]
+    terms.extend(f"{first} {second}" for first, second in zip(words, words[1:]) if first and second)
+    return terms
+
+
+def sentiment_score(text: str) -> float:
+    """
+    Sentiment a lessico di un commento
+
+    Args:
+        text: Commento
+
+    Returns:
+        Punteggio in [-1, 1] (0.0 senza parole del lessico)
+    """
+    normalized = normalize_comment(text)
+    return _sentiment(normalized, _tokenize_normalized(normalized))
+
+
+def _sentiment(normalized: str, tokens: Sequence[str]) -> float:
+    """Sentiment dal testo normalizzato (per le emoji) e dalle sue parole"""
+    contrast = max((i for i, token in enumerate(tokens) if token in CONTRASTS), default=-1)
+
+    total = 0.0
+    for i, token in enumerate(tokens):
+        score = SENTIMENT_LEXICON.get(token)
+        if score is None or (token in INTENSIFIERS and i + 1 < len(tokens)):
+            # "poco" è negativo da solo, un modificatore davanti a un'altra parola
+            continue
+        if i > 0 and tokens[i - 1] in INTENSIFIERS:
+            score *= INTENSIFIERS[tokens[i - 1]]
+        if any(previous in NEGATIONS for previous in tokens[max(0, i - NEGATION_WINDOW):i]):
+            score *= NEGATION_FACTOR
+        if contrast >= 0:
+            score *= CONTRAST_AFTER if i > contrast else CONTRAST_BEFORE
+        total += score
+
+    total += sum(EMOJI_LEXICON[emoji] for emoji in _EMOJI_RE.findall(normalized))
+    if total == 0.0:
+        return 0.0
+    return total / math.sqrt(total * total + SENTIMENT_ALPHA)
+
+
+def score_sentiment(texts: Sequence[str]) -> List[float]:
+    """
+    Sentiment a lotti, compatibile con CommentModerator(sentiment=...)
+
+    Args:
+        texts: Commenti
+
+    Returns:
+        Punteggi in [-1, 1]
+    """
+    return [sentiment_score(text) for text in texts]
+
+
+def sentiment_label(score: float) -> str:
+    """
+    Classe di un punteggio di sentiment
+
+    Returns:
+        'positive', 'negative' o 'neutral'
+    """
+    if score >= SENTIMENT_THRESHOLD:
+        return "positive"
+    if score <= -SENTIMENT_THRESHOLD:
+        return "negative"
+    return "neutral"
+
+
+@dataclass(frozen=True)
+class CommentInsights:
+    """Sintesi dei commenti approvati del round corrente"""
+    total: int
+    positive: int
+    neutral: int
+    negative: int
+    mean_sentiment: float
+    keywords: Tuple[Tuple[str, float], ...]
+
+    def share(self, label: str) -> float:
+        """Percentuale di commenti (0-100) con una classe di sentiment"""
+        return getattr(self, label) / self.total * 100 if self.total else 0.0
+
+
+class CommentAnalyzer:
+    """Indice incrementale di sentiment e frequenze dei termini"""
+
+    def __init__(self, db_manager: Optional[DatabaseManager] = None, talk_id: Optional[str] = None):
+        """
+        Inizializza l'indice (vuoto)
+
+        Args:
+            db_manager: Database da cui leggere i commenti approvati
+                (None: solo add() manuale)
+            talk_id: Solo i commenti ai voti di questo talk (None: tutti i talk del database)
+        """
+        self.db_manager = db_manager
+        self._cursor = ApprovedCommentCursor(db_manager, talk_id) if db_manager is not None else None
+        self._version: Optional[int] = None
+        self._lock = threading.Lock()
+        # Una lettura alla volta: i commenti di un round non finiscono nell'indice del successivo
+        self._refresh_lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.documents = 0
+        self.sentiment_sum = 0.0
+        self.labels: Counter = Counter()
+        # Somma delle frequenze sublineari (1 + ln tf) per documento e documenti per termine
+        self.term_frequency: Dict[str, float] = {}
+        self.document_frequency: Counter = Counter()
+        # Coppie di parole presenti in almeno MIN_BIGRAM_DOCUMENTS commenti
+        self._bigrams: Set[str] = set()
+        self._ranking: Optional[List[Tuple[str, float]]] = None
+
+    def add(self, text: str) -> float:
+        """
+        Aggiunge un commento all'indice
+
+        Args:
+            text: Commento approvato
+
+        Returns:
+            Sentiment del commento
+        """
+        normalized = normalize_comment(text)
+        tokens = _tokenize_normalized(normalized)
+        score = _sentiment(normalized, tokens)
+        counts = Counter(keyword_terms(tokens))
+        with self._lock:
+            self.documents += 1
+            self.sentiment_sum += score
+            self.labels[sentiment_label(score)] += 1
+            for term, count in counts.items():
+                self.term_frequency[term] = self.term_frequency.get(term, 0.0) + 1 + math.log(count)
+                self.document_frequency[term] += 1
+                if " " in term and self.document_frequency[term] == MIN_BIGRAM_DOCUMENTS:
+                    self._bigrams.add(term)
+            self._ranking = None
+        return score
+
+    def refresh(self) -> int:
+        """
+        Applica i commenti approvati dopo l'ultima lettura
+
+        Non legge il database se il contatore di modifiche non è cambiato.
+
+        Returns:
+            Numero di commenti aggiunti all'indice
+        """
+        if self._cursor is None:
+            return 0
+        with self._refresh_lock:
+            version = self.db_manager.change_notifier.version
+            if version is not None and version == self._version:
+                return 0
+            reset, comments = self._cursor.read()
+            if reset:
+                with self._lock:
+                    self._reset()
+            for _, comment in comments:
+                self.add(comment)
+            self._version = version
+            return len(comments)
+
+    def top_keywords(self, limit: int = KEYWORDS_LIMIT) -> List[Tuple[str, float]]:
+        """
+        Parole chiave per TF-IDF
+
+        Peso di un termine: somma di 1 + ln(tf) sui commenti che lo
+        contengono per idf = ln((1 + N) / (1 + df)) + 1. Le coppie di
+        parole contano solo se compaiono in almeno MIN_BIGRAM_DOCUMENTS
+        commenti; una parola che compare sempre dentro una coppia mostrata
+        è omessa. Il costo è lineare nel vocabolario, ma la classifica è
+        ricalcolata solo dopo commenti nuovi.
+
+        Args:
+            limit: Numero massimo di termini
+
+        Returns:
+            Lista di (termine, peso) in ordine decrescente
+        """
+        with self._lock:
+            if self._ranking is None or len(self._ranking) < limit:
+                n, df = self.documents, self.document_frequency
+                covered = {word for bigram in self._bigrams for word in bigram.split() if df[word] == df[bigram]}
+                # Molti termini hanno lo stesso df: un logaritmo per valore distinto
+                idf = {count: math.log((1 + n) / (1 + count)) + 1 for count in set(df.values())}
+                self._ranking = heapq.nlargest(
+                    max(limit, KEYWORDS_LIMIT),
+                    (
+                        (term, tf * idf[df[term]])
+                        for term, tf in self.term_frequency.items()
+                        if (term in self._bigrams if " " in term else term not in covered)
+                    ),
+                    key=lambda item: item[1]
+                )
+            return self._ranking[:limit]
+
+    def insights(self, limit: int = KEYWORDS_LIMIT) -> CommentInsights:
+        """
+        Aggiorna l'indice e ne ritorna la sintesi
+
+        Args:
+            limit: Numero massimo di parole chiave
+
+        Returns:
+            CommentInsights del round corrente
+        """
+        self.refresh()
+        keywords = tuple(self.top_keywords(limit))
+        with self._lock:
+            return CommentInsights(
+                total=self.documents,
+                positive=self.labels["positive"],
+                neutral=self.labels["neutral"],
+                negative=self.labels["negative"],
+                mean_sentiment=self.sentiment_sum / self.documents if self.documents else 0.0,
+                keywords=keywords
+            )
+
+
+# Indice per talk: (db_path, talk_id) -> CommentAnalyzer
+_analyzers: Dict[Tuple[str, str], CommentAnalyzer] = {}
+_analyzers_lock = threading.Lock()
+
+
+def get_comment_analyzer(db_manager: DatabaseManager, talk_id: str = 'main') -> CommentAnalyzer:
+    """
+    Ritorna l'indice dei commenti di un talk, condiviso dal processo
+
+    Args:
+        db_manager: Database dei commenti
+        talk_id: Talk di cui indicizzare i commenti
+
+    Returns:
+        CommentAnalyzer del talk
+    """
+    key = (db_manager.db_path, talk_id)
+    with _analyzers_lock:
+        analyzer = _analyzers.get(key)
+        if analyzer is None:
+            analyzer = CommentAnalyzer(db_manager, talk_id)
+            _analyzers[key] = analyzer
+        return analyzer
@@ -0,0 +1,566 @@
+"""
+Comment Pipeline - Moderazione asincrona dei commenti
+
+Il voto scrive il commento nella stessa transazione, come 'pending': la
+coda è la tabella comments stessa, quindi sopravvive ai riavvii e non
+aggiunge latenza al votante. Un pool di worker in background prende i
+commenti a lotti (claim atomico, sicuro anche con più processi) e per
+ognuno:
+
+1. normalizza il testo (Unicode NFC, niente caratteri di controllo,
+   spazi compressi, al più tre ripetizioni dello stesso carattere);
+2. lo rifiuta se contiene parole della lista locale di volgarità,
+   riconosciute anche con accenti, maiuscole, lettere ripetute o cifre
+   al posto delle lettere ("c4zzzo");
+3. lo scarta come duplicato se è quasi uguale a un commento già
+   approvato nel round per lo stesso talk (MinHash sugli shingle di
+   caratteri, con un indice LSH a bande per talk);
+4. ne calcola il sentiment con una funzione a lotti, se configurata (i
+   servizi di voto usano il lessico locale di services.comment_analytics).
+
+L'esito va in comments.comment_status ('approved', 'duplicate',
+'rejected'): pagine, conteggi e analisi mostrano solo gli approvati.
+
+I worker partono con il primo voto commentato del processo (o con
+l'app Streamlit). Per moderare una volta la coda, ad esempio dopo un
+import massivo:
+
+    python -m services.comment_pipeline --db database/votes.db
+"""
+import argparse
+import hashlib
+import logging
+import re
+import sqlite3
+import sys
+import threading
+import time
+import unicodedata
+from enum import Enum
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from database.db_manager import DatabaseManager, get_db_manager
+from utils.metrics import COMMENTS_MODERATED_TOTAL, QUEUE_DEPTH
+from utils.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Sentiment a lotti: testi -> punteggi in [-1, 1]
+SentimentFunction = Callable[[Sequence[str]], Sequence[float]]
+
+# Thread del pool, commenti per lotto e attesa dopo una notifica (per
+# raccogliere più commenti in un lotto: meno transazioni di moderazione in
+# concorrenza con i voti sul lock di scrittura) vengono dalle impostazioni
+# (moderation_workers, moderation_batch_size, moderation_batch_delay).
+# Attesa massima tra due controlli della coda senza notifiche (commenti
+# scritti da altri processi, import massivi)
+POLL_INTERVAL = 5.0
+# Secondi dopo i quali un commento rimasto in 'processing' viene ripreso
+CLAIM_TIMEOUT = 60.0
+
+# Commento più lungo accettato (vincolo della tabella)
+MAX_COMMENT_LENGTH = 500
+
+# MinHash: permutazioni, bande dell'indice LSH e somiglianza minima
+MINHASH_PERMUTATIONS = 64
+LSH_BANDS = 16
+SHINGLE_SIZE = 4
+DUPLICATE_THRESHOLD = 0.8
+# Sotto questa lunghezza (testo ripiegato) un commento non è mai un
+# duplicato: "Bravo!" scritto da molti votanti è un commento legittimo
+MIN_DEDUP_LENGTH = 20
+
+# Lista locale di volgarità (forme ripiegate: minuscole, senza accenti)
+PROFANITY_WORDS = frozenset({
+    "cazzo", "cazzi", "cazzata", "cazzate", "merda", "merde", "stronzo", "stronza",
+    "stronzi", "stronze", "vaffanculo", "fanculo", "coglione", "cogliona", "coglioni",
+    "puttana", "puttane", "troia", "bastardo", "bastarda", "bastardi", "minchia",
+    "porcodio", "porcamadonna", "culattone", "frocio", "froci",
+    "fuck", "fucking", "shit", "bitch", "asshole", "cunt", "dick",
+})
+
+_MASK64 = (1 << 64) - 1
+_CONTROL_RE = re.compile(r"[\x00-\x08\x0b-\x1f\x7f]")
+_SPACES_RE = re.compile(r"[^\S\n]+")
+_NEWLINES_RE = re.compile(r"\s*\n\s*")
+_REPEAT_RE = re.compile(r"(.)\1{3,}")
+_SQUEEZE_RE = re.compile(r"(.)\1+")
+_NON_WORD_RE = re.compile(r"[^a-z0-9]+")
+# Cifre e simboli usati al posto delle lettere
+_LEET = str.maketrans("0134579@$", "oieastgas")
+
+
+class CommentStatus(Enum):
+    """Stati di moderazione di comments.comment_status"""
+    PENDING = "pending"
+    PROCESSING = "processing"
+    APPROVED = "approved"
+    DUPLICATE = "duplicate"
+    REJECTED = "rejected"
+
+
+def normalize_comment(text: str) -> str:
+    """
+    Normalizza il testo di un commento per la visualizzazione
+
+    Args:
+        text: Commento originale
+
+    Returns:
+        Testo NFC senza caratteri di controllo, con spazi e a capo compressi
+        e al più tre ripetizioni consecutive dello stesso carattere
+    """
+    text = unicodedata.normalize("NFC", text)
+    text = _CONTROL_RE.sub("", text.replace("\r\n", "\n"))
+    text = _NEWLINES_RE.sub("\n", _SPACES_RE.sub(" ", text))
+    text = _REPEAT_RE.sub(lambda m: m.group(1) * 3, text)
+    return text.strip()[:MAX_COMMENT_LENGTH]
+
+
+def fold_comment(text: str) -> str:
+    """
+    Forma di confronto: minuscole, senza accenti, solo lettere e cifre
+
+    Args:
+        text: Commento (già normalizzato)
+
+    Returns:
+        Parole separate da un solo spazio
+    """
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return _NON_WORD_RE.sub(" ", stripped).strip()
+
+
+def _squeeze(word: str) -> str:
+    """Riduce le lettere ripetute a una sola ("cazzzo" -> "cazo")"""
+    return _SQUEEZE_RE.sub(r"\1", word)
+
+
+class ProfanityFilter:
+    """Riconoscimento di parole volgari da una lista locale"""
+
+    def __init__(self, words: Iterable[str] = PROFANITY_WORDS):
+        """
+        Inizializza il filtro
+
+        Args:
+            words: Parole vietate (confrontate ripiegate e senza lettere ripetute)
+        """
+        self._words = frozenset(_squeeze(fold_comment(word).replace(" ", "")) for word in words)
+
+    def is_profane(self, folded: str) -> bool:
+        """
+        Verifica se un commento ripiegato contiene una parola vietata
+
+        Args:
+            folded: Testo ripiegato con fold_comment
+
+        Returns:
+            True se almeno una parola (anche scritta con cifre) è nella lista
+        """
+        for word in folded.split():
+            if _squeeze(word) in self._words or _squeeze(word.translate(_LEET)) in self._words:
+                return True
+        return False
+
+
+class MinHashIndex:
+    """Indice LSH di firme MinHash per la ricerca di quasi-duplicati"""
+
+    def __init__(
+        self,
+        permutations: int = MINHASH_PERMUTATIONS,
+        bands: int = LSH_BANDS,
+        shingle_size: int = SHINGLE_SIZE,
+        threshold: float = DUPLICATE_THRESHOLD
+    ):
+        """
+        Inizializza l'indice
+
+        Args:
+            permutations: Valori della firma MinHash
+            bands: Bande LSH (permutations deve esserne multiplo)
+            shingle_size: Caratteri per shingle
+            threshold: Somiglianza di Jaccard stimata oltre la quale due testi sono duplicati
+        """
+        if permutations % bands:
+            raise ValueError("permutations deve essere multiplo di bands")
+        self.rows = permutations // bands
+        self.bands = bands
+        self.shingle_size = shingle_size
+        self.threshold = threshold
+        # Hash universali h(x) = (a*x + b) mod 2^64, primi 32 bit
+        seed = hashlib.blake2b(b"vibetheforce-minhash", digest_size=64).digest()
+        self._coefficients = [
+            (int.from_bytes(hashlib.blake2b(seed + bytes([i]), digest_size=8).digest(), "big") | 1,
+             int.from_bytes(hashlib.blake2b(seed + bytes([i, 1]), digest_size=8).digest(), "big"))
+            for i in range(permutations)
+        ]
+        self._buckets: List[Dict[Tuple[int, ...], List[int]]] = [{} for _ in range(bands)]
+        self._signatures: Dict[int, Tuple[int, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def __contains__(self, key: int) -> bool:
+        return key in self._signatures
+
+    def signature(self, folded: str) -> Tuple[int, ...]:
+        """
+        Firma MinHash degli shingle di caratteri di un testo ripiegato
+
+        Args:
+            folded: Testo ripiegato con fold_comment
+
+        Returns:
+            Tupla di `permutations` interi
+        """
+        text = folded.replace(" ", "")
+        size = self.shingle_size
+        shingles = {text[i:i + size] for i in range(max(1, len(text) - size + 1))}
+        hashes = [
+            int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "big")
+            for s in shingles
+        ]
+        return tuple(
+            min(((a * h + b) & _MASK64) >> 32 for h in hashes)
+            for a, b in self._coefficients
+        )
+
+    def _bands(self, signature: Tuple[int, ...]) -> Iterable[Tuple[int, Tuple[int, ...]]]:
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows]
+
+    def find_duplicate(self, signature: Tuple[int, ...], exclude: Optional[int] = None) -> Optional[int]:
+        """
+        Cerca un testo indicizzato quasi uguale
+
+        Args:
+            signature: Firma da confrontare
+            exclude: Chiave da ignorare (il testo stesso, se già indicizzato)
+
+        Returns:
+            Chiave del primo duplicato trovato o None
+        """
+        checked: Set[int] = {exclude}
+        for band, key in self._bands(signature):
+            for candidate in self._buckets[band].get(key, ()):
+                if candidate in checked:
+                    continue
+                checked.add(candidate)
+                other = self._signatures[candidate]
+                same = sum(1 for x, y in zip(signature, other) if x == y)
+                if same / len(signature) >= self.threshold:
+                    return candidate
+        return None
+
+    def add(self, key: int, signature: Tuple[int, ...]):
+        """Indicizza una firma (ignorata se la chiave è già presente)"""
+        if key in self._signatures:
+            return
+        self._signatures[key] = signature
+        for band, band_key in self._bands(signature):
+            self._buckets[band].setdefault(band_key, []).append(key)
+
+
+class ApprovedCommentCursor:
+    """
+    Lettura incrementale dei commenti approvati del round corrente
+
+    Ogni read() ritorna solo gli approvati non ancora visti, anche quando
+    i worker completano i lotti fuori ordine: il cursore avanza fino alla
+    soglia sotto cui tutti i commenti sono moderati e ricorda gli id già
+    letti sopra la soglia.
+    """
+
+    def __init__(self, db_manager: DatabaseManager, talk_id: Optional[str] = None):
+        """
+        Inizializza il cursore
+
+        Args:
+            db_manager: Database dei commenti
+            talk_id: Solo i commenti ai voti di questo talk (None: tutti i talk)
+        """
+        self.db_manager = db_manager
+        self.talk_id = talk_id
+        self.round_id: Optional[int] = None
+        self._last_id = 0
+        self._seen: Set[int] = set()
+
+    def read(self) -> Tuple[bool, List[Tuple[int, str]]]:
+        """
+        Legge i commenti approvati dall'ultima lettura
+
+        Returns:
+            Tupla (round cambiato: ricominciare da capo, nuove coppie (comment_id, commento))
+        """
+        current_round = self.db_manager.get_current_round()
+        reset = current_round != self.round_id
+        if reset:
+            self.round_id = current_round
+            self._last_id = 0
+            self._seen.clear()
+
+        # Soglia letta prima dei commenti: quanto è moderato sotto di essa è già visibile
+        watermark = self.db_manager.get_moderation_watermark()
+        rows = [row for row in self.db_manager.get_approved_comments(self._last_id, self.talk_id)
+                if row[0] not in self._seen]
+        self._seen.update(comment_id for comment_id, _ in rows)
+        if watermark > self._last_id:
+            self._last_id = watermark
+            self._seen = {comment_id for comment_id in self._seen if comment_id > watermark}
+        return reset, rows
+
+
+class CommentModerator:
+    """Moderazione a lotti dei commenti in attesa di un database"""
+
+    def __init__(
+        self,
+        db_manager: DatabaseManager,
+        batch_size: Optional[int] = None,
+        sentiment: Optional[SentimentFunction] = None,
+        profanity: Optional[ProfanityFilter] = None,
+        claim_timeout: float = CLAIM_TIMEOUT
+    ):
+        """
+        Inizializza il moderatore
+
+        Args:
+            db_manager: Database dei commenti
+            batch_size: Commenti presi per ogni lotto (default: moderation_batch_size)
+            sentiment: Funzione di sentiment a lotti (None: colonna sentiment vuota)
+            profanity: Filtro delle volgarità (default: lista locale)
+            claim_timeout: Secondi dopo i quali un lotto non completato viene ripreso
+        """
+        self.db_manager = db_manager
+        self.batch_size = batch_size or get_settings().moderation_batch_size
+        self.sentiment = sentiment
+        self.profanity = profanity or ProfanityFilter()
+        self.claim_timeout = claim_timeout
+        # Indici dei commenti approvati del round corrente, uno per talk (lo
+        # stesso commento su due talk non è un duplicato), condivisi dai worker
+        self._indexes: Dict[str, MinHashIndex] = {}
+        self._cursors: Dict[str, ApprovedCommentCursor] = {}
+        self._index_lock = threading.Lock()
+
+    def _sync_index(self, talk_id: str) -> MinHashIndex:
+        """Allinea l'indice del talk al round corrente e agli approvati di tutti i processi"""
+        cursor = self._cursors.get(talk_id)
+        if cursor is None:
+            cursor = self._cursors[talk_id] = ApprovedCommentCursor(self.db_manager, talk_id)
+        reset, comments = cursor.read()
+        index = self._indexes.get(talk_id)
+        if reset or index is None:
+            index = self._indexes[talk_id] = MinHashIndex()
+        for comment_id, comment in comments:
+            folded = fold_comment(comment)
+            if len(folded) >= MIN_DEDUP_LENGTH and comment_id not in index:
+                index.add(comment_id, index.signature(folded))
+        return index
+
+    def moderate(
+        self,
+        comments: Sequence[Tuple[int, str, str]]
+    ) -> List[Tuple[int, str, str, Optional[float]]]:
+        """
+        Modera un lotto di commenti (senza scrivere nel database)
+
+        I quasi-duplicati sono cercati solo tra i commenti dello stesso talk.
+
+        Args:
+            comments: Tuple (comment_id, commento, talk_id) in ordine di arrivo
+
+        Returns:
+            Tuple (comment_id, stato, commento normalizzato, sentiment)
+        """
+        outcomes = []
+        with self._index_lock:
+            indexes = {talk_id: self._sync_index(talk_id) for talk_id in {talk for _, _, talk in comments}}
+            for comment_id, comment, talk_id in comments:
+                index = indexes[talk_id]
+                text = normalize_comment(comment)
+                folded = fold_comment(text)
+                if not folded or self.profanity.is_profane(folded):
+                    status = CommentStatus.REJECTED
+                elif len(folded) < MIN_DEDUP_LENGTH:
+                    status = CommentStatus.APPROVED
+                else:
+                    signature = index.signature(folded)
+                    # Un lotto fallito e ripreso ha già i suoi commenti nell'indice
+                    if index.find_duplicate(signature, exclude=comment_id) is not None:
+                        status = CommentStatus.DUPLICATE
+                    else:
+                        status = CommentStatus.APPROVED
+                        # Subito nell'indice: i duplicati nello stesso lotto vengono scartati
+                        index.add(comment_id, signature)
+                outcomes.append([comment_id, status.value, text or comment, None])
+
+        approved = [outcome for outcome in outcomes if outcome[1] == CommentStatus.APPROVED.value]
+        if self.sentiment is not None and approved:
+            scores = self.sentiment([outcome[2] for outcome in approved])
+            for outcome, score in zip(approved, scores):
+                outcome[3] = float(score)
+        return [tuple(outcome) for outcome in outcomes]
+
+    def process_batch(self) -> int:
+        """
+        Prende, modera e salva un lotto di commenti in attesa
+
+        Un lotto che fallisce (errore del database, della funzione di
+        sentiment o della moderazione) torna subito in coda come 'pending',
+        senza aspettare la scadenza del claim.
+
+        Returns:
+            Numero di commenti moderati (0 se la coda è vuota)
+
+        Raises:
+            Exception: L'errore del lotto, dopo averlo rimesso in coda
+        """
+        comments = self.db_manager.claim_pending_comments(self.batch_size, self.claim_timeout)
+        if not comments:
+            return 0
+        try:
+            outcomes = self.moderate(comments)
+            self.db_manager.complete_comment_moderation(outcomes)
+        except Exception:
+            try:
+                self.db_manager.release_comment_claims([comment_id for comment_id, _, _ in comments])
+            except sqlite3.Error:
+                # Database non disponibile: il lotto torna in coda alla scadenza del claim
+                logger.exception("Rilascio del lotto di commenti fallito")
+            raise
+        for _, status, _, _ in outcomes:
+            COMMENTS_MODERATED_TOTAL.labels(status=status).inc()
+        return len(outcomes)
+
+    def run_pending(self) -> int:
+        """
+        Modera lotti finché la coda non è vuota
+
+        Returns:
+            Numero totale di commenti moderati
+        """
+        total = 0
+        while True:
+            processed = self.process_batch()
+            if not processed:
+                return total
+            total += processed
+
+
+class CommentPipeline:
+    """Pool di worker in background che svuota la coda dei commenti"""
+
+    def __init__(self, moderator: CommentModerator, workers: Optional[int] = None,
+                 poll_interval: float = POLL_INTERVAL, batch_delay: Optional[float] = None):
+        """
+        Inizializza il pool (i thread partono con start())
+
+        Args:
+            moderator: CommentModerator condiviso dai worker
+            workers: Numero di thread (default: moderation_workers)
+            poll_interval: Secondi massimi tra due controlli della coda
+            batch_delay: Attesa dopo una notifica prima di prendere il lotto
+                (default: moderation_batch_delay)
+        """
+        settings = get_settings()
+        self.moderator = moderator
+        self.workers = workers or settings.moderation_workers
+        self.poll_interval = poll_interval
+        self.batch_delay = settings.moderation_batch_delay if batch_delay is None else batch_delay
+        self._wakeup = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Avvia i worker (una sola volta); moderano subito i commenti già in coda"""
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f"comment-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        self.wake()
+
+    def wake(self):
+        """Segnala nuovi commenti in coda (costo costante per il votante)"""
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            if self._wakeup.wait(self.poll_interval):
+                time.sleep(self.batch_delay)
+            self._wakeup.clear()
+            # Un errore ferma solo il lotto corrente (rimesso in coda da
+            # process_batch): il worker resta vivo e riprova al controllo successivo
+            while True:
+                try:
+                    if not self.moderator.process_batch():
+                        break
+                except Exception:
+                    logger.exception("Moderazione di un lotto di commenti fallita")
+                    break
+
+
+# Pipeline per database: db_path -> CommentPipeline
+_pipelines: Dict[str, CommentPipeline] = {}
+_pipelines_lock = threading.Lock()
+
+
+def get_comment_pipeline(
+    db_manager: DatabaseManager,
+    sentiment: Optional[SentimentFunction] = None
+) -> CommentPipeline:
+    """
+    Ritorna (avviandola alla prima chiamata) la pipeline del database
+
+    Args:
+        db_manager: Database dei commenti
+        sentiment: Funzione di sentiment a lotti, usata solo alla creazione
+
+    Returns:
+        CommentPipeline con i worker in esecuzione
+    """
+    with _pipelines_lock:
+        pipeline = _pipelines.get(db_manager.db_path)
+        if pipeline is None:
+            pipeline = CommentPipeline(CommentModerator(db_manager, sentiment=sentiment))
+            _pipelines[db_manager.db_path] = pipeline
+            QUEUE_DEPTH.labels(queue="comments").set_function(_pending_comments)
+    pipeline.start()
+    return pipeline
+
+
+def _pending_comments() -> float:
+    """Commenti in attesa di moderazione in tutti i database con una pipeline"""
+    total = 0
+    for pipeline in list(_pipelines.values()):
+        try:
+            counts = pipeline.moderator.db_manager.get_comment_status_counts()
+        except sqlite3.Error:
+            continue
+        total += counts.get("pending", 0) + counts.get("processing", 0)
+    return total
+
+
+def main(argv=None):
+    """Entry point da riga di comando: modera tutti i commenti in coda"""
+    parser = argparse.ArgumentParser(description="Moderazione dei commenti in coda")
+    parser.add_argument("--db", default=get_settings().db_path, help="Database SQLite")
+    args = parser.parse_args(argv)
+
+    moderator = CommentModerator(get_db_manager(args.db))
+    try:
+        processed = moderator.run_pending()
+    except sqlite3.Error as e:
+        print(f"Moderazione fallita: {e}", file=sys.stderr)
+        sys.exit(1)
+    counts = moderator.db_manager.get_comment_status_counts()
+    print(f"{processed} commenti moderati; round corrente: {counts}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,45 @@
 """
 Gemini Client - Wrapper for Google Gemini API
 Handles authentication, error management, and timeout configuration
+
+Implements services.llm_providers.LLMProvider; create_llm_provider
+selects it (or an offline provider) from configuration.
+
+Has no Streamlit dependency: the API key is passed in explicitly or read
+from the GEMINI_API_KEY environment variable. Streamlit pages obtain a
+client configured from st.secrets via services.streamlit_adapters.
 """
 
+import logging
+import os
+import time
 import google.generativeai as genai
-import streamlit as st
 from typing import Optional
+from services.llm_providers import LLMProvider
+from utils.metrics import LLM_LATENCY_SECONDS, LLM_REQUESTS_TOTAL
+
+logger = logging.getLogger(__name__)
 
+# A 3-4 sentence comment needs ~150 tokens; callers with a prompt budget pass their own
+DEFAULT_MAX_OUTPUT_TOKENS = 256
 
-class GeminiClient:
+
+class GeminiClient(LLMProvider):
     """Wrapper for Google Gemini API with error handling and timeout management"""
     
-    def __init__(self, timeout: int = 30):
+    name = "gemini"
+    label = "Gemini AI"
+    
+    def __init__(self, timeout: int = 30, api_key: Optional[str] = None):
         """
-        Initialize Gemini client with API key from Streamlit secrets
+        Initialize Gemini client
         
         Args:
             timeout: Request timeout in seconds (default: 30)
+            api_key: Gemini API key (default: GEMINI_API_KEY environment variable)
         """
-        self.timeout = timeout
-        self.api_key = st.secrets.get("GEMINI_API_KEY")
+        super().__init__(timeout)
+        self.api_key = api_key or os.environ.get("GEMINI_API_KEY")
         self.model = None
         
         if self.api_key:
@@ -27,10 +47,11 @@ class GeminiClient:
                 genai.configure(api_key=self.api_key)
                 self.model = genai.GenerativeModel('gemini-pro')
             except Exception as e:
-                st.warning(f"Errore nella configurazione Gemini API: {e}")
+                self.config_error = f"Errore nella configurazione Gemini API: {e}"
+                logger.warning(self.config_error)
                 self.model = None
         else:
-            st.warning("GEMINI_API_KEY non configurata nei secrets")
+            self.config_error = "GEMINI_API_KEY non configurata nei secrets"
     
     def is_configured(self) -> bool:
         """
@@ -41,12 +62,13 @@ class GeminiClient:
         """
         return self.model is not None
     
-    def generate_text(self, prompt: str) -> Optional[str]:
+    def generate_text(self, prompt: str, max_output_tokens: int = DEFAULT_MAX_OUTPUT_TOKENS) -> Optional[str]:
         """
         Generate text using Gemini API with error handling and timeout
         
         Args:
             prompt: The prompt to send to Gemini
+            max_output_tokens: Upper bound on generated tokens
             
         Returns:
             Generated text or None if error occurs
@@ -58,13 +80,14 @@ class GeminiClient:
         if not self.is_configured():
             raise ValueError("Gemini API non configurata. Verifica GEMINI_API_KEY nei secrets.")
         
+        start = time.perf_counter()
         try:
             # Configure generation with timeout
             generation_config = genai.types.GenerationConfig(
                 temperature=0.7,
                 top_p=0.95,
                 top_k=40,
-                max_output_tokens=1024,
+                max_output_tokens=max_output_tokens,
             )
             
             response = self.model.generate_content(
@@ -73,11 +96,17 @@ class GeminiClient:
                 request_options={'timeout': self.timeout}
             )
             
-            return response.text.strip()
+            text = response.text.strip()
+            LLM_REQUESTS_TOTAL.labels(outcome="success").inc()
+            return text
             
         except TimeoutError as e:
-            st.error(f"Timeout nella richiesta Gemini (>{self.timeout}s): {e}")
+            LLM_REQUESTS_TOTAL.labels(outcome="timeout").inc()
+            logger.error(f"Timeout nella richiesta Gemini (>{self.timeout}s): {e}")
             return None
         except Exception as e:
-            st.error(f"Errore nella generazione testo Gemini: {e}")
+            LLM_REQUESTS_TOTAL.labels(outcome="error").inc()
+            logger.error(f"Errore nella generazione testo Gemini: {e}")
             return None
+        finally:
+            LLM_LATENCY_SECONDS.observe(time.perf_counter() - start)
@@ -0,0 +1,191 @@
+"""
+Leaderboard - Classifica dei talk dell'evento per media bayesiana
+
+Le statistiche sufficienti per talk (conteggio, somma e somma dei
+quadrati dei voti) sono mantenute dai trigger su talk_stats al commit di
+ogni voto, in ogni shard. La classifica legge una riga per talk, calcola
+la media bayesiana e seleziona i primi K con un heap; lo snapshot è
+condiviso a livello di processo e ricostruito solo quando cambia il
+contatore di modifiche di uno shard (o alla scadenza del TTL).
+
+Media bayesiana: (C * m + somma) / (C + voti), dove m è la media di tutti
+i voti dell'evento e C il peso del prior (default: voti medi per talk),
+così un talk con pochi voti non scavalca talk con molti voti solidi.
+"""
+import heapq
+import math
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from database.sharding import ShardedDatabaseManager, get_sharded_db_manager
+from services.vote_service import VoteServiceError
+
+# Durata massima di uno snapshot quando il contatore di modifiche non è disponibile
+LEADERBOARD_CACHE_TTL = 1.0
+
+# Snapshot di processo condiviso tra le sessioni
+_leaderboard_cache: Dict = {'key': None, 'source_version': None, 'snapshot': None, 'expires': 0.0}
+_leaderboard_cache_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class LeaderboardEntry:
+    """Posizione di un talk in classifica"""
+    rank: int
+    talk_id: str
+    votes: int
+    mean: float
+    std_dev: float
+    score: float
+
+
+@dataclass(frozen=True)
+class LeaderboardSnapshot:
+    """
+    Classifica calcolata in un istante
+
+    version cresce a ogni modifica dei dati ed è uguale in tutti i processi
+    che condividono gli stessi database (usabile come ETag).
+    """
+    version: int
+    generated_at: str
+    prior_mean: float
+    prior_weight: float
+    total_votes: int
+    total_talks: int
+    entries: Tuple[LeaderboardEntry, ...]
+
+    def to_dict(self) -> Dict:
+        """Rappresentazione serializzabile in JSON"""
+        data = asdict(self)
+        data['entries'] = [asdict(entry) for entry in self.entries]
+        return data
+
+
+def rank_talks(
+    stats: Dict[str, Tuple[int, int, int]],
+    top_k: int = 10,
+    prior_weight: Optional[float] = None
+) -> Tuple[float, float, Tuple[LeaderboardEntry, ...]]:
+    """
+    Classifica i talk per media bayesiana
+
+    Args:
+        stats: talk_id -> (voti, somma, somma dei quadrati)
+        top_k: Numero di talk da restituire
+        prior_weight: Peso C del prior (default: voti medi per talk)
+
+    Returns:
+        Tupla (media dell'evento, peso del prior, primi K talk)
+    """
+    total_votes = sum(votes for votes, _, _ in stats.values())
+    if total_votes == 0:
+        return 0.0, 0.0, ()
+
+    prior_mean = sum(rating_sum for _, rating_sum, _ in stats.values()) / total_votes
+    if prior_weight is None:
+        prior_weight = total_votes / len(stats)
+
+    def score(item):
+        _, (votes, rating_sum, _) = item
+        return (prior_weight * prior_mean + rating_sum) / (prior_weight + votes)
+
+    # Heap dei primi K: O(n log K) sul numero di talk; a parità di punteggio vince chi ha più voti
+    best = heapq.nlargest(top_k, stats.items(), key=lambda item: (score(item), item[1][0]))
+
+    entries = []
+    for rank, item in enumerate(best, start=1):
+        talk_id, (votes, rating_sum, rating_sumsq) = item
+        mean = rating_sum / votes
+        variance = (rating_sumsq - votes * mean * mean) / (votes - 1) if votes > 1 else 0.0
+        entries.append(LeaderboardEntry(
+            rank=rank,
+            talk_id=talk_id,
+            votes=votes,
+            mean=round(mean, 2),
+            std_dev=round(math.sqrt(max(0.0, variance)), 2),
+            score=round(score(item), 3)
+        ))
+    return prior_mean, prior_weight, tuple(entries)
+
+
+class LeaderboardService:
+    """Snapshot versionato della classifica dei talk su tutti gli shard"""
+
+    def __init__(
+        self,
+        sharded_db: Optional[ShardedDatabaseManager] = None,
+        top_k: int = 10,
+        prior_weight: Optional[float] = None
+    ):
+        """
+        Inizializza LeaderboardService
+
+        Args:
+            sharded_db: ShardedDatabaseManager (default: singleton configurato da env)
+            top_k: Numero di talk in classifica
+            prior_weight: Peso del prior bayesiano (default: voti medi per talk)
+        """
+        self.sharded_db = sharded_db or get_sharded_db_manager()
+        self.top_k = top_k
+        self.prior_weight = prior_weight
+
+    def get_snapshot(self) -> LeaderboardSnapshot:
+        """
+        Classifica corrente (dallo snapshot in cache se nessuno shard è cambiato)
+
+        Returns:
+            LeaderboardSnapshot
+
+        Raises:
+            VoteServiceError: Se la lettura di uno shard fallisce
+        """
+        key = (id(self.sharded_db), self.top_k, self.prior_weight)
+        now = time.monotonic()
+        try:
+            # Letto prima delle statistiche: una modifica nel frattempo invalida lo snapshot
+            source_version = self.sharded_db.get_source_version()
+            with _leaderboard_cache_lock:
+                cache = dict(_leaderboard_cache)
+            notified = all(version is not None for _, version in source_version)
+            if (
+                cache['snapshot'] is not None
+                and cache['key'] == key
+                and cache['source_version'] == source_version
+                and (notified or now < cache['expires'])
+            ):
+                return cache['snapshot']
+
+            stats = self.sharded_db.get_talk_stats()
+        except sqlite3.Error as e:
+            raise VoteServiceError("Errore nel calcolo della classifica", e)
+
+        prior_mean, prior_weight, entries = rank_talks(stats, self.top_k, self.prior_weight)
+        if notified:
+            # Somma dei contatori condivisi: stessa versione in tutti i processi
+            version = sum(version for _, version in source_version)
+        else:
+            previous = cache['snapshot'] if cache['key'] == key else None
+            version = (previous.version if previous is not None else 0) + 1
+
+        snapshot = LeaderboardSnapshot(
+            version=version,
+            generated_at=datetime.now().isoformat(timespec='seconds'),
+            prior_mean=round(prior_mean, 3),
+            prior_weight=round(prior_weight, 3),
+            total_votes=sum(votes for votes, _, _ in stats.values()),
+            total_talks=len(stats),
+            entries=entries
+        )
+        with _leaderboard_cache_lock:
+            _leaderboard_cache.update({
+                'key': key,
+                'source_version': source_version,
+                'snapshot': snapshot,
+                'expires': now + LEADERBOARD_CACHE_TTL
+            })
+        return snapshot
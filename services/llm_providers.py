@@ -0,0 +1,386 @@
+"""
+LLM Providers - Interfaccia comune dei modelli che generano il commento automatico
+
+Tre implementazioni, scelte da configurazione con create_llm_provider
+(impostazione llm_provider, vedi utils.settings):
+
+- gemini: Google Gemini (services.gemini_client), serve GEMINI_API_KEY;
+- local: testo deterministico composto da un template a partire dai
+  risultati strutturati del prompt (BuiltPrompt.results e comments),
+  senza rete (sviluppo, demo offline);
+- fake: come local, ma con latenza iniettata da una distribuzione
+  (llm_latency), timeout ed errori casuali (llm_failure_rate), per misurare cache, coalescenza e
+  aggiornamento in background di AnalyticsService sotto carico realistico.
+
+Con un nome sconosciuto o una configurazione non valida
+create_llm_provider ritorna un UnconfiguredProvider, che non genera
+testo e spiega il problema in config_error.
+
+Il client Gemini è importato solo quando serve: local e fake non
+richiedono google-generativeai.
+"""
+import hashlib
+import logging
+import math
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+from services.prompt_builder import BuiltPrompt, estimate_tokens
+from utils.metrics import LLM_LATENCY_SECONDS, LLM_REQUESTS_TOTAL
+from utils.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+PROVIDER_NAMES = ("gemini", "local", "fake")
+DEFAULT_TIMEOUT = 30
+# Latenza di default del fake: mediana ~1.5 s con coda lunga, come una chiamata reale
+DEFAULT_FAKE_LATENCY = "lognormal:1.5,0.5"
+
+_OPENINGS = (
+    ("La Forza è forte in questo talk", "Il Consiglio Jedi approva", "Gran Maestri in sala"),
+    ("Il lato luminoso prevale", "La Forza è con il relatore, ma non con tutti", "Equilibrio nella Forza"),
+    ("Il lato oscuro si fa sentire", "Turbolenze nella Forza", "Il pubblico chiede più allenamento Jedi"),
+)
+
+
+class LLMProvider(ABC):
+    """
+    Interfaccia di un modello che genera testo da un prompt
+
+    Le sottoclassi impostano name e label e implementano generate_text;
+    config_error descrive un problema di configurazione (None se pronto).
+    """
+
+    name = "base"
+    label = "LLM"
+
+    def __init__(self, timeout: int = DEFAULT_TIMEOUT):
+        """
+        Args:
+            timeout: Timeout di una chiamata in secondi
+        """
+        self.timeout = timeout
+        self.config_error: Optional[str] = None
+
+    def is_configured(self) -> bool:
+        """True se il provider può generare testo"""
+        return self.config_error is None
+
+    @abstractmethod
+    def generate_text(self, prompt: str, max_output_tokens: int = 256) -> Optional[str]:
+        """
+        Genera il testo del prompt
+
+        Args:
+            prompt: Prompt completo
+            max_output_tokens: Limite dei token generati
+
+        Returns:
+            Testo generato o None in caso di errore o timeout
+        """
+
+    def generate_comment(self, prompt: BuiltPrompt) -> Optional[str]:
+        """
+        Genera il commento automatico da un prompt dei risultati
+
+        Un modello riceve il testo del prompt; i provider senza modello
+        ridefiniscono il metodo e compongono dai dati strutturati.
+
+        Args:
+            prompt: Prompt da PromptBuilder.build_results_prompt
+
+        Returns:
+            Testo generato o None in caso di errore o timeout
+        """
+        return self.generate_text(prompt.text, max_output_tokens=prompt.max_output_tokens)
+
+
+class UnconfiguredProvider(LLMProvider):
+    """Provider che non può generare testo: config_error spiega perché"""
+
+    name = "unconfigured"
+    label = "LLM non configurato"
+
+    def __init__(self, config_error: str, timeout: int = DEFAULT_TIMEOUT):
+        """
+        Args:
+            config_error: Problema di configurazione da mostrare
+            timeout: Timeout di una chiamata in secondi
+        """
+        super().__init__(timeout)
+        self.config_error = config_error
+
+    def generate_text(self, prompt: str, max_output_tokens: int = 256) -> Optional[str]:
+        """Nessun modello: ritorna sempre None"""
+        return None
+
+
+class LocalProvider(LLMProvider):
+    """Provider deterministico: stessi dati, stesso testo, nessuna rete"""
+
+    name = "local"
+    label = "modello locale"
+
+    def generate_text(self, prompt: str, max_output_tokens: int = 256) -> Optional[str]:
+        """
+        Senza risultati strutturati il modello locale non ha nulla da commentare
+
+        Args:
+            prompt: Prompt completo (usato solo per la variante del testo)
+            max_output_tokens: Limite dei token del testo (stimati)
+
+        Returns:
+            Testo di attesa dei dati
+        """
+        return self._timed(lambda: self.compose(prompt), max_output_tokens)
+
+    def generate_comment(self, prompt: BuiltPrompt) -> Optional[str]:
+        """
+        Compone 2-3 frasi a tema Star Wars da risultati e commenti del prompt
+
+        La variante del template dipende dall'hash del testo del prompt:
+        prompt uguali producono sempre lo stesso testo.
+
+        Args:
+            prompt: Prompt da PromptBuilder.build_results_prompt
+
+        Returns:
+            Testo del commento
+        """
+        return self._timed(
+            lambda: self.compose(prompt.text, prompt.results, prompt.comments),
+            prompt.max_output_tokens
+        )
+
+    def _timed(self, compose: Callable[[], str], max_output_tokens: int) -> str:
+        """Compone il testo registrando esito e latenza nelle metriche"""
+        start = time.perf_counter()
+        text = _truncate_tokens(compose(), max_output_tokens)
+        LLM_REQUESTS_TOTAL.labels(outcome="success").inc()
+        LLM_LATENCY_SECONDS.observe(time.perf_counter() - start)
+        return text
+
+    @staticmethod
+    def compose(
+        prompt: str,
+        results: Optional[Dict] = None,
+        comments: Sequence[Tuple[int, str]] = ()
+    ) -> str:
+        """
+        Testo del commento (senza limite di lunghezza)
+
+        Args:
+            prompt: Testo del prompt, per scegliere la variante
+            results: Dizionario da VoteService.get_results() (None: nessun dato)
+            comments: Commenti campionati (rating, testo)
+
+        Returns:
+            Testo del commento
+        """
+        if not results or not results['total_votes']:
+            return "La Forza è ancora in raccolta: i dati dei voti non bastano per un commento."
+
+        variant = hashlib.blake2b(prompt.encode("utf-8"), digest_size=2).digest()[0]
+        stats = results['stats']
+        net_score = stats.net_score
+        tone = 0 if net_score >= 50 else 1 if net_score >= 0 else 2
+        opening = _OPENINGS[tone][variant % len(_OPENINGS[tone])]
+        sentences = [
+            f"{opening}: {results['total_votes']} voti con una media di {results['average_rating']:.2f} stelle.",
+            f"Il {stats.top2_box:.0f}% dei voti è da Maestro o Gran Maestro "
+            f"e il rating più scelto è {stats.mode} stelle (net score {net_score:+.0f})."
+        ]
+        if comments:
+            rating, text = comments[variant % len(comments)]
+            sentences.append(f"Tra i {len(comments)} commenti citati, uno da {rating} stelle dice: «{text}».")
+        return " ".join(sentences)
+
+
+class FakeProvider(LLMProvider):
+    """
+    Provider con latenza iniettata, per benchmark e prove di carico
+
+    Ogni chiamata attende una latenza estratta dalla distribuzione; oltre
+    il timeout attende il timeout e ritorna None, come un client reale.
+    Con probabilità failure_rate la chiamata fallisce. Il testo è quello
+    di LocalProvider. Conta chiamate e concorrenza massima.
+    """
+
+    name = "fake"
+    label = "modello simulato"
+
+    def __init__(
+        self,
+        latency: str = DEFAULT_FAKE_LATENCY,
+        failure_rate: float = 0.0,
+        timeout: int = DEFAULT_TIMEOUT,
+        seed: Optional[int] = None
+    ):
+        """
+        Args:
+            latency: Distribuzione della latenza (vedi parse_latency)
+            failure_rate: Probabilità di errore di una chiamata (0-1)
+            timeout: Timeout di una chiamata in secondi
+            seed: Seme del generatore casuale (None: non riproducibile)
+
+        Raises:
+            ValueError: Se latency o failure_rate non sono validi
+        """
+        super().__init__(timeout)
+        if not 0.0 <= failure_rate <= 1.0:
+            raise ValueError(f"failure_rate deve essere tra 0 e 1, non {failure_rate}")
+        self.sample_latency = parse_latency(latency)
+        self.failure_rate = failure_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def generate_text(self, prompt: str, max_output_tokens: int = 256) -> Optional[str]:
+        """
+        Attende la latenza simulata e genera il testo
+
+        Args:
+            prompt: Prompt completo
+            max_output_tokens: Limite dei token generati
+
+        Returns:
+            Testo di LocalProvider, None per timeout o errore simulato
+        """
+        return self._simulate(lambda: LocalProvider.compose(prompt), max_output_tokens)
+
+    def generate_comment(self, prompt: BuiltPrompt) -> Optional[str]:
+        """
+        Attende la latenza simulata e compone il commento come LocalProvider
+
+        Args:
+            prompt: Prompt da PromptBuilder.build_results_prompt
+
+        Returns:
+            Testo di LocalProvider, None per timeout o errore simulato
+        """
+        return self._simulate(
+            lambda: LocalProvider.compose(prompt.text, prompt.results, prompt.comments),
+            prompt.max_output_tokens
+        )
+
+    def _simulate(self, compose: Callable[[], str], max_output_tokens: int) -> Optional[str]:
+        """Una chiamata simulata: latenza, timeout ed errori, poi il testo di compose"""
+        with self._lock:
+            latency = self.sample_latency(self._rng)
+            failed = self._rng.random() < self.failure_rate
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(min(latency, self.timeout))
+            if latency > self.timeout:
+                LLM_REQUESTS_TOTAL.labels(outcome="timeout").inc()
+                logger.error(f"Timeout simulato nella richiesta LLM (>{self.timeout}s)")
+                return None
+            if failed:
+                LLM_REQUESTS_TOTAL.labels(outcome="error").inc()
+                logger.error("Errore simulato nella richiesta LLM")
+                return None
+            LLM_REQUESTS_TOTAL.labels(outcome="success").inc()
+            return _truncate_tokens(compose(), max_output_tokens)
+        finally:
+            LLM_LATENCY_SECONDS.observe(min(latency, self.timeout))
+            with self._lock:
+                self.in_flight -= 1
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    Distribuzione della latenza da una stringa
+
+    Formati: "fixed:S", "uniform:MIN,MAX", "lognormal:MEDIANA,SIGMA",
+    "exp:MEDIA" (secondi).
+
+    Args:
+        spec: Specifica della distribuzione
+
+    Returns:
+        Funzione che estrae una latenza in secondi da un random.Random
+
+    Raises:
+        ValueError: Se la specifica non è valida
+    """
+    kind, _, args = spec.strip().partition(":")
+    try:
+        values = [float(value) for value in args.split(",")] if args else []
+    except ValueError:
+        raise ValueError(f"Latenza non valida: {spec!r}") from None
+    if any(value < 0 for value in values):
+        raise ValueError(f"Latenza non valida: {spec!r}")
+
+    if kind == "fixed" and len(values) == 1:
+        return lambda rng: values[0]
+    if kind == "uniform" and len(values) == 2 and values[0] <= values[1]:
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "lognormal" and len(values) == 2 and values[0] > 0:
+        mu = math.log(values[0])
+        return lambda rng: rng.lognormvariate(mu, values[1])
+    if kind == "exp" and len(values) == 1 and values[0] > 0:
+        return lambda rng: rng.expovariate(1 / values[0])
+    raise ValueError(f"Latenza non valida: {spec!r} (fixed:S, uniform:MIN,MAX, lognormal:MEDIANA,SIGMA, exp:MEDIA)")
+
+
+def _truncate_tokens(text: str, max_tokens: int) -> str:
+    """Tronca il testo a fine parola entro max_tokens token stimati"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    words = text.split(" ")
+    while words and estimate_tokens(" ".join(words) + "…") > max_tokens:
+        words.pop()
+    return " ".join(words).rstrip(" ,.;:") + "…"
+
+
+def create_llm_provider(
+    name: Optional[str] = None,
+    api_key: Optional[str] = None,
+    timeout: Optional[float] = None,
+    latency: Optional[str] = None,
+    failure_rate: Optional[float] = None
+) -> LLMProvider:
+    """
+    Crea il provider scelto da configurazione
+
+    Args:
+        name: gemini, local o fake (default: llm_provider)
+        api_key: Chiave Gemini (default: GEMINI_API_KEY)
+        timeout: Timeout di una chiamata in secondi (default: llm_timeout)
+        latency: Distribuzione della latenza del fake (default: llm_latency)
+        failure_rate: Probabilità di errore del fake (default: llm_failure_rate)
+
+    Returns:
+        LLMProvider; con un nome sconosciuto, una dipendenza mancante o
+        parametri non validi, un UnconfiguredProvider il cui config_error
+        spiega il problema
+    """
+    settings = get_settings()
+    name = (name or settings.llm_provider).strip().lower()
+    timeout = timeout or settings.llm_timeout
+    try:
+        if name == "gemini":
+            from services.gemini_client import GeminiClient
+            return GeminiClient(timeout=timeout, api_key=api_key)
+        if name == "local":
+            return LocalProvider(timeout)
+        if name == "fake":
+            return FakeProvider(
+                latency=latency or settings.llm_latency,
+                failure_rate=settings.llm_failure_rate if failure_rate is None else failure_rate,
+                timeout=timeout
+            )
+        error = f"Provider LLM sconosciuto: {name!r} (valori ammessi: {', '.join(PROVIDER_NAMES)})"
+    except ImportError as e:
+        error = f"Provider LLM {name!r} non disponibile: {e}"
+    except ValueError as e:
+        error = f"Configurazione del provider LLM {name!r} non valida: {e}"
+    logger.warning(error)
+    return UnconfiguredProvider(error, timeout)
@@ -0,0 +1,302 @@
+"""
+Prompt Builder - Prompt compatti e a budget per le chiamate LLM
+
+I template sono compilati una sola volta (parti fisse e campi con il
+loro formato) e messi in cache per nome. Ogni prompt rispetta un budget
+di token in ingresso: le statistiche dei voti sono sempre incluse, i
+commenti del pubblico occupano lo spazio rimanente con un campione
+stratificato per rating (almeno un commento per ogni rating presente,
+poi in proporzione alla numerosità, i più recenti per primi), ognuno
+troncato a MAX_COMMENT_CHARS caratteri. Anche i token in uscita hanno
+un budget, passato al client come max_output_tokens. I budget di default
+sono llm_input_tokens e llm_output_tokens delle impostazioni (il prompt
+con le sole statistiche è ~350 token, 3-4 frasi di risposta ~150).
+
+I token sono stimati localmente, senza tokenizer del modello: circa un
+token ogni CHARS_PER_TOKEN caratteri di una parola e uno per ogni segno
+di punteggiatura. Byte e token stimati di ogni prompt finiscono nelle
+metriche e nel log.
+"""
+import logging
+import re
+import string
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from utils.metrics import LLM_PROMPT_BYTES, LLM_PROMPT_TOKENS
+from utils.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Stima dei token: caratteri per token dentro una parola
+CHARS_PER_TOKEN = 4
+# Lunghezza massima di un commento nel prompt
+MAX_COMMENT_CHARS = 200
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Template per nome (compilati alla prima richiesta con get_template)
+TEMPLATES = {
+    "results": (
+        "Dati di votazione di un talk a una conference sul VibeCoding, scala 1-5 stelle a tema Star Wars.\n"
+        "Voti: 1 Youngling {votes_1} ({pct_1:.1f}%), 2 Padawan {votes_2} ({pct_2:.1f}%), "
+        "3 Cavaliere Jedi {votes_3} ({pct_3:.1f}%), 4 Maestro Jedi {votes_4} ({pct_4:.1f}%), "
+        "5 Gran Maestro {votes_5} ({pct_5:.1f}%).\n"
+        "Totale {total_votes}; media {average:.2f} (IC 95% {mean_low:.2f}-{mean_high:.2f}); "
+        "mediana {median:g}; dev. std {std_dev:.2f}; moda {mode} stelle ({mode_count} voti); "
+        "top-2-box {top2:.1f}% (IC 95% {top2_low:.1f}-{top2_high:.1f}%); net score {net:+.1f}.\n"
+        "{comments}"
+        "Scrivi 3-4 frasi in italiano: sentiment generale (positivo/negativo/misto), il pattern più "
+        "interessante della distribuzione, un'osservazione statistica o comparativa{comments_hint}. "
+        "Tono coinvolgente a tema Star Wars quando appropriato (es. \"La Forza è forte in questo talk\"). "
+        "Rispondi solo con il testo del commento, senza titoli, markdown o introduzioni."
+    ),
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Stima i token di un testo
+
+    Args:
+        text: Testo del prompt
+
+    Returns:
+        Token stimati (parole divise ogni CHARS_PER_TOKEN caratteri,
+        un token per segno di punteggiatura o simbolo)
+    """
+    return sum(-(-len(piece) // CHARS_PER_TOKEN) for piece in _TOKEN_RE.findall(text))
+
+
+class PromptTemplate:
+    """Template compilato: sequenza di parti fisse e campi con formato"""
+
+    def __init__(self, source: str):
+        """
+        Compila il template
+
+        Args:
+            source: Testo con campi in sintassi str.format ({nome:formato})
+        """
+        self.source = source
+        self._parts: List[Tuple[str, Optional[str], str]] = [
+            (literal, field, spec or "")
+            for literal, field, spec, _ in string.Formatter().parse(source)
+        ]
+        self.fields = frozenset(field for _, field, _ in self._parts if field is not None)
+        # Token delle parti fisse, pagati da ogni prompt
+        self.static_tokens = estimate_tokens("".join(literal for literal, _, _ in self._parts))
+
+    def render(self, **values) -> str:
+        """
+        Compone il testo
+
+        Args:
+            **values: Un valore per ogni campo del template
+
+        Returns:
+            Testo del prompt
+
+        Raises:
+            KeyError: Se manca il valore di un campo
+        """
+        pieces = []
+        for literal, field, spec in self._parts:
+            pieces.append(literal)
+            if field is not None:
+                pieces.append(format(values[field], spec))
+        return "".join(pieces)
+
+
+@lru_cache(maxsize=None)
+def get_template(name: str) -> PromptTemplate:
+    """
+    Ritorna il template compilato (una sola volta per processo)
+
+    Args:
+        name: Chiave di TEMPLATES
+
+    Returns:
+        PromptTemplate in cache
+    """
+    return PromptTemplate(TEMPLATES[name])
+
+
+def truncate_comment(comment: str, max_chars: int = MAX_COMMENT_CHARS) -> str:
+    """
+    Commento su una riga, troncato a fine parola
+
+    Args:
+        comment: Testo del commento
+        max_chars: Lunghezza massima
+
+    Returns:
+        Testo con spazi compressi, terminato da "…" se troncato
+    """
+    text = _WHITESPACE_RE.sub(" ", comment).strip()
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars - 1]
+    if " " in cut:
+        cut = cut[:cut.rindex(" ")]
+    return cut.rstrip(" ,.;:") + "…"
+
+
+def sample_comments(
+    comments: Sequence[Tuple[str, int, str]],
+    token_budget: int,
+    max_chars: int = MAX_COMMENT_CHARS
+) -> List[Tuple[int, str]]:
+    """
+    Campione stratificato per rating dei commenti che sta nel budget
+
+    Ogni rating presente contribuisce prima un commento, poi i commenti si
+    alternano in proporzione alla numerosità del rating (il k-esimo di un
+    rating con n commenti ha priorità k / n). Si aggiungono righe finché
+    il budget lo consente.
+
+    Args:
+        comments: Tuple (commento, rating, timestamp), dal più recente
+        token_budget: Token disponibili per le righe dei commenti
+        max_chars: Lunghezza massima di un commento
+
+    Returns:
+        Coppie (rating, commento troncato), per rating decrescente
+    """
+    strata: Dict[int, List[str]] = {}
+    for comment, rating, _ in comments:
+        strata.setdefault(rating, []).append(comment)
+
+    order = sorted(
+        (k / len(stratum), -len(stratum), rating, k)
+        for rating, stratum in strata.items()
+        for k in range(len(stratum))
+    )
+    sampled, used = [], 0
+    for _, _, rating, k in order:
+        text = truncate_comment(strata[rating][k], max_chars)
+        cost = estimate_tokens(_comment_line(rating, text))
+        if used + cost > token_budget:
+            break
+        sampled.append((rating, k, text))
+        used += cost
+    return [(rating, text) for rating, _, text in sorted(sampled, key=lambda item: (-item[0], item[1]))]
+
+
+def _comment_line(rating: int, text: str) -> str:
+    return f"- [{rating}] {text}\n"
+
+
+@dataclass(frozen=True)
+class PromptBudget:
+    """Token consentiti per una chiamata LLM"""
+    input_tokens: int
+    output_tokens: int
+
+
+@dataclass(frozen=True)
+class BuiltPrompt:
+    """Prompt composto con le sue dimensioni e i dati da cui è composto"""
+    text: str
+    size_bytes: int
+    estimated_tokens: int
+    max_output_tokens: int
+    comments_included: int
+    comments_total: int
+    # Risultati e commenti campionati (rating, testo): i provider senza
+    # modello (services.llm_providers.LocalProvider) compongono da questi
+    results: Optional[Dict] = field(default=None, compare=False, repr=False)
+    comments: Tuple[Tuple[int, str], ...] = field(default=(), compare=False, repr=False)
+
+
+class PromptBuilder:
+    """Composizione dei prompt entro un budget di token"""
+
+    def __init__(self, budget: Optional[PromptBudget] = None):
+        """
+        Inizializza il builder
+
+        Args:
+            budget: Budget di token (default: llm_input_tokens e llm_output_tokens)
+        """
+        if budget is None:
+            settings = get_settings()
+            budget = PromptBudget(settings.llm_input_tokens, settings.llm_output_tokens)
+        self.budget = budget
+
+    def build_results_prompt(
+        self,
+        results: Dict,
+        comments: Sequence[Tuple[str, int, str]] = ()
+    ) -> BuiltPrompt:
+        """
+        Prompt del commento automatico sui risultati
+
+        Args:
+            results: Dizionario da VoteService.get_results()
+            comments: Commenti approvati (commento, rating, timestamp), dal più recente
+
+        Returns:
+            BuiltPrompt entro budget.input_tokens (salvo statistiche da sole più lunghe)
+        """
+        template = get_template("results")
+        votes, stats = results['votes'], results['stats']
+        values = {
+            **{f"votes_{rating}": votes[rating] for rating in range(1, 6)},
+            **{f"pct_{rating}": stats.percentage(rating) for rating in range(1, 6)},
+            "total_votes": results['total_votes'],
+            "average": results['average_rating'],
+            "mean_low": stats.mean_ci[0],
+            "mean_high": stats.mean_ci[1],
+            "median": stats.median,
+            "std_dev": stats.std_dev,
+            "mode": stats.mode,
+            "mode_count": stats.mode_count,
+            "top2": stats.top2_box,
+            "top2_low": stats.top2_box_ci[0],
+            "top2_high": stats.top2_box_ci[1],
+            "net": stats.net_score,
+        }
+
+        sampled: List[Tuple[int, str]] = []
+        if comments:
+            header = f"Commenti del pubblico ([rating] testo; campione per rating su {len(comments)}):\n"
+            hint = ", citando i temi ricorrenti nei commenti"
+            base = template.render(**values, comments=header, comments_hint=hint)
+            sampled = sample_comments(comments, self.budget.input_tokens - estimate_tokens(base))
+        if sampled:
+            section = header + "".join(_comment_line(rating, text) for rating, text in sampled)
+        else:
+            section, hint = "", ""
+        text = template.render(**values, comments=section, comments_hint=hint)
+        return self._report(text, sampled, len(comments), results)
+
+    def _report(
+        self,
+        text: str,
+        sampled: Sequence[Tuple[int, str]],
+        total: int,
+        results: Optional[Dict] = None
+    ) -> BuiltPrompt:
+        """Misura il prompt e lo registra in metriche e log"""
+        included = len(sampled)
+        prompt = BuiltPrompt(
+            text=text,
+            size_bytes=len(text.encode("utf-8")),
+            estimated_tokens=estimate_tokens(text),
+            max_output_tokens=self.budget.output_tokens,
+            comments_included=included,
+            comments_total=total,
+            results=results,
+            comments=tuple(sampled)
+        )
+        LLM_PROMPT_BYTES.observe(prompt.size_bytes)
+        LLM_PROMPT_TOKENS.observe(prompt.estimated_tokens)
+        logger.info(
+            f"Prompt LLM: {prompt.size_bytes} byte, ~{prompt.estimated_tokens} token "
+            f"(budget {self.budget.input_tokens}), {included}/{total} commenti, "
+            f"max {prompt.max_output_tokens} token in uscita"
+        )
+        return prompt
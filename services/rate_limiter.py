@@ -0,0 +1,245 @@
+"""
+Rate Limiter - Protezione dagli abusi sul percorso di scrittura dei voti
+
+Token bucket in memoria per IP del client e per sessione, controllati
+prima di qualsiasi accesso al database: un flood scriptato (localStorage
+o sessione Streamlit azzerati a ogni voto) riceve un rifiuto immediato
+invece di mettersi in coda sull'unico writer SQLite.
+
+Ogni chiave ha un bucket di `burst` gettoni che si ricarica a `rate`
+gettoni al secondo; un voto consuma un gettone. I bucket sono in una LRU
+limitata a `max_keys` voci: un bucket inattivo da burst / rate secondi è
+di nuovo pieno, quindi viene scartato senza cambiare il comportamento.
+
+Il limite per IP è largo perché durante un evento molti partecipanti
+escono sulla rete con lo stesso IP (Wi-Fi della sala, NAT); quello per
+sessione ferma i reinvii ripetuti dello stesso client. I bucket sono di
+processo: con più processi ognuno applica il proprio limite. Rate e burst
+vengono dalle impostazioni (utils.settings) e si aggiornano senza
+riavvio: get_vote_rate_limiter applica i valori correnti ai bucket.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from utils.metrics import RATE_LIMIT_BUCKETS, RATE_LIMITED_TOTAL
+from utils.settings import get_settings
+
+# Chiavi tracciate al massimo per ogni limiter
+MAX_TRACKED_KEYS = 10000
+
+
+class TokenBucketLimiter:
+    """Token bucket per chiave con LRU limitata"""
+
+    def __init__(self, rate: float, burst: float, max_keys: int = MAX_TRACKED_KEYS):
+        """
+        Inizializza il limiter
+
+        Args:
+            rate: Gettoni ricaricati al secondo
+            burst: Capacità del bucket (richieste consecutive consentite)
+            max_keys: Numero massimo di bucket in memoria
+        """
+        self.max_keys = max_keys
+        # chiave -> [gettoni, ultimo aggiornamento, richieste rifiutate]
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.configure(rate, burst)
+
+    def configure(self, rate: float, burst: float):
+        """
+        Cambia i limiti; i bucket esistenti restano (con al più `burst` gettoni)
+
+        Args:
+            rate: Gettoni ricaricati al secondo
+            burst: Capacità del bucket
+        """
+        with self._lock:
+            self.rate = rate
+            self.burst = burst
+            # Tempo dopo il quale un bucket inattivo è di nuovo pieno
+            self.idle_ttl = burst / rate
+            for bucket in self._buckets.values():
+                bucket[0] = min(bucket[0], burst)
+
+    def acquire(self, key: str, cost: float = 1.0, now: Optional[float] = None) -> float:
+        """
+        Consuma `cost` gettoni dal bucket della chiave
+
+        Un costo oltre la capacità viene ridotto a `burst`: un lotto grande
+        svuota il bucket invece di essere rifiutato per sempre.
+
+        Args:
+            key: Chiave del bucket (IP o sessione)
+            cost: Gettoni richiesti
+            now: Istante monotono (default: time.monotonic())
+
+        Returns:
+            0.0 se consentito, altrimenti i secondi da attendere
+        """
+        now = time.monotonic() if now is None else now
+        cost = min(cost, self.burst)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = [self.burst, now, 0]
+                self._buckets[key] = bucket
+                self._evict(now)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+
+            if bucket[0] >= cost:
+                bucket[0] -= cost
+                return 0.0
+            bucket[2] += 1
+            return (cost - bucket[0]) / self.rate
+
+    def _evict(self, now: float):
+        """Rimuove i bucket meno recenti oltre max_keys e quelli già ricaricati"""
+        while self._buckets:
+            bucket = next(iter(self._buckets.values()))
+            if len(self._buckets) <= self.max_keys and now - bucket[1] < self.idle_ttl:
+                break
+            self._buckets.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def top_limited(self, limit: int = 10) -> List[Tuple[str, int]]:
+        """
+        Chiavi ancora tracciate con più richieste rifiutate
+
+        Args:
+            limit: Numero massimo di chiavi
+
+        Returns:
+            Lista di (chiave, rifiuti) in ordine decrescente
+        """
+        with self._lock:
+            limited = [(key, int(bucket[2])) for key, bucket in self._buckets.items() if bucket[2]]
+        return sorted(limited, key=lambda item: item[1], reverse=True)[:limit]
+
+    def clear(self):
+        """Dimentica tutti i bucket (sblocca tutte le chiavi)"""
+        with self._lock:
+            self._buckets.clear()
+
+
+class VoteRateLimiter:
+    """Limiti per IP e per sessione sul percorso di voto"""
+
+    def __init__(
+        self,
+        ip_rate: Optional[float] = None,
+        ip_burst: Optional[float] = None,
+        session_rate: Optional[float] = None,
+        session_burst: Optional[float] = None,
+        max_keys: int = MAX_TRACKED_KEYS
+    ):
+        """
+        Inizializza i due limiter (i limiti non indicati dalle impostazioni)
+
+        Args:
+            ip_rate: Voti al secondo per IP
+            ip_burst: Voti consecutivi per IP
+            session_rate: Tentativi al secondo per sessione
+            session_burst: Tentativi consecutivi per sessione
+            max_keys: Bucket in memoria per ciascun limiter
+        """
+        settings = get_settings()
+        self.by_ip = TokenBucketLimiter(ip_rate or settings.ip_rate, ip_burst or settings.ip_burst, max_keys)
+        self.by_session = TokenBucketLimiter(
+            session_rate or settings.session_rate, session_burst or settings.session_burst, max_keys
+        )
+
+    @property
+    def limits(self) -> Tuple[float, float, float, float]:
+        """(ip_rate, ip_burst, session_rate, session_burst) correnti"""
+        return self.by_ip.rate, self.by_ip.burst, self.by_session.rate, self.by_session.burst
+
+    def check_ip(self, client_ip: Optional[str], votes: int = 1) -> float:
+        """
+        Controlla il limite dell'IP per `votes` voti
+
+        Args:
+            client_ip: Indirizzo del client (None: nessun controllo)
+            votes: Voti nella richiesta
+
+        Returns:
+            0.0 se consentito, altrimenti i secondi da attendere
+        """
+        if not client_ip:
+            return 0.0
+        wait = self.by_ip.acquire(client_ip, votes)
+        if wait:
+            RATE_LIMITED_TOTAL.labels(scope="ip").inc(votes)
+        return wait
+
+    def check_session(self, session_id: Optional[str]) -> float:
+        """
+        Controlla il limite della sessione per un tentativo di voto
+
+        Args:
+            session_id: Session ID del votante (None: nessun controllo)
+
+        Returns:
+            0.0 se consentito, altrimenti i secondi da attendere
+        """
+        if not session_id:
+            return 0.0
+        wait = self.by_session.acquire(session_id)
+        if wait:
+            RATE_LIMITED_TOTAL.labels(scope="session").inc()
+        return wait
+
+    def check(self, client_ip: Optional[str], session_id: Optional[str]) -> float:
+        """
+        Controlla IP e sessione di un singolo voto
+
+        Returns:
+            0.0 se consentito, altrimenti i secondi da attendere
+        """
+        return self.check_ip(client_ip) or self.check_session(session_id)
+
+    def clear(self):
+        """Sblocca tutti gli IP e le sessioni"""
+        self.by_ip.clear()
+        self.by_session.clear()
+
+
+# Istanza singleton del limiter dei voti
+_vote_rate_limiter: Optional[VoteRateLimiter] = None
+_vote_rate_limiter_lock = threading.Lock()
+
+
+def get_vote_rate_limiter() -> VoteRateLimiter:
+    """
+    Ritorna il limiter dei voti condiviso dal processo
+
+    Se le impostazioni sono cambiate dall'ultima chiamata, i nuovi limiti
+    sono applicati ai bucket esistenti.
+
+    Returns:
+        VoteRateLimiter singleton
+    """
+    global _vote_rate_limiter
+
+    settings = get_settings()
+    limits = (settings.ip_rate, settings.ip_burst, settings.session_rate, settings.session_burst)
+    with _vote_rate_limiter_lock:
+        if _vote_rate_limiter is not None and _vote_rate_limiter.limits != limits:
+            _vote_rate_limiter.by_ip.configure(limits[0], limits[1])
+            _vote_rate_limiter.by_session.configure(limits[2], limits[3])
+        if _vote_rate_limiter is None:
+            _vote_rate_limiter = VoteRateLimiter()
+            RATE_LIMIT_BUCKETS.labels(scope="ip").set_function(
+                lambda: len(_vote_rate_limiter.by_ip)
+            )
+            RATE_LIMIT_BUCKETS.labels(scope="session").set_function(
+                lambda: len(_vote_rate_limiter.by_session)
+            )
+        return _vote_rate_limiter
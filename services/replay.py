@@ -0,0 +1,135 @@
+"""
+Replay - Riproduzione di votazioni storiche sul percorso di scrittura live
+
+Rilegge un dump di voti (CSV o JSON Lines, vedi database.bulk_import) e
+invia ogni voto tramite VoteService.record_vote rispettando gli intervalli
+originali divisi per un fattore di accelerazione, per riprodurre il carico
+di un evento reale.
+
+Uso:
+    python -m services.replay votes.jsonl --speedup 60 --workers 8
+"""
+import argparse
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from database.bulk_import import read_records
+from services.vote_service import VoteService
+from utils.session_identity import new_session_id
+from utils.settings import get_settings
+
+
+@dataclass
+class ReplayReport:
+    """Esito di un replay"""
+    accepted: int = 0
+    duplicates: int = 0
+    errors: int = 0
+    seconds: float = 0.0
+    latencies: List[float] = field(default_factory=list)
+
+    def percentile(self, p: float) -> float:
+        """Latenza di scrittura al percentile p (secondi)"""
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[float]:
+    """Converte un timestamp SQLite/ISO in secondi epoch"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value)).timestamp()
+    except ValueError:
+        return None
+
+
+def replay_votes(
+    records: Iterable[Dict],
+    vote_service: VoteService,
+    speedup: float = 1.0,
+    workers: int = 4
+) -> ReplayReport:
+    """
+    Invia i voti storici al percorso di scrittura live
+
+    Args:
+        records: Record di voto in ordine cronologico
+        vote_service: VoteService usato per scrivere
+        speedup: Fattore di accelerazione (60 = un'ora in un minuto)
+        workers: Scritture concorrenti massime
+
+    Returns:
+        ReplayReport con conteggi e latenze
+    """
+    if speedup <= 0:
+        raise ValueError("speedup deve essere > 0")
+
+    report = ReplayReport()
+    lock = threading.Lock()
+
+    def send(record: Dict):
+        start = time.perf_counter()
+        try:
+            vote_service.record_vote(
+                record.get('session_id') or new_session_id(),
+                int(record['rating']),
+                record.get('comment') or None,
+                record.get('talk_id') or 'main'
+            )
+            outcome = 'accepted'
+        except sqlite3.IntegrityError:
+            outcome = 'duplicates'
+        except Exception:
+            outcome = 'errors'
+        latency = time.perf_counter() - start
+        with lock:
+            setattr(report, outcome, getattr(report, outcome) + 1)
+            report.latencies.append(latency)
+
+    wall_start = time.monotonic()
+    first_ts = None
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for record in records:
+            ts = _parse_timestamp(record.get('timestamp'))
+            if ts is not None:
+                if first_ts is None:
+                    first_ts = ts
+                # Attende l'istante originale scalato dal fattore di accelerazione
+                delay = (ts - first_ts) / speedup - (time.monotonic() - wall_start)
+                if delay > 0:
+                    time.sleep(delay)
+            pool.submit(send, record)
+
+    report.seconds = time.monotonic() - wall_start
+    return report
+
+
+def main(argv=None):
+    """Entry point da riga di comando"""
+    parser = argparse.ArgumentParser(description="Replay di voti storici sul percorso live")
+    parser.add_argument("path", help="File CSV o JSON Lines")
+    parser.add_argument("--db", default=get_settings().db_path, help="Percorso database SQLite")
+    parser.add_argument("--speedup", type=float, default=1.0, help="Fattore di accelerazione")
+    parser.add_argument("--workers", type=int, default=4, help="Scritture concorrenti")
+    args = parser.parse_args(argv)
+
+    report = replay_votes(read_records(args.path), VoteService(args.db), args.speedup, args.workers)
+    print(
+        f"Replay completato in {report.seconds:.1f}s: {report.accepted} accettati, "
+        f"{report.duplicates} duplicati, {report.errors} errori, "
+        f"p50 {report.percentile(50) * 1000:.1f} ms, p99 {report.percentile(99) * 1000:.1f} ms",
+        file=sys.stderr
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Sharded Vote Service - Voti instradati sullo shard del talk
+
+Ogni talk viene scritto nel proprio file SQLite (vedi database.sharding):
+ogni shard ha il proprio VoteService e quindi il proprio lock di
+scrittura, indice delle sessioni e cache dei risultati. Le letture a
+livello di evento aggregano i conteggi di tutti gli shard.
+"""
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from database.sharding import ShardedDatabaseManager, get_sharded_db_manager
+from services.vote_service import (
+    VoteError, VoteResult, VoteService, VoteServiceError, VoteSubmission
+)
+
+
+class ShardedVoteService:
+    """Facade di VoteService con un servizio per shard"""
+
+    def __init__(self, sharded_db: Optional[ShardedDatabaseManager] = None):
+        """
+        Inizializza ShardedVoteService
+
+        Args:
+            sharded_db: ShardedDatabaseManager (default: singleton configurato da env)
+        """
+        self.sharded_db = sharded_db or get_sharded_db_manager()
+        self._services: Dict[str, VoteService] = {}
+        self._lock = threading.Lock()
+
+    def for_talk(self, talk_id: str) -> VoteService:
+        """
+        VoteService dello shard che contiene il talk
+
+        Args:
+            talk_id: Identificativo del talk
+
+        Returns:
+            VoteService legato allo shard
+        """
+        db_manager = self.sharded_db.shard_for(talk_id)
+        with self._lock:
+            service = self._services.get(db_manager.db_path)
+            if service is None:
+                service = VoteService(db_manager=db_manager)
+                self._services[db_manager.db_path] = service
+            return service
+
+    def submit_vote(
+        self,
+        rating: int,
+        comment: Optional[str] = None,
+        session_id: Optional[str] = None,
+        talk_id: str = 'main'
+    ) -> VoteResult:
+        """
+        Invia un voto allo shard del talk (vedi VoteService.submit_vote)
+
+        Returns:
+            VoteResult con l'ID del voto (locale allo shard) o il motivo del rifiuto
+        """
+        try:
+            service = self.for_talk(talk_id)
+        except ValueError as e:
+            return VoteResult(False, error=VoteError.UNEXPECTED, detail=str(e))
+        return service.submit_vote(rating, comment, session_id, talk_id)
+
+    def submit_votes(self, submissions: Sequence[VoteSubmission]) -> List[VoteResult]:
+        """
+        Registra un lotto di voti: una transazione per ogni shard coinvolto
+        (vedi VoteService.submit_votes)
+
+        Returns:
+            Un VoteResult per ogni voto, nello stesso ordine
+        """
+        results: List[Optional[VoteResult]] = [None] * len(submissions)
+        groups: Dict[str, Tuple[VoteService, List[int]]] = {}
+        for i, submission in enumerate(submissions):
+            try:
+                service = self.for_talk(submission.talk_id)
+            except ValueError as e:
+                results[i] = VoteResult(False, error=VoteError.UNEXPECTED, detail=str(e))
+                continue
+            groups.setdefault(service.db_path, (service, []))[1].append(i)
+
+        for service, indexes in groups.values():
+            shard_results = service.submit_votes([submissions[i] for i in indexes])
+            for i, result in zip(indexes, shard_results):
+                results[i] = result
+        return results
+
+    def get_votes_by_talk(self) -> Dict[str, Dict[int, int]]:
+        """
+        Conteggi per rating di ogni talk, aggregati su tutti gli shard
+
+        Returns:
+            Dizionario talk_id -> {rating: conteggio}
+
+        Raises:
+            VoteServiceError: Se la lettura di uno shard fallisce
+        """
+        try:
+            return self.sharded_db.get_votes_by_talk()
+        except sqlite3.Error as e:
+            raise VoteServiceError("Errore nell'aggregazione degli shard", e)
@@ -0,0 +1,131 @@
+"""
+Statistics - Statistiche descrittive sull'istogramma dei voti
+
+Tutte le statistiche sono derivate dai cinque conteggi per rating, senza
+accesso ai singoli voti: il costo è costante qualunque sia il numero di
+voti. VoteService le calcola una volta per snapshot dei risultati e le
+mette in cache insieme ai conteggi.
+"""
+import math
+from dataclasses import dataclass
+from typing import Dict, Tuple
+
+RATINGS = (1, 2, 3, 4, 5)
+
+# Quantile normale per intervalli di confidenza al 95%
+Z_95 = 1.959963984540054
+
+
+@dataclass(frozen=True)
+class VoteStatistics:
+    """Statistiche descrittive di una distribuzione di voti 1-5"""
+    total: int
+    mean: float
+    median: float
+    mode: int
+    mode_count: int
+    std_dev: float
+    mean_ci: Tuple[float, float]
+    percentages: Tuple[float, ...]
+    top2_box: float
+    top2_box_ci: Tuple[float, float]
+    bottom2_box: float
+    net_score: float
+
+    def percentage(self, rating: int) -> float:
+        """Percentuale di voti (0-100) per un rating"""
+        return self.percentages[rating - 1]
+
+
+def wilson_interval(successes: int, total: int, z: float = Z_95) -> Tuple[float, float]:
+    """
+    Intervallo di Wilson per una proporzione
+
+    Args:
+        successes: Numero di successi
+        total: Numero di prove
+        z: Quantile normale (default: 95%)
+
+    Returns:
+        Tupla (limite inferiore, limite superiore) in [0, 1]
+    """
+    if total == 0:
+        return (0.0, 0.0)
+    p = successes / total
+    z2 = z * z
+    denominator = 1 + z2 / total
+    center = (p + z2 / (2 * total)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / total + z2 / (4 * total * total)) / denominator
+    return (max(0.0, center - margin), min(1.0, center + margin))
+
+
+def _histogram_median(votes: Dict[int, int], total: int) -> float:
+    """Mediana dall'istogramma (media dei due valori centrali se total è pari)"""
+    lower_rank = (total - 1) // 2
+    upper_rank = total // 2
+    lower = upper = None
+    seen = 0
+    for rating in RATINGS:
+        seen += votes.get(rating, 0)
+        if lower is None and seen > lower_rank:
+            lower = rating
+        if seen > upper_rank:
+            upper = rating
+            break
+    return (lower + upper) / 2
+
+
+def compute_statistics(votes: Dict[int, int]) -> VoteStatistics:
+    """
+    Calcola le statistiche descrittive da un istogramma di voti
+
+    Args:
+        votes: Conteggio dei voti per rating (1-5)
+
+    Returns:
+        VoteStatistics (tutti i valori a zero se non ci sono voti)
+    """
+    counts = [votes.get(rating, 0) for rating in RATINGS]
+    total = sum(counts)
+    if total == 0:
+        return VoteStatistics(
+            total=0, mean=0.0, median=0.0, mode=0, mode_count=0, std_dev=0.0,
+            mean_ci=(0.0, 0.0), percentages=(0.0,) * len(RATINGS),
+            top2_box=0.0, top2_box_ci=(0.0, 0.0), bottom2_box=0.0, net_score=0.0
+        )
+
+    mean = sum(rating * count for rating, count in zip(RATINGS, counts)) / total
+
+    # Deviazione standard campionaria (n - 1)
+    if total > 1:
+        squares = sum(count * (rating - mean) ** 2 for rating, count in zip(RATINGS, counts))
+        std_dev = math.sqrt(squares / (total - 1))
+    else:
+        std_dev = 0.0
+
+    # Intervallo di confidenza della media (approssimazione normale, limitato a 1-5)
+    margin = Z_95 * std_dev / math.sqrt(total)
+    mean_ci = (max(1.0, mean - margin), min(5.0, mean + margin))
+
+    # Rating più votato (a parità, il più basso)
+    mode_count = max(counts)
+    mode = RATINGS[counts.index(mode_count)]
+
+    top2 = counts[3] + counts[4]
+    bottom2 = counts[0] + counts[1]
+    top2_low, top2_high = wilson_interval(top2, total)
+
+    return VoteStatistics(
+        total=total,
+        mean=mean,
+        median=_histogram_median(votes, total),
+        mode=mode,
+        mode_count=mode_count,
+        std_dev=std_dev,
+        mean_ci=mean_ci,
+        percentages=tuple(count / total * 100 for count in counts),
+        top2_box=top2 / total * 100,
+        top2_box_ci=(top2_low * 100, top2_high * 100),
+        bottom2_box=bottom2 / total * 100,
+        net_score=(top2 - bottom2) / total * 100
+    )
@@ -0,0 +1,269 @@
+"""
+Streamlit Adapters - Strato sottile tra le pagine Streamlit e il core
+
+Il core (VoteService, AnalyticsService, provider LLM) non conosce
+Streamlit; questi adapter aggiungono session_state, secrets e la
+visualizzazione degli errori con st.error. Le impostazioni
+(utils.settings) includono i secrets VIBETHEFORCE_<CAMPO>, con
+precedenza su ambiente e file TOML.
+
+I servizi in background (metriche, API, backup, moderazione) partono
+una volta per processo con bootstrap_services(), chiamata in testa a
+ogni pagina; gli adapter non avviano nulla.
+"""
+import os
+from typing import Dict, List, Optional, Tuple
+
+import streamlit as st
+
+from database.backup import start_backup_scheduler_from_settings
+from services.analytics_service import AnalyticsService
+from services.api_server import start_api_server_from_settings
+from services.comment_analytics import KEYWORDS_LIMIT, CommentInsights, score_sentiment
+from services.comment_pipeline import get_comment_pipeline
+from services.leaderboard import LeaderboardService, LeaderboardSnapshot
+from services.llm_providers import LLMProvider, create_llm_provider
+from services.rate_limiter import get_vote_rate_limiter
+from services.sharded_vote_service import ShardedVoteService
+from services.vote_service import (
+    VOTE_ERROR_MESSAGES, VoteError, VoteService, VoteServiceError, empty_results
+)
+from utils.metrics import start_metrics_server_from_settings
+from utils.session_identity import ensure_session_id
+from utils.settings import ENV_PREFIX, Settings, SettingsError, get_settings, reload_settings, setting_fields
+
+
+def get_secret(name: str, default: Optional[str] = None) -> Optional[str]:
+    """
+    Legge un valore da st.secrets, con fallback sulle variabili d'ambiente
+
+    Args:
+        name: Nome del secret
+        default: Valore di default
+
+    Returns:
+        Valore del secret o default
+    """
+    try:
+        value = st.secrets.get(name)
+    except Exception:
+        # Nessun secrets.toml configurato
+        value = None
+    return value or os.environ.get(name, default)
+
+
+def _secret_settings() -> Dict[str, object]:
+    """Impostazioni presenti in st.secrets (VIBETHEFORCE_<CAMPO>), per nome del campo"""
+    try:
+        secrets = {f.name: st.secrets.get(ENV_PREFIX + f.name.upper()) for f in setting_fields()}
+    except Exception:
+        # Nessun secrets.toml configurato
+        return {}
+    return {name: value for name, value in secrets.items() if value is not None}
+
+
+# Secrets applicati alle impostazioni di processo (una volta, poi da Admin)
+_settings_loaded = False
+
+
+def get_app_settings() -> Settings:
+    """
+    Impostazioni correnti, con i secrets applicati al primo uso
+
+    Una configurazione iniziale non valida ferma la pagina con l'elenco
+    dei problemi.
+
+    Returns:
+        Settings attive
+    """
+    global _settings_loaded
+    if not _settings_loaded:
+        try:
+            reload_settings(_secret_settings())
+        except SettingsError as e:
+            st.error(f"⚙️ {e}")
+            st.stop()
+        _settings_loaded = True
+    return get_settings()
+
+
+def reload_app_settings() -> Settings:
+    """
+    Rilegge secrets, ambiente e file TOML (dal pannello Admin)
+
+    Returns:
+        Nuove Settings attive
+
+    Raises:
+        SettingsError: Se la nuova configurazione non è valida (restano le precedenti)
+    """
+    global _settings_loaded
+    settings = reload_settings(_secret_settings())
+    _settings_loaded = True
+    return settings
+
+
+def get_client_ip() -> Optional[str]:
+    """
+    IP del client della sessione Streamlit corrente
+
+    Dietro un reverse proxy (impostazione trust_proxy, es. Streamlit
+    Cloud) è il primo indirizzo di X-Forwarded-For; senza proxy l'header
+    sarebbe falsificabile e si usa l'indirizzo della connessione.
+
+    Returns:
+        Indirizzo IP o None se Streamlit non lo espone
+    """
+    try:
+        if get_app_settings().trust_proxy:
+            forwarded = st.context.headers.get('X-Forwarded-For')
+            if forwarded:
+                return forwarded.split(',')[0].strip()
+        return getattr(st.context, 'ip_address', None)
+    except Exception:
+        # Streamlit senza st.context o fuori da una sessione
+        return None
+
+
+# Talk delle pagine Streamlit (votazione, risultati, admin)
+MAIN_TALK = 'main'
+
+
+def _main_vote_service() -> VoteService:
+    """VoteService dello shard del talk principale, come /api/results e /api/votes/batch"""
+    return ShardedVoteService().for_talk(MAIN_TALK)
+
+
+@st.cache_resource(show_spinner=False)
+def _start_background_services(db_path: str) -> bool:
+    """Avvia i servizi in background del database (una volta per processo)"""
+    db_manager = _main_vote_service().db_manager
+    start_metrics_server_from_settings()
+    start_api_server_from_settings()
+    start_backup_scheduler_from_settings(db_manager)
+    # Modera anche i commenti rimasti in coda (riavvii, import massivi)
+    get_comment_pipeline(db_manager, sentiment=score_sentiment)
+    return True
+
+
+def bootstrap_services():
+    """
+    Avvia server delle metriche, server API, backup periodici e worker
+    della moderazione per lo shard del talk principale
+
+    Idempotente: le pagine la chiamano a ogni rerun, ma l'avvio avviene
+    una sola volta per processo (st.cache_resource).
+    """
+    get_app_settings()
+    _start_background_services(_main_vote_service().db_path)
+
+
+class StreamlitVoteService:
+    """VoteService per le pagine Streamlit: sessione da session_state, errori a video"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        Inizializza l'adapter (senza avviare servizi: vedi bootstrap_services)
+
+        Args:
+            db_path: Percorso al database SQLite (default: lo shard del talk
+                principale secondo la shard_map, come per l'API)
+        """
+        get_app_settings()
+        self.core = VoteService(db_path) if db_path else _main_vote_service()
+        self.db_path = self.core.db_path
+        self.db_manager = self.core.db_manager
+
+    def submit_vote(self, rating: int, comment: Optional[str] = None) -> bool:
+        """
+        Invia il voto della sessione corrente
+
+        Returns:
+            True se il voto è stato registrato, False altrimenti (errore mostrato)
+        """
+        session_id = ensure_session_id(st.session_state)
+        # Rifiuto immediato oltre il limite, prima di toccare il database
+        if get_vote_rate_limiter().check(get_client_ip(), session_id):
+            st.error(VOTE_ERROR_MESSAGES[VoteError.RATE_LIMITED])
+            return False
+        result = self.core.submit_vote(rating, comment, session_id)
+        if not result.success:
+            st.error(result.message)
+        return result.success
+
+    def get_results(self) -> Dict:
+        """Risultati aggregati (vuoti in caso di errore, mostrato a video)"""
+        try:
+            return self.core.get_results()
+        except VoteServiceError as e:
+            st.error(str(e))
+            return empty_results()
+
+    def get_timeline(self, talk_id: str = 'main', since: Optional[str] = None) -> List[Dict]:
+        """Andamento dei voti per minuto (vuoto in caso di errore)"""
+        try:
+            return self.core.get_timeline(talk_id, since)
+        except VoteServiceError as e:
+            st.error(str(e))
+            return []
+
+    def get_comment_insights(self, limit: int = KEYWORDS_LIMIT) -> CommentInsights:
+        """Sentiment e parole chiave dei commenti (vuoti in caso di errore)"""
+        try:
+            return self.core.get_comment_insights(limit)
+        except VoteServiceError as e:
+            st.error(str(e))
+            return CommentInsights(total=0, positive=0, neutral=0, negative=0, mean_sentiment=0.0, keywords=())
+
+    def get_all_comments(self) -> List[Tuple[str, int, str]]:
+        """Tutti i commenti con rating (vuoto in caso di errore)"""
+        try:
+            return self.core.get_all_comments()
+        except VoteServiceError as e:
+            st.error(str(e))
+            return []
+
+    def reset_votes(self) -> bool:
+        """Reset di voti e commenti; True se riuscito"""
+        try:
+            self.core.reset_votes()
+            return True
+        except VoteServiceError as e:
+            st.error(str(e))
+            return False
+
+
+def get_leaderboard(top_k: int = 10) -> Optional[LeaderboardSnapshot]:
+    """
+    Classifica dei talk (None in caso di errore, mostrato a video)
+
+    Args:
+        top_k: Numero di talk in classifica
+    """
+    get_app_settings()
+    try:
+        return LeaderboardService(top_k=top_k).get_snapshot()
+    except VoteServiceError as e:
+        st.error(str(e))
+        return None
+
+
+def get_llm_provider() -> LLMProvider:
+    """
+    Crea il provider LLM delle impostazioni (llm_provider: gemini, local o fake)
+
+    Returns:
+        LLMProvider (eventuali problemi di configurazione mostrati con st.warning)
+    """
+    get_app_settings()
+    provider = create_llm_provider(api_key=get_secret("GEMINI_API_KEY"))
+    if provider.config_error:
+        st.warning(provider.config_error)
+    return provider
+
+
+class StreamlitAnalyticsService(AnalyticsService):
+    """AnalyticsService con il provider LLM configurato dai secrets di Streamlit"""
+
+    def __init__(self):
+        super().__init__(llm=get_llm_provider())
@@ -1,114 +1,421 @@
 """
 Vote Service - Gestione logica di votazione e persistenza dati
+
+Core in puro Python, senza dipendenze da Streamlit: usabile da pagine
+Streamlit (tramite services.streamlit_adapters), server API, worker in
+background e load test. Le scritture ritornano un VoteResult tipizzato,
+gli errori di lettura sollevano VoteServiceError.
 """
 import sqlite3
-from datetime import datetime
-from typing import Optional, Dict, List, Tuple
-import streamlit as st
-from database.db_manager import get_db_manager
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+from typing import Optional, Dict, List, Sequence, Tuple
+from database.archiver import RoundArchiver, archive_in_background
+from database.db_manager import DatabaseManager, get_db_manager
+from services.comment_analytics import KEYWORDS_LIMIT, CommentInsights, get_comment_analyzer, score_sentiment
+from services.comment_pipeline import get_comment_pipeline
+from services.statistics import compute_statistics
+from utils.metrics import RESULTS_READS_TOTAL, VOTES_TOTAL
+from utils.session_identity import new_session_id, to_session_key
+from utils.settings import get_settings
+
+
+# Cache di processo dei risultati aggregati, condivisa tra le sessioni,
+# con una voce per (database, talk), valida settings.results_cache_ttl
+# secondi. Con più processi sullo stesso database la cache è invalidata
+# anche dal contatore di modifiche condiviso (vedi database.change_notifier)
+_results_cache: Dict[Tuple[str, str], Dict] = {}
+_results_cache_lock = threading.Lock()
+
+
+# Intervallo di polling suggerito ai client dei risultati: circa un voto
+# nuovo per richiesta, tra settings.poll_min_seconds (votazione intensa) e
+# settings.poll_max_seconds (nessun voto recente). Il ritmo è misurato
+# sugli ultimi minuti del rollup
+POLL_RATE_WINDOW_MINUTES = 2
+
+
+def suggest_poll_interval(votes_per_minute: float) -> int:
+    """
+    Intervallo di polling (secondi interi) adatto al ritmo dei voti
+
+    Args:
+        votes_per_minute: Voti al minuto recenti
+
+    Returns:
+        Secondi tra settings.poll_min_seconds e settings.poll_max_seconds
+    """
+    settings = get_settings()
+    if votes_per_minute <= 0:
+        return settings.poll_max_seconds
+    return max(settings.poll_min_seconds, min(settings.poll_max_seconds, round(60 / votes_per_minute)))
+
+
+def invalidate_results_cache(db_path: Optional[str] = None):
+    """
+    Invalida la cache dei risultati (dopo un voto o un reset)
+    
+    Args:
+        db_path: Database di cui invalidare i risultati (default: tutti)
+    """
+    with _results_cache_lock:
+        if db_path is None:
+            _results_cache.clear()
+        else:
+            for key in [key for key in _results_cache if key[0] == db_path]:
+                del _results_cache[key]
+
+
+def get_cached_results(
+    version: Optional[int] = None,
+    db_path: Optional[str] = None,
+    talk_id: str = 'main'
+) -> Optional[Dict]:
+    """
+    Ritorna i risultati dalla cache di processo, se ancora validi
+    
+    Non accede mai al database: usabile anche dal thread di un event loop.
+    
+    Args:
+        version: Contatore di modifiche corrente (None se non disponibile)
+        db_path: Database a cui si riferiscono i risultati (default: settings db_path)
+        talk_id: Talk a cui si riferiscono i risultati
+    
+    Returns:
+        Copia dei risultati in cache o None se scaduti/assenti
+    """
+    with _results_cache_lock:
+        entry = _results_cache.get((db_path or get_settings().db_path, talk_id))
+        if entry is None or time.monotonic() >= entry['expires']:
+            return None
+        if version is not None and version != entry['version']:
+            return None
+        snapshot = entry['snapshot']
+    RESULTS_READS_TOTAL.labels(source="cache").inc()
+    return dict(snapshot, votes=dict(snapshot['votes']))
+
+
+def empty_results() -> Dict:
+    """Risultati vuoti (nessun voto)"""
+    return {
+        'votes': {i: 0 for i in range(1, 6)},
+        'total_votes': 0,
+        'average_rating': 0.0,
+        'total_comments': 0,
+        'stats': compute_statistics({}),
+        'as_of': None
+    }
+
+
+class VoteError(Enum):
+    """Motivi di rifiuto di un voto"""
+    INVALID_RATING = "invalid_rating"
+    COMMENT_TOO_LONG = "comment_too_long"
+    DUPLICATE = "duplicate"
+    RATE_LIMITED = "rate_limited"
+    DATABASE = "database"
+    UNEXPECTED = "unexpected"
+
+
+# Messaggi utente per ogni VoteError
+VOTE_ERROR_MESSAGES = {
+    VoteError.INVALID_RATING: "Rating deve essere un intero tra 1 e 5",
+    VoteError.COMMENT_TOO_LONG: "Il commento non può superare i 500 caratteri",
+    VoteError.DUPLICATE: "Hai già votato! Non è possibile votare più volte.",
+    VoteError.RATE_LIMITED: "Troppi tentativi di voto, riprova tra qualche secondo.",
+    VoteError.DATABASE: "Errore database",
+    VoteError.UNEXPECTED: "Errore imprevisto",
+}
+
+
+@dataclass(frozen=True)
+class VoteResult:
+    """Esito di un invio voto"""
+    success: bool
+    vote_id: Optional[int] = None
+    error: Optional[VoteError] = None
+    detail: Optional[str] = None
+    
+    @property
+    def message(self) -> str:
+        """Messaggio leggibile per l'utente (vuoto se il voto è riuscito)"""
+        if self.error is None:
+            return ""
+        message = VOTE_ERROR_MESSAGES[self.error]
+        return f"{message}: {self.detail}" if self.detail else message
+
+
+@dataclass(frozen=True)
+class VoteSubmission:
+    """Voto da registrare in un invio a lotti (vedi VoteService.submit_votes)"""
+    rating: int
+    session_id: str
+    comment: Optional[str] = None
+    talk_id: str = 'main'
+
+
+# Commento più lungo accettato
+MAX_COMMENT_LENGTH = 500
+
+
+def validate_vote(rating, comment: Optional[str] = None) -> Optional[VoteError]:
+    """
+    Valida rating e commento di un voto
+    
+    Args:
+        rating: Valutazione (intero da 1 a 5)
+        comment: Commento opzionale
+    
+    Returns:
+        VoteError del primo controllo fallito, None se il voto è valido
+    """
+    if not isinstance(rating, int) or isinstance(rating, bool) or rating < 1 or rating > 5:
+        return VoteError.INVALID_RATING
+    if comment and len(comment) > MAX_COMMENT_LENGTH:
+        return VoteError.COMMENT_TOO_LONG
+    return None
+
+
+class VoteServiceError(Exception):
+    """Errore di accesso ai dati in una lettura o operazione admin"""
+    
+    def __init__(self, operation: str, cause: Exception):
+        super().__init__(f"{operation}: {cause}")
+        self.operation = operation
+        self.cause = cause
 
 
 class VoteService:
     """Service per gestire votazioni, commenti e statistiche"""
     
-    def __init__(self, db_path: str = 'database/votes.db'):
+    def __init__(self, db_path: Optional[str] = None, db_manager: Optional[DatabaseManager] = None):
         """
         Inizializza il VoteService
         
         Args:
-            db_path: Percorso al database SQLite
+            db_path: Percorso al database SQLite (default: settings db_path)
+            db_manager: DatabaseManager da usare (es. lo shard di un talk);
+                default: singleton per db_path
         """
-        self.db_path = db_path
-        self.db_manager = get_db_manager(db_path)
+        self.db_manager = db_manager or get_db_manager(db_path)
+        self.db_path = self.db_manager.db_path
     
-    def submit_vote(self, rating: int, comment: Optional[str] = None) -> bool:
+    def submit_vote(
+        self,
+        rating: int,
+        comment: Optional[str] = None,
+        session_id: Optional[str] = None,
+        talk_id: str = 'main'
+    ) -> VoteResult:
         """
         Invia un voto con commento opzionale
         
         Args:
             rating: Valutazione da 1 a 5
             comment: Commento opzionale (max 500 caratteri)
+            session_id: Session ID del votante (generato se assente)
+            talk_id: Identificativo del talk votato
         
         Returns:
-            True se il voto è stato registrato con successo, False altrimenti
+            VoteResult con l'ID del voto o il motivo del rifiuto
         
         Requisiti: 1.2, 1.4, 6.3, 6.4
         """
-        # Validazione rating
-        if not isinstance(rating, int) or rating < 1 or rating > 5:
-            st.error("Rating deve essere un intero tra 1 e 5")
-            return False
-        
-        # Validazione commento
-        if comment and len(comment) > 500:
-            st.error("Il commento non può superare i 500 caratteri")
-            return False
+        # Validazione rating e commento
+        error = validate_vote(rating, comment)
+        if error is not None:
+            VOTES_TOTAL.labels(outcome="invalid").inc()
+            return VoteResult(False, error=error)
         
         try:
-            # Genera session_id se non esiste
-            if 'session_id' not in st.session_state:
-                st.session_state.session_id = f"session_{datetime.now().timestamp()}_{id(st.session_state)}"
-            
-            session_id = st.session_state.session_id
+            vote_id = self.record_vote(session_id or new_session_id(), rating, comment, talk_id)
+            return VoteResult(True, vote_id=vote_id)
             
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Insert vote
-            cursor.execute(
-                'INSERT INTO votes (rating, session_id) VALUES (?, ?)',
-                (rating, session_id)
-            )
-            vote_id = cursor.lastrowid
+        except sqlite3.IntegrityError:
+            # Session ha già votato il talk in questo round (UNIQUE su round_id, talk_id, session_id)
+            return VoteResult(False, error=VoteError.DUPLICATE)
+        except sqlite3.Error as e:
+            VOTES_TOTAL.labels(outcome="error").inc()
+            return VoteResult(False, error=VoteError.DATABASE, detail=str(e))
+        except Exception as e:
+            VOTES_TOTAL.labels(outcome="error").inc()
+            return VoteResult(False, error=VoteError.UNEXPECTED, detail=str(e))
+    
+    def submit_votes(self, submissions: Sequence[VoteSubmission]) -> List[VoteResult]:
+        """
+        Registra un lotto di voti in una sola transazione di scrittura
+        
+        Idempotente per sessione e talk: un voto ripetuto (stessa sessione
+        e stesso talk nel round corrente, anche nello stesso lotto) risulta DUPLICATE senza
+        toccare il voto già registrato, quindi un client può reinviare un
+        lotto la cui risposta è andata persa.
+        
+        Args:
+            submissions: Voti da registrare
+        
+        Returns:
+            Un VoteResult per ogni voto, nello stesso ordine
+        
+        Requisiti: 1.2, 1.4, 6.3, 6.4
+        """
+        results: List[Optional[VoteResult]] = [None] * len(submissions)
+        pending = []
+        batch_keys = set()
+        
+        for i, submission in enumerate(submissions):
+            error = validate_vote(submission.rating, submission.comment)
+            if error is not None:
+                VOTES_TOTAL.labels(outcome="invalid").inc()
+                results[i] = VoteResult(False, error=error)
+                continue
+            session_key = to_session_key(submission.session_id)
+            vote_key = (submission.talk_id, session_key)
+            if vote_key in batch_keys or self.db_manager.check_session_exists(session_key, submission.talk_id):
+                VOTES_TOTAL.labels(outcome="duplicate").inc()
+                results[i] = VoteResult(False, error=VoteError.DUPLICATE)
+                continue
+            batch_keys.add(vote_key)
+            pending.append((i, session_key, submission))
+        
+        if not pending:
+            return results
+        
+        accepted = []
+        try:
+            with self.db_manager.get_transaction() as conn:
+                for i, session_key, submission in pending:
+                    # OR IGNORE: una sessione registrata nel frattempo da un
+                    # altro processo diventa un duplicato, non un errore del lotto
+                    cursor = conn.execute(
+                        'INSERT OR IGNORE INTO votes (rating, session_id, talk_id, round_id) '
+                        'VALUES (?, ?, ?, (SELECT MAX(id) FROM rounds))',
+                        (submission.rating, session_key, submission.talk_id)
+                    )
+                    if cursor.rowcount == 0:
+                        results[i] = VoteResult(False, error=VoteError.DUPLICATE)
+                        continue
+                    vote_id = cursor.lastrowid
+                    if submission.comment and submission.comment.strip():
+                        conn.execute(
+                            'INSERT INTO comments (vote_id, comment) VALUES (?, ?)',
+                            (vote_id, submission.comment.strip())
+                        )
+                    results[i] = VoteResult(True, vote_id=vote_id)
+                    accepted.append(i)
+        except sqlite3.Error as e:
+            VOTES_TOTAL.labels(outcome="error").inc(len(pending))
+            for i, _, _ in pending:
+                results[i] = VoteResult(False, error=VoteError.DATABASE, detail=str(e))
+            return results
+        
+        for _, session_key, submission in pending:
+            self.db_manager.session_index.add(session_key, submission.talk_id)
+        if any(submissions[i].comment and submissions[i].comment.strip() for i in accepted):
+            get_comment_pipeline(self.db_manager, sentiment=score_sentiment).wake()
+        invalidate_results_cache(self.db_path)
+        VOTES_TOTAL.labels(outcome="accepted").inc(len(accepted))
+        VOTES_TOTAL.labels(outcome="duplicate").inc(len(pending) - len(accepted))
+        return results
+    
+    def record_vote(
+        self,
+        session_id: str,
+        rating: int,
+        comment: Optional[str] = None,
+        talk_id: str = 'main'
+    ) -> int:
+        """
+        Scrive un voto già validato (percorso di scrittura live)
+        
+        Usato da submit_vote e dal replay dei dati storici.
+        
+        Args:
+            session_id: Session ID del votante
+            rating: Valutazione da 1 a 5
+            comment: Commento opzionale
+            talk_id: Identificativo del talk votato
+        
+        Returns:
+            ID del voto inserito
+        
+        Raises:
+            sqlite3.IntegrityError: Se la sessione ha già votato
+        """
+        session_key = to_session_key(session_id)
+        
+        try:
+            # Rifiuto anticipato dei duplicati tramite l'indice in memoria
+            # (il vincolo UNIQUE resta l'autorità finale)
+            if self.db_manager.check_session_exists(session_key, talk_id):
+                raise sqlite3.IntegrityError("UNIQUE constraint failed: votes.round_id, votes.talk_id, votes.session_id")
             
-            # Insert comment se fornito
-            if comment and comment.strip():
+            with self.db_manager.get_transaction() as conn:
+                cursor = conn.cursor()
+                
+                # Insert vote
                 cursor.execute(
-                    'INSERT INTO comments (vote_id, comment) VALUES (?, ?)',
-                    (vote_id, comment.strip())
+                    'INSERT INTO votes (rating, session_id, talk_id, round_id) '
+                    'VALUES (?, ?, ?, (SELECT MAX(id) FROM rounds))',
+                    (rating, session_key, talk_id)
                 )
-            
-            conn.commit()
-            conn.close()
-            return True
-            
+                vote_id = cursor.lastrowid
+                
+                # Commento in coda ('pending'): la moderazione avviene in background
+                if comment and comment.strip():
+                    cursor.execute(
+                        'INSERT INTO comments (vote_id, comment) VALUES (?, ?)',
+                        (vote_id, comment.strip())
+                    )
         except sqlite3.IntegrityError:
-            # Session ha già votato (UNIQUE constraint su session_id)
-            st.error("Hai già votato! Non è possibile votare più volte.")
-            return False
-        except sqlite3.Error as e:
-            st.error(f"Errore database: {e}")
-            return False
-        except Exception as e:
-            st.error(f"Errore imprevisto: {e}")
-            return False
+            self.db_manager.session_index.add(session_key, talk_id)
+            VOTES_TOTAL.labels(outcome="duplicate").inc()
+            raise
+        
+        self.db_manager.session_index.add(session_key, talk_id)
+        if comment and comment.strip():
+            get_comment_pipeline(self.db_manager, sentiment=score_sentiment).wake()
+        invalidate_results_cache(self.db_path)
+        VOTES_TOTAL.labels(outcome="accepted").inc()
+        return vote_id
     
-    def get_results(self) -> Dict:
+    def get_results(self, talk_id: str = 'main') -> Dict:
         """
-        Recupera i risultati aggregati delle votazioni
+        Recupera i risultati aggregati delle votazioni di un talk
+        
+        Args:
+            talk_id: Identificativo del talk (solo i suoi voti, anche se il
+                database contiene altri talk)
         
         Returns:
             Dizionario con:
             - votes: dict con conteggio per ogni rating (1-5)
             - total_votes: numero totale di voti
             - average_rating: media con 2 decimali
-            - total_comments: numero di commenti ricevuti
+            - total_comments: numero di commenti approvati dalla moderazione
+            - stats: VoteStatistics (mediana, deviazione standard, IC, top-2-box)
+            - as_of: datetime a cui i conteggi sono aggiornati (copia della
+              replica di lettura, o momento della lettura senza replica)
+        
+        Raises:
+            VoteServiceError: Se la lettura dal database fallisce
         
         Requisiti: 2.1, 2.3, 2.4, 6.5
         """
+        # Letto prima della query: una modifica durante il calcolo invalida lo snapshot
+        version = self.db_manager.read_version
+        cached = get_cached_results(version, self.db_path, talk_id)
+        if cached is not None:
+            return cached
+        
+        now = time.monotonic()
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            as_of = self.db_manager.read_as_of()
             
             # Get vote counts per rating
-            cursor.execute('''
-                SELECT rating, COUNT(*) as count
-                FROM votes
-                GROUP BY rating
-            ''')
-            vote_counts = {i: 0 for i in range(1, 6)}
-            for rating, count in cursor.fetchall():
-                vote_counts[rating] = count
+            vote_counts = self.db_manager.get_votes_by_rating(talk_id)
             
             # Get total votes
             total_votes = sum(vote_counts.values())
@@ -121,79 +428,143 @@ class VoteService:
                 average_rating = 0.0
             
             # Get comment count
-            cursor.execute('SELECT COUNT(*) FROM comments')
-            total_comments = cursor.fetchone()[0]
+            total_comments = self.db_manager.get_comment_count(talk_id)
             
-            conn.close()
-            
-            return {
+            results = {
                 'votes': vote_counts,
                 'total_votes': total_votes,
                 'average_rating': average_rating,
-                'total_comments': total_comments
+                'total_comments': total_comments,
+                'stats': compute_statistics(vote_counts),
+                'as_of': as_of
             }
             
+            RESULTS_READS_TOTAL.labels(source="db").inc()
+            with _results_cache_lock:
+                _results_cache[(self.db_path, talk_id)] = {
+                    'snapshot': results,
+                    'expires': now + get_settings().results_cache_ttl,
+                    'version': version
+                }
+            
+            return dict(results, votes=dict(vote_counts))
+            
+        except sqlite3.Error as e:
+            raise VoteServiceError("Errore nel recupero risultati", e)
+    
+    def get_timeline(self, talk_id: str = 'main', since: Optional[str] = None) -> List[Dict]:
+        """
+        Recupera l'andamento dei voti minuto per minuto dalla tabella di rollup
+        
+        Args:
+            talk_id: Identificativo del talk
+            since: Primo minuto da includere ('YYYY-MM-DD HH:MM'), opzionale
+        
+        Returns:
+            Lista di dizionari con minute, votes (conteggio per rating) e total
+        
+        Raises:
+            VoteServiceError: Se la lettura dal database fallisce
+        """
+        try:
+            rows = self.db_manager.get_vote_timeline(talk_id, since=since)
         except sqlite3.Error as e:
-            st.error(f"Errore nel recupero risultati: {e}")
-            return {
-                'votes': {i: 0 for i in range(1, 6)},
-                'total_votes': 0,
-                'average_rating': 0.0,
-                'total_comments': 0
+            raise VoteServiceError("Errore nel recupero timeline", e)
+        
+        return [
+            {
+                'minute': minute,
+                'votes': {rating: count for rating, count in enumerate(counts, start=1)},
+                'total': sum(counts)
             }
+            for minute, *counts in rows
+        ]
     
-    def get_all_comments(self) -> List[Tuple[str, int, str]]:
+    def get_vote_rate(self, talk_id: str = 'main', window_minutes: int = POLL_RATE_WINDOW_MINUTES) -> float:
         """
-        Recupera tutti i commenti con rating associato
+        Voti al minuto del talk negli ultimi minuti, dalla tabella di rollup
+        
+        Il minuto in corso è contato per intero, quindi un picco appena
+        iniziato alza subito il ritmo.
+        
+        Args:
+            talk_id: Identificativo del talk
+            window_minutes: Minuti considerati, oltre a quello in corso
+        
+        Returns:
+            Media dei voti al minuto nella finestra
+        
+        Raises:
+            VoteServiceError: Se la lettura dal database fallisce
+        """
+        # Il rollup usa i minuti UTC di CURRENT_TIMESTAMP
+        since = datetime.now(timezone.utc) - timedelta(minutes=window_minutes)
+        timeline = self.get_timeline(talk_id, since=since.strftime('%Y-%m-%d %H:%M'))
+        return sum(minute['total'] for minute in timeline) / window_minutes
+    
+    def get_comment_insights(self, limit: int = KEYWORDS_LIMIT, talk_id: str = 'main') -> CommentInsights:
+        """
+        Sentiment e parole chiave dei commenti approvati, calcolati localmente
+        
+        L'indice è condiviso dalle sessioni e applica solo i commenti nuovi.
+        
+        Args:
+            limit: Numero massimo di parole chiave
+            talk_id: Talk di cui analizzare i commenti
+        
+        Returns:
+            CommentInsights del round corrente
+        
+        Raises:
+            VoteServiceError: Se la lettura dal database fallisce
+        """
+        try:
+            return get_comment_analyzer(self.db_manager, talk_id).insights(limit)
+        except sqlite3.Error as e:
+            raise VoteServiceError("Errore nell'analisi dei commenti", e)
+    
+    def get_all_comments(self, talk_id: str = 'main') -> List[Tuple[str, int, str]]:
+        """
+        Recupera tutti i commenti approvati di un talk con rating associato
+        
+        Args:
+            talk_id: Identificativo del talk
         
         Returns:
             Lista di tuple (comment, rating, timestamp)
         
+        Raises:
+            VoteServiceError: Se la lettura dal database fallisce
+        
         Requisiti: 6.5
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT c.comment, v.rating, c.timestamp
-                FROM comments c
-                JOIN votes v ON c.vote_id = v.id
-                ORDER BY c.timestamp DESC
-            ''')
-            
-            comments = cursor.fetchall()
-            conn.close()
-            
-            return comments
-            
+            return self.db_manager.get_all_comments_with_ratings(talk_id)
         except sqlite3.Error as e:
-            st.error(f"Errore nel recupero commenti: {e}")
-            return []
+            raise VoteServiceError("Errore nel recupero commenti", e)
     
-    def reset_votes(self) -> bool:
+    def reset_votes(self, snapshot: bool = True):
         """
-        Reset di tutti i voti e commenti (funzione admin)
+        Reset dei voti e commenti (funzione admin)
         
-        Returns:
-            True se il reset è avvenuto con successo, False altrimenti
+        Avvia un nuovo round in tempo costante: i voti dei round precedenti
+        spariscono da tutte le letture e vengono spostati nell'archivio
+        (database/archiver.py) da un thread in background, che poi compatta
+        il database.
+        
+        Args:
+            snapshot: Salva uno snapshot "pre-reset" prima di archiviare
+                (se lo snapshot fallisce i vecchi round restano nel database)
+        
+        Raises:
+            VoteServiceError: Se l'avvio del nuovo round fallisce
         
         Requisiti: 5.5
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Delete comments first (foreign key constraint)
-            cursor.execute('DELETE FROM comments')
-            # Delete votes
-            cursor.execute('DELETE FROM votes')
-            
-            conn.commit()
-            conn.close()
-            
-            return True
-            
+            self.db_manager.start_new_round()
+            invalidate_results_cache(self.db_path)
         except sqlite3.Error as e:
-            st.error(f"Errore durante il reset: {e}")
-            return False
+            raise VoteServiceError("Errore durante il reset", e)
+        
+        archive_in_background(RoundArchiver(self.db_manager, snapshot=snapshot))
@@ -0,0 +1,57 @@
+"""
+Fixture comuni dei test: database temporanei inizializzati
+
+I test non usano get_db_manager: il singleton di processo terrebbe il
+database del primo test.
+"""
+
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database.db_manager import DatabaseManager  # noqa: E402
+from services.vote_service import VoteService  # noqa: E402
+
+
+@pytest.fixture
+def db_manager(tmp_path):
+    """DatabaseManager su un file temporaneo con schema e migrazioni applicati"""
+    manager = DatabaseManager(str(tmp_path / "votes.db"))
+    manager.initialize_database()
+    yield manager
+    manager.change_notifier.close()
+
+
+@pytest.fixture
+def vote_service(db_manager):
+    """VoteService sul database temporaneo"""
+    return VoteService(db_manager=db_manager)
+
+
+@pytest.fixture
+def api_server(tmp_path, monkeypatch):
+    """
+    Server API su una porta libera, con tutti i talk instradati su un
+    database temporaneo e limiter dei voti azzerato
+
+    Yields:
+        URL base del server (http://127.0.0.1:PORT)
+    """
+    from database import sharding
+    from services.api_server import make_api_server
+    from services.rate_limiter import get_vote_rate_limiter
+
+    shard_map = sharding.ShardMap(default=str(tmp_path / "api.db"))
+    monkeypatch.setattr(sharding, "_sharded_db_manager_instance", sharding.ShardedDatabaseManager(shard_map))
+    get_vote_rate_limiter().clear()
+    server = make_api_server(port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+    get_vote_rate_limiter().clear()
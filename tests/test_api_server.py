@@ -0,0 +1,63 @@
+"""API JSON: lotto di voti dall'outbox e gestione degli errori"""
+
+import json
+import urllib.error
+import urllib.request
+
+from utils.session_identity import new_session_id
+
+
+def post_json(url, body, headers=None):
+    """POST di un corpo JSON; ritorna (status, corpo decodificato)"""
+    data = body if isinstance(body, bytes) else json.dumps(body).encode()
+    request = urllib.request.Request(
+        url, data=data, method="POST",
+        headers={"Content-Type": "application/json", **(headers or {})}
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_batch_accepts_then_reports_duplicates(api_server):
+    session_id = new_session_id()
+    votes = [
+        {"id": "a", "sessionId": session_id, "rating": 5},
+        {"id": "b", "sessionId": session_id, "rating": 4},
+        {"id": "c", "sessionId": new_session_id(), "rating": 9},
+    ]
+    status, body = post_json(f"{api_server}/api/votes/batch", {"votes": votes})
+    assert status == 200
+    assert [(r["id"], r["status"]) for r in body["results"]] == [
+        ("a", "accepted"), ("b", "duplicate"), ("c", "rejected")
+    ]
+
+    # Reinvio dall'outbox: idempotente
+    status, body = post_json(f"{api_server}/api/votes/batch", {"votes": votes[:1]})
+    assert body["results"] == [{"id": "a", "status": "duplicate"}]
+
+    with urllib.request.urlopen(f"{api_server}/api/results", timeout=10) as response:
+        results = json.loads(response.read())
+    assert results["total_votes"] == 1
+    assert results["votes"]["5"] == 1
+
+
+def test_batch_rejects_invalid_talk_ids(api_server):
+    votes = [
+        {"id": i, "sessionId": new_session_id(), "rating": 5, "talkId": talk_id}
+        for i, talk_id in enumerate(["keynote-1", "../etc", "x" * 65, 42, ""])
+    ]
+    status, body = post_json(f"{api_server}/api/votes/batch", {"votes": votes})
+    assert status == 200
+    assert [r["status"] for r in body["results"]] == ["accepted"] + ["rejected"] * 4
+    assert {r.get("error") for r in body["results"][1:]} == {"invalid_request"}
+
+
+def test_bad_requests(api_server):
+    url = f"{api_server}/api/votes/batch"
+    assert post_json(url, b"not json")[0] == 400
+    assert post_json(url, {"votes": "x"})[0] == 400
+    too_many = [{"sessionId": new_session_id(), "rating": 5}] * 101
+    assert post_json(url, {"votes": too_many})[0] == 413
@@ -0,0 +1,41 @@
+"""
+Archiviazione dei round conclusi (database/archiver.py)
+
+Uso:
+    python -m pytest -q tests/test_archiver.py
+"""
+
+import sqlite3
+
+from database.archiver import RoundArchiver
+from utils.session_identity import new_session_id
+
+
+def test_archived_comments_keep_moderation(db_manager, vote_service, tmp_path):
+    vote_id = vote_service.record_vote(new_session_id(), 5, "Ottimo talk")
+    db_manager.execute_update(
+        "UPDATE comments SET comment_status = 'approved', sentiment = 0.8,"
+        " moderated_at = CURRENT_TIMESTAMP WHERE vote_id = ?",
+        (vote_id,),
+    )
+    db_manager.start_new_round()
+
+    # Archivio scritto da una versione precedente, senza le colonne della moderazione
+    archive_path = str(tmp_path / "archive.db")
+    with sqlite3.connect(archive_path) as conn:
+        conn.execute(
+            "CREATE TABLE comments (id INTEGER PRIMARY KEY, vote_id INTEGER NOT NULL,"
+            " comment TEXT NOT NULL, timestamp DATETIME)"
+        )
+    conn.close()
+
+    archived = RoundArchiver(db_manager, archive_path=archive_path, step_sleep=0).run()
+    assert list(archived.values()) == [1]
+
+    with sqlite3.connect(archive_path) as conn:
+        row = conn.execute(
+            "SELECT comment, comment_status, sentiment, moderated_at FROM comments"
+        ).fetchone()
+    conn.close()
+    assert row[:3] == ("Ottimo talk", "approved", 0.8)
+    assert row[3] is not None
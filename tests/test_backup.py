@@ -0,0 +1,61 @@
+"""
+Snapshot e ripristino online (database/backup.py)
+
+Uso:
+    python -m pytest -q tests/test_backup.py
+"""
+
+import sqlite3
+
+from database.backup import BackupManager
+from utils.session_identity import new_session_id
+
+
+def test_restore_brings_back_snapshot_data(db_manager, vote_service, tmp_path):
+    backups = BackupManager(db_manager, backup_dir=str(tmp_path / "backups"), step_sleep=0)
+    session_id = new_session_id()
+    vote_service.record_vote(session_id, 5)
+    snapshot = backups.create_snapshot("manual")
+
+    # Nuovo round senza archiviazione in background, che correrebbe col ripristino
+    db_manager.start_new_round()
+    assert vote_service.get_results()['total_votes'] == 0
+
+    safety = backups.restore_snapshot(snapshot.path)
+    assert safety.label == "pre-restore"
+    assert vote_service.get_results()['total_votes'] == 1
+    # L'indice delle sessioni è ricaricato dai dati ripristinati
+    assert db_manager.check_session_exists(session_id)
+
+
+def test_restore_migrates_legacy_snapshot(db_manager, tmp_path):
+    legacy_path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(legacy_path)
+    conn.execute("""
+        CREATE TABLE votes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            rating INTEGER NOT NULL,
+            session_id TEXT NOT NULL UNIQUE,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("INSERT INTO votes (rating, session_id) VALUES (4, 'legacy')")
+    conn.commit()
+    conn.close()
+
+    backups = BackupManager(db_manager, backup_dir=str(tmp_path / "backups"), step_sleep=0)
+    backups.restore_snapshot(legacy_path, safety_snapshot=False)
+
+    assert db_manager.execute_query("SELECT rating, talk_id, round_id FROM votes") == [(4, "main", 1)]
+    assert db_manager.get_vote_count() == 1
+
+
+def test_retention_is_per_label(db_manager, tmp_path):
+    backups = BackupManager(db_manager, backup_dir=str(tmp_path / "backups"), retention=2, step_sleep=0)
+    backups.create_snapshot("pre-reset")
+    for _ in range(4):
+        backups.create_snapshot("scheduled")
+
+    labels = [info.label for info in backups.list_snapshots()]
+    assert labels.count("scheduled") == 2
+    assert labels.count("pre-reset") == 1
@@ -0,0 +1,26 @@
+"""Moderazione dei commenti: quasi-duplicati cercati per talk"""
+
+from services.comment_pipeline import CommentModerator
+from utils.session_identity import new_session_id
+
+COMMENT = "Talk bellissimo, esempi chiari e demo dal vivo riuscita"
+
+
+def test_same_comment_on_two_talks_is_approved_for_both(db_manager, vote_service):
+    vote_service.record_vote(new_session_id(), 5, COMMENT, talk_id="A")
+    vote_service.record_vote(new_session_id(), 5, COMMENT, talk_id="B")
+    CommentModerator(db_manager).run_pending()
+
+    assert db_manager.get_comment_status_counts() == {"approved": 2}
+    for talk_id in ("A", "B"):
+        assert vote_service.get_results(talk_id)['total_comments'] == 1
+        assert [comment for comment, _, _ in vote_service.get_all_comments(talk_id)] == [COMMENT]
+
+
+def test_near_duplicate_in_same_talk_is_discarded(db_manager, vote_service):
+    vote_service.record_vote(new_session_id(), 5, COMMENT, talk_id="A")
+    vote_service.record_vote(new_session_id(), 4, COMMENT + "!", talk_id="A")
+    CommentModerator(db_manager).run_pending()
+
+    assert db_manager.get_comment_status_counts() == {"approved": 1, "duplicate": 1}
+    assert vote_service.get_results("A")['total_comments'] == 1
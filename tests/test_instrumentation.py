@@ -0,0 +1,24 @@
+"""
+Instrumentation delle query (database/instrumentation.py)
+
+Uso:
+    python -m pytest -q tests/test_instrumentation.py
+"""
+
+from database.instrumentation import QueryInstrumentation
+from utils.session_identity import new_session_id
+
+
+def test_transaction_statements_are_timed(db_manager, vote_service):
+    instrumentation = db_manager.enable_instrumentation()
+    vote_service.record_vote(new_session_id(), 5, "Bel talk")
+    claimed = db_manager.claim_pending_comments(10, 60)
+    assert len(claimed) == 1
+
+    stats = instrumentation.get_stats()
+    assert stats[QueryInstrumentation.TRANSACTION_KEY].count == 2
+    # Oltre al tempo della transazione, ogni statement ha la sua chiave
+    statements = {sql.split(" (")[0]: s for sql, s in stats.items()}
+    assert statements["INSERT INTO votes"].rows == 1
+    assert statements["INSERT INTO comments"].rows == 1
+    assert any(sql.startswith("UPDATE comments") for sql in stats)
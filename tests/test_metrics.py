@@ -0,0 +1,25 @@
+"""
+Endpoint Prometheus /metrics (utils/metrics.py)
+
+Uso:
+    python -m pytest -q tests/test_metrics.py
+"""
+
+import urllib.request
+
+from utils.metrics import start_metrics_server
+from utils.session_identity import new_session_id
+
+
+def test_metrics_endpoint_exposes_series(vote_service):
+    vote_service.submit_vote(5, session_id=new_session_id())
+    server = start_metrics_server(port=0)
+    url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+
+    with urllib.request.urlopen(url, timeout=5) as response:
+        content_type = response.headers["Content-Type"]
+        body = response.read().decode("utf-8")
+
+    assert content_type.startswith("text/plain; version=0.0.4")
+    assert "# TYPE vibetheforce_votes_total counter" in body
+    assert 'vibetheforce_votes_total{outcome="accepted"}' in body
@@ -0,0 +1,64 @@
+"""
+Migrazioni dello schema (database/migrations.py) su un database della prima versione
+
+Uso:
+    python -m pytest -q tests/test_migrations.py
+"""
+
+import sqlite3
+
+from database.db_manager import DatabaseManager
+from services.vote_service import VoteService
+from utils.session_identity import new_session_id, to_session_key
+
+# Schema originale: session_id TEXT, nessun talk né round
+LEGACY_SCHEMA = """
+CREATE TABLE votes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    rating INTEGER NOT NULL CHECK(rating >= 1 AND rating <= 5),
+    session_id TEXT NOT NULL UNIQUE,
+    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE comments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    vote_id INTEGER NOT NULL,
+    comment TEXT NOT NULL CHECK(LENGTH(comment) <= 500),
+    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (vote_id) REFERENCES votes(id) ON DELETE CASCADE
+);
+"""
+
+
+def test_legacy_database_is_migrated(tmp_path):
+    db_path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(db_path)
+    conn.executescript(LEGACY_SCHEMA)
+    conn.executemany(
+        "INSERT INTO votes (rating, session_id) VALUES (?, ?)",
+        [(5, "legacy-a"), (3, "legacy-b"), (1, "legacy-c")],
+    )
+    conn.execute("INSERT INTO comments (vote_id, comment) VALUES (1, 'Bel talk')")
+    # Il voto con l'id più alto non c'è più: il suo id non deve tornare in uso
+    conn.execute("DELETE FROM votes WHERE id = 3")
+    conn.commit()
+    conn.close()
+
+    db_manager = DatabaseManager(db_path)
+    try:
+        db_manager.initialize_database()
+
+        rows = db_manager.execute_query(
+            "SELECT id, session_id, talk_id, round_id FROM votes ORDER BY id"
+        )
+        assert rows == [
+            (1, to_session_key("legacy-a"), "main", 1),
+            (2, to_session_key("legacy-b"), "main", 1),
+        ]
+        assert db_manager.execute_query(
+            "SELECT vote_id, comment, comment_status FROM comments"
+        ) == [(1, "Bel talk", "pending")]
+
+        vote_id = VoteService(db_manager=db_manager).record_vote(new_session_id(), 4)
+        assert vote_id == 4
+    finally:
+        db_manager.change_notifier.close()
@@ -0,0 +1,121 @@
+"""
+Coerenza tra processi delle cache di VoteService (processi avviati con spawn)
+
+Ogni processo ha la propria cache dei risultati e il proprio indice delle
+sessioni; il contatore condiviso (database/change_notifier.py) deve
+invalidarli quando un altro processo scrive. benchmarks/bench_multiprocess.py
+misura gli stessi ritardi con più lettori.
+
+Uso:
+    python -m pytest -q tests/test_multiprocess_cache.py
+"""
+
+import multiprocessing
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database.db_manager import DatabaseManager  # noqa: E402
+from services.vote_service import VoteService  # noqa: E402
+from utils.session_identity import new_session_id  # noqa: E402
+from utils.settings import update_settings  # noqa: E402
+
+# Ritardo massimo tra il commit di un voto e la sua lettura in un altro processo.
+# La cache dei risultati dei processi figli vale 60 s: solo il contatore
+# condiviso può rendere il voto visibile entro questo limite
+MAX_LAG_SECONDS = 1.0
+# Polling del lettore
+TICK_SECONDS = 0.005
+# Attesa massima di un processo figlio (avvio con spawn compreso)
+CHILD_TIMEOUT = 30.0
+
+
+@pytest.fixture
+def ctx():
+    return multiprocessing.get_context("spawn")
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "votes.db")
+
+
+@pytest.fixture
+def service(db_path):
+    """VoteService del processo di test (get_db_manager terrebbe il database del primo test)"""
+    db_manager = DatabaseManager(db_path)
+    db_manager.initialize_database()
+    return VoteService(db_manager=db_manager)
+
+
+def reader(db_path, ready, results):
+    """Mette in cache i risultati, poi li rilegge finché non vede il primo voto"""
+    update_settings(results_cache_ttl=60)
+    service = VoteService(db_path)
+    service.get_results()
+    ready.set()
+    deadline = time.monotonic() + CHILD_TIMEOUT
+    while time.monotonic() < deadline:
+        if service.get_results()['total_votes'] == 1:
+            results.put(time.monotonic())
+            return
+        time.sleep(TICK_SECONDS)
+    results.put(None)
+
+
+def voter(db_path, session_id, voted, reset_done, results):
+    """Vota due volte con la stessa sessione, prima e dopo un reset di un altro processo"""
+    service = VoteService(db_path)
+    first = service.submit_vote(5, session_id=session_id).success
+    duplicate = service.submit_vote(5, session_id=session_id).success
+    voted.set()
+    reset_done.wait(CHILD_TIMEOUT)
+    second = service.submit_vote(4, session_id=session_id).success
+    results.put((first, duplicate, second))
+
+
+def test_reader_sees_vote_from_other_process(ctx, db_path, service):
+    ready, results = ctx.Event(), ctx.Queue()
+    proc = ctx.Process(target=reader, args=(db_path, ready, results))
+    proc.start()
+    try:
+        assert ready.wait(CHILD_TIMEOUT)
+        service.record_vote(new_session_id(), 5)
+        committed = time.monotonic()
+        seen = results.get(timeout=CHILD_TIMEOUT)
+    finally:
+        proc.join(CHILD_TIMEOUT)
+    assert seen is not None, "il lettore non ha mai visto il voto"
+    # time.monotonic è lo stesso orologio di sistema in tutti i processi
+    assert seen - committed < MAX_LAG_SECONDS
+
+
+def test_reset_unblocks_session_in_other_process(ctx, db_path, service):
+    voted, reset_done, results = ctx.Event(), ctx.Event(), ctx.Queue()
+    proc = ctx.Process(target=voter, args=(db_path, new_session_id(), voted, reset_done, results))
+    proc.start()
+    try:
+        assert voted.wait(CHILD_TIMEOUT)
+        service.reset_votes(snapshot=False)
+        reset_done.set()
+        first, duplicate, second = results.get(timeout=CHILD_TIMEOUT)
+    finally:
+        proc.join(CHILD_TIMEOUT)
+    assert first
+    assert not duplicate
+    assert second, "dopo il reset la sessione è ancora bloccata nell'altro processo"
+    assert proc.exitcode == 0
+
+
+def test_only_transactions_with_changes_bump_version(db_manager, vote_service):
+    version = db_manager.change_notifier.version
+    # Claim a vuoto: il poll dei worker della moderazione non invalida le cache
+    assert db_manager.claim_pending_comments(10, 60) == []
+    assert db_manager.change_notifier.version == version
+
+    vote_service.record_vote(new_session_id(), 5)
+    assert db_manager.change_notifier.version == version + 1
@@ -0,0 +1,43 @@
+"""
+Token bucket per IP e per sessione (services/rate_limiter.py)
+
+Uso:
+    python -m pytest -q tests/test_rate_limiter.py
+"""
+
+from services.rate_limiter import TokenBucketLimiter, VoteRateLimiter
+
+
+def test_bucket_allows_burst_then_refills():
+    limiter = TokenBucketLimiter(rate=2.0, burst=3.0)
+    assert [limiter.acquire("ip", now=0.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    # Bucket vuoto: mezzo secondo per un gettone a 2 gettoni/s
+    assert limiter.acquire("ip", now=0.0) == 0.5
+    assert limiter.acquire("altro-ip", now=0.0) == 0.0
+    assert limiter.acquire("ip", now=0.5) == 0.0
+    assert limiter.top_limited() == [("ip", 1)]
+
+
+def test_large_batch_empties_bucket_instead_of_failing_forever():
+    limiter = TokenBucketLimiter(rate=1.0, burst=5.0)
+    assert limiter.acquire("ip", cost=50, now=0.0) == 0.0
+    assert limiter.acquire("ip", now=0.0) == 1.0
+
+
+def test_lru_keeps_at_most_max_keys():
+    limiter = TokenBucketLimiter(rate=0.001, burst=1.0, max_keys=2)
+    for key in ("a", "b", "c"):
+        limiter.acquire(key, now=0.0)
+    assert len(limiter) == 2
+
+
+def test_vote_limiter_checks_ip_and_session():
+    limiter = VoteRateLimiter(ip_rate=0.01, ip_burst=2, session_rate=0.01, session_burst=1)
+    assert limiter.check("10.0.0.1", "sessione-a") == 0.0
+    # Stessa sessione: limitata anche da un altro IP
+    assert limiter.check("10.0.0.2", "sessione-a") > 0
+    assert limiter.check("10.0.0.1", "sessione-b") == 0.0
+    # Terzo voto dallo stesso IP oltre il burst
+    assert limiter.check("10.0.0.1", "sessione-c") > 0
+    limiter.clear()
+    assert limiter.check("10.0.0.1", "sessione-a") == 0.0
@@ -0,0 +1,39 @@
+"""
+Statistiche descrittive dall'istogramma dei voti (services/statistics.py)
+
+Uso:
+    python -m pytest -q tests/test_statistics.py
+"""
+
+import pytest
+
+from services.statistics import compute_statistics, wilson_interval
+
+
+def test_statistics_from_histogram():
+    # Voti: 1, 2, 4, 4, 5, 5, 5, 5
+    stats = compute_statistics({1: 1, 2: 1, 4: 2, 5: 4})
+    assert stats.total == 8
+    assert stats.mean == pytest.approx(31 / 8)
+    assert stats.median == 4.5
+    assert (stats.mode, stats.mode_count) == (5, 4)
+    assert stats.percentage(3) == 0.0
+    assert stats.top2_box == 75.0
+    assert stats.bottom2_box == 25.0
+    assert stats.net_score == 50.0
+    assert 1.0 <= stats.mean_ci[0] < stats.mean < stats.mean_ci[1] <= 5.0
+    assert stats.top2_box_ci[0] < stats.top2_box < stats.top2_box_ci[1]
+
+
+def test_statistics_without_votes():
+    stats = compute_statistics({})
+    assert stats.total == 0
+    assert stats.mean == 0.0
+    assert stats.percentages == (0.0,) * 5
+
+
+def test_wilson_interval_stays_in_bounds():
+    assert wilson_interval(0, 0) == (0.0, 0.0)
+    low, high = wilson_interval(10, 10)
+    assert 0.6 < low < 1.0
+    assert high == pytest.approx(1.0)
@@ -0,0 +1,327 @@
+"""
+Asset Pipeline - Build del frontend statico (public/) per il deploy
+
+Minifica HTML, CSS e JavaScript, rinomina CSS e JS con l'hash del
+contenuto (style.3f2a9c1b0d.css) e genera il Service Worker con l'elenco
+dei file da mettere in cache all'installazione: dalla seconda visita la
+pagina si apre dalla cache senza richieste di rete. Ogni file testuale
+viene anche precompresso (.gz) per il server API.
+
+Il foglio di Google Fonts diventa non bloccante (preload + onload) e il
+Service Worker tiene in cache CSS e font, così il round trip verso un
+altro dominio non ritarda più il primo render.
+
+Uso:
+    python -m utils.asset_pipeline --src public --out dist
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List
+
+# Lunghezza dell'hash nei nomi dei file
+HASH_LENGTH = 10
+
+# File rinominati con l'hash (il Service Worker e index.html restano fissi)
+HASHED_ASSETS = ('style.css', 'outbox.js', 'script.js')
+
+_FONT_LINK_RE = re.compile(
+    r'<link\s+href="(https://fonts\.googleapis\.com/[^"]+)"\s+rel="stylesheet">'
+)
+
+# Caratteri dopo i quali "/" apre un'espressione regolare e non una divisione
+_REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^')
+_WORD_RE = re.compile(r'[\w$]')
+
+
+@dataclass
+class AssetManifest:
+    """Risultato di una build"""
+    version: str
+    files: Dict[str, str] = field(default_factory=dict)
+    source_bytes: Dict[str, int] = field(default_factory=dict)
+    output_bytes: Dict[str, int] = field(default_factory=dict)
+    gzip_bytes: Dict[str, int] = field(default_factory=dict)
+    precache: List[str] = field(default_factory=list)
+
+
+def content_hash(data: bytes) -> str:
+    """Hash del contenuto usato nei nomi dei file"""
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def _skip_string(text: str, i: int) -> int:
+    """Indice dopo la stringa (o template literal) che inizia in i"""
+    quote = text[i]
+    i += 1
+    depth = 0
+    while i < len(text):
+        c = text[i]
+        if c == '\\':
+            i += 2
+            continue
+        if quote == '`' and c == '$' and text.startswith('${', i):
+            depth += 1
+            i += 2
+            continue
+        if quote == '`' and depth and c == '}':
+            depth -= 1
+        elif c == quote and depth == 0:
+            return i + 1
+        i += 1
+    return i
+
+
+def _skip_regex(text: str, i: int) -> int:
+    """Indice dopo l'espressione regolare che inizia in i"""
+    i += 1
+    in_class = False
+    while i < len(text):
+        c = text[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c == '[':
+            in_class = True
+        elif c == ']':
+            in_class = False
+        elif c == '/' and not in_class:
+            i += 1
+            while i < len(text) and _WORD_RE.match(text[i]):
+                i += 1
+            return i
+        i += 1
+    return i
+
+
+def minify_js(text: str) -> str:
+    """
+    Minificazione conservativa di JavaScript
+
+    Rimuove commenti e indentazione e comprime gli spazi, senza toccare
+    stringhe, template literal ed espressioni regolari. Gli a capo restano
+    dove l'inserimento automatico del punto e virgola potrebbe dipenderne.
+
+    Args:
+        text: Sorgente JavaScript
+
+    Returns:
+        Sorgente minificato
+    """
+    out: List[str] = []
+    i = 0
+    pending_space = pending_newline = False
+
+    def last_char() -> str:
+        return out[-1][-1] if out else ''
+
+    while i < len(text):
+        c = text[i]
+        if c in ' \t\r\n':
+            pending_space = True
+            pending_newline = pending_newline or c == '\n'
+            i += 1
+            continue
+        if text.startswith('//', i):
+            end = text.find('\n', i)
+            i = len(text) if end < 0 else end
+            continue
+        if text.startswith('/*', i):
+            end = text.find('*/', i + 2)
+            i = len(text) if end < 0 else end + 2
+            pending_space = True
+            continue
+
+        if pending_space:
+            prev = last_char()
+            if pending_newline and prev and prev not in '{;,([' and c not in ')]},;':
+                out.append('\n')
+            elif _WORD_RE.match(prev or ' ') and _WORD_RE.match(c):
+                out.append(' ')
+            elif prev and prev in '+-/' and c == prev:
+                # "a + +b", "a - -b": non unire in ++ / --
+                out.append(' ')
+            pending_space = pending_newline = False
+
+        if c in '"\'`':
+            end = _skip_string(text, i)
+        elif c == '/' and (last_char() in _REGEX_PRECEDERS or not out or last_char() == '\n'):
+            end = _skip_regex(text, i)
+        else:
+            end = i + 1
+        out.append(text[i:end])
+        i = end
+    return ''.join(out).strip() + '\n'
+
+
+def minify_css(text: str) -> str:
+    """
+    Minificazione di CSS: commenti, spazi superflui e ultimo ";" dei blocchi
+
+    Args:
+        text: Foglio di stile
+
+    Returns:
+        Foglio di stile minificato
+    """
+    out: List[str] = []
+    i = 0
+    pending_space = False
+    while i < len(text):
+        c = text[i]
+        if text.startswith('/*', i):
+            end = text.find('*/', i + 2)
+            i = len(text) if end < 0 else end + 2
+            pending_space = True
+            continue
+        if c in ' \t\r\n':
+            pending_space = True
+            i += 1
+            continue
+        if pending_space:
+            prev = out[-1][-1] if out else ''
+            # Lo spazio resta tra parole, nei selettori discendenti e nei calc()
+            if prev and prev not in '{};,>:(' and c not in '{};,>)!':
+                out.append(' ')
+            pending_space = False
+        if c in '"\'':
+            end = _skip_string(text, i)
+            out.append(text[i:end])
+            i = end
+            continue
+        if c == '}' and out and out[-1] == ';':
+            out.pop()
+        out.append(c)
+        i += 1
+    return ''.join(out) + '\n'
+
+
+def minify_html(text: str) -> str:
+    """
+    Minificazione di HTML: commenti e spazi ripetuti
+
+    Gli spazi tra elementi si riducono a uno solo (mai rimossi), quindi il
+    layout degli elementi inline non cambia.
+
+    Args:
+        text: Documento HTML
+
+    Returns:
+        Documento minificato
+    """
+    text = re.sub(r'<!--(?!\[).*?-->', '', text, flags=re.S)
+    text = re.sub(r'[ \t]*\n\s*', '\n', text)
+    text = re.sub(r'[ \t]{2,}', ' ', text)
+    return text.strip() + '\n'
+
+
+def _non_blocking_fonts(html: str) -> str:
+    """Carica il CSS di Google Fonts senza bloccare il render"""
+    return _FONT_LINK_RE.sub(
+        lambda match: (
+            f'<link rel="preload" as="style" href="{match[1]}" '
+            f'onload="this.onload=null;this.rel=\'stylesheet\'">'
+            f'<noscript><link rel="stylesheet" href="{match[1]}"></noscript>'
+        ),
+        html
+    )
+
+
+def build_assets(src_dir: str = 'public', out_dir: str = 'dist') -> AssetManifest:
+    """
+    Esegue la build del frontend statico
+
+    Args:
+        src_dir: Sorgenti (index.html, style.css, outbox.js, script.js, sw.js)
+        out_dir: Cartella di output (ricreata da zero)
+
+    Returns:
+        AssetManifest con nomi, dimensioni e versione della build
+    """
+    def read(name):
+        with open(os.path.join(src_dir, name), encoding='utf-8') as f:
+            return f.read()
+
+    minifiers = {'.css': minify_css, '.js': minify_js}
+    outputs: Dict[str, str] = {}
+    manifest = AssetManifest(version='')
+
+    for name in HASHED_ASSETS:
+        source = read(name)
+        minified = minifiers[os.path.splitext(name)[1]](source)
+        stem, ext = os.path.splitext(name)
+        hashed = f"{stem}.{content_hash(minified.encode('utf-8'))}{ext}"
+        manifest.files[name] = hashed
+        manifest.source_bytes[name] = len(source.encode('utf-8'))
+        outputs[hashed] = minified
+
+    html = read('index.html')
+    manifest.source_bytes['index.html'] = len(html.encode('utf-8'))
+    for name, hashed in manifest.files.items():
+        html = html.replace(f'"{name}"', f'"{hashed}"')
+    outputs['index.html'] = minify_html(_non_blocking_fonts(html))
+    manifest.files['index.html'] = 'index.html'
+
+    # La versione copre tutti i file in cache: cambia se cambia anche uno solo
+    manifest.precache = ['index.html'] + [manifest.files[name] for name in HASHED_ASSETS]
+    manifest.version = content_hash(
+        ''.join(outputs[name] for name in manifest.precache).encode('utf-8')
+    )
+
+    worker = read('sw.js')
+    manifest.source_bytes['sw.js'] = len(worker.encode('utf-8'))
+    worker = worker.replace("importScripts('outbox.js')", f"importScripts('{manifest.files['outbox.js']}')")
+    header = (
+        f"self.PRECACHE_VERSION = '{manifest.version}';\n"
+        f"self.PRECACHE_URLS = {json.dumps(manifest.precache)};\n"
+    )
+    outputs['sw.js'] = header + minify_js(worker)
+    manifest.files['sw.js'] = 'sw.js'
+
+    if os.path.isdir(out_dir):
+        shutil.rmtree(out_dir)
+    os.makedirs(out_dir)
+    for name, content in outputs.items():
+        data = content.encode('utf-8')
+        with open(os.path.join(out_dir, name), 'wb') as f:
+            f.write(data)
+        # mtime fisso: .gz identici a parità di contenuto
+        compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        with open(os.path.join(out_dir, f"{name}.gz"), 'wb') as f:
+            f.write(compressed)
+        manifest.output_bytes[name] = len(data)
+        manifest.gzip_bytes[name] = len(compressed)
+
+    with open(os.path.join(out_dir, 'asset-manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(asdict(manifest), f, indent=2)
+    return manifest
+
+
+def main(argv=None):
+    """Entry point da riga di comando"""
+    parser = argparse.ArgumentParser(description="Build del frontend statico")
+    parser.add_argument("--src", default="public", help="Cartella dei sorgenti")
+    parser.add_argument("--out", default="dist", help="Cartella di output")
+    args = parser.parse_args(argv)
+
+    try:
+        manifest = build_assets(args.src, args.out)
+    except OSError as e:
+        print(f"Build fallita: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    for source, built in manifest.files.items():
+        size = manifest.output_bytes[built]
+        print(f"{source:12s} -> {built:26s} {manifest.source_bytes[source]:7d} -> {size:7d} B "
+              f"(gzip {manifest.gzip_bytes[built]:6d} B)", file=sys.stderr)
+    print(f"Versione {manifest.version}, {len(manifest.precache)} file in precache", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
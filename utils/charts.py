@@ -0,0 +1,99 @@
+"""
+Charts - VibeTheForce
+Grafici Plotly riutilizzati da più pagine con i colori del tema Star Wars
+"""
+import math
+from typing import Dict, List, Sequence, Tuple
+
+import plotly.graph_objects as go
+
+from utils.theme import RATING_COLORS, RATING_LABELS
+
+
+def build_timeline_chart(timeline: List[Dict], height: int = 350, sparkline: bool = False) -> go.Figure:
+    """
+    Crea un grafico ad area impilata dei voti per minuto
+
+    Args:
+        timeline: Output di VoteService.get_timeline()
+        height: Altezza del grafico in pixel
+        sparkline: Se True nasconde assi e legenda (versione compatta)
+
+    Returns:
+        Figura Plotly
+    """
+    minutes = [bucket['minute'] for bucket in timeline]
+
+    fig = go.Figure()
+    for rating in range(1, 6):
+        fig.add_trace(go.Scatter(
+            x=minutes,
+            y=[bucket['votes'][rating] for bucket in timeline],
+            name=RATING_LABELS[rating],
+            mode='lines',
+            stackgroup='votes',
+            line=dict(width=0.5, color=RATING_COLORS[rating]),
+            hovertemplate='%{x}: %{y} voti<extra>' + RATING_LABELS[rating] + '</extra>'
+        ))
+
+    fig.update_layout(
+        plot_bgcolor='rgba(0, 0, 0, 0)',
+        paper_bgcolor='rgba(0, 0, 0, 0)',
+        height=height,
+        margin=dict(t=10, b=10, l=10, r=10) if sparkline else dict(t=30, b=60, l=60, r=30),
+        showlegend=not sparkline,
+        font=dict(color='#FFFFFF', family='Arial'),
+        legend=dict(orientation='h', y=-0.25)
+    )
+    fig.update_xaxes(visible=not sparkline, gridcolor='rgba(255, 255, 255, 0.2)')
+    fig.update_yaxes(
+        visible=not sparkline,
+        title="Voti al minuto",
+        gridcolor='rgba(255, 255, 255, 0.2)'
+    )
+    return fig
+
+
+def build_keyword_cloud(keywords: Sequence[Tuple[str, float]], height: int = 420) -> go.Figure:
+    """
+    Crea una nuvola di parole chiave (testo su spirale, dimensione per peso)
+
+    Args:
+        keywords: Coppie (termine, peso) in ordine decrescente di peso
+        height: Altezza del grafico in pixel
+
+    Returns:
+        Figura Plotly
+    """
+    top = keywords[0][1] if keywords else 1.0
+    colors = [RATING_COLORS[rating] for rating in (5, 3, 4, 2)]
+    # Spirale con angolo aureo: le parole più pesanti al centro
+    golden_angle = math.pi * (3 - math.sqrt(5))
+    positions = [
+        (math.sqrt(i) * math.cos(i * golden_angle) * 1.6, math.sqrt(i) * math.sin(i * golden_angle))
+        for i in range(len(keywords))
+    ]
+
+    fig = go.Figure(go.Scatter(
+        x=[x for x, _ in positions],
+        y=[y for _, y in positions],
+        mode='text',
+        text=[term for term, _ in keywords],
+        textfont=dict(
+            size=[18 + 42 * weight / top for _, weight in keywords],
+            color=[colors[i % len(colors)] for i in range(len(keywords))],
+            family='Arial'
+        ),
+        hovertext=[f"{term}: {weight:.2f}" for term, weight in keywords],
+        hoverinfo='text'
+    ))
+    fig.update_layout(
+        plot_bgcolor='rgba(0, 0, 0, 0)',
+        paper_bgcolor='rgba(0, 0, 0, 0)',
+        height=height,
+        margin=dict(t=10, b=10, l=10, r=10),
+        showlegend=False
+    )
+    fig.update_xaxes(visible=False)
+    fig.update_yaxes(visible=False)
+    return fig
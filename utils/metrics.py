@@ -0,0 +1,481 @@
+"""
+Metrics - VibeTheForce
+Registry di metriche in-process (counter, gauge, histogram) esposto in
+formato Prometheus su un endpoint HTTP locale
+"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from utils.settings import get_settings
+
+
+# Bucket di default per le latenze, in secondi
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+
+class _ThreadCells:
+    """
+    Celle per-thread per aggiornamenti senza lock
+
+    Ogni thread scrive solo nella propria cella; la lettura somma tutte le
+    celle. Il lock serve solo alla prima scrittura di un nuovo thread.
+    Le celle dei thread terminati (un thread per richiesta HTTP o per
+    rerun di Streamlit) sono sommate in una base e rimosse alla lettura,
+    o quando il numero di celle raddoppia: memoria e costo dello scrape
+    dipendono dai thread vivi, non da quelli passati.
+    """
+
+    # Celle oltre le quali la creazione di una nuova cella ripulisce i thread terminati
+    MIN_SWEEP = 64
+
+    def __init__(self, size: int):
+        self._size = size
+        self._local = threading.local()
+        self._cells: List[Tuple[threading.Thread, List[float]]] = []
+        self._base = [0.0] * size
+        self._sweep_at = self.MIN_SWEEP
+        self._lock = threading.Lock()
+
+    def cell(self) -> List[float]:
+        """Ritorna la cella del thread corrente, creandola se necessario"""
+        cell = getattr(self._local, 'cell', None)
+        if cell is None:
+            cell = [0.0] * self._size
+            with self._lock:
+                self._cells.append((threading.current_thread(), cell))
+                if len(self._cells) > self._sweep_at:
+                    self._sweep()
+            self._local.cell = cell
+        return cell
+
+    def _sweep(self):
+        """Somma nella base le celle dei thread terminati (con il lock)"""
+        live = []
+        for thread, cell in self._cells:
+            if thread.is_alive():
+                live.append((thread, cell))
+            else:
+                for i, value in enumerate(cell):
+                    self._base[i] += value
+        self._cells = live
+        self._sweep_at = max(self.MIN_SWEEP, 2 * len(live))
+
+    def totals(self) -> List[float]:
+        """Somma delle celle di tutti i thread"""
+        with self._lock:
+            self._sweep()
+            totals = list(self._base)
+            cells = [cell for _, cell in self._cells]
+        for cell in cells:
+            for i, value in enumerate(cell):
+                totals[i] += value
+        return totals
+
+
+class Counter:
+    """Contatore monotono crescente"""
+
+    def __init__(self):
+        self._cells = _ThreadCells(1)
+
+    def inc(self, amount: float = 1.0):
+        """Incrementa il contatore"""
+        self._cells.cell()[0] += amount
+
+    @property
+    def value(self) -> float:
+        """Valore corrente"""
+        return self._cells.totals()[0]
+
+
+class Gauge:
+    """Valore istantaneo che può salire e scendere"""
+
+    def __init__(self):
+        self._cells = _ThreadCells(1)
+        self._base = 0.0
+        self._function: Optional[Callable[[], float]] = None
+
+    def inc(self, amount: float = 1.0):
+        """Incrementa il gauge"""
+        self._cells.cell()[0] += amount
+
+    def dec(self, amount: float = 1.0):
+        """Decrementa il gauge"""
+        self._cells.cell()[0] -= amount
+
+    def set(self, value: float):
+        """Imposta il valore assoluto del gauge"""
+        self._base = value - self._cells.totals()[0]
+
+    def set_function(self, function: Callable[[], float]):
+        """Calcola il valore al momento dello scrape tramite function"""
+        self._function = function
+
+    @property
+    def value(self) -> float:
+        """Valore corrente"""
+        if self._function is not None:
+            return float(self._function())
+        return self._base + self._cells.totals()[0]
+
+
+class Histogram:
+    """Istogramma cumulativo con bucket fissi"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        # Celle: un contatore per bucket, poi +Inf, somma e conteggio
+        self._cells = _ThreadCells(len(self.buckets) + 3)
+
+    def observe(self, value: float):
+        """Registra un'osservazione"""
+        cell = self._cells.cell()
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                cell[i] += 1
+                break
+        else:
+            cell[len(self.buckets)] += 1
+        cell[-2] += value
+        cell[-1] += 1
+
+    def time(self) -> '_Timer':
+        """Context manager che osserva la durata del blocco"""
+        return _Timer(self)
+
+    def snapshot(self) -> Tuple[List[float], float, float]:
+        """
+        Ritorna (conteggi cumulativi per bucket incluso +Inf, somma, conteggio)
+        """
+        totals = self._cells.totals()
+        cumulative = []
+        running = 0.0
+        for value in totals[:len(self.buckets) + 1]:
+            running += value
+            cumulative.append(running)
+        return cumulative, totals[-2], totals[-1]
+
+
+class _Timer:
+    """Context manager per Histogram.time()"""
+
+    def __init__(self, histogram: Histogram):
+        self._histogram = histogram
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._histogram.observe(time.perf_counter() - self._start)
+        return False
+
+
+class MetricFamily:
+    """Famiglia di metriche con lo stesso nome e label diverse"""
+
+    def __init__(self, name: str, help_text: str, metric_type: str,
+                 labelnames: Sequence[str], factory: Callable[[], object]):
+        self.name = name
+        self.help_text = help_text
+        self.metric_type = metric_type
+        self.labelnames = tuple(labelnames)
+        self._factory = factory
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, **labels: str):
+        """
+        Ritorna la metrica figlia per una combinazione di label
+
+        Raises:
+            ValueError: Se le label non corrispondono a labelnames
+        """
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Label attese per {self.name}: {self.labelnames}")
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._factory())
+        return child
+
+    def __getattr__(self, attr):
+        # Famiglie senza label: delega alla metrica singola
+        if attr.startswith('_') or self.__dict__.get('labelnames', ('?',)):
+            raise AttributeError(attr)
+        return getattr(self.labels(), attr)
+
+    def children(self) -> List[Tuple[Tuple[str, ...], object]]:
+        """Coppie (valori label, metrica) ordinate"""
+        with self._lock:
+            return sorted(self._children.items())
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    """Formatta le label nel formato di esposizione Prometheus"""
+    parts = [
+        '{}="{}"'.format(
+            name,
+            value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        )
+        for name, value in zip(names, values)
+    ]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    """Formatta un valore numerico per Prometheus"""
+    if value == float('inf'):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class MetricsRegistry:
+    """Registry delle metriche applicative"""
+
+    def __init__(self):
+        self._families: Dict[str, MetricFamily] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, name: str, help_text: str, metric_type: str,
+                  labelnames: Sequence[str], factory: Callable[[], object]) -> MetricFamily:
+        with self._lock:
+            family = self._families.get(name)
+            if family is None:
+                family = MetricFamily(name, help_text, metric_type, labelnames, factory)
+                if not family.labelnames:
+                    # Metrica singola: esposta subito con valore zero
+                    family.labels()
+                self._families[name] = family
+            elif family.metric_type != metric_type:
+                raise ValueError(f"Metrica {name} già registrata come {family.metric_type}")
+            return family
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> MetricFamily:
+        """Registra (o ritorna) una famiglia di counter"""
+        return self._register(name, help_text, 'counter', labelnames, Counter)
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> MetricFamily:
+        """Registra (o ritorna) una famiglia di gauge"""
+        return self._register(name, help_text, 'gauge', labelnames, Gauge)
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> MetricFamily:
+        """Registra (o ritorna) una famiglia di histogram"""
+        return self._register(name, help_text, 'histogram', labelnames,
+                              lambda: Histogram(buckets))
+
+    def render(self) -> str:
+        """
+        Serializza tutte le metriche nel formato di esposizione Prometheus
+
+        Returns:
+            Testo in formato Prometheus 0.0.4
+        """
+        with self._lock:
+            families = sorted(self._families.values(), key=lambda f: f.name)
+
+        lines = []
+        for family in families:
+            lines.append(f"# HELP {family.name} {family.help_text}")
+            lines.append(f"# TYPE {family.name} {family.metric_type}")
+            for values, metric in family.children():
+                if family.metric_type == 'histogram':
+                    cumulative, total, count = metric.snapshot()
+                    bounds = list(metric.buckets) + [float('inf')]
+                    for bound, bucket_count in zip(bounds, cumulative):
+                        le = f'le="{_format_value(bound)}"'
+                        lines.append(
+                            f"{family.name}_bucket"
+                            f"{_format_labels(family.labelnames, values, le)} "
+                            f"{_format_value(bucket_count)}"
+                        )
+                    labels = _format_labels(family.labelnames, values)
+                    lines.append(f"{family.name}_sum{labels} {_format_value(total)}")
+                    lines.append(f"{family.name}_count{labels} {_format_value(count)}")
+                else:
+                    labels = _format_labels(family.labelnames, values)
+                    lines.append(f"{family.name}{labels} {_format_value(metric.value)}")
+        return "\n".join(lines) + "\n"
+
+
+# Istanza singleton del registry applicativo
+_registry = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    """
+    Ritorna il registry di metriche condiviso dal processo
+
+    Returns:
+        MetricsRegistry singleton
+    """
+    return _registry
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """Handler HTTP che serve /metrics"""
+
+    registry: MetricsRegistry = _registry
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = self.registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Niente log per ogni scrape
+        pass
+
+
+_server: Optional[ThreadingHTTPServer] = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port: int = 9464, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """
+    Avvia (una sola volta per processo) l'endpoint HTTP /metrics
+
+    Args:
+        port: Porta locale (0 per una porta libera)
+        host: Indirizzo di bind (default solo locale)
+
+    Returns:
+        Server HTTP in esecuzione in un thread daemon
+    """
+    global _server
+
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            _server.daemon_threads = True
+            thread = threading.Thread(
+                target=_server.serve_forever, name="metrics-server", daemon=True
+            )
+            thread.start()
+        return _server
+
+
+def start_metrics_server_from_settings() -> Optional[ThreadingHTTPServer]:
+    """
+    Avvia l'endpoint /metrics se l'impostazione metrics_port è impostata
+
+    Returns:
+        Server HTTP o None se l'endpoint non è abilitato
+    """
+    port = get_settings().metrics_port
+    if not port:
+        return None
+    return start_metrics_server(port)
+
+
+# Metriche applicative condivise
+
+VOTES_TOTAL = _registry.counter(
+    "vibetheforce_votes_total", "Voti ricevuti per esito", ["outcome"]
+)
+RESULTS_READS_TOTAL = _registry.counter(
+    "vibetheforce_results_reads_total", "Letture dei risultati per sorgente", ["source"]
+)
+ANALYTICS_COMMENTS_TOTAL = _registry.counter(
+    "vibetheforce_analytics_comments_total", "Commenti automatici serviti per sorgente", ["source"]
+)
+LLM_REQUESTS_TOTAL = _registry.counter(
+    "vibetheforce_llm_requests_total", "Chiamate LLM per esito", ["outcome"]
+)
+LLM_LATENCY_SECONDS = _registry.histogram(
+    "vibetheforce_llm_latency_seconds", "Latenza delle chiamate LLM"
+)
+LLM_PROMPT_BYTES = _registry.histogram(
+    "vibetheforce_llm_prompt_bytes", "Dimensione dei prompt LLM in byte",
+    buckets=(512, 1024, 2048, 4096, 8192, 16384, 32768, 65536)
+)
+LLM_PROMPT_TOKENS = _registry.histogram(
+    "vibetheforce_llm_prompt_tokens", "Token stimati dei prompt LLM",
+    buckets=(128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+)
+DB_QUERIES_TOTAL = _registry.counter(
+    "vibetheforce_db_queries_total", "Statement eseguiti da DatabaseManager", ["kind"]
+)
+DB_TRANSACTION_SECONDS = _registry.histogram(
+    "vibetheforce_db_transaction_seconds", "Durata delle transazioni di scrittura"
+)
+DB_REPLICA_REFRESH_SECONDS = _registry.histogram(
+    "vibetheforce_db_replica_refresh_seconds", "Durata delle copie del database nella replica in memoria"
+)
+DB_REPLICA_AGE_SECONDS = _registry.gauge(
+    "vibetheforce_db_replica_age_seconds", "Età dei dati della replica in memoria per database", ["db"]
+)
+QUEUE_DEPTH = _registry.gauge(
+    "vibetheforce_queue_depth", "Operazioni in attesa per coda", ["queue"]
+)
+COMMENTS_MODERATED_TOTAL = _registry.counter(
+    "vibetheforce_comments_moderated_total", "Commenti moderati per esito", ["status"]
+)
+RATE_LIMITED_TOTAL = _registry.counter(
+    "vibetheforce_rate_limited_total", "Voti rifiutati dal rate limiter per limite", ["scope"]
+)
+RATE_LIMIT_BUCKETS = _registry.gauge(
+    "vibetheforce_rate_limit_buckets", "Bucket del rate limiter in memoria", ["scope"]
+)
+ACTIVE_SESSIONS = _registry.gauge(
+    "vibetheforce_active_sessions", "Sessioni Streamlit attive negli ultimi 60 secondi"
+)
+
+# Sessioni viste di recente: session_id -> ultimo accesso
+_session_last_seen: Dict[str, float] = {}
+SESSION_ACTIVE_WINDOW = 60.0
+
+
+def touch_session(session_id: str):
+    """
+    Segna una sessione come attiva (chiamato ad ogni run di una pagina)
+
+    Args:
+        session_id: Identificativo della sessione
+    """
+    _session_last_seen[session_id] = time.monotonic()
+
+
+def _count_active_sessions() -> float:
+    """Conta le sessioni attive ed elimina quelle scadute"""
+    cutoff = time.monotonic() - SESSION_ACTIVE_WINDOW
+    for session_id, last_seen in list(_session_last_seen.items()):
+        if last_seen < cutoff:
+            _session_last_seen.pop(session_id, None)
+    return len(_session_last_seen)
+
+
+ACTIVE_SESSIONS.set_function(_count_active_sessions)
+
+
+def track_streamlit_session():
+    """
+    Registra la sessione Streamlit corrente come attiva
+
+    Import locale di streamlit: il modulo resta usabile anche senza Streamlit.
+    """
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return
+    ctx = get_script_run_ctx()
+    if ctx is not None:
+        touch_session(ctx.session_id)
@@ -6,12 +6,14 @@ import qrcode
 from io import BytesIO
 from typing import Optional
 
+from utils.settings import get_settings
+
 
 def generate_qr_code(
     url: str,
     fill_color: str = "#FFE81F",
     back_color: str = "#000428",
-    box_size: int = 10,
+    box_size: Optional[int] = None,
     border: int = 4
 ) -> BytesIO:
     """
@@ -21,7 +23,7 @@ def generate_qr_code(
         url: URL da codificare nel QR code
         fill_color: Colore di riempimento (default: giallo Jedi #FFE81F)
         back_color: Colore di sfondo (default: nero spazio #000428)
-        box_size: Dimensione di ogni box del QR code (default: 10)
+        box_size: Dimensione di ogni box del QR code (default: qr_box_size, 10)
         border: Dimensione del bordo in boxes (default: 4)
     
     Returns:
@@ -33,7 +35,7 @@ def generate_qr_code(
     qr = qrcode.QRCode(
         version=1,  # Controlla dimensione (1 è la più piccola)
         error_correction=qrcode.constants.ERROR_CORRECT_L,  # ~7% error correction
-        box_size=box_size,
+        box_size=box_size or get_settings().qr_box_size,
         border=border,
     )
     
@@ -76,7 +78,7 @@ def generate_qr_code_with_logo(
     qr = qrcode.QRCode(
         version=1,
         error_correction=qrcode.constants.ERROR_CORRECT_H,  # High error correction per logo
-        box_size=10,
+        box_size=get_settings().qr_box_size,
         border=4,
     )
     
@@ -0,0 +1,103 @@
+"""
+Session Identity - VibeTheForce
+Generazione e codifica degli identificativi di sessione dei votanti
+
+Gli ID sono da 128 bit, ordinati nel tempo come UUIDv7: 48 bit di
+timestamp in millisecondi seguiti da 80 bit casuali (secrets). Il prefisso
+temporale fa sì che gli insert finiscano in coda all'indice UNIQUE invece
+che in punti casuali del B-tree; gli 80 bit casuali rendono trascurabili
+le collisioni anche tra ID generati nello stesso millisecondo.
+
+Verso l'esterno sono 32 caratteri esadecimali, nel database un BLOB da
+16 byte. Il frontend statico (public/script.js) genera ID nello stesso
+formato.
+"""
+import hashlib
+import re
+import secrets
+import time
+from typing import MutableMapping
+
+# Lunghezza della chiave binaria salvata in votes.session_id
+SESSION_KEY_BYTES = 16
+
+_HEX_SESSION_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+def new_session_id() -> str:
+    """
+    Genera un nuovo session ID (timestamp 48 bit + 80 bit casuali)
+
+    Returns:
+        Stringa esadecimale di 32 caratteri (128 bit)
+    """
+    millis = int(time.time() * 1000) & 0xFFFFFFFFFFFF
+    return f"{millis:012x}{secrets.token_hex(10)}"
+
+
+def is_session_id(value: str) -> bool:
+    """
+    Verifica se una stringa è un session ID nel formato corrente
+
+    Args:
+        value: Stringa da verificare
+
+    Returns:
+        True se è un ID esadecimale di 128 bit
+    """
+    return bool(_HEX_SESSION_ID.match(value))
+
+
+def to_session_key(session_id) -> bytes:
+    """
+    Converte un session ID nella chiave binaria da 16 byte usata nel database
+
+    Gli ID legacy (es. "session_1700000000123") vengono mappati in modo
+    deterministico con BLAKE2b-128, così restano confrontabili dopo la
+    migrazione.
+
+    Args:
+        session_id: Session ID (stringa) o chiave già binaria
+
+    Returns:
+        Chiave binaria di 16 byte
+    """
+    if isinstance(session_id, (bytes, bytearray, memoryview)):
+        key = bytes(session_id)
+        if len(key) == SESSION_KEY_BYTES:
+            return key
+        return hashlib.blake2b(key, digest_size=SESSION_KEY_BYTES).digest()
+    normalized = session_id.strip().lower()
+    if is_session_id(normalized):
+        return bytes.fromhex(normalized)
+    return hashlib.blake2b(session_id.encode('utf-8'), digest_size=SESSION_KEY_BYTES).digest()
+
+
+def from_session_key(key: bytes) -> str:
+    """
+    Converte una chiave binaria nel session ID esadecimale
+
+    Args:
+        key: Chiave da 16 byte
+
+    Returns:
+        Stringa esadecimale di 32 caratteri
+    """
+    return bytes(key).hex()
+
+
+def ensure_session_id(state: MutableMapping) -> str:
+    """
+    Ritorna il session ID salvato in state, generandolo se assente
+
+    Funziona con st.session_state o con un qualsiasi dict.
+
+    Args:
+        state: Stato di sessione
+
+    Returns:
+        Session ID della sessione corrente
+    """
+    if 'session_id' not in state:
+        state['session_id'] = new_session_id()
+    return state['session_id']
@@ -0,0 +1,323 @@
+"""
+Settings - Impostazioni tipizzate dell'applicazione
+
+Un solo oggetto Settings (dataclass immutabile) raccoglie i parametri che
+incidono sulle prestazioni di un evento: cadenza di aggiornamento, TTL
+delle cache, soglie e budget dell'LLM, limiti di rate, dimensioni dei
+pool e dei lotti. Ogni valore arriva, in ordine di precedenza crescente:
+
+1. dal default dichiarato qui;
+2. dal file TOML (VIBETHEFORCE_SETTINGS_FILE, default vibetheforce.toml
+   nella directory di lavoro, se esiste), con chiavi uguali ai campi;
+3. dalle variabili d'ambiente VIBETHEFORCE_<CAMPO> (es. VIBETHEFORCE_REFRESH_SECONDS);
+4. dagli override passati al caricamento (i secrets di Streamlit, vedi
+   services.streamlit_adapters) o impostati a runtime con update_settings.
+
+I valori sono convertiti al tipo del campo e validati tutti insieme: un
+errore di configurazione ferma l'avvio con l'elenco dei problemi, un
+ricaricamento non valido lascia attive le impostazioni precedenti.
+
+Il codice legge get_settings() nel momento in cui usa un valore, quindi
+un ricaricamento ha effetto alla richiesta successiva; fanno eccezione i
+campi con restart=True (percorso del database, pool della moderazione),
+letti una volta alla creazione dei singleton di processo.
+"""
+import os
+import threading
+import tomllib
+from dataclasses import dataclass, field, fields, replace
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+ENV_PREFIX = "VIBETHEFORCE_"
+SETTINGS_FILE_ENV = "VIBETHEFORCE_SETTINGS_FILE"
+DEFAULT_SETTINGS_FILE = "vibetheforce.toml"
+
+LLM_PROVIDERS = ("gemini", "local", "fake")
+
+
+class SettingsError(ValueError):
+    """Configurazione non valida: il messaggio elenca tutti i problemi"""
+
+    def __init__(self, problems: List[str]):
+        self.problems = problems
+        super().__init__("Impostazioni non valide: " + "; ".join(problems))
+
+
+def _setting(default, help: str, min=None, max=None, choices=None, restart: bool = False):
+    """Campo di Settings con descrizione e vincoli"""
+    return field(default=default, metadata={
+        'help': help, 'min': min, 'max': max, 'choices': choices, 'restart': restart
+    })
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Impostazioni dell'applicazione (vedi il docstring del modulo per le fonti)"""
+
+    # Database
+    db_path: str = _setting("database/votes.db", "Percorso del database SQLite", restart=True)
+    db_timeout: float = _setting(10.0, "Attesa massima di un lock SQLite (s)", min=0.1, max=300)
+    replica_interval: float = _setting(0.0, "Copia in memoria per le letture aggregate, ogni quanti secondi (0 = disattivata)", min=0, max=300)
+    replica_max_staleness: float = _setting(5.0, "Età massima dei dati letti dalla copia in memoria (s)", min=0.1, max=600)
+    shard_map: str = _setting("", "File JSON della mappa degli shard per talk (vuoto = un solo database)", restart=True)
+    db_instrumentation: bool = _setting(False, "Misura latenze e lock wait delle query dall'avvio", restart=True)
+
+    # Risultati
+    refresh_seconds: float = _setting(2.0, "Aggiornamento delle pagine Risultati e Classifica (s)", min=0.5, max=60)
+    results_cache_ttl: float = _setting(1.0, "Validità della cache dei risultati (s)", min=0, max=60)
+    poll_min_seconds: int = _setting(2, "Polling minimo suggerito ai client API (s)", min=1, max=3600)
+    poll_max_seconds: int = _setting(30, "Polling massimo suggerito ai client API (s)", min=1, max=3600)
+
+    # Commento automatico
+    llm_provider: str = _setting("gemini", "Provider LLM", choices=LLM_PROVIDERS)
+    llm_latency: str = _setting("lognormal:1.5,0.5", "Latenza del provider fake")
+    llm_failure_rate: float = _setting(0.0, "Probabilità di errore del provider fake", min=0, max=1)
+    llm_timeout: float = _setting(30.0, "Timeout di una chiamata LLM (s)", min=1, max=300)
+    llm_cache_ttl: float = _setting(30.0, "Validità del commento automatico in cache (s)", min=0, max=3600)
+    llm_min_votes: int = _setting(10, "Voti minimi per il commento automatico", min=1, max=100_000)
+    llm_input_tokens: int = _setting(1500, "Budget di token del prompt", min=300, max=100_000)
+    llm_output_tokens: int = _setting(256, "Budget di token della risposta", min=16, max=8192)
+
+    # Rate limiting dei voti
+    ip_rate: float = _setting(5.0, "Voti al secondo per IP", min=0.01, max=10_000)
+    ip_burst: float = _setting(100.0, "Voti consecutivi per IP", min=1, max=1_000_000)
+    session_rate: float = _setting(0.2, "Tentativi al secondo per sessione", min=0.001, max=1000)
+    session_burst: float = _setting(3.0, "Tentativi consecutivi per sessione", min=1, max=1000)
+
+    # Moderazione dei commenti
+    moderation_workers: int = _setting(2, "Thread della moderazione", min=1, max=32, restart=True)
+    moderation_batch_size: int = _setting(50, "Commenti per lotto di moderazione", min=1, max=10_000, restart=True)
+    moderation_batch_delay: float = _setting(0.2, "Attesa prima di un lotto (s)", min=0, max=10, restart=True)
+
+    # Backup
+    backup_dir: str = _setting("", "Directory degli snapshot (vuoto = backups accanto al database)")
+    backup_retention: int = _setting(10, "Snapshot conservati per etichetta (0 = tutti)", min=0, max=10_000)
+    backup_interval: float = _setting(0.0, "Snapshot periodici, ogni quanti secondi (0 = disattivati)", min=0, max=7 * 86400, restart=True)
+
+    # Server API e metriche
+    api_port: int = _setting(0, "Porta del server API avviato con l'app (0 = disattivato)", min=0, max=65535, restart=True)
+    api_host: str = _setting("127.0.0.1", "Indirizzo del server API", restart=True)
+    static_dir: str = _setting("", "Build del frontend servita dal server API (vuoto = nessuna)", restart=True)
+    trust_proxy: bool = _setting(False, "IP del client dal primo X-Forwarded-For (dietro un reverse proxy)")
+    metrics_port: int = _setting(0, "Porta dell'endpoint /metrics (0 = disattivato)", min=0, max=65535, restart=True)
+
+    # Export
+    export_max_mb: int = _setting(50, "Dimensione massima di un export scaricabile dall'Admin (MiB)", min=1, max=4096)
+
+    # QR code
+    qr_box_size: int = _setting(10, "Pixel per modulo del QR code", min=1, max=50)
+
+    # Fonte di ogni valore (default, toml, env, override, admin)
+    sources: Dict[str, str] = field(default_factory=dict, compare=False, repr=False)
+
+
+def setting_fields() -> Tuple:
+    """Campi di Settings che sono impostazioni (escluso sources)"""
+    return tuple(f for f in fields(Settings) if 'help' in f.metadata)
+
+
+_FIELDS = {f.name: f for f in setting_fields()}
+
+# Valori testuali dei campi bool (variabili d'ambiente e secrets)
+_TRUE = ("1", "true", "yes", "on")
+_FALSE = ("0", "false", "no", "off", "")
+
+
+def _coerce(f, value: Any) -> Any:
+    """Converte un valore (stringa da env o tipo TOML) al tipo del campo"""
+    if f.type is bool:
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, str) and value.strip().lower() in _TRUE + _FALSE:
+            return value.strip().lower() in _TRUE
+        raise ValueError
+    if f.type is str:
+        if not isinstance(value, str):
+            raise ValueError
+        return value.strip()
+    if isinstance(value, bool):
+        raise ValueError
+    if f.type is int:
+        if isinstance(value, float) and not value.is_integer():
+            raise ValueError
+        return int(value) if not isinstance(value, str) else int(value.strip())
+    return float(value)
+
+
+def validate_settings(settings: Settings) -> List[str]:
+    """
+    Controlla vincoli dei campi e coerenza tra campi
+
+    Args:
+        settings: Impostazioni da controllare
+
+    Returns:
+        Problemi trovati (vuota se valide)
+    """
+    problems = []
+    for f in setting_fields():
+        value, meta = getattr(settings, f.name), f.metadata
+        if meta['choices'] and value not in meta['choices']:
+            problems.append(f"{f.name}={value!r} non è tra {', '.join(meta['choices'])}")
+        if meta['min'] is not None and value < meta['min']:
+            problems.append(f"{f.name}={value} sotto il minimo {meta['min']}")
+        if meta['max'] is not None and value > meta['max']:
+            problems.append(f"{f.name}={value} sopra il massimo {meta['max']}")
+    if not settings.db_path:
+        problems.append("db_path vuoto")
+    if settings.poll_min_seconds > settings.poll_max_seconds:
+        problems.append("poll_min_seconds maggiore di poll_max_seconds")
+    if settings.replica_interval > settings.replica_max_staleness:
+        problems.append("replica_interval maggiore di replica_max_staleness")
+    return problems
+
+
+def load_settings(
+    path: Optional[str] = None,
+    environ: Optional[Mapping[str, str]] = None,
+    overrides: Optional[Mapping[str, Any]] = None
+) -> Settings:
+    """
+    Carica e valida le impostazioni da TOML, ambiente e override
+
+    Args:
+        path: File TOML (default: VIBETHEFORCE_SETTINGS_FILE o vibetheforce.toml se esiste)
+        environ: Variabili d'ambiente (default: os.environ)
+        overrides: Valori con precedenza massima, per nome del campo
+
+    Returns:
+        Settings validate
+
+    Raises:
+        SettingsError: Con tutti i problemi trovati (file, chiavi, tipi, vincoli)
+    """
+    environ = os.environ if environ is None else environ
+    layers: List[Tuple[str, Mapping[str, Any]]] = []
+    problems: List[str] = []
+
+    path = path or environ.get(SETTINGS_FILE_ENV)
+    if path or os.path.exists(DEFAULT_SETTINGS_FILE):
+        try:
+            with open(path or DEFAULT_SETTINGS_FILE, "rb") as f:
+                layers.append(("toml", tomllib.load(f)))
+        except (OSError, tomllib.TOMLDecodeError) as e:
+            problems.append(f"file {path or DEFAULT_SETTINGS_FILE}: {e}")
+    layers.append(("env", {
+        name: environ[ENV_PREFIX + name.upper()]
+        for name in _FIELDS if ENV_PREFIX + name.upper() in environ
+    }))
+    layers.append(("override", dict(overrides or {})))
+
+    values: Dict[str, Any] = {}
+    sources = {name: "default" for name in _FIELDS}
+    for source, layer in layers:
+        for name, value in layer.items():
+            if name not in _FIELDS:
+                problems.append(f"chiave sconosciuta {name!r} ({source})")
+                continue
+            try:
+                values[name] = _coerce(_FIELDS[name], value)
+                sources[name] = source
+            except (TypeError, ValueError):
+                problems.append(f"{name}={value!r} ({source}): atteso {_FIELDS[name].type.__name__}")
+
+    settings = Settings(**values, sources=sources)
+    problems.extend(validate_settings(settings))
+    if problems:
+        raise SettingsError(problems)
+    return settings
+
+
+# Impostazioni di processo: sostituite per intero a ogni (ri)caricamento
+_settings: Optional[Settings] = None
+_settings_lock = threading.Lock()
+
+
+def get_settings() -> Settings:
+    """
+    Impostazioni correnti del processo (caricate alla prima chiamata)
+
+    Returns:
+        Settings attive
+
+    Raises:
+        SettingsError: Se la configurazione iniziale non è valida
+    """
+    settings = _settings
+    if settings is None:
+        with _settings_lock:
+            if _settings is None:
+                _install(load_settings())
+            settings = _settings
+    return settings
+
+
+def _install(settings: Settings):
+    global _settings
+    _settings = settings
+
+
+def reload_settings(overrides: Optional[Mapping[str, Any]] = None) -> Settings:
+    """
+    Rilegge TOML e ambiente; scarta le modifiche fatte con update_settings
+
+    Args:
+        overrides: Valori con precedenza massima (es. secrets di Streamlit)
+
+    Returns:
+        Nuove Settings attive
+
+    Raises:
+        SettingsError: Se la nuova configurazione non è valida (restano le precedenti)
+    """
+    settings = load_settings(overrides=overrides)
+    with _settings_lock:
+        _install(settings)
+    return settings
+
+
+def update_settings(**changes: Any) -> Settings:
+    """
+    Modifica alcuni valori a runtime (fonte "admin", fino al prossimo reload)
+
+    Args:
+        **changes: Nuovi valori per nome del campo
+
+    Returns:
+        Nuove Settings attive
+
+    Raises:
+        SettingsError: Se un campo non esiste o i valori non sono validi
+    """
+    problems = [f"chiave sconosciuta {name!r}" for name in changes if name not in _FIELDS]
+    if problems:
+        raise SettingsError(problems)
+    with _settings_lock:
+        current = _settings or load_settings()
+        try:
+            values = {name: _coerce(_FIELDS[name], value) for name, value in changes.items()}
+        except (TypeError, ValueError):
+            raise SettingsError([f"valore non valido in {changes!r}"]) from None
+        settings = replace(current, **values, sources={**current.sources, **dict.fromkeys(values, "admin")})
+        problems = validate_settings(settings)
+        if problems:
+            raise SettingsError(problems)
+        _install(settings)
+    return settings
+
+
+def restart_required(old: Settings, new: Settings) -> List[str]:
+    """
+    Campi cambiati che hanno effetto solo dopo un riavvio del processo
+
+    Args:
+        old: Impostazioni precedenti
+        new: Impostazioni nuove
+
+    Returns:
+        Nomi dei campi
+    """
+    return [
+        f.name for f in setting_fields()
+        if f.metadata['restart'] and getattr(old, f.name) != getattr(new, f.name)
+    ]